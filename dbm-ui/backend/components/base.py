@@ -19,16 +19,18 @@ from urllib import parse
 
 import requests
 from django.conf import settings
-from django.core.cache import cache
 from django.core.handlers.wsgi import WSGIRequest
 from django.utils import translation
 from django.utils.translation import ugettext as _
 from urllib3.exceptions import ConnectTimeoutError
 
 from backend import env
+from backend.components.cache import api_response_cache
 from backend.components.constants import CLIENT_CRT_PATH, SSL_KEY, SSLEnum
 from backend.components.domains import ESB_PREFIX
 from backend.components.exception import DataAPIException
+from backend.components.telemetry import api_telemetry
+from backend.components.transport import transport_manager
 from backend.configuration.models.system import SystemSettings
 from backend.exceptions import ApiError, ApiRequestError, ApiResultError, AppBaseException
 from backend.utils.local import local
@@ -260,16 +262,27 @@ class DataAPI(object):
             return DataResponse(self.default_return_value, self.request_id)
 
         # 缓存
-        try:
-            cache_key = self._build_cache_key(params)
-            if self.cache_time:
-                result = self._get_cache(cache_key)
-                if result is not None:
-                    # 有缓存时返回
-                    return DataResponse(result, self.request_id)
-        except (TypeError, AttributeError):
-            pass
+        cache_key = None
+        if self.cache_time:
+            try:
+                cache_key = self._build_cache_key(params)
+            except (TypeError, AttributeError):
+                pass
+
+        if cache_key:
+            response_result = api_response_cache.get_or_load(
+                module=self.module,
+                key=cache_key,
+                loader=lambda: self._request_upstream(params, headers, use_admin=use_admin).response,
+                cache_time=self.cache_time,
+                is_error=lambda result: not result.get("result"),
+                skip_errors=(requests.exceptions.Timeout, ConnectTimeoutError),
+            )
+            return DataResponse(response_result, self.request_id)
+
+        return self._request_upstream(params, headers, use_admin=use_admin)
 
+    def _request_upstream(self, params, headers, use_admin=False):
         response = None
         error_message = ""
 
@@ -313,72 +326,61 @@ class DataAPI(object):
                     if self.after_request is not None:
                         response_result = self.after_request(response_result)
 
-                if self.cache_time and "cache_key" in locals():
-                    self._set_cache(locals()["cache_key"], response_result)
-
                 response = DataResponse(response_result, self.request_id)
                 return response
         finally:
             # 最后记录时间
             end_time = time.time()
-            # 如果param是一个非dict，则手动变成dict来记录流水日志
-            if not isinstance(params, dict):
-                params = {"params_data": params}
-            # 判断是否需要记录,及其最大返回值
-            bk_username = params.get("bk_username", "")
 
             if response is not None:
                 response_result = response.is_success()
-                response_data = json.dumps(response.data)[: self.max_response_record]
-
-                for _param in settings.SENSITIVE_PARAMS:
-                    params.pop(_param, None)
-
-                try:
-                    params = json.dumps(params)[: self.max_query_params_record]
-                except TypeError:
-                    params = ""
-
                 # 防止部分平台不规范接口搞出大新闻
                 if response.code is None:
                     response.response["code"] = "00"
                 # message不符合规范，不为string的处理
                 if type(response.message) not in [str]:
                     response.response["message"] = str(response.message)
-                response_code = response.code
             else:
-                response_data = ""
-                response_code = -1
                 response_result = False
-            response_message = response.message if response is not None else error_message
-            response_errors = response.errors if response is not None else ""
-
-            # 增加流水的记录
-            _info = {
-                "request_datetime": start_time,
-                "url": self.url,
-                "module": self.module,
-                "method": self.method,
-                "method_override": self.method_override,
-                "headers": headers,
-                "query_params": params,
-                "response_result": response_result,
-                "response_code": response_code,
-                "response_data": response_data,
-                "response_message": response_message[:1023],
-                "response_errors": response_errors,
-                "cost_time": (end_time - start_time),
-                "request_id": self.request_id,
-                "request_user": bk_username,
-            }
 
-            _log = _("[BKAPI] {info}").format(
-                info=" && ".join([" {}=>{} ".format(_k, _v) for _k, _v in list(_info.items())])
-            )
-            if response_result:
-                logger.debug(_log)
-            else:
-                logger.exception(_log)
+            # 先判断是否需要记录流水，不需要记录时跳过所有的序列化开销
+            if api_telemetry.should_record(response_result):
+                # 如果param是一个非dict，则手动变成dict来记录流水日志
+                if not isinstance(params, dict):
+                    params = {"params_data": params}
+                bk_username = params.get("bk_username", "")
+
+                if response is not None:
+                    response_data = api_telemetry.dumps_data(response.data, self.max_response_record)
+                    query_params = api_telemetry.dumps_params(params, self.max_query_params_record)
+                    response_code = response.code
+                    response_message = response.message
+                    response_errors = response.errors
+                else:
+                    response_data = query_params = ""
+                    response_code = -1
+                    response_message = error_message
+                    response_errors = ""
+
+                # 增加流水的记录
+                _info = {
+                    "request_datetime": start_time,
+                    "url": self.url,
+                    "module": self.module,
+                    "method": self.method,
+                    "method_override": self.method_override,
+                    "headers": headers,
+                    "query_params": query_params,
+                    "response_result": response_result,
+                    "response_code": response_code,
+                    "response_data": response_data,
+                    "response_message": response_message[:1023],
+                    "response_errors": response_errors,
+                    "cost_time": (end_time - start_time),
+                    "request_id": self.request_id,
+                    "request_user": bk_username,
+                }
+                api_telemetry.record(_info, is_success=response_result)
 
     def _build_cache_key(self, params):
         """
@@ -387,20 +389,14 @@ class DataAPI(object):
         :return:
         """
         # 缓存
-        cache_str = "url_{url}__params_{params}".format(url=self.build_actual_url(params), params=json.dumps(params))
+        cache_str = "url_{url}__params_{params}".format(
+            url=self.build_actual_url(params), params=json.dumps(params, sort_keys=True)
+        )
         hash_md5 = hashlib.new("md5")
         hash_md5.update(cache_str.encode("utf-8"))
-        cache_key = hash_md5.hexdigest()
+        cache_key = f"{self.module}_{hash_md5.hexdigest()}"
         return cache_key
 
-    def _set_cache(self, cache_key, data):
-        """
-        获取缓存
-        :param cache_key:
-        :return:
-        """
-        cache.set(cache_key, data, self.cache_time)
-
     def _set_session_headers(self, session, local_request, headers: Dict, params: Dict, use_admin: bool = False):
         """
         设置session的headers
@@ -456,7 +452,8 @@ class DataAPI(object):
         @param params: 请求的参数,预期是一个字典
         @return: requests response
         """
-        session = requests.session()
+        # 同一模块的请求复用长连接池，避免每次请求都重新建立TCP/TLS连接
+        session = transport_manager.session(self.module, self.base)
         try:
             local_request = local.request
         except AppBaseException:
@@ -560,16 +557,6 @@ class DataAPI(object):
                 non_file_data[key] = value
         return non_file_data, file_data
 
-    @staticmethod
-    def _get_cache(cache_key):
-        """
-        获取缓存
-        :param cache_key:
-        :return:
-        """
-        if cache.get(cache_key):
-            return cache.get(cache_key)
-
 
 class BaseApi(object):
     """
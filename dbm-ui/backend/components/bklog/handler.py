@@ -11,8 +11,9 @@ specific language governing permissions and limitations under the License.
 
 import json
 import logging
-from datetime import datetime
-from typing import Dict, List
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 from backend import env
 from backend.components import BKLogApi
@@ -21,36 +22,34 @@ from backend.utils.time import datetime2str
 
 logger = logging.getLogger("root")
 
+# ES 单次查询 start+size 的上限(max_result_window)
+BKLOG_MAX_RESULT_WINDOW = 10000
+# 批量扫描时每页的日志条数
+BKLOG_SCAN_PAGE_SIZE = 2000
+# 批量扫描时初始的时间窗口
+BKLOG_SCAN_WINDOW = timedelta(hours=1)
+
 
 class BKLogHandler(object):
     """封装bklog查询的通用函数"""
 
-    @classmethod
-    def query_logs(
-        cls,
+    @staticmethod
+    def _search(
         collector: str,
         start_time: datetime,
         end_time: datetime,
-        query_string="*",
-        size=1000,
+        query_string: str,
+        start: int,
+        size: int,
         sorting_rule: str = "asc",
-    ) -> List[Dict]:
-        """
-        从日志平台获取对应采集项的日志
-        @param collector: 采集项名称
-        @param start_time: 开始时间
-        @param end_time: 结束时间
-        @param query_string: 过滤条件
-        @param size: 返回条数
-        @param sorting_rule: 排序规则，默认是 asc升序； desc倒序
-        """
-        resp = BKLogApi.esquery_search(
+    ) -> Dict:
+        return BKLogApi.esquery_search(
             {
                 "indices": f"{env.DBA_APP_BK_BIZ_ID}_bklog.{collector}",
                 "start_time": datetime2str(start_time),
                 "end_time": datetime2str(end_time),
                 "query_string": query_string,
-                "start": 0,
+                "start": start,
                 "size": size,
                 "sort_list": [
                     ["dtEventTimeStamp", sorting_rule],
@@ -60,9 +59,128 @@ class BKLogHandler(object):
             },
             use_admin=True,
         )
-        backup_logs = []
+
+    @staticmethod
+    def _parse_hits(resp: Dict) -> List[Dict]:
+        logs = []
         for hit in resp["hits"]["hits"]:
             raw_log = json.loads(hit["_source"]["log"])
-            backup_logs.append({pascal_to_snake(key): value for key, value in raw_log.items()})
+            logs.append({pascal_to_snake(key): value for key, value in raw_log.items()})
+        return logs
+
+    @staticmethod
+    def _exceed_result_window(resp: Dict) -> bool:
+        """窗口内的日志是否超过了ES的分页上限，ES7 未开启 track_total_hits 时 total 最大为上限值且 relation 为 gte"""
+        total = resp["hits"].get("total") or 0
+        if isinstance(total, dict):
+            return total.get("relation") == "gte" or total.get("value", 0) > BKLOG_MAX_RESULT_WINDOW
+        return total > BKLOG_MAX_RESULT_WINDOW
+
+    @classmethod
+    def query_logs(
+        cls,
+        collector: str,
+        start_time: datetime,
+        end_time: datetime,
+        query_string="*",
+        size=1000,
+        sorting_rule: str = "asc",
+    ) -> List[Dict]:
+        """
+        从日志平台获取对应采集项的日志
+        @param collector: 采集项名称
+        @param start_time: 开始时间
+        @param end_time: 结束时间
+        @param query_string: 过滤条件
+        @param size: 返回条数
+        @param sorting_rule: 排序规则，默认是 asc升序； desc倒序
+        """
+        resp = cls._search(collector, start_time, end_time, query_string, 0, size, sorting_rule)
+        return cls._parse_hits(resp)
+
+    @classmethod
+    def scan_logs(
+        cls,
+        collector: str,
+        start_time: datetime,
+        end_time: datetime,
+        query_string: str = "*",
+        page_size: int = BKLOG_SCAN_PAGE_SIZE,
+        window: timedelta = BKLOG_SCAN_WINDOW,
+    ) -> Iterator[Dict]:
+        """
+        按时间窗口分页遍历采集项在时间范围内的全部日志，日志按时间升序逐条返回
+        esquery_search 只支持 start/size 分页，受 max_result_window 限制，
+        所以先把时间范围切分为窗口，窗口内日志超过上限时再对半拆分窗口(最小到秒)
+        @param collector: 采集项名称
+        @param start_time: 开始时间
+        @param end_time: 结束时间(包含)
+        @param query_string: 过滤条件
+        @param page_size: 每页条数
+        @param window: 初始时间窗口
+        """
+        # 查询时间精确到秒，且起止时间都包含在内，所以相邻窗口之间相差一秒
+        second = timedelta(seconds=1)
+        start_time, end_time = start_time.replace(microsecond=0), end_time.replace(microsecond=0)
+        windows = deque()
+        while start_time <= end_time:
+            windows.append((start_time, min(start_time + window - second, end_time)))
+            start_time += window
+
+        while windows:
+            window_start, window_end = windows.popleft()
+            resp = cls._search(collector, window_start, window_end, query_string, 0, page_size)
+            if cls._exceed_result_window(resp) and window_end > window_start:
+                middle = window_start + timedelta(seconds=int((window_end - window_start).total_seconds()) // 2)
+                windows.extendleft([(middle + second, window_end), (window_start, middle)])
+                continue
+
+            start, size = 0, page_size
+            while True:
+                logs = cls._parse_hits(resp)
+                yield from logs
+                start += size
+                if len(logs) < size:
+                    break
+                # 只有拆分到秒级的窗口仍然超过上限时才会走到这里
+                if start >= BKLOG_MAX_RESULT_WINDOW:
+                    logger.warning(
+                        f"[bklog scan] {collector} logs in {window_start}-{window_end} "
+                        f"exceed {BKLOG_MAX_RESULT_WINDOW}, some logs are ignored"
+                    )
+                    break
+                size = min(page_size, BKLOG_MAX_RESULT_WINDOW - start)
+                resp = cls._search(collector, window_start, window_end, query_string, start, size)
+
+    @classmethod
+    def partition_logs(
+        cls,
+        logs: Iterable[Dict],
+        key_func: Callable[[Dict], Any],
+        keys: Optional[Iterable] = None,
+        max_size: Optional[int] = None,
+        formatter: Callable[[Dict], Dict] = None,
+    ) -> Dict[Any, List[Dict]]:
+        """
+        把日志按 key 分组
+        @param logs: 日志流
+        @param key_func: 获取分组 key 的函数
+        @param keys: 关注的 key，其他日志直接丢弃，为空表示不过滤
+        @param max_size: 每组保留的最大条数，超出的日志丢弃
+        @param formatter: 日志入组前的转换函数，只保留需要的字段以减少内存
+        """
+        keys = set(keys) if keys is not None else None
+        partitions: Dict[Any, List[Dict]] = defaultdict(list)
+        dropped: Dict[Any, int] = defaultdict(int)
+        for log in logs:
+            key = key_func(log)
+            if keys is not None and key not in keys:
+                continue
+            if max_size is not None and len(partitions[key]) >= max_size:
+                dropped[key] += 1
+                continue
+            partitions[key].append(formatter(log) if formatter else log)
 
-        return backup_logs
+        for key, count in dropped.items():
+            logger.warning(f"[bklog scan] logs of {key} exceed {max_size}, {count} logs are ignored")
+        return partitions
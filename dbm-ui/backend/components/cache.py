@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.core.cache import cache
+
+from backend.utils.local import inject_request
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("root")
+
+DEFAULT_API_CACHE_CONFIG = {
+    # 进程内LRU缓存的最大条目数
+    "lru_size": 2048,
+    # 缓存过期后仍可返回旧值的时间窗口，期间会在后台刷新
+    "stale_time": 60,
+    # 接口异常的缓存时间，避免上游故障时被重复请求打垮
+    "negative_time": 5,
+}
+
+# 缓存在redis中的key前缀
+API_CACHE_KEY_PREFIX = "data_api_cache"
+
+
+def copy_error(err: Exception) -> Exception:
+    """为每次命中构造新的异常对象，避免多个调用方共享同一个异常实例(及其 traceback)"""
+    new_err = err.__class__.__new__(err.__class__, *err.args)
+    new_err.args = err.args
+    new_err.__dict__.update(err.__dict__)
+    return new_err
+
+
+class CacheEntry(object):
+    __slots__ = ("value", "expire_at", "stale_until", "error")
+
+    def __init__(self, value: Any, expire_at: float, stale_until: float, error: Exception = None):
+        self.value = value
+        self.expire_at = expire_at
+        self.stale_until = stale_until
+        self.error = error
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expire_at
+
+    def is_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+
+class LRUCache(object):
+    """线程安全的进程内LRU缓存，缓存的对象会被多个调用方共享，返回给调用方前需要拷贝"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class InFlight(object):
+    """正在请求上游的调用，相同key的并发调用等待同一个结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class APIResponseCache(object):
+    """
+    DataAPI 的两级缓存：进程内LRU + Django cache(redis)
+    - 单飞(single-flight)：同一进程内相同key的并发未命中只会请求一次上游
+    - 过期后在 stale_time 内返回旧值，并在后台线程刷新(stale-while-revalidate)
+    - 接口异常会在进程内缓存 negative_time 秒，每次命中都抛出新的异常对象
+    - 返回给调用方的是缓存结果的深拷贝，调用方修改结果不会影响缓存
+    - 按模块统计命中/未命中/上游耗时
+    """
+
+    def __init__(self):
+        self._lru: Optional[LRUCache] = None
+        self._in_flight: Dict[str, InFlight] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("DATA_API_CACHE", DEFAULT_API_CACHE_CONFIG)
+
+    @property
+    def lru(self) -> LRUCache:
+        if self._lru is None:
+            self._lru = LRUCache(self.config["lru_size"])
+        return self._lru
+
+    def _incr(self, module: str, field: str, value: float = 1):
+        with self._lock:
+            self._stats[module][field] += value
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """获取各模块的缓存统计信息"""
+        with self._lock:
+            stats = {module: dict(counter) for module, counter in self._stats.items()}
+        for counter in stats.values():
+            loads = counter.get("upstream_calls", 0)
+            lookups = sum(counter.get(field, 0) for field in ["l1_hits", "l2_hits", "stale_hits", "misses"])
+            counter["hit_rate"] = round(1 - counter.get("misses", 0) / lookups, 4) if lookups else 0
+            counter["avg_upstream_cost"] = round(counter.get("upstream_cost", 0) / loads, 4) if loads else 0
+        return stats
+
+    def _build_entry(self, value: Any, cache_time: int, now: float) -> CacheEntry:
+        expire_at = now + cache_time
+        return CacheEntry(value, expire_at, expire_at + self.config["stale_time"])
+
+    def _get_entry(self, module: str, key: str, now: float) -> Tuple[Optional[CacheEntry], str]:
+        entry = self.lru.get(key)
+        if entry is not None and entry.is_usable(now):
+            return entry, "l1_hits"
+
+        cached = cache.get(f"{API_CACHE_KEY_PREFIX}:{key}")
+        if cached is not None:
+            entry = CacheEntry(cached["value"], cached["expire_at"], cached["stale_until"])
+            if entry.is_usable(now):
+                self.lru.set(key, entry)
+                return entry, "l2_hits"
+        return None, "misses"
+
+    def _set_entry(self, key: str, entry: CacheEntry):
+        self.lru.set(key, entry)
+        # 异常结果只缓存在进程内
+        if entry.error is not None:
+            return
+        cache.set(
+            f"{API_CACHE_KEY_PREFIX}:{key}",
+            {"value": entry.value, "expire_at": entry.expire_at, "stale_until": entry.stale_until},
+            max(int(entry.stale_until - time.time()), 1),
+        )
+
+    def _load(
+        self,
+        module: str,
+        key: str,
+        loader: Callable,
+        cache_time: int,
+        is_error: Callable = None,
+        skip_errors: Tuple = (),
+    ) -> Any:
+        """请求上游，同一个key同时只会有一个调用真正执行loader"""
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            is_leader = in_flight is None
+            if is_leader:
+                in_flight = self._in_flight[key] = InFlight()
+
+        if not is_leader:
+            self._incr(module, "coalesced")
+            in_flight.event.wait()
+            if in_flight.error is not None:
+                raise copy_error(in_flight.error)
+            return copy.deepcopy(in_flight.value)
+
+        start_time = time.time()
+        try:
+            in_flight.value = loader()
+            if is_error and is_error(in_flight.value):
+                # 业务层面失败的结果按照异常的缓存时间处理
+                self._incr(module, "errors")
+                entry = self._build_entry(in_flight.value, min(cache_time, self.config["negative_time"]), time.time())
+                entry.stale_until = entry.expire_at
+            else:
+                entry = self._build_entry(in_flight.value, cache_time, time.time())
+            self._set_entry(key, entry)
+            # 缓存中的对象不能直接交给调用方，避免调用方修改后污染缓存
+            return copy.deepcopy(in_flight.value)
+        except Exception as err:  # pylint: disable=broad-except
+            in_flight.error = err
+            self._incr(module, "errors")
+            # 超时等可重试的异常不做缓存，交由调用方重试
+            if isinstance(err, skip_errors):
+                raise
+            now = time.time()
+            negative_time = min(cache_time, self.config["negative_time"])
+            self._set_entry(key, CacheEntry(None, now + negative_time, now + negative_time, error=err))
+            raise
+        finally:
+            self._incr(module, "upstream_calls")
+            self._incr(module, "upstream_cost", time.time() - start_time)
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.event.set()
+
+    def _refresh_in_background(
+        self, module: str, key: str, loader: Callable, cache_time: int, is_error: Callable, skip_errors: Tuple
+    ):
+        with self._lock:
+            if key in self._in_flight:
+                return
+
+        def refresh():
+            try:
+                self._load(module, key, loader, cache_time, is_error, skip_errors)
+            except Exception as err:  # pylint: disable=broad-except
+                logger.warning(f"[{module}] refresh api cache failed: {err}")
+
+        threading.Thread(target=inject_request(refresh), daemon=True).start()
+
+    def get_or_load(
+        self,
+        module: str,
+        key: str,
+        loader: Callable,
+        cache_time: int,
+        is_error: Callable = None,
+        skip_errors: Tuple = (),
+    ) -> Any:
+        """
+        读取缓存，未命中时通过 loader 请求上游并写入缓存
+        @param module: 接口所属模块，用于统计
+        @param key: 缓存key
+        @param loader: 请求上游的函数，抛出异常表示请求失败
+        @param cache_time: 缓存时间
+        @param is_error: 判断返回结果是否为失败结果，失败结果按 negative_time 缓存
+        @param skip_errors: 不做缓存的异常类型
+        """
+        now = time.time()
+        entry, hit_type = self._get_entry(module, key, now)
+        if entry is None:
+            self._incr(module, "misses")
+            return self._load(module, key, loader, cache_time, is_error, skip_errors)
+
+        if entry.error is not None:
+            self._incr(module, "negative_hits")
+            raise copy_error(entry.error)
+
+        if entry.is_fresh(now):
+            self._incr(module, hit_type)
+        else:
+            self._incr(module, "stale_hits")
+            self._refresh_in_background(module, key, loader, cache_time, is_error, skip_errors)
+        return copy.deepcopy(entry.value)
+
+    def delete(self, key: str):
+        self.lru.delete(key)
+        cache.delete(f"{API_CACHE_KEY_PREFIX}:{key}")
+
+
+api_response_cache = APIResponseCache()
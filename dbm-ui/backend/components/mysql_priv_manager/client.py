@@ -9,11 +9,22 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+from django.core.cache import cache
 from django.utils.translation import ugettext_lazy as _
 
 from ..base import BaseApi
 from ..domains import MYSQL_PRIV_MANAGER_APIGW_DOMAIN
 
+# 通过密码服务修改密码后递增的版本号，缓存了账号密码的调用方(如流程 payload 缓存)读取时比对
+DB_PRIV_PASSWORD_VERSION_KEY = "db_priv_manager:password_version"
+
+
+def bump_password_version(response):
+    """密码修改成功后递增密码版本号，使已缓存的账号密码失效"""
+    cache.add(DB_PRIV_PASSWORD_VERSION_KEY, 0, timeout=None)
+    cache.incr(DB_PRIV_PASSWORD_VERSION_KEY)
+    return response
+
 
 class _DBPrivManagerApi(BaseApi):
     MODULE = _("DB权限管理")
@@ -73,6 +84,7 @@ class _DBPrivManagerApi(BaseApi):
             method="POST",
             url="/priv/modify_account",
             description=_("修改账号的密码"),
+            after_request=bump_password_version,
         )
         self.get_account = self.generate_data_api(
             method="POST",
@@ -127,6 +139,7 @@ class _DBPrivManagerApi(BaseApi):
             method="POST",
             url="/priv/modify_admin_password",
             description=_("新增或者修改实例中管理用户的密码"),
+            after_request=bump_password_version,
         )
         self.get_password = self.generate_data_api(
             method="POST",
@@ -137,6 +150,7 @@ class _DBPrivManagerApi(BaseApi):
             method="POST",
             url="/priv/modify_password",
             description=_("新增或者修改密码"),
+            after_request=bump_password_version,
         )
         self.get_random_string = self.generate_data_api(
             method="POST",
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import logging
+import os
+import random
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+from django.conf import settings
+
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("root")
+
+DEFAULT_API_LOG_CONFIG = {
+    # 成功请求的流水采样率，失败请求总是记录
+    "success_sample_rate": 1.0,
+    # 是否开启异步写日志，开启后成功请求的流水会先写入环形缓冲区，再由后台线程批量输出
+    "async_sink": False,
+    # 环形缓冲区大小，写满后丢弃最旧的记录
+    "buffer_size": 10000,
+    # 每批次输出的记录数
+    "batch_size": 200,
+    # 后台线程的刷新间隔(秒)
+    "flush_interval": 1,
+}
+
+_JSON_ENCODER = json.JSONEncoder()
+
+
+def truncated_json_dumps(obj: Any, max_size: Optional[int] = None) -> str:
+    """
+    增量序列化，序列化结果超过 max_size 后立即停止，避免大对象的完整序列化
+    @param obj: 序列化对象
+    @param max_size: 最大长度，为None时完整序列化
+    """
+    if max_size is None:
+        return json.dumps(obj)
+
+    chunks, size = [], 0
+    for chunk in _JSON_ENCODER.iterencode(obj):
+        remain = max_size - size
+        if len(chunk) >= remain:
+            chunks.append(chunk[:remain])
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    return "".join(chunks)
+
+
+class APIRecord(object):
+    """
+    接口调用流水，只有在真正输出时才会拼接日志字符串
+    """
+
+    __slots__ = ("info",)
+
+    def __init__(self, info: Dict):
+        self.info = info
+
+    def __str__(self):
+        return "[BKAPI] {info}".format(info=" && ".join([" {}=>{} ".format(_k, _v) for _k, _v in self.info.items()]))
+
+
+class AsyncLogSink(object):
+    """
+    异步日志输出：记录写入环形缓冲区，由后台线程批量输出到日志后端
+    """
+
+    def __init__(self, target: logging.Logger, buffer_size: int, batch_size: int, flush_interval: float):
+        self.target = target
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self._event = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        # fork之后子进程需要重新启动后台线程
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._run, name="api-log-sink", daemon=True).start()
+            self._pid = os.getpid()
+
+    def put(self, record: APIRecord):
+        self._ensure_started()
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(record)
+        if len(self.buffer) >= self.batch_size:
+            self._event.set()
+
+    def _drain(self) -> Iterable[APIRecord]:
+        for __ in range(min(len(self.buffer), self.batch_size)):
+            try:
+                yield self.buffer.popleft()
+            except IndexError:
+                return
+
+    def flush(self):
+        while self.buffer:
+            self.target.debug("\n".join(str(record) for record in self._drain()))
+
+    def _run(self):
+        while True:
+            self._event.wait(self.flush_interval)
+            self._event.clear()
+            try:
+                self.flush()
+            except Exception as err:  # pylint: disable=broad-except
+                logger.warning(f"api log sink flush failed: {err}")
+
+
+class APITelemetry(object):
+    """
+    DataAPI 的调用流水记录
+    - 在格式化之前判断日志级别和采样，不需要输出的成功流水不做任何序列化
+    - 请求参数和返回数据按最大记录长度增量序列化
+    - 可选地通过异步环形缓冲区批量输出成功流水
+    """
+
+    def __init__(self, target: logging.Logger = logger):
+        self.target = target
+        self._sink = None
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("DATA_API_LOG", DEFAULT_API_LOG_CONFIG)
+
+    @property
+    def sink(self) -> Optional[AsyncLogSink]:
+        if self._sink is None and self.config["async_sink"]:
+            self._sink = AsyncLogSink(
+                self.target, self.config["buffer_size"], self.config["batch_size"], self.config["flush_interval"]
+            )
+        return self._sink
+
+    def should_record(self, is_success: bool) -> bool:
+        if not is_success:
+            return True
+        if not self.target.isEnabledFor(logging.DEBUG):
+            return False
+        sample_rate = self.config["success_sample_rate"]
+        return sample_rate >= 1 or random.random() < sample_rate
+
+    @staticmethod
+    def dumps_params(params: Any, max_size: Optional[int]) -> str:
+        if isinstance(params, dict):
+            params = {k: v for k, v in params.items() if k not in settings.SENSITIVE_PARAMS}
+        try:
+            return truncated_json_dumps(params, max_size)
+        except (TypeError, ValueError):
+            return ""
+
+    @staticmethod
+    def dumps_data(data: Any, max_size: Optional[int]) -> str:
+        try:
+            return truncated_json_dumps(data, max_size)
+        except (TypeError, ValueError):
+            return str(data)[:max_size]
+
+    def record(self, info: Dict, is_success: bool):
+        """输出流水，info 中的参数和返回数据需要已经序列化"""
+        record = APIRecord(info)
+        if not is_success:
+            self.target.exception(record)
+        elif self.sink is not None:
+            self.sink.put(record)
+        else:
+            self.target.debug(record)
+
+
+api_telemetry = APITelemetry()
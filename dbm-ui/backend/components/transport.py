@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import os
+import threading
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from backend.utils.settings import get_feature_config
+
+DEFAULT_TRANSPORT_CONFIG = {
+    # 每个模块缓存的host连接池数量(ProxyAPI会根据云区域转发到不同的host)
+    "pool_connections": 10,
+    # 每个host连接池的最大连接数
+    "pool_maxsize": 20,
+    # 连接池满时是否阻塞等待，False则临时新建连接且用完即丢弃
+    "pool_block": False,
+    # 建连失败的重试次数，建连失败时请求尚未发出，对所有方法都是安全的
+    "connect_retries": 1,
+    # 幂等方法在网关类状态码下的重试次数
+    "status_retries": 2,
+    "status_forcelist": [502, 503, 504],
+    "backoff_factor": 0.3,
+}
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    带统计信息的连接池适配器，同一个模块的所有请求共享同一个适配器(即共享连接池)
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.waits = 0
+        self.total_requests = 0
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        with self._stats_lock:
+            # 正在使用的连接数已达上限，本次请求需要等待(pool_block)或者临时新建连接
+            if self.in_use >= self._pool_maxsize:
+                self.waits += 1
+            self.in_use += 1
+            self.total_requests += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+        try:
+            return super().send(request, *args, **kwargs)
+        finally:
+            with self._stats_lock:
+                self.in_use -= 1
+
+    def get_stats(self) -> Dict:
+        new_connections, pool_requests = 0, 0
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            new_connections += pool.num_connections
+            pool_requests += pool.num_requests
+
+        reuse_ratio = round(1 - new_connections / pool_requests, 4) if pool_requests else 0
+        return {
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "waits": self.waits,
+            "total_requests": self.total_requests,
+            "new_connections": new_connections,
+            "reuse_ratio": reuse_ratio,
+            "host_pools": len(pools),
+        }
+
+
+class PooledSession(requests.Session):
+    """
+    挂载共享连接池的 session，关闭 session 时不能关闭共享的连接池
+    """
+
+    def close(self):
+        pass
+
+
+class TransportManager(object):
+    """
+    DataAPI 的共享传输层，按照 (模块, base) 维护长连接池。
+    - 连接池只与进程绑定，fork 之后(如celery prefork)会自动重建，避免父子进程共享socket
+    - 每次请求仍然创建独立的 session，以保证 headers/cookies 不会在请求之间串用
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._adapters: Dict[Tuple[str, str], PooledHTTPAdapter] = {}
+        self._pid = os.getpid()
+
+    @staticmethod
+    def get_config() -> Dict:
+        return get_feature_config("DATA_API_TRANSPORT", DEFAULT_TRANSPORT_CONFIG)
+
+    @staticmethod
+    def build_retry(config: Dict) -> Retry:
+        return Retry(
+            total=None,
+            connect=config["connect_retries"],
+            # 读超时交由 DataAPI 自身的超时重试机制处理，这里不重复重试
+            read=0,
+            status=config["status_retries"],
+            other=0,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            status_forcelist=config["status_forcelist"],
+            backoff_factor=config["backoff_factor"],
+            # 重试耗尽后返回最后一次的响应，由 DataAPI 统一处理非200的情况
+            raise_on_status=False,
+        )
+
+    def _check_fork(self):
+        if self._pid == os.getpid():
+            return
+        # 子进程中丢弃从父进程继承的连接池
+        self._adapters = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def get_adapter(self, module: str, base: str) -> PooledHTTPAdapter:
+        self._check_fork()
+        key = (module, base)
+        adapter = self._adapters.get(key)
+        if adapter is not None:
+            return adapter
+
+        with self._lock:
+            adapter = self._adapters.get(key)
+            if adapter is None:
+                config = self.get_config()
+                adapter = PooledHTTPAdapter(
+                    pool_connections=config["pool_connections"],
+                    pool_maxsize=config["pool_maxsize"],
+                    pool_block=config["pool_block"],
+                    max_retries=self.build_retry(config),
+                )
+                self._adapters[key] = adapter
+        return adapter
+
+    def session(self, module: str, base: str) -> requests.Session:
+        """获取一个挂载了共享连接池的 session"""
+        adapter = self.get_adapter(module, base)
+        session = PooledSession()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """获取各模块连接池的统计信息"""
+        self._check_fork()
+        return {f"{module}|{base}": adapter.get_stats() for (module, base), adapter in list(self._adapters.items())}
+
+    def close(self):
+        with self._lock:
+            for adapter in self._adapters.values():
+                adapter.close()
+            self._adapters = {}
+
+
+transport_manager = TransportManager()
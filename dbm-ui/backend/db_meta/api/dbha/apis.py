@@ -11,7 +11,7 @@ specific language governing permissions and limitations under the License.
 import logging
 from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 import validators
 from django.core.exceptions import ObjectDoesNotExist
@@ -22,6 +22,7 @@ from django.utils.translation import ugettext_lazy as _
 from backend.constants import DEFAULT_BK_CLOUD_ID, IP_PORT_DIVIDER
 from backend.db_meta import flatten, meta_validator, request_validator
 from backend.db_meta.api.cluster.sqlserverha.handler import SqlserverHAClusterHandler
+from backend.db_meta.api.dbha.snapshot import dbha_instance_snapshot, notify_meta_changed
 from backend.db_meta.enums import (
     ClusterEntryType,
     ClusterStatus,
@@ -50,6 +51,9 @@ from backend.flow.utils.sqlserver.sqlserver_host import Host
 
 logger = logging.getLogger("root")
 
+# 批量更新实例状态时每批次的数量
+UPDATE_STATUS_BATCH_SIZE = 500
+
 
 def cities():
     return flatten.cities(BKCity.objects.all())
@@ -121,11 +125,60 @@ def instances(
     hash_cnt: Optional[int] = None,
     hash_value: Optional[int] = None,
 ):
-
     logical_city_ids = request_validator.validated_integer_list(logical_city_ids)
     addresses = request_validator.validated_str_list(addresses)
     statuses = request_validator.validated_str_list(statuses)
 
+    # 按地址过滤的查询不走快照，其余按分片读取快照
+    if addresses or not dbha_instance_snapshot.enabled:
+        return _query_instances(
+            logical_city_ids, addresses, statuses, bk_cloud_id, cluster_types, hash_cnt, hash_value
+        )
+    return instances_snapshot(logical_city_ids, statuses, bk_cloud_id, cluster_types, hash_cnt, hash_value)[
+        "instances"
+    ]
+
+
+def instances_snapshot(
+    logical_city_ids: Optional[List[int]] = None,
+    statuses: Optional[List[str]] = None,
+    bk_cloud_id: int = DEFAULT_BK_CLOUD_ID,
+    cluster_types: Optional[List[str]] = None,
+    hash_cnt: Optional[int] = None,
+    hash_value: Optional[int] = None,
+    since_version: Optional[int] = None,
+) -> Dict:
+    """
+    获取实例分片快照
+    @param since_version: 客户端已有的快照版本，传入时只返回该版本之后的变更，历史版本过期时返回全量
+    返回: {"version", "etag", "full", "instances", "removed"}
+    """
+    params = {
+        "logical_city_ids": request_validator.validated_integer_list(logical_city_ids),
+        "statuses": request_validator.validated_str_list(statuses),
+        "bk_cloud_id": bk_cloud_id,
+        "cluster_types": cluster_types,
+        "hash_cnt": hash_cnt,
+        "hash_value": hash_value,
+    }
+    snapshot = dbha_instance_snapshot.get(params, loader=_query_instances)
+    result = {"version": snapshot["version"], "etag": snapshot["etag"]}
+
+    delta = dbha_instance_snapshot.get_delta(snapshot, since_version) if since_version is not None else None
+    if delta is None:
+        return {**result, "full": True, "instances": snapshot["instances"], "removed": []}
+    return {**result, "full": False, **delta}
+
+
+def _query_instances(
+    logical_city_ids: Optional[List[int]] = None,
+    addresses: Optional[List[str]] = None,
+    statuses: Optional[List[str]] = None,
+    bk_cloud_id: int = DEFAULT_BK_CLOUD_ID,
+    cluster_types: Optional[List[str]] = None,
+    hash_cnt: Optional[int] = None,
+    hash_value: Optional[int] = None,
+):
     # dbha 会频繁周期性调用这个函数, 拉取需要探测的实例
     # 在这个接口的最开始, 检查所有集群的 end_time
     # 如果 end_time < now, 就把 begin_time 和 end_time 置 NULL
@@ -176,39 +229,143 @@ def instances(
     return [ele for ele in flat_instances if ele["cluster_id"] not in disabled_dbha_cluster_ids]
 
 
+def _resolve_instances(
+    addresses: List[Tuple[str, int]], bk_cloud_id: int
+) -> Dict[Tuple[str, int], Union[StorageInstance, ProxyInstance]]:
+    """
+    批量查询 ip:port 对应的实例，每种实例只查询一次，同一地址优先匹配存储实例
+    返回 (ip, port) -> 实例，实例上附加 cluster_ids 属性(关联的全部集群)和 first_cluster_id 属性(对应原来的 cluster.first())
+    """
+    ips = {ip for ip, __ in addresses}
+    ports = {port for __, port in addresses}
+    address_set = set(addresses)
+
+    address_instance_map: Dict[Tuple[str, int], Union[StorageInstance, ProxyInstance]] = {}
+    for model in [ProxyInstance, StorageInstance]:
+        instances = (
+            model.objects.select_related("machine")
+            .filter(machine__bk_cloud_id=bk_cloud_id, machine__ip__in=ips, port__in=ports)
+            .only("id", "port", "status", "machine__ip")
+        )
+        instance_map = {
+            (inst.machine.ip, inst.port): inst for inst in instances if (inst.machine.ip, inst.port) in address_set
+        }
+
+        # 一次查询获取实例关联的集群，id最小的集群与 cluster.first() 保持一致
+        cluster_ids_map: Dict[int, List[int]] = defaultdict(list)
+        through_field = f"{model._meta.model_name}_id"
+        relations = model.cluster.through.objects.filter(
+            **{f"{through_field}__in": [inst.id for inst in instance_map.values()]}
+        ).values_list(through_field, "cluster_id")
+        for inst_id, cluster_id in relations:
+            cluster_ids_map[inst_id].append(cluster_id)
+        for inst in instance_map.values():
+            inst.cluster_ids = sorted(cluster_ids_map.get(inst.id, []))
+            inst.first_cluster_id = inst.cluster_ids[0] if inst.cluster_ids else None
+
+        # 存储实例在后，覆盖同地址的proxy实例
+        address_instance_map.update(instance_map)
+
+    return address_instance_map
+
+
+def _refresh_cluster_status(cluster_ids: Set[int], abnormal_cluster_ids: Set[int]) -> List[Cluster]:
+    """
+    批量重新计算集群状态，与实例保存时的 update_cluster_status 信号逻辑一致：
+    集群下存在不可用实例时为异常，否则恢复正常，临时集群不处理；上报不可用实例的首个集群直接置为异常
+    返回状态有变化的集群
+    @param cluster_ids: 上报实例关联的全部集群
+    @param abnormal_cluster_ids: 需要置为异常的集群
+    """
+    unavailable_proxy_cluster_ids = set(
+        ProxyInstance.cluster.through.objects.filter(
+            cluster_id__in=cluster_ids, proxyinstance__status=InstanceStatus.UNAVAILABLE.value
+        ).values_list("cluster_id", flat=True)
+    )
+    unavailable_storage_roles: Dict[int, Set[str]] = defaultdict(set)
+    storage_relations = StorageInstance.cluster.through.objects.filter(
+        cluster_id__in=cluster_ids, storageinstance__status=InstanceStatus.UNAVAILABLE.value
+    ).values_list("cluster_id", "storageinstance__instance_inner_role")
+    for cluster_id, inner_role in storage_relations:
+        unavailable_storage_roles[cluster_id].add(inner_role)
+
+    changed_clusters = []
+    for cluster in Cluster.objects.filter(id__in=cluster_ids).only("id", "status", "cluster_type"):
+        if cluster.id in abnormal_cluster_ids:
+            target_status = ClusterStatus.ABNORMAL.value
+        elif cluster.status == ClusterStatus.TEMPORARY.value:
+            continue
+        elif Cluster.get_status_flag(
+            cluster.cluster_type,
+            cluster.id in unavailable_proxy_cluster_ids,
+            unavailable_storage_roles[cluster.id],
+        ):
+            target_status = ClusterStatus.ABNORMAL.value
+        else:
+            target_status = ClusterStatus.NORMAL.value
+
+        if cluster.status != target_status:
+            cluster.status = target_status
+            changed_clusters.append(cluster)
+
+    Cluster.objects.bulk_update(changed_clusters, ["status"], batch_size=UPDATE_STATUS_BATCH_SIZE)
+    return changed_clusters
+
+
 @transaction.atomic
-def update_status(payloads: List, bk_cloud_id: int):
+def update_status(payloads: List, bk_cloud_id: int) -> List[Dict]:
     """
-    ToDo 验证 status
+    批量更新实例状态，并重新计算实例所属集群的状态
+    - 所有 ip:port 每种实例只查询一次，实例和集群通过 bulk_update 批量更新
+    - bulk_update 不触发信号，集群状态按 update_cluster_status 的逻辑批量计算，实例恢复后集群恢复正常
+    - 重复上报的地址以最后一条为准
+    - 任一实例不存在时整体回滚
+    返回每条上报的处理结果: updated/unchanged/duplicate
     """
     DBHAUpdateStatusRequestSerializer(data={"payloads": payloads}).is_valid(raise_exception=True)
-    for pl in payloads:
-        ip = pl["ip"]
-        port = pl["port"]
 
-        try:
-            storage_obj = StorageInstance.objects.get(machine__ip=ip, port=port, machine__bk_cloud_id=bk_cloud_id)
-            cluster = storage_obj.cluster.first()
-
-            storage_obj.status = pl["status"]
-            storage_obj.save(update_fields=["status"])
-        except ObjectDoesNotExist:
-            try:
-                proxy_obj = ProxyInstance.objects.get(machine__ip=ip, port=port, machine__bk_cloud_id=bk_cloud_id)
-                cluster = proxy_obj.cluster.first()
-
-                proxy_obj.status = pl["status"]
-                proxy_obj.save(update_fields=["status"])
-            except ObjectDoesNotExist:
-                raise InstanceNotExistException(_("实例ip={}, port={}不存在，请检查输入参数或相关数据").format(ip, port))
-            except Exception as e:
-                raise e
-        except Exception as e:
-            raise e
-
-        if cluster and pl["status"] == InstanceStatus.UNAVAILABLE.value:
-            cluster.status = ClusterStatus.ABNORMAL.value
-            cluster.save(update_fields=["status"])
+    # 重复上报的地址以最后一条为准，与逐条更新的结果一致
+    last_payload_index = {(pl["ip"], int(pl["port"])): index for index, pl in enumerate(payloads)}
+    address_instance_map = _resolve_instances(list(last_payload_index.keys()), bk_cloud_id)
+
+    missing_addresses = [address for address in last_payload_index if address not in address_instance_map]
+    if missing_addresses:
+        ip, port = missing_addresses[0]
+        raise InstanceNotExistException(_("实例ip={}, port={}不存在，请检查输入参数或相关数据").format(ip, port))
+
+    results: List[Dict] = []
+    changed_instances: Dict[type, List] = defaultdict(list)
+    cluster_ids, abnormal_cluster_ids = set(), set()
+    for index, pl in enumerate(payloads):
+        address = (pl["ip"], int(pl["port"]))
+        result = {"ip": pl["ip"], "port": pl["port"], "status": pl["status"]}
+        results.append(result)
+        if last_payload_index[address] != index:
+            result["result"] = "duplicate"
+            continue
+
+        inst = address_instance_map[address]
+        if inst.status == pl["status"]:
+            result["result"] = "unchanged"
+        else:
+            inst.status = pl["status"]
+            changed_instances[type(inst)].append(inst)
+            result["result"] = "updated"
+
+        cluster_ids.update(inst.cluster_ids)
+        if inst.first_cluster_id and pl["status"] == InstanceStatus.UNAVAILABLE.value:
+            abnormal_cluster_ids.add(inst.first_cluster_id)
+
+    for model, instances in changed_instances.items():
+        model.objects.bulk_update(instances, ["status"], batch_size=UPDATE_STATUS_BATCH_SIZE)
+
+    clusters = _refresh_cluster_status(cluster_ids, abnormal_cluster_ids)
+
+    # bulk_update 不会触发信号，需要主动通知实例快照
+    if changed_instances or clusters:
+        notify_meta_changed([bk_cloud_id])
+
+    return results
 
 
 @transaction.atomic
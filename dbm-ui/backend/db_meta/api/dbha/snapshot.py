@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Min
+
+from backend.constants import IP_PORT_DIVIDER
+from backend.db_meta.models import ClusterDBHAExt
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("root")
+
+DEFAULT_DBHA_SNAPSHOT_CONFIG = {
+    # 是否开启实例快照，关闭后每次都实时查询
+    "enabled": True,
+    # 快照的最长有效时间(秒)，兜底没有触发信号的元数据变更(如 queryset.update)
+    "ttl": 10,
+    # 快照及历史版本摘要的保留时间(秒)，超过后增量查询退化为全量
+    "history_ttl": 600,
+}
+
+DBHA_META_VERSION_KEY = "dbha_snapshot:meta_version:{bk_cloud_id}"
+DBHA_SNAPSHOT_KEY = "dbha_snapshot:shard:{shard}"
+DBHA_SNAPSHOT_DIGEST_KEY = "dbha_snapshot:digest:{shard}:{version}"
+
+
+def _md5(value) -> str:
+    return hashlib.md5(json.dumps(value, sort_keys=True, cls=DjangoJSONEncoder).encode()).hexdigest()
+
+
+def bump_meta_version(bk_cloud_id: int) -> int:
+    """云区域的元数据版本号加一，该云区域的分片在下次读取时重建"""
+    key = DBHA_META_VERSION_KEY.format(bk_cloud_id=bk_cloud_id)
+    cache.add(key, 0, timeout=None)
+    return cache.incr(key)
+
+
+class PendingMetaChange(object):
+    """
+    事务中发生元数据变更的云区域，每一层事务(保存点)只注册一个提交回调，提交后每个云区域只递增一次
+    """
+
+    def __init__(self):
+        self.bk_cloud_ids = set()
+
+    def __call__(self):
+        for bk_cloud_id in self.bk_cloud_ids:
+            bump_meta_version(bk_cloud_id)
+
+
+def notify_meta_changed(bk_cloud_ids: Iterable[int]):
+    """
+    通知云区域的元数据发生变更
+    立即递增版本号，事务中的变更在提交后再递增一次，避免提交前重建的快照读到旧数据却带上新版本号
+    同一层事务中同一云区域只在第一次变更时立即递增，后续的变更合并到提交后的一次递增，
+    回调按保存点注册，保存点回滚时 Django 会一并丢弃
+    @param bk_cloud_ids: 发生变更的云区域
+    """
+    bk_cloud_ids = set(bk_cloud_ids)
+    if not connection.in_atomic_block:
+        for bk_cloud_id in bk_cloud_ids:
+            bump_meta_version(bk_cloud_id)
+        return
+
+    savepoint_ids = set(connection.savepoint_ids)
+    pending = next(
+        (
+            func
+            for sids, func in connection.run_on_commit
+            if isinstance(func, PendingMetaChange) and sids == savepoint_ids
+        ),
+        None,
+    )
+    if pending is None:
+        pending = PendingMetaChange()
+        transaction.on_commit(pending)
+    for bk_cloud_id in bk_cloud_ids - pending.bk_cloud_ids:
+        bump_meta_version(bk_cloud_id)
+        pending.bk_cloud_ids.add(bk_cloud_id)
+
+
+class DBHAInstanceSnapshot(object):
+    """
+    DBHA 探测实例的快照
+    - 按 (云区域, 逻辑城市, 状态, 集群类型, 哈希分片) 划分快照，快照记录构建时所属云区域的元数据版本号
+    - 元数据变更时只递增变更所在云区域的版本号，分片在下一次读取时才重建，其他云区域的分片直接返回缓存
+    - 快照的内容版本只在内容变化时前进，ETag 为内容摘要，支持按版本号获取增量
+    """
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("DBHA_SNAPSHOT", DEFAULT_DBHA_SNAPSHOT_CONFIG)
+
+    @property
+    def enabled(self) -> bool:
+        return self.config["enabled"]
+
+    @staticmethod
+    def get_meta_version(bk_cloud_id: int) -> int:
+        version = cache.get(DBHA_META_VERSION_KEY.format(bk_cloud_id=bk_cloud_id))
+        if version is None:
+            return bump_meta_version(bk_cloud_id)
+        return int(version)
+
+    @staticmethod
+    def get_shard(params: Dict) -> str:
+        return _md5(
+            {
+                "bk_cloud_id": params.get("bk_cloud_id"),
+                "logical_city_ids": sorted(params.get("logical_city_ids") or []),
+                "statuses": sorted(params.get("statuses") or []),
+                "cluster_types": sorted(params.get("cluster_types") or []),
+                "hash_cnt": params.get("hash_cnt"),
+                "hash_value": params.get("hash_value"),
+            }
+        )
+
+    @staticmethod
+    def get_row_key(row: Dict) -> str:
+        return f"{row['ip']}{IP_PORT_DIVIDER}{row['port']}#{row.get('cluster_id')}"
+
+    def get_expire_at(self, now: float) -> float:
+        """快照过期时间，不晚于最近一个DBHA屏蔽结束的时间，保证屏蔽到期的集群能及时恢复探测"""
+        expire_at = now + self.config["ttl"]
+        nearest_end_time = ClusterDBHAExt.objects.filter(end_time__gte=datetime.now(timezone.utc)).aggregate(
+            end_time=Min("end_time")
+        )["end_time"]
+        if nearest_end_time:
+            expire_at = min(expire_at, nearest_end_time.timestamp())
+        return expire_at
+
+    def get(self, params: Dict, loader: Callable[..., List[Dict]]) -> Dict:
+        """
+        获取分片快照，过期或元数据版本变化时通过 loader 重建
+        @param params: 过滤条件，同 dbha.instances
+        @param loader: 实时查询实例的函数
+        """
+        shard = self.get_shard(params)
+        meta_version = self.get_meta_version(params["bk_cloud_id"])
+        snapshot = cache.get(DBHA_SNAPSHOT_KEY.format(shard=shard))
+        if snapshot and snapshot["meta_version"] == meta_version and time.time() < snapshot["expire_at"]:
+            return snapshot
+        return self.rebuild(shard, params, loader, meta_version, snapshot)
+
+    def rebuild(
+        self, shard: str, params: Dict, loader: Callable, meta_version: int, old_snapshot: Optional[Dict]
+    ) -> Dict:
+        now = time.time()
+        rows = loader(**params)
+        digests = {self.get_row_key(row): _md5(row) for row in rows}
+        etag = _md5(sorted(digests.items()))
+
+        if old_snapshot and old_snapshot["etag"] == etag:
+            # 内容没有变化，沿用原来的内容版本，客户端的 ETag 和增量版本继续有效
+            version = old_snapshot["version"]
+        elif old_snapshot and old_snapshot["version"] >= meta_version:
+            # 元数据版本没变但内容变化了(未触发信号的变更)，需要生成新的版本号
+            version = meta_version = bump_meta_version(params["bk_cloud_id"])
+        else:
+            version = meta_version
+
+        snapshot = {
+            "shard": shard,
+            "meta_version": meta_version,
+            "version": version,
+            "etag": etag,
+            "expire_at": self.get_expire_at(now),
+            "instances": rows,
+        }
+        history_ttl = self.config["history_ttl"]
+        cache.set(DBHA_SNAPSHOT_KEY.format(shard=shard), snapshot, timeout=history_ttl)
+        cache.set(DBHA_SNAPSHOT_DIGEST_KEY.format(shard=shard, version=version), digests, timeout=history_ttl)
+        return snapshot
+
+    def get_delta(self, snapshot: Dict, since_version: int) -> Optional[Dict]:
+        """
+        获取 since_version 之后的变更，历史版本已过期时返回 None，调用方退化为全量
+        返回新增或变化的实例，以及被移除的实例key(ip:port#cluster_id)
+        """
+        if since_version == snapshot["version"]:
+            return {"instances": [], "removed": []}
+
+        old_digests = cache.get(DBHA_SNAPSHOT_DIGEST_KEY.format(shard=snapshot["shard"], version=since_version))
+        if old_digests is None:
+            return None
+
+        changed, row_keys = [], set()
+        for row in snapshot["instances"]:
+            row_key = self.get_row_key(row)
+            row_keys.add(row_key)
+            if old_digests.get(row_key) != _md5(row):
+                changed.append(row)
+        return {"instances": changed, "removed": [key for key in old_digests if key not in row_keys]}
+
+
+dbha_instance_snapshot = DBHAInstanceSnapshot()
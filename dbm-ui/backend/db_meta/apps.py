@@ -12,7 +12,7 @@ import logging
 
 from django.apps import AppConfig
 from django.db import IntegrityError
-from django.db.models.signals import m2m_changed, post_migrate, post_save, pre_delete
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete
 
 logger = logging.getLogger("root")
 
@@ -43,8 +43,17 @@ class DBMeta(AppConfig):
     name = "backend.db_meta"
 
     def ready(self):
-        from backend.db_meta.models import ProxyInstance, StorageInstance
-        from backend.db_meta.signals import update_cluster_status
+        from backend.db_meta.models import (
+            Cluster,
+            ClusterDBHAExt,
+            ClusterEntry,
+            ExtraProcessInstance,
+            Machine,
+            ProxyInstance,
+            StorageInstance,
+            StorageInstanceTuple,
+        )
+        from backend.db_meta.signals import refresh_dbha_snapshot, update_cluster_status
 
         post_migrate.connect(init_db_meta, sender=self)
         # 当实例进行修改或者删除时，更新集群状态
@@ -54,3 +63,25 @@ class DBMeta(AppConfig):
         pre_delete.connect(update_cluster_status, sender=ProxyInstance)
         m2m_changed.connect(update_cluster_status, sender=StorageInstance.cluster.through)
         m2m_changed.connect(update_cluster_status, sender=ProxyInstance.cluster.through)
+
+        # DBHA 实例快照依赖的元数据变更时，递增快照版本号
+        for model in [
+            Cluster,
+            ClusterDBHAExt,
+            ClusterEntry,
+            ExtraProcessInstance,
+            Machine,
+            ProxyInstance,
+            StorageInstance,
+            StorageInstanceTuple,
+        ]:
+            post_save.connect(refresh_dbha_snapshot, sender=model)
+            post_delete.connect(refresh_dbha_snapshot, sender=model)
+        for through in [
+            StorageInstance.cluster.through,
+            StorageInstance.bind_entry.through,
+            ProxyInstance.cluster.through,
+            ProxyInstance.storageinstance.through,
+            ProxyInstance.bind_entry.through,
+        ]:
+            m2m_changed.connect(refresh_dbha_snapshot, sender=through)
@@ -19,7 +19,7 @@ from .cluster_status import (
     ClusterTenDBClusterStatusFlag,
 )
 from .cluster_type import ClusterType
-from .comm import DBCCModule, SyncType
+from .comm import CapacityGranularity, DBCCModule, SyncType
 from .destroyed_status import DataStructureStatus, DestroyedStatus, MigrateStatus
 from .instance_inner_role import InstanceInnerRole
 from .instance_phase import InstancePhase
@@ -41,3 +41,11 @@ class RedisVerUpdateNodeType(str, StructuredEnum):
 
     Proxy = EnumField("Proxy", _("Proxy"))
     Backend = EnumField("Backend", _("Backend"))
+
+
+class CapacityGranularity(str, StructuredEnum):
+    """集群容量采样的粒度"""
+
+    RAW = EnumField("raw", _("原始采样"))
+    DAY = EnumField("day", _("按天汇总"))
+    WEEK = EnumField("week", _("按周汇总"))
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2024-09-02 08:00
+
+from django.db import migrations, models
+
+from backend.db_meta.enums import CapacityGranularity, ClusterType
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("db_meta", "0041_auto_20240819_1031"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClusterCapacityStat",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("cluster_id", models.IntegerField(help_text="集群ID")),
+                ("bk_biz_id", models.IntegerField(help_text="业务ID")),
+                (
+                    "cluster_type",
+                    models.CharField(choices=ClusterType.get_choices(), help_text="集群类型", max_length=64),
+                ),
+                ("immute_domain", models.CharField(help_text="集群域名", max_length=255)),
+                (
+                    "granularity",
+                    models.CharField(choices=CapacityGranularity.get_choices(), help_text="采样粒度", max_length=16),
+                ),
+                ("sample_time", models.DateTimeField(help_text="采样时间，汇总数据为周期的开始时间")),
+                ("used", models.BigIntegerField(help_text="已用容量(byte)")),
+                ("total", models.BigIntegerField(help_text="总容量(byte)")),
+            ],
+            options={
+                "verbose_name": "集群容量采样",
+                "verbose_name_plural": "集群容量采样",
+                "unique_together": {("cluster_id", "granularity", "sample_time")},
+                "index_together": {("bk_biz_id", "granularity", "sample_time"), ("granularity", "sample_time")},
+            },
+        ),
+    ]
@@ -13,6 +13,7 @@ from .city_map import BKCity, LogicalCity
 from .cluster import Cluster, ClusterDBHAExt
 from .cluster_entry import CLBEntryDetail, ClusterEntry, PolarisEntryDetail
 from .cluster_monitor import AppMonitorTopo, ClusterMonitorTopo
+from .cluster_stat import ClusterCapacityStat
 from .db_module import DBModule
 from .extra_process import ExtraProcessInstance
 from .group import Group, GroupInstance
@@ -12,7 +12,7 @@ specific language governing permissions and limitations under the License.
 import json
 import logging
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, List, Set
 
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
@@ -42,6 +42,7 @@ from backend.db_meta.enums.cluster_status import (
     ClusterDBSingleStatusFlags,
     ClusterRedisStatusFlags,
     ClusterSqlserverStatusFlags,
+    ClusterStatusFlags,
 )
 from backend.db_meta.exceptions import ClusterExclusiveOperateException, DBMetaException
 from backend.db_services.version.constants import LATEST, PredixyVersion, TwemproxyVersion
@@ -179,56 +180,65 @@ class Cluster(AuditedModel):
 
     @property
     def __status_flag(self):
+        proxy_unavailable = self.proxyinstance_set.filter(status=InstanceStatus.UNAVAILABLE.value).exists()
+        unavailable_storage_roles = set(
+            self.storageinstance_set.filter(status=InstanceStatus.UNAVAILABLE.value).values_list(
+                "instance_inner_role", flat=True
+            )
+        )
+        return self.get_status_flag(self.cluster_type, proxy_unavailable, unavailable_storage_roles)
+
+    @staticmethod
+    def get_status_flag(
+        cluster_type: str, proxy_unavailable: bool, unavailable_storage_roles: Set[str]
+    ) -> ClusterStatusFlags:
+        """
+        根据集群下不可用的实例计算集群状态标志，单个集群和批量更新集群状态共用
+        @param cluster_type: 集群类型
+        @param proxy_unavailable: 是否存在不可用的接入层实例
+        @param unavailable_storage_roles: 不可用的存储实例的 instance_inner_role 集合
+        """
+        storage_unavailable = bool(unavailable_storage_roles)
+        master_unavailable = InstanceInnerRole.MASTER.value in unavailable_storage_roles
+        slave_unavailable = InstanceInnerRole.SLAVE.value in unavailable_storage_roles
         # tendb ha
-        if self.cluster_type == ClusterType.TenDBHA.value:
+        if cluster_type == ClusterType.TenDBHA.value:
             flag_obj = ClusterDBHAStatusFlags(0)
-            if self.proxyinstance_set.filter(status=InstanceStatus.UNAVAILABLE.value).exists():
+            if proxy_unavailable:
                 flag_obj |= ClusterDBHAStatusFlags.ProxyUnavailable
-            if self.storageinstance_set.filter(
-                status=InstanceStatus.UNAVAILABLE.value, instance_inner_role=InstanceInnerRole.MASTER.value
-            ).exists():
+            if master_unavailable:
                 flag_obj |= ClusterDBHAStatusFlags.BackendMasterUnavailable
-            if self.storageinstance_set.filter(
-                status=InstanceStatus.UNAVAILABLE.value, instance_inner_role=InstanceInnerRole.SLAVE.value
-            ).exists():
+            if slave_unavailable:
                 flag_obj |= ClusterDBHAStatusFlags.BackendSlaveUnavailable
         # tendbcluster
-        elif self.cluster_type == ClusterType.TenDBCluster.value:
+        elif cluster_type == ClusterType.TenDBCluster.value:
             flag_obj = ClusterTenDBClusterStatusFlag(0)
-            if self.proxyinstance_set.filter(status=InstanceStatus.UNAVAILABLE.value).exists():
+            if proxy_unavailable:
                 flag_obj |= ClusterTenDBClusterStatusFlag.SpiderUnavailable
-            if self.storageinstance_set.filter(
-                status=InstanceStatus.UNAVAILABLE.value, instance_inner_role=InstanceInnerRole.MASTER.value
-            ).exists():
+            if master_unavailable:
                 flag_obj |= ClusterTenDBClusterStatusFlag.RemoteMasterUnavailable
-            if self.storageinstance_set.filter(
-                status=InstanceStatus.UNAVAILABLE.value, instance_inner_role=InstanceInnerRole.SLAVE.value
-            ).exists():
+            if slave_unavailable:
                 flag_obj |= ClusterTenDBClusterStatusFlag.RemoteSlaveUnavailable
         # tendb single
-        elif self.cluster_type == ClusterType.TenDBSingle.value:
+        elif cluster_type == ClusterType.TenDBSingle.value:
             flag_obj = ClusterDBSingleStatusFlags(0)
-            if self.storageinstance_set.filter(status=InstanceStatus.UNAVAILABLE.value).exists():
+            if storage_unavailable:
                 flag_obj |= ClusterDBSingleStatusFlags.SingleUnavailable
         # redis
-        elif self.cluster_type in ClusterType.redis_cluster_types():
+        elif cluster_type in ClusterType.redis_cluster_types():
             flag_obj = ClusterRedisStatusFlags(0)
-            if self.storageinstance_set.filter(status=InstanceStatus.UNAVAILABLE.value).exists():
+            if storage_unavailable:
                 flag_obj |= ClusterRedisStatusFlags.RedisUnavailable
         # sqlserver ha
-        if self.cluster_type == ClusterType.SqlserverHA.value:
+        if cluster_type == ClusterType.SqlserverHA.value:
             flag_obj = ClusterSqlserverStatusFlags(0)
-            if self.storageinstance_set.filter(
-                status=InstanceStatus.UNAVAILABLE.value, instance_inner_role=InstanceInnerRole.MASTER.value
-            ).exists():
+            if master_unavailable:
                 flag_obj |= ClusterSqlserverStatusFlags.BackendMasterUnavailable
-            if self.storageinstance_set.filter(
-                status=InstanceStatus.UNAVAILABLE.value, instance_inner_role=InstanceInnerRole.SLAVE.value
-            ).exists():
+            if slave_unavailable:
                 flag_obj |= ClusterSqlserverStatusFlags.BackendSlaveUnavailable
         # 默认
         else:
-            logger.debug(_("{} 未实现 status flag, 认为实例异常会导致集群异常".format(self.cluster_type)))
+            logger.debug(_("{} 未实现 status flag, 认为实例异常会导致集群异常".format(cluster_type)))
             flag_obj = ClusterCommonStatusFlags(0)
 
         return flag_obj
@@ -391,9 +401,12 @@ class Cluster(AuditedModel):
 
     @classmethod
     def get_cluster_stats(cls, bk_biz_id, cluster_types) -> dict:
+        # 所有集群类型的容量信息一次性批量获取
+        cache_keys = [f"{CACHE_CLUSTER_STATS}_{bk_biz_id}_{cluster_type}" for cluster_type in cluster_types]
         cluster_stats = {}
-        for cluster_type in cluster_types:
-            cluster_stats.update(json.loads(cache.get(f"{CACHE_CLUSTER_STATS}_{bk_biz_id}_{cluster_type}", "{}")))
+        for stats in cache.get_many(cache_keys).values():
+            # 兼容旧版本写入的 json 字符串
+            cluster_stats.update(json.loads(stats) if isinstance(stats, str) else stats)
 
         return cluster_stats
 
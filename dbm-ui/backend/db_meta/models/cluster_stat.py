@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from django.db import models, transaction
+from django.db.models import Avg, Max
+from django.utils.translation import ugettext_lazy as _
+
+from backend.db_meta.enums import CapacityGranularity, ClusterType
+from backend.db_meta.models.cluster import Cluster
+
+
+class ClusterCapacityStat(models.Model):
+    """
+    集群容量的历史采样
+    - raw: 同步任务每次从监控查询到的容量
+    - day/week: 按天/按周汇总的容量，已用容量取平均值，总容量取最大值
+    """
+
+    cluster_id = models.IntegerField(help_text=_("集群ID"))
+    bk_biz_id = models.IntegerField(help_text=_("业务ID"))
+    cluster_type = models.CharField(max_length=64, choices=ClusterType.get_choices(), help_text=_("集群类型"))
+    immute_domain = models.CharField(max_length=255, help_text=_("集群域名"))
+    granularity = models.CharField(max_length=16, choices=CapacityGranularity.get_choices(), help_text=_("采样粒度"))
+    sample_time = models.DateTimeField(help_text=_("采样时间，汇总数据为周期的开始时间"))
+    used = models.BigIntegerField(help_text=_("已用容量(byte)"))
+    total = models.BigIntegerField(help_text=_("总容量(byte)"))
+
+    class Meta:
+        verbose_name = verbose_name_plural = _("集群容量采样")
+        unique_together = ("cluster_id", "granularity", "sample_time")
+        index_together = [("bk_biz_id", "granularity", "sample_time"), ("granularity", "sample_time")]
+
+    @staticmethod
+    def get_period_start(sample_time: datetime, granularity: str) -> datetime:
+        day_start = sample_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        if granularity == CapacityGranularity.WEEK:
+            return day_start - timedelta(days=day_start.weekday())
+        return day_start
+
+    @classmethod
+    def record(cls, bk_biz_id: int, cluster_type: str, cluster_stats: Dict[str, Dict], sample_time: datetime):
+        """
+        记录一次容量采样，并更新采样所在天/周的汇总
+        @param bk_biz_id: 业务ID
+        @param cluster_type: 集群类型
+        @param cluster_stats: 集群域名 -> {"used": xx, "total": xx}
+        @param sample_time: 采样时间
+        """
+        domain__cluster_id = dict(
+            Cluster.objects.filter(
+                bk_biz_id=bk_biz_id, cluster_type=cluster_type, immute_domain__in=list(cluster_stats.keys())
+            ).values_list("immute_domain", "id")
+        )
+        samples = [
+            cls(
+                cluster_id=domain__cluster_id[domain],
+                bk_biz_id=bk_biz_id,
+                cluster_type=cluster_type,
+                immute_domain=domain,
+                granularity=CapacityGranularity.RAW,
+                sample_time=sample_time,
+                used=int(stats["used"]),
+                total=int(stats["total"]),
+            )
+            for domain, stats in cluster_stats.items()
+            # 兼容查不到数据的情况
+            if domain in domain__cluster_id and "used" in stats and "total" in stats
+        ]
+        cls.objects.bulk_create(samples, ignore_conflicts=True)
+
+        # 天汇总来自原始采样，周汇总来自天汇总
+        cls.rollup(
+            bk_biz_id,
+            cluster_type,
+            granularity=CapacityGranularity.DAY,
+            source_granularity=CapacityGranularity.RAW,
+            period_start=cls.get_period_start(sample_time, CapacityGranularity.DAY),
+            period=timedelta(days=1),
+        )
+        cls.rollup(
+            bk_biz_id,
+            cluster_type,
+            granularity=CapacityGranularity.WEEK,
+            source_granularity=CapacityGranularity.DAY,
+            period_start=cls.get_period_start(sample_time, CapacityGranularity.WEEK),
+            period=timedelta(days=7),
+        )
+
+    @classmethod
+    def rollup(
+        cls,
+        bk_biz_id: int,
+        cluster_type: str,
+        granularity: str,
+        source_granularity: str,
+        period_start: datetime,
+        period: timedelta,
+    ):
+        """按业务和集群类型重新计算一个周期的汇总，周期内的采样在 DB 中聚合"""
+        rollups = (
+            cls.objects.filter(
+                bk_biz_id=bk_biz_id,
+                cluster_type=cluster_type,
+                granularity=source_granularity,
+                sample_time__gte=period_start,
+                sample_time__lt=period_start + period,
+            )
+            .values("cluster_id", "immute_domain")
+            .annotate(avg_used=Avg("used"), max_total=Max("total"))
+        )
+        records = [
+            cls(
+                cluster_id=rollup["cluster_id"],
+                bk_biz_id=bk_biz_id,
+                cluster_type=cluster_type,
+                immute_domain=rollup["immute_domain"],
+                granularity=granularity,
+                sample_time=period_start,
+                used=int(rollup["avg_used"]),
+                total=int(rollup["max_total"]),
+            )
+            for rollup in rollups
+        ]
+        with transaction.atomic():
+            cls.objects.filter(
+                bk_biz_id=bk_biz_id, cluster_type=cluster_type, granularity=granularity, sample_time=period_start
+            ).delete()
+            cls.objects.bulk_create(records)
+
+    @classmethod
+    def clear_expired(cls, now: datetime, retention_days: Dict[str, int]):
+        """
+        按粒度清理过期的采样
+        @param now: 当前时间
+        @param retention_days: 粒度 -> 保留天数
+        """
+        for granularity, days in retention_days.items():
+            cls.objects.filter(granularity=granularity, sample_time__lt=now - timedelta(days=days)).delete()
+
+    @classmethod
+    def get_series(
+        cls, bk_biz_id: int, cluster_types: List[str], granularity: str, start_time: datetime
+    ) -> Dict[int, List[Dict]]:
+        """获取业务下集群的容量序列，返回 集群ID -> 按时间升序的采样"""
+        samples = (
+            cls.objects.filter(
+                bk_biz_id=bk_biz_id,
+                cluster_type__in=cluster_types,
+                granularity=granularity,
+                sample_time__gte=start_time,
+            )
+            .order_by("sample_time")
+            .values("cluster_id", "immute_domain", "cluster_type", "sample_time", "used", "total")
+        )
+        series: Dict[int, List[Dict]] = {}
+        for sample in samples:
+            series.setdefault(sample["cluster_id"], []).append(sample)
+        return series
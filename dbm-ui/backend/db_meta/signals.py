@@ -14,7 +14,14 @@ from typing import Union
 from django.db.models.signals import pre_delete
 
 from backend.db_meta.enums import ClusterStatus
-from backend.db_meta.models import Cluster, ProxyInstance, StorageInstance
+from backend.db_meta.models import (
+    Cluster,
+    ClusterDBHAExt,
+    ClusterEntry,
+    ProxyInstance,
+    StorageInstance,
+    StorageInstanceTuple,
+)
 
 logger = logging.getLogger("root")
 
@@ -53,3 +60,29 @@ def update_cluster_status(sender, instance: Union[StorageInstance, ProxyInstance
             cluster.status = target_status
             logger.info("[signals] update cluster status, origin: %s, target: %s", origin_status, target_status)
             cluster.save(update_fields=["status"])
+
+
+def get_bk_cloud_id(instance) -> int:
+    """
+    获取 DBHA 探测相关元数据所在的云区域，实例与所属集群、访问入口位于同一个云区域
+    """
+    if isinstance(instance, (StorageInstance, ProxyInstance)):
+        return instance.machine.bk_cloud_id
+    if isinstance(instance, (ClusterEntry, ClusterDBHAExt)):
+        return instance.cluster.bk_cloud_id
+    if isinstance(instance, StorageInstanceTuple):
+        return instance.ejector.machine.bk_cloud_id
+    # Cluster, Machine, ExtraProcessInstance
+    return instance.bk_cloud_id
+
+
+def refresh_dbha_snapshot(sender, instance, **kwargs):
+    """
+    DBHA 探测相关的元数据变更时，通知所在云区域的实例快照重建
+    """
+    from backend.db_meta.api.dbha.snapshot import notify_meta_changed
+
+    # 多对多关系变更只在变更完成后通知
+    if kwargs.get("action", "").startswith("pre_"):
+        return
+    notify_meta_changed([get_bk_cloud_id(instance)])
@@ -458,7 +458,8 @@ class DispatchGroup(AuditedModel):
     def get_rules(cls, bk_biz_id=PLAT_BIZ_ID):
         rules = []
 
-        notify_groups = NoticeGroup.objects.filter(is_built_in=True, bk_biz_id=bk_biz_id)
+        # 固定规则顺序，便于和已同步的规则比较
+        notify_groups = NoticeGroup.objects.filter(is_built_in=True, bk_biz_id=bk_biz_id).order_by("id")
         for db_type in notify_groups.values_list("db_type", flat=True):
             db_type_rules = cls.get_rules_by_dbtype(db_type, bk_biz_id)
 
@@ -808,17 +809,13 @@ class MonitorPolicy(AuditedModel):
 
         return details
 
-    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
-        """保存策略对象的同时，同步记录到监控"""
-
-        # step1. sync to model
+    def get_bkm_details(self, update_fields=None) -> Dict:
+        """获取需要同步到监控的策略详情"""
         # 启停操作(["is_enabled"]) -> 跳过重复的patch
-        details = self.details if update_fields == ["is_enabled"] else self.patch_all()
-
-        # step2. sync to bkm
-        res = bkm_save_alarm_strategy(details)
+        return self.details if update_fields == ["is_enabled"] else self.patch_all()
 
-        # overwrite by bkm strategy details
+    def apply_bkm_details(self, res: Dict):
+        """使用监控返回的策略详情覆盖本地策略"""
         self.details = res
         self.monitor_policy_id = self.details["id"]
         self.sync_at = datetime.datetime.now(timezone.utc)
@@ -827,6 +824,18 @@ class MonitorPolicy(AuditedModel):
         if self.pk is None and self.bk_biz_id == env.DBA_APP_BK_BIZ_ID:
             self.parent_details = self.details
 
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        """保存策略对象的同时，同步记录到监控"""
+
+        # step1. sync to model
+        details = self.get_bkm_details(update_fields)
+
+        # step2. sync to bkm
+        res = bkm_save_alarm_strategy(details)
+
+        # overwrite by bkm strategy details
+        self.apply_bkm_details(res)
+
         # step3. save to db
         super().save(force_insert, force_update, using, update_fields)
 
@@ -976,15 +985,17 @@ class MonitorPolicy(AuditedModel):
     def get_policies(cls, db_type, bk_biz_id=PLAT_BIZ_ID):
         """获取监控策略id列表"""
         policy_ids = list(
-            cls.objects.filter(db_type=db_type, bk_biz_id=bk_biz_id).values_list("monitor_policy_id", flat=True)
+            cls.objects.filter(db_type=db_type, bk_biz_id=bk_biz_id)
+            .order_by("id")
+            .values_list("monitor_policy_id", flat=True)
         )
         # MySQL 需额外补充
         if db_type == DBType.MySQL:
             policy_ids.extend(
                 list(
-                    cls.objects.filter(details__labels__contains=["/DBM_TBINLOGDUMPER/"]).values_list(
-                        "monitor_policy_id", flat=True
-                    )
+                    cls.objects.filter(details__labels__contains=["/DBM_TBINLOGDUMPER/"])
+                    .order_by("id")
+                    .values_list("monitor_policy_id", flat=True)
                 )
             )
         return policy_ids
@@ -993,7 +1004,9 @@ class MonitorPolicy(AuditedModel):
     def get_dbha_policies(cls):
         """获取高可用策略id列表"""
         return list(
-            cls.objects.filter(details__labels__contains=["/DBM_DBHA/"]).values_list("monitor_policy_id", flat=True)
+            cls.objects.filter(details__labels__contains=["/DBM_DBHA/"])
+            .order_by("id")
+            .values_list("monitor_policy_id", flat=True)
         )
 
     @staticmethod
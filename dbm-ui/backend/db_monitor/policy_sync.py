@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+from backend.configuration.constants import PLAT_BIZ_ID
+from backend.core.translation.context import RespectsLanguage
+from backend.db_monitor.constants import TPLS_ALARM_DIR, TargetPriority
+from backend.db_monitor.models import DispatchGroup, MonitorPolicy
+from backend.db_monitor.utils import bkm_save_alarm_strategy
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("celery")
+
+DEFAULT_MONITOR_POLICY_SYNC_CONFIG = {
+    # 是否缓存模板指纹，关闭后每次都读取并解析全部模板
+    "fingerprint_enabled": True,
+    # 模板指纹的保留时间(秒)
+    "fingerprint_ttl": 7 * 24 * 60 * 60,
+    # 并发推送策略到监控的线程数
+    "concurrency": 5,
+    # 每秒最多调用的监控接口次数，0 表示不限制
+    "rate_limit": 10,
+}
+
+MONITOR_POLICY_FINGERPRINT_KEY = "monitor_policy_sync:fingerprints"
+# 旧版本的模板目录，不再同步
+SKIP_TEMPLATE_DIR = "v1"
+
+
+def _md5(value) -> str:
+    return hashlib.md5(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+class RateLimiter(object):
+    """按固定间隔放行调用的限速器，多个线程共享"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def load_template(content: bytes) -> Optional[Dict]:
+    """
+    解析告警模板，返回可以直接构造 MonitorPolicy 的字段(另带 deleted 标记)，无效模板返回 None
+    @param content: 模板文件内容
+    """
+    try:
+        template = json.loads(content)
+        # 监控API不支持传入额外的字段
+        template.pop("export_at", "")
+        policy_name = template["name"]
+    except (json.decoder.JSONDecodeError, KeyError, TypeError):
+        return None
+
+    if not template.get("details"):
+        return None
+
+    # patch template
+    template["details"]["labels"] = list(set(template["details"]["labels"]))
+    template["details"]["name"] = policy_name
+    template["details"]["priority"] = TargetPriority.PLATFORM.value
+    # 平台策略仅开启基于分派通知
+    template["details"]["notice"]["options"]["assign_mode"] = ["by_rule"]
+    return template
+
+
+def get_template_meta(template: Optional[Dict]) -> Dict:
+    """模板中参与比较的字段，缓存在指纹中，模板未变化时无需再解析"""
+    if template is None:
+        return {"valid": False}
+    return {
+        "valid": True,
+        "name": template["name"],
+        "bk_biz_id": template.get("bk_biz_id", PLAT_BIZ_ID),
+        "version": template.get("version", 0),
+        "deleted": template.get("deleted", False),
+    }
+
+
+def get_rules_digest(rules: List[Dict]) -> str:
+    """分派规则的摘要，忽略保存时回填的监控规则ID"""
+    return _md5([{key: value for key, value in rule.items() if key != "id"} for rule in rules])
+
+
+class MonitorPolicySyncer(object):
+    """
+    平台告警策略的增量同步
+    - 模板按 (mtime, size) -> sha256 记录指纹，未变化的模板不再读取和解析
+    - 一次查询出已有策略，和模板比较版本后只处理需要新建、更新和删除的策略
+    - 需要推送的策略并发调用监控接口，并按 rate_limit 限速
+    """
+
+    def __init__(self, tpl_dir: str = TPLS_ALARM_DIR):
+        self.tpl_dir = tpl_dir
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("MONITOR_POLICY_SYNC", DEFAULT_MONITOR_POLICY_SYNC_CONFIG)
+
+    @staticmethod
+    def read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def walk_templates(self):
+        for root, dirs, files in os.walk(self.tpl_dir):
+            if SKIP_TEMPLATE_DIR in dirs:
+                dirs.remove(SKIP_TEMPLATE_DIR)
+            for file_name in sorted(files):
+                path = os.path.join(root, file_name)
+                yield os.path.relpath(path, self.tpl_dir), path
+
+    def scan_templates(self) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """
+        扫描模板目录，返回 (模板相对路径 -> 指纹, 本次解析过的模板)
+        指纹中包含模板的元信息，mtime 或 sha256 没有变化时直接复用
+        """
+        use_fingerprint = self.config["fingerprint_enabled"]
+        old_fingerprints = (cache.get(MONITOR_POLICY_FINGERPRINT_KEY) or {}) if use_fingerprint else {}
+
+        fingerprints, templates = {}, {}
+        for rel_path, path in self.walk_templates():
+            stat = os.stat(path)
+            fingerprint = old_fingerprints.get(rel_path)
+            if fingerprint and fingerprint["mtime"] == stat.st_mtime and fingerprint["size"] == stat.st_size:
+                fingerprints[rel_path] = fingerprint
+                continue
+
+            content = self.read_file(path)
+            sha = hashlib.sha256(content).hexdigest()
+            if fingerprint and fingerprint["sha"] == sha:
+                # 仅 mtime 变化(如重新部署)，内容不变
+                fingerprints[rel_path] = {**fingerprint, "mtime": stat.st_mtime, "size": stat.st_size}
+                continue
+
+            templates[rel_path] = load_template(content)
+            fingerprints[rel_path] = {
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "sha": sha,
+                **get_template_meta(templates[rel_path]),
+            }
+
+        if use_fingerprint:
+            cache.set(MONITOR_POLICY_FINGERPRINT_KEY, fingerprints, timeout=self.config["fingerprint_ttl"])
+        return fingerprints, templates
+
+    def push_policies(self, policies: List[MonitorPolicy]) -> List[Tuple[MonitorPolicy, Optional[Dict], str]]:
+        """
+        并发推送策略到监控，返回 (策略, 监控返回的策略详情, 错误信息)
+        策略详情的渲染和本地保存都需要查询数据库，在调用方线程中完成，这里只并发调用监控接口
+        """
+        limiter = RateLimiter(self.config["rate_limit"])
+
+        def _push(details: Dict) -> Tuple[Optional[Dict], str]:
+            limiter.acquire()
+            try:
+                return bkm_save_alarm_strategy(details), ""
+            except Exception as err:  # pylint: disable=broad-except
+                return None, str(err)
+
+        details_list = [policy.get_bkm_details() for policy in policies]
+        with ThreadPoolExecutor(max_workers=self.config["concurrency"]) as ex:
+            futures = [
+                ex.submit(RespectsLanguage(language=get_language())(_push), details) for details in details_list
+            ]
+        return [(policy, *future.result()) for policy, future in zip(policies, futures)]
+
+    def sync_plat_policies(self) -> Dict[str, int]:
+        """同步平台告警策略，返回各类处理结果的数量"""
+        fingerprints, templates = self.scan_templates()
+        counts = {"total": len(fingerprints), "parsed": len(templates)}
+        counts.update(skipped=0, invalid=0, created=0, updated=0, deleted=0, failed=0)
+
+        names = [fp["name"] for fp in fingerprints.values() if fp["valid"]]
+        synced_policies = {
+            (policy.bk_biz_id, policy.name): policy for policy in MonitorPolicy.objects.filter(name__in=names)
+        }
+
+        # 比较模板和已有策略，得到需要推送的策略
+        policies = []
+        for rel_path, fingerprint in fingerprints.items():
+            if not fingerprint["valid"]:
+                logger.error("[sync_plat_monitor_policy] invalid template: %s", rel_path)
+                counts["invalid"] += 1
+                continue
+
+            policy_name = fingerprint["name"]
+            synced_policy = synced_policies.get((fingerprint["bk_biz_id"], policy_name))
+            if fingerprint["deleted"]:
+                if synced_policy:
+                    logger.info("[sync_plat_monitor_policy] delete old alarm: %s ", policy_name)
+                    synced_policy.delete()
+                    counts["deleted"] += 1
+                else:
+                    counts["skipped"] += 1
+                continue
+
+            if synced_policy and synced_policy.version >= fingerprint["version"]:
+                counts["skipped"] += 1
+                continue
+
+            template = templates.get(rel_path) or load_template(self.read_file(os.path.join(self.tpl_dir, rel_path)))
+            template.pop("deleted", None)
+            policy = MonitorPolicy(**template)
+            if synced_policy:
+                for keeped_field in MonitorPolicy.KEEPED_FIELDS:
+                    setattr(policy, keeped_field, getattr(synced_policy, keeped_field))
+                policy.details["id"] = synced_policy.monitor_policy_id
+
+            # fetch targets/test_rules/notify_rules/notify_groups from parent details
+            for attr, value in policy.parse_details().items():
+                setattr(policy, attr, value)
+            policies.append(policy)
+
+        for policy, res, err in self.push_policies(policies):
+            if res is None:
+                logger.error("[sync_plat_monitor_policy] save bkm alarm policy failed: %s, %s ", policy.name, err)
+                counts["failed"] += 1
+                continue
+
+            counts["updated" if policy.pk else "created"] += 1
+            policy.apply_bkm_details(res)
+            policy.local_save()
+            logger.info("[sync_plat_monitor_policy] save bkm alarm policy success: %s", policy.name)
+
+        return counts
+
+    @staticmethod
+    def sync_dispatch_group(bk_biz_id: int) -> bool:
+        """
+        同步业务的分派策略组，规则没有变化时跳过，返回是否推送到了监控
+        @param bk_biz_id: 业务ID
+        """
+        latest_rules = DispatchGroup.get_rules(bk_biz_id)
+        dispatch_group = DispatchGroup.objects.filter(bk_biz_id=bk_biz_id).first()
+        if dispatch_group is None:
+            logger.info("sync_plat_dispatch_policy: create biz_rules(%s)\n %s \n", bk_biz_id, latest_rules)
+            DispatchGroup(bk_biz_id=bk_biz_id, rules=latest_rules).save()
+            return True
+
+        if dispatch_group.monitor_dispatch_id and get_rules_digest(dispatch_group.rules) == get_rules_digest(
+            latest_rules
+        ):
+            logger.info("sync_plat_dispatch_policy: skip unchanged biz_rules(%s)", bk_biz_id)
+            return False
+
+        logger.info("sync_plat_dispatch_policy: update biz_rules(%s)\n %s \n", bk_biz_id, latest_rules)
+        dispatch_group.rules = latest_rules
+        dispatch_group.save()
+        return True
+
+
+monitor_policy_syncer = MonitorPolicySyncer()
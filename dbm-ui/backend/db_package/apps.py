@@ -11,8 +11,17 @@ specific language governing permissions and limitations under the License.
 
 
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class DBPackageConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "backend.db_package"
+
+    def ready(self):
+        from backend.db_package.catalog import notify_package_changed
+        from backend.db_package.models import Package
+
+        # 介质包变更时，递增介质包目录版本号
+        post_save.connect(notify_package_changed, sender=Package)
+        post_delete.connect(notify_package_changed, sender=Package)
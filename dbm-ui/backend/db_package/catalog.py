@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from backend.configuration.constants import DBType
+from backend.db_package.exceptions import PackageNotExistException
+from backend.db_package.models import Package
+from backend.flow.consts import MediumEnum
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("root")
+
+DEFAULT_PACKAGE_CATALOG_CONFIG = {
+    # 是否开启进程内的介质包目录，关闭后每次都实时查询数据库
+    "enabled": True,
+}
+
+PACKAGE_CATALOG_VERSION_KEY = "package_catalog:version"
+
+
+def _enum_value(value):
+    """枚举成员的哈希与其值不同，统一转换为值后再查询索引"""
+    return getattr(value, "value", value)
+
+
+def bump_catalog_version() -> int:
+    """介质包目录版本号加一，各个进程在下次解析介质包时重新加载目录"""
+    cache.add(PACKAGE_CATALOG_VERSION_KEY, 0, timeout=None)
+    return cache.incr(PACKAGE_CATALOG_VERSION_KEY)
+
+
+def notify_package_changed(*args, **kwargs):
+    """
+    通知介质包发生变更，可直接作为 Package 的 post_save/post_delete 信号处理函数
+    事务中的变更在提交后再递增一次，避免提交前重新加载的目录读到旧数据却带上新版本号
+    """
+    bump_catalog_version()
+    if not connection.in_atomic_block:
+        return
+    if any(func is bump_catalog_version for __, func in connection.run_on_commit):
+        return
+    transaction.on_commit(bump_catalog_version)
+
+
+class PackageCatalog(object):
+    """
+    进程内的介质包目录
+    - 一次性加载全部启用的介质包，按 (db_type, pkg_type, version) 建立索引，version 为 latest 时表示不限版本
+    - 每个索引项预先计算出 全业务可用的最新包 和 各个灰度业务可用的最新包，解析最新包为 O(1)
+    - Package 变更时递增共享的版本号，进程发现版本号变化后重新加载
+    - 返回的 Package 对象在进程内共享，调用方只能读取
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._index: Dict[tuple, Dict] = {}
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("PACKAGE_CATALOG", DEFAULT_PACKAGE_CATALOG_CONFIG)
+
+    @staticmethod
+    def get_version() -> int:
+        version = cache.get(PACKAGE_CATALOG_VERSION_KEY)
+        if version is None:
+            return bump_catalog_version()
+        return int(version)
+
+    @staticmethod
+    def build_index(packages: List[Package]) -> Dict[tuple, Dict]:
+        """
+        构建索引
+        @param packages: 按新旧顺序排列的介质包，越新越靠前
+        """
+        index: Dict[tuple, Dict] = {}
+        for rank, package in enumerate(packages):
+            keys = {
+                (package.db_type, package.pkg_type, package.version),
+                (package.db_type, package.pkg_type, MediumEnum.Latest.value),
+            }
+            for key in keys:
+                entry = index.setdefault(key, {"newest": (rank, package), "public": None, "biz": {}})
+                # allow_biz_ids 为空代表全业务可用，否则只有列表中的业务可用
+                if package.allow_biz_ids is None:
+                    entry["public"] = entry["public"] or (rank, package)
+                    continue
+                for bk_biz_id in package.allow_biz_ids:
+                    entry["biz"].setdefault(bk_biz_id, (rank, package))
+        return index
+
+    def get_index(self) -> Dict[tuple, Dict]:
+        version = self.get_version()
+        if version == self._version:
+            return self._index
+
+        with self._lock:
+            if version != self._version:
+                packages = list(Package.objects.filter(enable=True).order_by("-update_at", "-id"))
+                self._index, self._version = self.build_index(packages), version
+                logger.info(f"load package catalog, version: {version}, package count: {len(packages)}")
+        return self._index
+
+    @staticmethod
+    def resolve(
+        index: Dict[tuple, Dict], version: str, pkg_type: str, bk_biz_id: Optional[int], db_type: str
+    ) -> Package:
+        version, pkg_type, db_type = _enum_value(version), _enum_value(pkg_type), _enum_value(db_type)
+        entry = index.get((db_type, pkg_type, version))
+        if not entry:
+            raise PackageNotExistException(version=version, pkg_type=pkg_type, db_type=db_type)
+        if not bk_biz_id:
+            return entry["newest"][1]
+
+        # 取全业务可用和当前业务灰度可用中较新的一个
+        candidates = [candidate for candidate in [entry["public"], entry["biz"].get(bk_biz_id)] if candidate]
+        if not candidates:
+            raise PackageNotExistException(version=version, pkg_type=pkg_type, db_type=db_type)
+        return min(candidates, key=lambda candidate: candidate[0])[1]
+
+    def get_latest_package(
+        self,
+        version: str,
+        pkg_type: str,
+        bk_biz_id: Optional[int] = None,
+        db_type: Optional[str] = DBType.MySQL,
+        name: Optional[str] = None,
+    ) -> Package:
+        """
+        根据版本和包类型获取最新的介质包，参数同 Package.get_latest_package
+        """
+        if not self.config["enabled"]:
+            return Package.get_latest_package(version, pkg_type, bk_biz_id, db_type, name)
+        return self.resolve(self.get_index(), version, pkg_type, bk_biz_id, db_type)
+
+    def get_latest_packages(self, specs: List[Dict]) -> List[Package]:
+        """
+        一次性解析一组介质包，只检查一次目录版本
+        @param specs: 介质包描述列表，每一项的参数同 get_latest_package，如 [{"version": "latest", "pkg_type": "dbbackup"}]
+        """
+        if not self.config["enabled"]:
+            return [Package.get_latest_package(**spec) for spec in specs]
+
+        index = self.get_index()
+        return [
+            self.resolve(
+                index, spec["version"], spec["pkg_type"], spec.get("bk_biz_id"), spec.get("db_type", DBType.MySQL)
+            )
+            for spec in specs
+        ]
+
+
+package_catalog = PackageCatalog()
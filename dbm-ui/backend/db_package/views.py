@@ -23,6 +23,7 @@ from backend.bk_web import viewsets
 from backend.bk_web.swagger import common_swagger_auto_schema
 from backend.core.storages.handlers import StorageHandler
 from backend.core.storages.storage import get_storage
+from backend.db_package.catalog import notify_package_changed
 from backend.db_package.constants import DB_PACKAGE_TAG, INSTALL_PACKAGE_LIST, PARSE_FILE_EXT, PackageType
 from backend.db_package.exceptions import PackageNotExistException
 from backend.db_package.filters import PackageListFilter
@@ -103,6 +104,8 @@ class DBPackageViewSet(viewsets.AuditedModelViewSet):
         with atomic():
             old_packages.delete()
             Package.objects.bulk_create([Package(**info) for info in sync_medium_infos])
+            # bulk_create 不会触发信号，需要主动通知介质包目录
+            notify_package_changed()
 
         return Response()
 
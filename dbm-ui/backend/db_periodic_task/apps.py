@@ -9,12 +9,28 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import logging
+
+from celery.signals import beat_init
 from django.apps import AppConfig
 
+logger = logging.getLogger("root")
+
+
+def sync_periodic_tasks_on_beat_init(sender=None, **kwargs):
+    """beat 启动时同步本地周期任务，web 和 worker 进程导入任务模块时不再写数据库"""
+    from backend.db_periodic_task.local_tasks.register import sync_local_periodic_tasks
+
+    try:
+        sync_local_periodic_tasks()
+    except Exception as err:  # pylint: disable=broad-except
+        # 同步失败不影响 beat 启动，沿用数据库中已有的周期任务
+        logger.exception(f"sync local periodic tasks failed: {err}")
+
 
 class PeriodicTaskConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "backend.db_periodic_task"
 
     def ready(self):
-        pass
+        beat_init.connect(sync_periodic_tasks_on_beat_init, weak=False)
@@ -22,10 +22,5 @@ from backend.db_periodic_task.local_tasks.redis_autofix import *
 from backend.db_periodic_task.local_tasks.redis_backup import *
 from backend.db_periodic_task.local_tasks.redis_clusternodes_update import *
 from backend.db_periodic_task.local_tasks.ticket import *
-from backend.db_periodic_task.models import DBPeriodicTask
 
-from ..constants import PeriodicTaskType
-from .register import registered_local_tasks
-
-# 删除过期的本地周期任务
-DBPeriodicTask.delete_legacy_periodic_task(registered_local_tasks, PeriodicTaskType.LOCAL.value)
+# 导入时只登记任务，周期任务的创建、更新和过期任务的删除由 register.sync_local_periodic_tasks 统一完成
@@ -201,6 +201,10 @@ QUERY_TEMPLATE = {
         (avg_over_time(custom:dbm_report_channel:redis_dbmon_heart_beat{
             {cluster_domain="{cluster_domain}",%s}
         }[1m]))""",
+        # 按集群域名批量查询心跳，%s 为集群域名的正则分支
+        "heartbeat_group": """
+        avg by (cluster_domain, target)
+        (avg_over_time(custom:dbm_report_channel:redis_dbmon_heart_beat{cluster_domain=~"^(%s)$"}[1m]))""",
     },
 }
 
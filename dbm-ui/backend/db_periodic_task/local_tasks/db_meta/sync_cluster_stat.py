@@ -10,7 +10,6 @@ specific language governing permissions and limitations under the License.
 """
 import copy
 import datetime
-import json
 import logging
 from collections import defaultdict
 
@@ -23,7 +22,7 @@ from backend import env
 from backend.components import BKMonitorV3Api
 from backend.constants import CACHE_CLUSTER_STATS
 from backend.db_meta.enums import ClusterType
-from backend.db_meta.models import Cluster
+from backend.db_meta.models import Cluster, ClusterCapacityStat
 from backend.db_periodic_task.local_tasks import register_periodic_task
 from backend.db_periodic_task.local_tasks.db_meta.constants import (
     QUERY_TEMPLATE,
@@ -31,6 +30,7 @@ from backend.db_periodic_task.local_tasks.db_meta.constants import (
     UNIFY_QUERY_PARAMS,
 )
 from backend.db_periodic_task.utils import TimeUnit, calculate_countdown
+from backend.db_services.dbbase.cluster.capacity import ClusterCapacityForecaster
 
 logger = logging.getLogger("celery")
 
@@ -123,9 +123,18 @@ def sync_cluster_stat_by_cluster_type(bk_biz_id, cluster_type):
             continue
         cap["in_use"] = round(cap["used"] * 100.0 / cap["total"], 2)
 
-    cache.set(
-        f"{CACHE_CLUSTER_STATS}_{bk_biz_id}_{cluster_type}", json.dumps(cluster_stats), timeout=1 * TimeUnit.HOUR
-    )
+    # 记录容量历史并预测剩余可用天数，失败时不影响当前容量的更新
+    try:
+        ClusterCapacityStat.record(bk_biz_id, cluster_type, cluster_stats, timezone.now())
+        forecasts = ClusterCapacityForecaster.forecast(bk_biz_id, [cluster_type])
+        for forecast in forecasts.values():
+            if forecast["immute_domain"] in cluster_stats:
+                cluster_stats[forecast["immute_domain"]]["days_to_full"] = forecast["days_to_full"]
+    except Exception as e:  # pylint: disable=broad-except
+        logger.error("record cluster capacity error: %s -> %s", cluster_type, e)
+
+    # 缓存本身按 json 序列化，直接写入字典，读取时无需再次解码
+    cache.set(f"{CACHE_CLUSTER_STATS}_{bk_biz_id}_{cluster_type}", dict(cluster_stats), timeout=1 * TimeUnit.HOUR)
 
 
 @register_periodic_task(run_every=crontab(hour="*/1", minute=0))
@@ -135,6 +144,8 @@ def sync_cluster_stat_from_monitor():
     """
 
     logger.info("sync_cluster_stat_from_monitor started")
+    ClusterCapacityStat.clear_expired(timezone.now(), ClusterCapacityForecaster.config()["retention_days"])
+
     biz_cluster_types = Cluster.objects.values_list("bk_biz_id", "cluster_type").distinct()
 
     count = len(biz_cluster_types)
@@ -11,7 +11,6 @@ specific language governing permissions and limitations under the License.
 import datetime
 import json
 import logging
-import os
 
 from blueapps.core.celery.celery import app
 from celery.schedules import crontab
@@ -21,9 +20,9 @@ from django.utils import timezone
 from backend import env
 from backend.configuration.constants import DEFAULT_DB_ADMINISTRATORS, PLAT_BIZ_ID, SystemSettingsEnum
 from backend.configuration.models import DBAdministrator, SystemSettings
-from backend.db_monitor.constants import DEFAULT_ALERT_NOTICE, MONITOR_EVENTS, TPLS_ALARM_DIR, TargetPriority
-from backend.db_monitor.exceptions import BkMonitorSaveAlarmException
-from backend.db_monitor.models import CollectInstance, DispatchGroup, MonitorPolicy, NoticeGroup
+from backend.db_monitor.constants import DEFAULT_ALERT_NOTICE, MONITOR_EVENTS
+from backend.db_monitor.models import CollectInstance, MonitorPolicy, NoticeGroup
+from backend.db_monitor.policy_sync import monitor_policy_syncer
 from backend.db_monitor.tasks import update_app_policy
 from backend.db_periodic_task.local_tasks.register import register_periodic_task
 from backend.db_periodic_task.utils import TimeUnit, calculate_countdown
@@ -73,82 +72,18 @@ def update_dba_notice_group(dba_id: int):
 
 @register_periodic_task(run_every=crontab(minute="*/5"))
 def sync_plat_monitor_policy():
-    """同步平台告警策略"""
-    skip_dir = "v1"
+    """同步平台告警策略，仅处理内容或版本有变化的模板"""
     now = datetime.datetime.now(timezone.utc)
     logger.warning("[sync_plat_monitor_policy] sync bkm alarm policy start: %s", now)
 
-    # 逐个json导入，本地+远程
-    updated_policies = 0
-    for root, dirs, files in os.walk(TPLS_ALARM_DIR):
-        if skip_dir in dirs:
-            dirs.remove(skip_dir)
-
-        for alarm_tpl in files:
-            with open(os.path.join(root, alarm_tpl), "r", encoding="utf-8") as f:
-                logger.info("[sync_plat_monitor_policy] start sync bkm alarm tpl: %s " % alarm_tpl)
-                try:
-                    template_dict = json.loads(f.read())
-                    # 监控API不支持传入额外的字段
-                    template_dict.pop("export_at", "")
-                    policy_name = template_dict["name"]
-                except json.decoder.JSONDecodeError:
-                    logger.error("[sync_plat_monitor_policy] load template failed: %s", alarm_tpl)
-                    continue
-
-                deleted = template_dict.pop("deleted", False)
-
-                if not template_dict.get("details"):
-                    logger.error(("[sync_plat_monitor_policy] template %s has no details" % alarm_tpl))
-                    continue
-
-                # patch template
-                template_dict["details"]["labels"] = list(set(template_dict["details"]["labels"]))
-                template_dict["details"]["name"] = policy_name
-                template_dict["details"]["priority"] = TargetPriority.PLATFORM.value
-                # 平台策略仅开启基于分派通知
-                template_dict["details"]["notice"]["options"]["assign_mode"] = ["by_rule"]
-
-                policy = MonitorPolicy(**template_dict)
-
-            policy_name = policy.name
-            logger.info("[sync_plat_monitor_policy] start sync bkm alarm policy: %s " % policy_name)
-            try:
-                synced_policy = MonitorPolicy.objects.get(bk_biz_id=policy.bk_biz_id, name=policy_name)
-
-                if deleted:
-                    logger.info("[sync_plat_monitor_policy] delete old alarm: %s " % policy_name)
-                    synced_policy.delete()
-                    continue
-
-                if synced_policy.version >= policy.version:
-                    logger.info("[sync_plat_monitor_policy] skip same version alarm: %s " % policy_name)
-                    continue
-
-                for keeped_field in MonitorPolicy.KEEPED_FIELDS:
-                    setattr(policy, keeped_field, getattr(synced_policy, keeped_field))
-
-                policy.details["id"] = synced_policy.monitor_policy_id
-                logger.info("[sync_plat_monitor_policy] update bkm alarm policy: %s " % policy_name)
-            except MonitorPolicy.DoesNotExist:
-                logger.info("[sync_plat_monitor_policy] create bkm alarm policy: %s " % policy_name)
-
-            try:
-                # fetch targets/test_rules/notify_rules/notify_groups from parent details
-                for attr, value in policy.parse_details().items():
-                    setattr(policy, attr, value)
-
-                policy.save()
-                updated_policies += 1
-                logger.error("[sync_plat_monitor_policy] save bkm alarm policy success: %s", policy_name)
-            except BkMonitorSaveAlarmException as e:
-                logger.error("[sync_plat_monitor_policy] save bkm alarm policy failed: %s, %s ", policy_name, e)
+    counts = monitor_policy_syncer.sync_plat_policies()
 
     logger.warning(
-        "[sync_plat_monitor_policy] finish sync bkm alarm policy end: %s, update_cnt: %s",
+        "[sync_plat_monitor_policy] finish sync bkm alarm policy end: %s, counts: %s",
         datetime.datetime.now(timezone.utc) - now,
-        updated_policies,
+        counts,
     )
+    return counts
 
 
 @register_periodic_task(run_every=crontab(minute=0, hour="*/1"))
@@ -171,16 +106,8 @@ def sync_plat_dispatch_policy():
 
 @app.task
 def sync_biz_dispatch_policy(bk_biz_id):
-    latest_rules = DispatchGroup.get_rules(bk_biz_id)
-    try:
-        dispatch_group = DispatchGroup.objects.get(bk_biz_id=bk_biz_id)
-        logger.info("sync_plat_dispatch_policy: update biz_rules(%s)\n %s \n", bk_biz_id, latest_rules)
-        dispatch_group.rules = latest_rules
-        dispatch_group.save()
-    except DispatchGroup.DoesNotExist:
-        logger.info("sync_plat_dispatch_policy: create biz_rules(%s)\n %s \n", bk_biz_id, latest_rules)
-        dispatch_group = DispatchGroup(bk_biz_id=bk_biz_id, rules=latest_rules)
-        dispatch_group.save()
+    """同步业务分派策略，规则没有变化时不调用监控接口"""
+    return monitor_policy_syncer.sync_dispatch_group(bk_biz_id)
 
 
 @register_periodic_task(run_every=crontab(minute="*/5"))
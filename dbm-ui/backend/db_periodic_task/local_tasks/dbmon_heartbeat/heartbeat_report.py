@@ -11,7 +11,9 @@ specific language governing permissions and limitations under the License.
 import copy
 import datetime
 import logging
+from collections import defaultdict
 from datetime import timedelta
+from typing import Dict, List, Set
 
 from django.db.models import Q
 from django.utils import timezone
@@ -32,16 +34,26 @@ from backend.db_services.redis.util import is_predixy_proxy_type, is_twemproxy_p
 
 logger = logging.getLogger("root")
 
+# 单次查询返回的最大序列数，超过后监控会截断结果
+HEARTBEAT_QUERY_SERIES_LIMIT = UNIFY_QUERY_PARAMS["slimit"]
+# 单次查询的最大集群数，避免 promql 过长
+HEARTBEAT_QUERY_MAX_DOMAINS = 100
+# 集群信息及心跳报告的批次大小
+HEARTBEAT_BATCH_SIZE = 500
+
 
 def check_dbmon_heart_beat():
     _check_dbmon_heart_beat()
 
 
-def query_by_cluster_dimension(cluster_domain, cap_key="heartbeat", cluster_type="dbmon"):
-    logger.info("+===+++++=== cluster is: {} +++++===++++ ".format(cluster_domain))
+def query_by_cluster_domains(cluster_domains: List[str], cap_key="heartbeat_group", cluster_type="dbmon") -> Dict:
+    """
+    批量查询多个集群的心跳，返回 集群域名 -> 心跳正常的ip 集合
+    结果的序列数达到监控的上限时，对半拆分集群后分别查询
+    """
     query_template = QUERY_TEMPLATE.get(cluster_type)
     if not query_template:
-        logger.error("No query template for cluster type: %s,cluster name: %s", cluster_type, cluster_domain)
+        logger.error("No query template for cluster type: %s", cluster_type)
         return {}
     # now-5/15m ~ now
     end_time = datetime.datetime.now(timezone.utc)
@@ -50,28 +62,53 @@ def query_by_cluster_dimension(cluster_domain, cap_key="heartbeat", cluster_type
     params["bk_biz_id"] = env.DBA_APP_BK_BIZ_ID
     params["start_time"] = int(start_time.timestamp())
     params["end_time"] = int(end_time.timestamp())
-    # 设置要查询的 cluster_domain 变量
-    params["query_configs"][0]["promql"] = query_template[cap_key].format(cluster_domain=cluster_domain)
+    # 域名中的 . 在正则中可以匹配任意字符，多匹配的序列在下面按域名过滤掉
+    params["query_configs"][0]["promql"] = query_template[cap_key] % "|".join(cluster_domains)
     try:
         series = BKMonitorV3Api.unify_query(params, use_admin=True)["series"]
     except Exception as e:
         logger.error(f"Error occurred while doing  BKMonitorV3Api.unify_query(: {e}")
-        raise NotImplementedError("{} get dbmon heartbeat failed from BKMonitorV3Api ".format(cluster_domain))
+        raise NotImplementedError("{} get dbmon heartbeat failed from BKMonitorV3Api ".format(cluster_domains))
+
+    if len(series) >= HEARTBEAT_QUERY_SERIES_LIMIT and len(cluster_domains) > 1:
+        middle = len(cluster_domains) // 2
+        heartbeat_ips = query_by_cluster_domains(cluster_domains[:middle], cap_key, cluster_type)
+        heartbeat_ips.update(query_by_cluster_domains(cluster_domains[middle:], cap_key, cluster_type))
+        return heartbeat_ips
 
-    dbmon_heartbeat_data = []
+    domains = set(cluster_domains)
+    heartbeat_ips: Dict[str, Set[str]] = defaultdict(set)
     for item in series:
-        found = False
+        dimensions = item["dimensions"]
+        if dimensions.get("cluster_domain") not in domains:
+            continue
         # 获取的五个点，如果有一个为1，则认为心跳上报正常，如果都不为1则，心跳异常
-        for value, time in item["datapoints"]:
-            if value == 1:
-                dbmon_heartbeat_data.append({"dimensions": item["dimensions"], "time": time, "value": value})
-                found = True
-                break
-        if not found:
-            dbmon_heartbeat_data.append(
-                {"dimensions": item["dimensions"], "time": item["datapoints"][-1][1], "value": None}
-            )
-    return dbmon_heartbeat_data
+        if any(value == 1 for value, __ in item["datapoints"]):
+            heartbeat_ips[dimensions["cluster_domain"]].add(dimensions["target"])
+    return heartbeat_ips
+
+
+def shard_cluster_domains(cluster_infos: List[Dict]) -> List[List[str]]:
+    """按集群的节点数切分查询，使每次查询预计返回的序列数不超过监控的上限"""
+    shards, shard, series_count = [], [], 0
+    for cluster_info in cluster_infos:
+        node_count = len(get_cluster_nodes(cluster_info))
+        if shard and (
+            series_count + node_count > HEARTBEAT_QUERY_SERIES_LIMIT or len(shard) >= HEARTBEAT_QUERY_MAX_DOMAINS
+        ):
+            shards.append(shard)
+            shard, series_count = [], 0
+        shard.append(cluster_info["immute_domain"])
+        series_count += node_count
+    if shard:
+        shards.append(shard)
+    return shards
+
+
+def get_cluster_nodes(cluster_info: Dict) -> List[str]:
+    return (
+        cluster_info["redis_master_ips_set"] + cluster_info["redis_slave_ips_set"] + cluster_info["twemproxy_ips_set"]
+    )
 
 
 def get_report_subtype_for_storage(cluster_type):
@@ -96,9 +133,59 @@ def get_report_subtype_for_proxy(cluster_type):
     return heart_beat_subtype
 
 
+def get_missing_instance(cluster_info: Dict, ip: str):
+    """获取缺失心跳的ip对应的实例及报告子类型"""
+    cluster_type, cluster_domain = cluster_info["cluster_type"], cluster_info["immute_domain"]
+    # 如果是后端存储节点，再区分cache ,ssd ,tendisplus
+    if ip in cluster_info["redis_master_ips_set"] or ip in cluster_info["redis_slave_ips_set"]:
+        heart_beat_subtype = get_report_subtype_for_storage(cluster_type)
+        # 获取端口范围：30000-30010
+        port_ranges = []
+        if ip in cluster_info["redis_master_ips_set"]:
+            redis_set = cluster_info["redis_master_set"]
+        elif ip in cluster_info["redis_slave_ips_set"]:
+            redis_set = cluster_info["redis_slave_set"]
+        else:
+            raise NotImplementedError("Dbmon ip:{} not in cluster:{}".format(ip, cluster_domain))
+        # ssd 和cache 有segment，tendisplus没有
+        for item in redis_set:
+            if item.startswith(ip):
+                if is_twemproxy_proxy_type(cluster_type):
+                    # 格式为 "ip:port range"
+                    ip_port, range = item.split(" ")
+                    ip, port = ip_port.split(IP_PORT_DIVIDER)
+                    port_ranges.append(port)
+                elif cluster_type == ClusterType.TendisPredixyTendisplusCluster.value:
+                    # 格式为 "ip:port"
+                    ip, port = item.split(IP_PORT_DIVIDER)
+                    port_ranges.append(port)
+                else:
+                    raise NotImplementedError("Dbmon Not supported tendis type:{}".format(cluster_type))
+        if len(port_ranges) > 1:
+            start_port = min(port_ranges)
+            end_port = max(port_ranges)
+            port_range = f"{start_port}-{end_port}"
+        # tendisplus 后面线上是部署1个实例
+        elif len(port_ranges) == 1:
+            port_range = port_ranges
+        else:
+            raise NotImplementedError("Dbmon ip:{} not get port_ranges for cluster:{}".format(ip, cluster_domain))
+        instance = "{} {}".format(ip, port_range)
+    # 如果是代理proxy，再区分是twemproxy还是predixy
+    elif ip in cluster_info["twemproxy_ips_set"]:
+        twemproxy_ports = cluster_info.get("twemproxy_ports", [])
+        instance = "{} {}".format(ip, twemproxy_ports[0])
+        heart_beat_subtype = get_report_subtype_for_proxy(cluster_type)
+    else:
+        raise NotImplementedError(" %s is not identified in Dbmon" % ip)
+    return instance, heart_beat_subtype
+
+
 def _check_dbmon_heart_beat():
     """
     获取dbmon心跳信息
+    按集群类型分组，每组集群合并为一条 promql 查询心跳(超过监控上限时再切分)，在内存中按集群计算缺失心跳的节点，
+    最后批量写入心跳报告
     """
     """
     删除时间大于60天的记录
@@ -111,100 +198,73 @@ def _check_dbmon_heart_beat():
         | Q(cluster_type=ClusterType.TwemproxyTendisSSDInstance)
         | Q(cluster_type=ClusterType.TendisTwemproxyRedisInstance)
     ) & Q(create_at__lt=timezone.now() - timedelta(hours=2))
-    # 遍历集群
-    for c in Cluster.objects.filter(query):
-        logger.info("+===+++++===  start check {} dbmon heartbeat +++++===++++ ".format(c.immute_domain))
-        logger.info("+===+++++===  cluster type is: {} +++++===++++ ".format(c.cluster_type))
-        # 初始化集群机器列表
-        cluster_nodes = []
+    clusters = list(Cluster.objects.filter(query).order_by("id"))
+    if not clusters:
+        return
+
+    # 批量获取集群信息、业务英文名和dba，通过bk_biz_id获取dba列表,业务没设置的话，用平台的配置
+    cluster_infos: List[Dict] = []
+    for index in range(0, len(clusters), HEARTBEAT_BATCH_SIZE):
+        cluster_ids = [c.id for c in clusters[index : index + HEARTBEAT_BATCH_SIZE]]
         try:
-            cluster_info = api.cluster.nosqlcomm.other.get_cluster_detail(c.id)[0]
+            cluster_infos.extend(api.cluster.nosqlcomm.other.get_clusters_details(cluster_ids))
         except Exception as e:
             logger.error(f"Error occurred while getting cluster_info: {e}")
-            raise NotImplementedError("{} get cluster_info failed".format(c.immute_domain))
-        cluster_nodes.extend(cluster_info["redis_master_ips_set"])
-        cluster_nodes.extend(cluster_info["redis_slave_ips_set"])
-        cluster_nodes.extend(cluster_info["twemproxy_ips_set"])
-        logger.info("+===+++++===  cluster all nodes  is: {} +++++===++++ ".format(cluster_nodes))
-        try:
-            # 通过bk_biz_id获取dba列表,业务没设置的话，用平台的配置
-            redis_dba = DBAdministrator().get_biz_db_type_admins(c.bk_biz_id, DBType.Redis)
-            app = AppCache.objects.get(bk_biz_id=c.bk_biz_id).db_app_abbr
-        except Exception as e:
-            logger.error(f"Error occurred while getting redis_dba and app: {e}")
+            raise NotImplementedError("{} get cluster_info failed".format(cluster_ids))
+    cluster_info_map = {info["id"]: info for info in cluster_infos}
+
+    bk_biz_ids = {c.bk_biz_id for c in clusters}
+    app_map = dict(AppCache.objects.filter(bk_biz_id__in=bk_biz_ids).values_list("bk_biz_id", "db_app_abbr"))
+    dba_map = {
+        bk_biz_id: DBAdministrator().get_biz_db_type_admins(bk_biz_id, DBType.Redis) for bk_biz_id in bk_biz_ids
+    }
+
+    # 按集群类型分组查询心跳
+    #   整个集群都没数据或者部分ip没有数据，都通过集合拿到缺失心跳的ip
+    cluster_type__infos: Dict[str, List[Dict]] = defaultdict(list)
+    for c in clusters:
+        cluster_type__infos[c.cluster_type].append(cluster_info_map[c.id])
+    heartbeat_ips: Dict[str, Set[str]] = {}
+    for cluster_type, infos in cluster_type__infos.items():
+        for cluster_domains in shard_cluster_domains(infos):
+            logger.info("check {} dbmon heartbeat of {} clusters".format(cluster_type, len(cluster_domains)))
+            heartbeat_ips.update(query_by_cluster_domains(cluster_domains))
+
+    reports: List[DbmonHeartbeatReport] = []
+    for c in clusters:
+        cluster_info = cluster_info_map[c.id]
+        if c.bk_biz_id not in app_map:
+            logger.error(f"Error occurred while getting app of {c.bk_biz_id}")
             raise NotImplementedError("{} get redis_dba and ap failed".format(c.immute_domain))
 
-        # 按集群查询
-        #   这样子可能结果为[],整个集群都没数据 dbmon_heartbeat_data:[]
-        #   也有可能部分ip没有数据
-        #   通过集合拿到缺失心跳的ip
-        dbmon_heartbeat_data = query_by_cluster_dimension(c.immute_domain)
         # 缺失心跳的或者心跳为None的
-        missing_heartbeat_ips = set(cluster_nodes) - {
-            data["dimensions"]["target"] for data in dbmon_heartbeat_data if data["value"] == 1
-        }
-        logger.warning(_("+===+++++=== missing_heartbeat_ips 实例:{}  +++++===++++ ".format(missing_heartbeat_ips)))
+        missing_heartbeat_ips = set(get_cluster_nodes(cluster_info)) - heartbeat_ips.get(c.immute_domain, set())
+        if missing_heartbeat_ips:
+            logger.warning(
+                "+===+++++=== {} missing_heartbeat_ips 实例:{}  +++++===++++ ".format(
+                    c.immute_domain, missing_heartbeat_ips
+                )
+            )
         for ip in missing_heartbeat_ips:
-            # 如果是后端存储节点，再区分cache ,ssd ,tendisplus
-            if ip in cluster_info["redis_master_ips_set"] or ip in cluster_info["redis_slave_ips_set"]:
-                heart_beat_subtype = get_report_subtype_for_storage(c.cluster_type)
-                # 获取端口范围：30000-30010
-                port_ranges = []
-                if ip in cluster_info["redis_master_ips_set"]:
-                    redis_set = cluster_info["redis_master_set"]
-                elif ip in cluster_info["redis_slave_ips_set"]:
-                    redis_set = cluster_info["redis_slave_set"]
-                else:
-                    raise NotImplementedError("Dbmon ip:{} not in cluster:{}".format(ip, c.immute_domain))
-                # ssd 和cache 有segment，tendisplus没有
-                for item in redis_set:
-                    if item.startswith(ip):
-                        if is_twemproxy_proxy_type(c.cluster_type):
-                            # 格式为 "ip:port range"
-                            ip_port, range = item.split(" ")
-                            ip, port = ip_port.split(IP_PORT_DIVIDER)
-                            port_ranges.append(port)
-                        elif c.cluster_type == ClusterType.TendisPredixyTendisplusCluster.value:
-                            # 格式为 "ip:port"
-                            ip, port = item.split(IP_PORT_DIVIDER)
-                            port_ranges.append(port)
-                        else:
-                            raise NotImplementedError("Dbmon Not supported tendis type:{}".format(c.cluster_type))
-                if len(port_ranges) > 1:
-                    start_port = min(port_ranges)
-                    end_port = max(port_ranges)
-                    port_range = f"{start_port}-{end_port}"
-                # tendisplus 后面线上是部署1个实例
-                elif len(port_ranges) == 1:
-                    port_range = port_ranges
-                else:
-                    raise NotImplementedError(
-                        "Dbmon ip:{} not get port_ranges for cluster:{}".format(ip, c.immute_domain)
-                    )
-                instance = "{} {}".format(ip, port_range)
-            # 如果是代理proxy，再区分是twemproxy还是predixy
-            elif ip in cluster_info["twemproxy_ips_set"]:
-                twemproxy_ports = cluster_info.get("twemproxy_ports", [])
-                instance = "{} {}".format(ip, twemproxy_ports[0])
-                heart_beat_subtype = get_report_subtype_for_proxy(c.cluster_type)
-            else:
-                raise NotImplementedError(" %s is not identified in Dbmon" % ip)
-            msg = _("实例 {} dbmon 心跳超时").format(instance)
-            try:
-                # 心跳超时的时间点就用这条记录的创建时间代替了，这里对时间要求不严格
-                DbmonHeartbeatReport.objects.create(
+            instance, heart_beat_subtype = get_missing_instance(cluster_info, ip)
+            # 心跳超时的时间点就用这条记录的创建时间代替了，这里对时间要求不严格
+            reports.append(
+                DbmonHeartbeatReport(
                     creator=c.creator,
                     bk_biz_id=c.bk_biz_id,
                     bk_cloud_id=c.bk_cloud_id,
                     status=False,
-                    msg=msg,
+                    msg=_("实例 {} dbmon 心跳超时").format(instance),
                     cluster_type=heart_beat_subtype,
                     cluster=c.immute_domain,
                     instance=instance,
-                    app=app,
-                    dba=redis_dba,
+                    app=app_map[c.bk_biz_id],
+                    dba=dba_map[c.bk_biz_id],
                 )
-                logger.warning(_("+===+++++=== 实例 {} dbmon 心跳超时  +++++===++++ ".format(instance)))
-            except Exception as e:
-                logger.error(f"Error occurred while inserting data: {e}")
-                raise NotImplementedError("{} insert data failed".format(c.immute_domain))
+            )
+
+    try:
+        DbmonHeartbeatReport.objects.bulk_create(reports, batch_size=HEARTBEAT_BATCH_SIZE)
+    except Exception as e:
+        logger.error(f"Error occurred while inserting data: {e}")
+        raise NotImplementedError("insert dbmon heartbeat report failed")
@@ -10,13 +10,17 @@ specific language governing permissions and limitations under the License.
 """
 import datetime
 import json
-from typing import Dict, List
+from typing import Dict, Iterable, List
 
 from backend import env
 from backend.components.bklog.client import BKLogApi
+from backend.components.bklog.handler import BKLogHandler
 from backend.utils.string import pascal_to_snake
 from backend.utils.time import datetime2str
 
+# 单个集群保留的最大日志条数，与按集群查询时的 size 保持一致
+MAX_LOGS_PER_CLUSTER = 6000
+
 
 def _get_log_from_bklog(collector, start_time, end_time, query_string="*") -> List[Dict]:
     """
@@ -47,6 +51,13 @@ def _get_log_from_bklog(collector, start_time, end_time, query_string="*") -> Li
     return backup_logs
 
 
+def _get_cluster_id(log: Dict):
+    try:
+        return int(log.get("cluster_id"))
+    except (TypeError, ValueError):
+        return None
+
+
 class ClusterBackup:
     """
     集群前一天备份信息，包括全备和binlog
@@ -64,7 +75,6 @@ class ClusterBackup:
         :param start_time: 开始时间
         :param end_time: 结束时间
         """
-        backup_files = []
         backup_logs = _get_log_from_bklog(
             collector="mysql_dbbackup_result",
             start_time=start_time,
@@ -72,29 +82,48 @@ class ClusterBackup:
             # query_string=f'log: "cluster_id: {self.cluster_id}"',
             query_string=f'log: "cluster_address: \\"{self.cluster_domain}\\""',
         )
-        for log in backup_logs:
-            bf = {
-                "bk_biz_id": log["bk_biz_id"],
-                "backup_id": log["backup_id"],
-                "cluster_domain": log["cluster_address"],
-                "cluster_id": log["cluster_id"],
-                "mysql_host": log["backup_host"],
-                "mysql_port": log["backup_port"],
-                "mysql_role": log["mysql_role"],
-                "backup_type": log["backup_type"],
-                "file_list": log["file_list"],
-                "data_schema_grant": log["data_schema_grant"],
-                "is_full_backup": log["is_full_backup"],
-                "total_filesize": log["total_filesize"],
-                "encrypt_enable": log["encrypt_enable"],
-                "mysql_version": log["mysql_version"],
-                "backup_begin_time": log["backup_begin_time"],
-                "backup_end_time": log["backup_end_time"],
-                "backup_consistent_time": log["backup_consistent_time"],
-                "shard_value": log["shard_value"],
-            }
-            backup_files.append(bf)
-        return backup_files
+        return [self.format_backup_log(log) for log in backup_logs]
+
+    @staticmethod
+    def format_backup_log(log: Dict) -> Dict:
+        return {
+            "bk_biz_id": log["bk_biz_id"],
+            "backup_id": log["backup_id"],
+            "cluster_domain": log["cluster_address"],
+            "cluster_id": log["cluster_id"],
+            "mysql_host": log["backup_host"],
+            "mysql_port": log["backup_port"],
+            "mysql_role": log["mysql_role"],
+            "backup_type": log["backup_type"],
+            "file_list": log["file_list"],
+            "data_schema_grant": log["data_schema_grant"],
+            "is_full_backup": log["is_full_backup"],
+            "total_filesize": log["total_filesize"],
+            "encrypt_enable": log["encrypt_enable"],
+            "mysql_version": log["mysql_version"],
+            "backup_begin_time": log["backup_begin_time"],
+            "backup_end_time": log["backup_end_time"],
+            "backup_consistent_time": log["backup_consistent_time"],
+            "shard_value": log["shard_value"],
+        }
+
+    @classmethod
+    def scan_backup_logs(
+        cls, start_time: datetime.datetime, end_time: datetime.datetime, cluster_domains: Iterable[str]
+    ) -> Dict[str, List[Dict]]:
+        """
+        一次性遍历时间范围内所有集群的全备记录，按集群域名分组
+        :param start_time: 开始时间
+        :param end_time: 结束时间
+        :param cluster_domains: 需要巡检的集群域名
+        """
+        return BKLogHandler.partition_logs(
+            BKLogHandler.scan_logs("mysql_dbbackup_result", start_time, end_time),
+            key_func=lambda log: log.get("cluster_address"),
+            keys=cluster_domains,
+            max_size=MAX_LOGS_PER_CLUSTER,
+            formatter=cls.format_backup_log,
+        )
 
     def query_binlog_from_bklog(self, start_time: datetime.datetime, end_time: datetime.datetime) -> List[Dict]:
         """
@@ -103,7 +132,6 @@ class ClusterBackup:
         :param start_time: 开始时间
         :param end_time: 结束时间
         """
-        binlogs = []
         backup_logs = _get_log_from_bklog(
             collector="mysql_binlog_result",
             start_time=start_time,
@@ -111,20 +139,39 @@ class ClusterBackup:
             query_string=f'log: "cluster_id: {self.cluster_id}"',
             # query_string=f'log: "cluster_address: \\"{self.cluster_domain}\\""',
         )
-        for log in backup_logs:
-            bl = {
-                "cluster_domain": log["cluster_domain"],
-                "cluster_id": log["cluster_id"],
-                "task_id": log["task_id"],
-                "file_name": log["filename"],  # file_name
-                "file_size": log["size"],
-                "file_mtime": log["file_mtime"],
-                "file_type": "binlog",
-                "mysql_host": log["host"],
-                "mysql_port": log["port"],
-                "mysql_role": log["db_role"],
-                "backup_status": log["backup_status"],
-                "backup_status_info": log["backup_status_info"],
-            }
-            binlogs.append(bl)
-        return binlogs
+        return [self.format_binlog(log) for log in backup_logs]
+
+    @staticmethod
+    def format_binlog(log: Dict) -> Dict:
+        return {
+            "cluster_domain": log["cluster_domain"],
+            "cluster_id": log["cluster_id"],
+            "task_id": log["task_id"],
+            "file_name": log["filename"],  # file_name
+            "file_size": log["size"],
+            "file_mtime": log["file_mtime"],
+            "file_type": "binlog",
+            "mysql_host": log["host"],
+            "mysql_port": log["port"],
+            "mysql_role": log["db_role"],
+            "backup_status": log["backup_status"],
+            "backup_status_info": log["backup_status_info"],
+        }
+
+    @classmethod
+    def scan_binlogs(
+        cls, start_time: datetime.datetime, end_time: datetime.datetime, cluster_ids: Iterable[int]
+    ) -> Dict[int, List[Dict]]:
+        """
+        一次性遍历时间范围内所有集群的binlog备份记录，按集群ID分组
+        :param start_time: 开始时间
+        :param end_time: 结束时间
+        :param cluster_ids: 需要巡检的集群ID
+        """
+        return BKLogHandler.partition_logs(
+            BKLogHandler.scan_logs("mysql_binlog_result", start_time, end_time),
+            key_func=_get_cluster_id,
+            keys=cluster_ids,
+            max_size=MAX_LOGS_PER_CLUSTER,
+            formatter=cls.format_binlog,
+        )
@@ -10,6 +10,8 @@ specific language governing permissions and limitations under the License.
 """
 import logging
 from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
 
 from backend.db_meta.enums import ClusterType
 from backend.db_meta.models import Cluster
@@ -18,46 +20,65 @@ from backend.db_report.enums import MysqlBackupCheckSubType
 from backend.db_report.models import MysqlBackupCheckReport
 
 from .bklog_query import ClusterBackup
-from .check_full_backup import get_query_date_time
+from .check_full_backup import REPORT_BATCH_SIZE, get_query_date_time
 
 logger = logging.getLogger("root")
 
 
 def check_binlog_backup(date_str: str):
-    _check_tendbha_binlog_backup(date_str)
-    _check_tendbcluster_binlog_backup(date_str)
+    start_time, end_time = get_query_date_time(date_str)
+    clusters = list(Cluster.objects.filter(cluster_type__in=[ClusterType.TenDBHA, ClusterType.TenDBCluster]))
+    # 一次性拉取时间范围内所有集群的binlog备份记录，在内存中按集群分组
+    cluster_binlogs = ClusterBackup.scan_binlogs(start_time, end_time, [c.id for c in clusters])
+
+    reports = []
+    reports.extend(_check_tendbha_binlog_backup(clusters, cluster_binlogs, start_time, end_time))
+    reports.extend(_check_tendbcluster_binlog_backup(clusters, cluster_binlogs, start_time, end_time))
+    MysqlBackupCheckReport.objects.bulk_create(reports, batch_size=REPORT_BATCH_SIZE)
 
 
-def _check_tendbha_binlog_backup(date_str: str):
+def _check_tendbha_binlog_backup(
+    clusters: List[Cluster], cluster_binlogs: Dict[int, List[Dict]], start_time: datetime, end_time: datetime
+) -> List[MysqlBackupCheckReport]:
     """
     master 实例必须要有备份binlog
     且binlog序号要连续
     """
     logger.info("==== start check binlog for cluster type {} ====".format(ClusterType.TenDBHA))
-    return _check_binlog_backup(ClusterType.TenDBHA, date_str)
+    return _check_binlog_backup(ClusterType.TenDBHA, clusters, cluster_binlogs, start_time, end_time)
 
 
-def _check_tendbcluster_binlog_backup(date_str: str):
+def _check_tendbcluster_binlog_backup(
+    clusters: List[Cluster], cluster_binlogs: Dict[int, List[Dict]], start_time: datetime, end_time: datetime
+) -> List[MysqlBackupCheckReport]:
     """
     master 实例必须要有备份binlog
     且binlog序号要连续
     """
     logger.info("==== start check binlog for cluster type {} ====".format(ClusterType.TenDBCluster))
-    return _check_binlog_backup(ClusterType.TenDBCluster, date_str)
+    return _check_binlog_backup(ClusterType.TenDBCluster, clusters, cluster_binlogs, start_time, end_time)
 
 
-def _check_binlog_backup(cluster_type, date_str):
+def _check_binlog_backup(
+    cluster_type: str,
+    clusters: List[Cluster],
+    cluster_binlogs: Dict[int, List[Dict]],
+    start_time: datetime,
+    end_time: datetime,
+) -> List[MysqlBackupCheckReport]:
     """
     master 实例必须要有备份binlog
     且binlog序号要连续
     """
-    start_time, end_time = get_query_date_time(date_str)
     logger.info(
         "==== start check binlog for cluster type {}, time range[{},{}] ====".format(
             cluster_type, start_time, end_time
         )
     )
-    for c in Cluster.objects.filter(cluster_type=cluster_type):
+    reports = []
+    for c in clusters:
+        if c.cluster_type != cluster_type:
+            continue
         backup = ClusterBackup(c.id, c.immute_domain)
         logger.info(
             "==== start check binlog for cluster {}, time range[{},{}] ====".format(
@@ -66,7 +87,7 @@ def _check_binlog_backup(cluster_type, date_str):
         )
         # todo 需要获取集群的 master 分片实例，或者分片数
 
-        items = backup.query_binlog_from_bklog(start_time, end_time)
+        items = cluster_binlogs.get(c.id, [])
         instance_binlogs = defaultdict(list)
         shard_binlog_stat = {}
         for i in items:
@@ -87,15 +108,18 @@ def _check_binlog_backup(cluster_type, date_str):
                 backup.success = False
 
         if not backup.success:
-            MysqlBackupCheckReport.objects.create(
-                bk_biz_id=c.bk_biz_id,
-                bk_cloud_id=c.bk_cloud_id,
-                cluster=c.immute_domain,
-                cluster_type=cluster_type,
-                status=False,
-                msg="binlog is not consecutive:{}".format(shard_binlog_stat),
-                subtype=MysqlBackupCheckSubType.BinlogSeq.value,
+            reports.append(
+                MysqlBackupCheckReport(
+                    bk_biz_id=c.bk_biz_id,
+                    bk_cloud_id=c.bk_cloud_id,
+                    cluster=c.immute_domain,
+                    cluster_type=cluster_type,
+                    status=False,
+                    msg="binlog is not consecutive:{}".format(shard_binlog_stat),
+                    subtype=MysqlBackupCheckSubType.BinlogSeq.value,
+                )
             )
+    return reports
 
 
 def is_consecutive_strings(str_list: list):
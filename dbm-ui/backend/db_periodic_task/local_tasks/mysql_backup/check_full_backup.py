@@ -11,6 +11,7 @@ specific language governing permissions and limitations under the License.
 import logging
 from collections import defaultdict
 from datetime import datetime, time, timedelta
+from typing import Dict, List
 
 from django.db.models import Q
 from django.utils import timezone
@@ -24,6 +25,9 @@ from .bklog_query import ClusterBackup
 
 logger = logging.getLogger("root")
 
+# 巡检报表批量写入的批次大小
+REPORT_BATCH_SIZE = 500
+
 
 def get_query_date_time(date_str: str):
     # date_str 为空时，取当前时间的前一天为查询区间，不为空时需要是 2024-05-20 这样的格式，指定查询这一天 00:00:01-23:59:59 的数据
@@ -43,10 +47,28 @@ def get_query_date_time(date_str: str):
 
 
 def check_full_backup(date_str: str):
+    # 清理过期的报表
+    MysqlBackupCheckReport.objects.filter(create_at__lte=timezone.now() - timedelta(days=60)).delete()
+
+    start_time, end_time = get_query_date_time(date_str)
+    tendbha_clusters = list(
+        Cluster.objects.filter(
+            Q(cluster_type=ClusterType.TenDBHA) & Q(create_at__lt=timezone.now() - timedelta(days=1))
+        )
+    )
+    tendbcluster_clusters = list(Cluster.objects.filter(cluster_type=ClusterType.TenDBCluster))
+
+    # 一次性拉取时间范围内所有集群的全备记录，在内存中按集群分组
+    cluster_backup_logs = ClusterBackup.scan_backup_logs(
+        start_time, end_time, [c.immute_domain for c in tendbha_clusters + tendbcluster_clusters]
+    )
+
+    reports = []
     # tendbha 全备巡检
-    _check_tendbha_full_backup(date_str)
+    reports.extend(_check_tendbha_full_backup(tendbha_clusters, cluster_backup_logs, start_time, end_time))
     # tendbcluster 全备巡检
-    _check_tendbcluster_full_backup(date_str)
+    reports.extend(_check_tendbcluster_full_backup(tendbcluster_clusters, cluster_backup_logs, start_time, end_time))
+    MysqlBackupCheckReport.objects.bulk_create(reports, batch_size=REPORT_BATCH_SIZE)
 
 
 class BackupFile:
@@ -97,28 +119,22 @@ def _build_backup_info_files(backups_info: []):
     return backups
 
 
-def _check_tendbha_full_backup(date_str: str):
+def _check_tendbha_full_backup(
+    clusters: List[Cluster], cluster_backup_logs: Dict[str, List[Dict]], start_time: datetime, end_time: datetime
+) -> List[MysqlBackupCheckReport]:
     """
     tendbha 必须有一份完整的备份
     """
-
-    # 清理过期的报表
-    MysqlBackupCheckReport.objects.filter(create_at__lte=timezone.now() - timedelta(days=60)).delete()
-
-    # 检查前一天的全备
-    start_time, end_time = get_query_date_time(date_str)
     logger.info(
         "====  start check full backup for cluster type {}, time range[{},{}] ====".format(
             ClusterType.TenDBHA, start_time, end_time
         )
     )
-    query = Q(cluster_type=ClusterType.TenDBHA) & Q(create_at__lt=timezone.now() - timedelta(days=1))
-    for c in Cluster.objects.filter(query):
+    reports = []
+    for c in clusters:
         logger.info("==== start check full backup for cluster {} ====".format(c.immute_domain))
         backup = ClusterBackup(c.id, c.immute_domain)
-
-        items = backup.query_backup_log_from_bklog(start_time, end_time)
-        backup.backups = _build_backup_info_files(items)
+        backup.backups = _build_backup_info_files(cluster_backup_logs.get(c.immute_domain, []))
 
         for bid, bk in backup.backups.items():
             if bk.is_full_backup == 1:
@@ -126,33 +142,36 @@ def _check_tendbha_full_backup(date_str: str):
                     backup.success = True
                     break
         if not backup.success:
-            MysqlBackupCheckReport.objects.create(
-                bk_biz_id=c.bk_biz_id,
-                bk_cloud_id=c.bk_cloud_id,
-                cluster=c.immute_domain,
-                cluster_type=ClusterType.TenDBHA,
-                status=False,
-                msg="no success full backup found",
-                subtype=MysqlBackupCheckSubType.FullBackup.value,
+            reports.append(
+                MysqlBackupCheckReport(
+                    bk_biz_id=c.bk_biz_id,
+                    bk_cloud_id=c.bk_cloud_id,
+                    cluster=c.immute_domain,
+                    cluster_type=ClusterType.TenDBHA,
+                    status=False,
+                    msg="no success full backup found",
+                    subtype=MysqlBackupCheckSubType.FullBackup.value,
+                )
             )
+    return reports
 
 
-def _check_tendbcluster_full_backup(date_str: str):
+def _check_tendbcluster_full_backup(
+    clusters: List[Cluster], cluster_backup_logs: Dict[str, List[Dict]], start_time: datetime, end_time: datetime
+) -> List[MysqlBackupCheckReport]:
     """
     tendbcluster 集群必须有完整的备份
     """
-    start_time, end_time = get_query_date_time(date_str)
     logger.info(
         "==== start check full backup for cluster type {}, time range[{},{}] ====".format(
             ClusterType.TenDBCluster, start_time, end_time
         )
     )
-
-    for c in Cluster.objects.filter(cluster_type=ClusterType.TenDBCluster):
+    reports = []
+    for c in clusters:
         logger.info("==== start check full backup for cluster {} ====".format(c.immute_domain))
         backup = ClusterBackup(c.id, c.immute_domain)
-        items = backup.query_backup_log_from_bklog(start_time, end_time)
-        backup.backups = _build_backup_info_files(items)
+        backup.backups = _build_backup_info_files(cluster_backup_logs.get(c.immute_domain, []))
 
         backup_id_stat = defaultdict(list)
         backup_id_invalid = {}
@@ -175,12 +194,15 @@ def _check_tendbcluster_full_backup(date_str: str):
 
         # 只记录失败的结果
         if not backup.success:
-            MysqlBackupCheckReport.objects.create(
-                bk_biz_id=c.bk_biz_id,
-                bk_cloud_id=c.bk_cloud_id,
-                cluster=c.immute_domain,
-                cluster_type=ClusterType.TenDBCluster,
-                status=False,
-                msg="no success full backup found:{}".format(message),
-                subtype=MysqlBackupCheckSubType.FullBackup.value,
+            reports.append(
+                MysqlBackupCheckReport(
+                    bk_biz_id=c.bk_biz_id,
+                    bk_cloud_id=c.bk_cloud_id,
+                    cluster=c.immute_domain,
+                    cluster_type=ClusterType.TenDBCluster,
+                    status=False,
+                    msg="no success full backup found:{}".format(message),
+                    subtype=MysqlBackupCheckSubType.FullBackup.value,
+                )
             )
+    return reports
@@ -13,6 +13,7 @@ import logging
 from celery.schedules import crontab
 
 from backend.db_periodic_task.local_tasks.register import register_periodic_task
+from backend.db_services.mysql.fixpoint_rollback.catalog import BackupCatalogHandler
 
 from .check_binlog_backup import check_binlog_backup
 from .check_full_backup import check_full_backup
@@ -27,3 +28,13 @@ def mysql_backup_check_task():
     """
     check_full_backup("")
     check_binlog_backup("")
+
+
+@register_periodic_task(run_every=crontab(minute="*/10"))
+def sync_mysql_backup_catalog():
+    """
+    增量导入 mysql 备份日志到备份目录
+    """
+    counts = BackupCatalogHandler.ingest()
+    if counts is not None:
+        logger.info("sync mysql backup catalog: {}".format(counts))
@@ -11,17 +11,21 @@ specific language governing permissions and limitations under the License.
 import datetime
 import json
 import logging
-from typing import Dict, List
+from typing import Dict, Iterable, List
 
 from django.utils.translation import ugettext as _
 
 from backend import env
 from backend.components.bklog.client import BKLogApi
+from backend.components.bklog.handler import BKLogHandler
 from backend.utils.string import pascal_to_snake
 from backend.utils.time import datetime2str
 
 logger = logging.getLogger("root")
 
+# 单个集群保留的最大日志条数，与按集群查询时的 size 保持一致
+MAX_LOGS_PER_CLUSTER = 6000
+
 
 def _get_log_from_bklog(
     collector: str, start_time: datetime.datetime, end_time: datetime.datetime, query_string: str = "*"
@@ -86,6 +90,24 @@ class ClusterBackup:
             backup_files.append(self.convert_to_backup_system_format(bklog))
         return backup_files
 
+    @classmethod
+    def scan_full_logs(
+        cls, start_time: datetime.datetime, end_time: datetime.datetime, cluster_domains: Iterable[str]
+    ) -> Dict[str, List[Dict]]:
+        """
+        一次性遍历时间范围内所有集群的全备记录，按集群域名分组
+        :param start_time: 开始时间
+        :param end_time: 结束时间
+        :param cluster_domains: 需要巡检的集群域名
+        """
+        return BKLogHandler.partition_logs(
+            BKLogHandler.scan_logs("redis_fullbackup_result", start_time, end_time),
+            key_func=lambda log: log.get("domain"),
+            keys=cluster_domains,
+            max_size=MAX_LOGS_PER_CLUSTER,
+            formatter=cls.convert_to_backup_system_format,
+        )
+
     def query_binlog_from_bklog(
         self,
         start_time: datetime.datetime,
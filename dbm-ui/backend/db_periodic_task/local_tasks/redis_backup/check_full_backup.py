@@ -11,6 +11,7 @@ specific language governing permissions and limitations under the License.
 import logging
 from collections import defaultdict
 from datetime import datetime, timedelta
+from typing import List
 
 from django.db.models import Q
 from django.utils import timezone
@@ -26,6 +27,9 @@ from .bklog_query import ClusterBackup
 
 logger = logging.getLogger("root")
 
+# 巡检报表批量写入的批次大小
+REPORT_BATCH_SIZE = 500
+
 
 def check_full_backup():
     _check_tendis_full_backup()
@@ -68,8 +72,20 @@ def _check_tendis_full_backup():
         | Q(cluster_type=ClusterType.TwemproxyTendisSSDInstance)
         | Q(cluster_type=ClusterType.TendisTwemproxyRedisInstance)
     ) & Q(create_at__lt=timezone.now() - timedelta(days=1))
+    now = datetime.now(timezone.utc)
+    yesterday = now - timedelta(days=1)
+    start_time = datetime(yesterday.year, yesterday.month, yesterday.day).astimezone(timezone.utc)
+    end_time = datetime(yesterday.year, yesterday.month, yesterday.day, 23, 59, 59).astimezone(timezone.utc)
+    #  	 +===+++++=== start_time is: 2023-10-25 00:00:00 ,end_time is :2023-10-25 23:59:59 +++++===++++
+    logger.info("+===+++++=== start_time is: {} ,end_time is :{} +++++===++++ ".format(start_time, end_time))
+
+    clusters = list(Cluster.objects.filter(query))
+    # 一次性拉取前一天所有集群的全备记录，在内存中按集群分组
+    cluster_full_logs = ClusterBackup.scan_full_logs(start_time, end_time, [c.immute_domain for c in clusters])
+
+    reports: List[RedisBackupCheckReport] = []
     # 遍历集群
-    for c in Cluster.objects.filter(query):
+    for c in clusters:
         logger.info("+===+++++===  start check {} full backup +++++===++++ ".format(c.immute_domain))
         logger.info("+===+++++===  cluster type is: {} +++++===++++ ".format(c.cluster_type))
         cluster_slave_instance = []  # 初始化集群slave列表
@@ -102,23 +118,14 @@ def _check_tendis_full_backup():
         for instance in cluster_all_instance:
             bklog_success_instance_count[instance] = 0
 
-        now = datetime.now(timezone.utc)
-        yesterday = now - timedelta(days=1)
-        start_time = datetime(yesterday.year, yesterday.month, yesterday.day).astimezone(timezone.utc)
-        end_time = datetime(yesterday.year, yesterday.month, yesterday.day, 23, 59, 59).astimezone(timezone.utc)
-        #  	 +===+++++=== start_time is: 2023-10-25 00:00:00 ,end_time is :2023-10-25 23:59:59 +++++===++++
-        logger.info("+===+++++=== start_time is: {} ,end_time is :{} +++++===++++ ".format(start_time, end_time))
         # 集群前一天对应的集群备份记录
-        backup = ClusterBackup(c.id, c.immute_domain)
-        # 集群纬度的，假设一开始是备份完整的，后面会去校验对这个值进行赋值，如果有存在异常会赋值为False
-
-        bklogs = backup.query_full_log_from_bklog(start_time, end_time)
+        bklogs = cluster_full_logs.get(c.immute_domain, [])
         # 如果集群维度没有数据，就不用在看节点维度了
         if not bklogs:
             msg = _("无法查找到在时间范围内{}-{}，集群{}的全备份日志").format(start_time, end_time, c.immute_domain)
             logger.error(msg)
             instance = "all instance"
-            full_backup_failed_record(c, instance, msg)
+            reports.append(build_full_backup_failed_record(c, instance, msg))
             continue
 
         logger.info(_("+===+++++===  {} 集群维度日志不为空 +++++===++++ ".format(c.immute_domain)))
@@ -128,7 +135,7 @@ def _check_tendis_full_backup():
                 logger.error("+===+++++=== to_backup_system_failed bklog: {} +++++===++++ ".format(bklog))
                 msg = bklog["backup_status_info"]
                 instance = bklog["redis_ip"] + IP_PORT_DIVIDER + str(bklog["redis_port"])
-                full_backup_failed_record(c, instance, msg)
+                reports.append(build_full_backup_failed_record(c, instance, msg))
 
             # 对成功的进行处理
             if bklog.get("backup_status", "") == "to_backup_system_success":
@@ -162,15 +169,17 @@ def _check_tendis_full_backup():
                     instance, count, master_instance, master_backup_count, expect_count
                 )
                 # 记录备份失败的集群和实例
-                full_backup_failed_record(c, instance, msg)
+                reports.append(build_full_backup_failed_record(c, instance, msg))
+
+    RedisBackupCheckReport.objects.bulk_create(reports, batch_size=REPORT_BATCH_SIZE)
 
 
-def full_backup_failed_record(c: Cluster, instance: str, msg: str):
+def build_full_backup_failed_record(c: Cluster, instance: str, msg: str) -> RedisBackupCheckReport:
     """
-    记录全备备份失败的集群和实例
+    构造全备备份失败的集群和实例记录，由调用方批量写入
     """
     logger.info(_("+===++===  实例{}全备份失败，集群类型{}写入表 ++++++++ ".format(instance, c.cluster_type)))
-    RedisBackupCheckReport.objects.create(
+    return RedisBackupCheckReport(
         creator=c.creator,
         bk_biz_id=c.bk_biz_id,
         bk_cloud_id=c.bk_cloud_id,
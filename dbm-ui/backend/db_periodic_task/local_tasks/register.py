@@ -8,12 +8,18 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import logging
+import time
+
 from celery import shared_task
 
 from backend.db_periodic_task.constants import PeriodicTaskType
 from backend.db_periodic_task.models import DBPeriodicTask
 
-registered_local_tasks = set()
+logger = logging.getLogger("root")
+
+# 本地周期任务注册表：任务名 -> 任务定义，导入模块时只登记到内存，由 beat 启动时统一同步到数据库
+registered_local_tasks = {}
 
 
 def register_periodic_task(run_every, args=None, kwargs=None):
@@ -23,10 +29,23 @@ def register_periodic_task(run_every, args=None, kwargs=None):
 
     def inner_wrapper(wrapped_func):
         name = f"{wrapped_func.__module__}.{wrapped_func.__name__}"
-        registered_local_tasks.add(name)
-        DBPeriodicTask.create_or_update_periodic_task(
-            name=name, task=name, task_type=PeriodicTaskType.LOCAL.value, run_every=run_every, args=args, kwargs=kwargs
-        )
+        registered_local_tasks[name] = {"task": name, "run_every": run_every, "args": args, "kwargs": kwargs}
         return shared_task(wrapped_func)
 
     return inner_wrapper
+
+
+def sync_local_periodic_tasks():
+    """将注册表中的本地周期任务同步到数据库，在 beat 启动或执行 sync_periodic_tasks 命令时调用"""
+    # 导入全部任务模块，保证注册表完整
+    import backend.db_periodic_task.local_tasks  # noqa
+
+    start_time = time.time()
+    result = DBPeriodicTask.sync_periodic_tasks(registered_local_tasks, PeriodicTaskType.LOCAL.value)
+    logger.info(
+        "sync local periodic tasks, total: %s, result: %s, cost: %.3fs",
+        len(registered_local_tasks),
+        result,
+        time.time() - start_time,
+    )
+    return result
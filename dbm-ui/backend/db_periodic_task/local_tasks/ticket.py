@@ -12,6 +12,7 @@ from celery.schedules import crontab
 
 from backend.db_periodic_task.local_tasks import register_periodic_task
 from backend.db_services.taskflow import task as TaskFlow
+from backend.flow.utils.job_poller import job_status_poller
 from backend.ticket.tasks.ticket_tasks import TicketTask
 
 
@@ -20,6 +21,11 @@ def auto_retry_exclusive_inner_flow():
     TicketTask.retry_exclusive_inner_flow()
 
 
+@register_periodic_task(run_every=2)
+def poll_job_instance_status():
+    job_status_poller.run()
+
+
 @register_periodic_task(run_every=crontab(minute=0, hour=6))
 def auto_create_data_repair_ticket():
     TicketTask.auto_create_data_repair_ticket()
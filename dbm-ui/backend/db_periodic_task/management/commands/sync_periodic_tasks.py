@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from django.core.management.base import BaseCommand
+
+from backend.db_periodic_task.local_tasks.register import registered_local_tasks, sync_local_periodic_tasks
+
+
+class Command(BaseCommand):
+    help = "将注册的本地周期任务同步到数据库(新建、更新和删除过期任务)，beat 启动时会自动执行"
+
+    def handle(self, *args, **options):
+        result = sync_local_periodic_tasks()
+        self.stdout.write(
+            f"sync {len(registered_local_tasks)} local periodic tasks: "
+            f"created {result['created']}, updated {result['updated']}, deleted {result['deleted']}"
+        )
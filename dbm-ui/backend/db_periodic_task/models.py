@@ -11,10 +11,12 @@ specific language governing permissions and limitations under the License.
 
 import json
 import logging
+from typing import Dict, Tuple
 
+from celery import schedules
 from django.db import models, transaction
 from django.utils.translation import ugettext_lazy as _
-from django_celery_beat.models import PeriodicTask
+from django_celery_beat.models import PeriodicTask, PeriodicTasks
 from django_celery_beat.schedulers import ModelEntry
 
 from backend.bk_web import constants
@@ -43,6 +45,29 @@ class DBPeriodicTask(AuditedModel):
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def get_schedule_key(schedule: schedules.BaseSchedule) -> Tuple:
+        """
+        执行周期在 schedule 表中的唯一标识，与 django_celery_beat 各 schedule 模型的 from_schedule 查询条件一致
+        repr 会对周期取整(如 1 天和 1 天 5 分钟都是 <freq: 1.00 day>)，不能作为标识
+        @param schedule: celery 的执行周期
+        """
+        if isinstance(schedule, schedules.crontab):
+            return (
+                "crontab",
+                schedule._orig_minute,
+                schedule._orig_hour,
+                schedule._orig_day_of_week,
+                schedule._orig_day_of_month,
+                schedule._orig_month_of_year,
+                str(schedule.tz),
+            )
+        if isinstance(schedule, schedules.solar):
+            return "solar", schedule.event, schedule.lat, schedule.lon
+        if isinstance(schedule, schedules.schedule):
+            return "interval", max(schedule.run_every.total_seconds(), 0)
+        return type(schedule).__name__, repr(schedule)
+
     @classmethod
     @transaction.atomic
     def delete_legacy_periodic_task(cls, tasks, task_type):
@@ -80,3 +105,77 @@ class DBPeriodicTask(AuditedModel):
                 celery_task.args = _args
                 celery_task.kwargs = _kwargs
                 celery_task.save(update_fields=[model_field, "args", "kwargs"])
+
+    @classmethod
+    @transaction.atomic
+    def sync_periodic_tasks(cls, task_specs: Dict[str, Dict], task_type: str) -> Dict[str, int]:
+        """
+        将注册表中的周期任务一次性同步到数据库：对比已有任务后批量新建/更新，并删除不再注册的任务
+        @param task_specs: 任务名 -> {"task": 任务路径, "run_every": 执行周期, "args": 参数, "kwargs": 参数}
+        @param task_type: 任务类型
+        """
+        # 相同的执行周期只转换一次，避免每个任务都写一次 schedule 表
+        model_schedules, schedule_keys = {}, {}
+        for name, spec in task_specs.items():
+            schedule = schedules.maybe_schedule(spec["run_every"])
+            schedule_keys[name] = cls.get_schedule_key(schedule)
+            if schedule_keys[name] not in model_schedules:
+                model_schedules[schedule_keys[name]] = ModelEntry.to_model_schedule(schedule)
+
+        db_tasks = {
+            db_task.name: db_task
+            for db_task in DBPeriodicTask.objects.select_related("task").filter(name__in=list(task_specs.keys()))
+        }
+
+        to_create, to_update, update_fields = [], [], {"args", "kwargs"}
+        for name, spec in task_specs.items():
+            model_schedule, model_field = model_schedules[schedule_keys[name]]
+            _args, _kwargs = json.dumps(spec.get("args") or []), json.dumps(spec.get("kwargs") or {})
+            if name not in db_tasks:
+                to_create.append(
+                    PeriodicTask(
+                        name=name, task=spec["task"], args=_args, kwargs=_kwargs, **{model_field: model_schedule}
+                    )
+                )
+                continue
+
+            # 冻结的任务不受更新影响，未变化的任务不做更新
+            celery_task = db_tasks[name].task
+            if db_tasks[name].is_frozen:
+                continue
+            # 执行周期类型变化时需要清空原来的周期，否则 beat 仍按原来的周期执行
+            other_fields = [field for __, __, field in ModelEntry.model_schedules if field != model_field]
+            if (
+                getattr(celery_task, f"{model_field}_id") == model_schedule.id
+                and not any(getattr(celery_task, f"{field}_id") for field in other_fields)
+                and celery_task.args == _args
+                and celery_task.kwargs == _kwargs
+            ):
+                continue
+            setattr(celery_task, model_field, model_schedule)
+            for field in other_fields:
+                setattr(celery_task, field, None)
+            celery_task.args, celery_task.kwargs = _args, _kwargs
+            update_fields.update([model_field, *other_fields])
+            to_update.append(celery_task)
+
+        if to_create:
+            # 部分数据库的 bulk_create 不回填主键，需要重新查询
+            PeriodicTask.objects.bulk_create(to_create)
+            celery_tasks = PeriodicTask.objects.filter(name__in=[task.name for task in to_create])
+            DBPeriodicTask.objects.bulk_create(
+                [DBPeriodicTask(name=task.name, task=task, task_type=task_type) for task in celery_tasks]
+            )
+        if to_update:
+            PeriodicTask.objects.bulk_update(to_update, fields=list(update_fields))
+
+        legacy_tasks = DBPeriodicTask.objects.filter(task_type=task_type).exclude(name__in=list(task_specs.keys()))
+        deleted = legacy_tasks.count()
+        if deleted:
+            cls.delete_legacy_periodic_task(list(task_specs.keys()), task_type)
+
+        # 批量操作不会触发 django_celery_beat 的信号，需要主动通知 beat 重新加载
+        if to_create or to_update:
+            PeriodicTasks.update_changed()
+
+        return {"created": len(to_create), "updated": len(to_update), "deleted": deleted}
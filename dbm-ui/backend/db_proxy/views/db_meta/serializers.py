@@ -41,6 +41,22 @@ class InstancesSerializer(BaseProxyPassSerializer):
     hash_value = serializers.IntegerField(help_text=_("哈希分片值"), required=False)
 
 
+class InstancesSnapshotSerializer(BaseProxyPassSerializer):
+    logical_city_ids = serializers.ListField(
+        help_text=_("逻辑城市ID列表"), child=serializers.IntegerField(), allow_null=True, allow_empty=True, required=False
+    )
+    statuses = serializers.ListField(
+        help_text=_("状态列表"), child=serializers.CharField(), allow_null=True, allow_empty=True, required=False
+    )
+    bk_cloud_id = serializers.IntegerField()
+    cluster_types = serializers.ListField(
+        help_text=_("集群类型"), child=serializers.CharField(), allow_null=True, allow_empty=True, required=False
+    )
+    hash_cnt = serializers.IntegerField(help_text=_("哈希分片数"), required=False)
+    hash_value = serializers.IntegerField(help_text=_("哈希分片值"), required=False)
+    since_version = serializers.IntegerField(help_text=_("已有的快照版本，传入时只返回该版本之后的变更"), required=False)
+
+
 class InstancesResponseSerializer(serializers.Serializer):
     class Meta:
         swagger_schema_fields = {"example": mock_data.INSTANCE_DATA_RESPONSE}
@@ -30,6 +30,7 @@ from backend.db_proxy.views.db_meta.serializers import (
     FakeTendbSingleCreateCluster,
     InstancesResponseSerializer,
     InstancesSerializer,
+    InstancesSnapshotSerializer,
     MachinesClusterSerializer,
     SwapRoleSerializer,
     TendbInstancesSerializer,
@@ -55,6 +56,26 @@ class DBMetaApiProxyPassViewSet(BaseProxyPassViewSet):
         validated_data = self.params_validate(self.get_serializer_class())
         return Response(DBHA.instances(**validated_data))
 
+    @common_swagger_auto_schema(
+        operation_summary=_("[dbmeta]获取实例分片快照"),
+        request_body=InstancesSnapshotSerializer(),
+        tags=[SWAGGER_TAG],
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        serializer_class=InstancesSnapshotSerializer,
+        url_path="dbmeta/dbha/instances_snapshot",
+    )
+    def instances_snapshot(self, request):
+        validated_data = self.params_validate(self.get_serializer_class())
+        snapshot = DBHA.instances_snapshot(**validated_data)
+        etag = f'"{snapshot["etag"]}"'
+        # 快照内容没有变化时直接返回304
+        if request.META.get("HTTP_IF_NONE_MATCH") == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return Response(snapshot, headers={"ETag": etag})
+
     @common_swagger_auto_schema(
         operation_summary=_("[dbmeta]实例角色交换"),
         request_body=SwapRoleSerializer(),
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from backend.db_meta.enums import CapacityGranularity
+from backend.db_meta.models import ClusterCapacityStat
+from backend.utils.settings import get_feature_config
+
+DEFAULT_CLUSTER_CAPACITY_CONFIG = {
+    # 各粒度采样的保留天数
+    "retention_days": {
+        CapacityGranularity.RAW.value: 8,
+        CapacityGranularity.DAY.value: 400,
+        CapacityGranularity.WEEK.value: 1100,
+    },
+    # 预测使用的历史天数
+    "forecast_days": 30,
+    # 预测需要的最少采样(天)数
+    "min_samples": 3,
+    # 预测方法：linear(最小二乘线性拟合)/holt(双指数平滑)
+    "method": "linear",
+    # holt 的水平和趋势平滑系数
+    "holt_alpha": 0.5,
+    "holt_beta": 0.3,
+}
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class LinearFit(object):
+    """最小二乘线性拟合，只保存累加量，可以在一次遍历中同时拟合多个序列"""
+
+    def __init__(self):
+        self.n = self.sum_x = self.sum_y = self.sum_xy = self.sum_xx = 0.0
+        self.last_x = 0.0
+
+    def add(self, x: float, y: float):
+        self.n += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xy += x * y
+        self.sum_xx += x * x
+        self.last_x = max(self.last_x, x)
+
+    def fit(self) -> Optional[Tuple[float, float]]:
+        """返回 (最后一个采样点的拟合值, 斜率)，采样点不足以拟合时返回 None"""
+        denominator = self.n * self.sum_xx - self.sum_x * self.sum_x
+        if not denominator:
+            return None
+        slope = (self.n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+        intercept = (self.sum_y - slope * self.sum_x) / self.n
+        return intercept + slope * self.last_x, slope
+
+
+def holt_fit(values: List[float], alpha: float, beta: float) -> Optional[Tuple[float, float]]:
+    """双指数平滑，返回 (最后一个采样点的平滑值, 趋势)"""
+    if len(values) < 2:
+        return None
+    level, trend = values[0], values[1] - values[0]
+    for value in values[1:]:
+        last_level = level
+        level = alpha * value + (1 - alpha) * (level + trend)
+        trend = beta * (level - last_level) + (1 - beta) * trend
+    return level, trend
+
+
+class ClusterCapacityForecaster(object):
+    """
+    集群容量预测
+    基于按天汇总的容量采样拟合已用容量的增长趋势，估算集群的剩余可用天数
+    """
+
+    @classmethod
+    def config(cls) -> Dict:
+        return get_feature_config("CLUSTER_CAPACITY", DEFAULT_CLUSTER_CAPACITY_CONFIG)
+
+    @staticmethod
+    def days_to_full(used: float, total: float, growth_per_day: float) -> Optional[float]:
+        if used >= total:
+            return 0
+        if growth_per_day <= 0:
+            return None
+        return round((total - used) / growth_per_day, 1)
+
+    @classmethod
+    def forecast(
+        cls, bk_biz_id: int, cluster_types: List[str], method: str = None, now: datetime = None
+    ) -> Dict[int, Dict]:
+        """
+        批量预测业务下集群的剩余可用天数，返回 集群ID -> 预测结果
+        业务下所有集群的采样只查询一次，线性拟合在一次遍历中累加全部集群的统计量
+        @param bk_biz_id: 业务ID
+        @param cluster_types: 集群类型列表
+        @param method: 预测方法，默认读取配置
+        @param now: 当前时间
+        """
+        config = cls.config()
+        method = method or config["method"]
+        now = now or datetime.now(timezone.utc)
+        start_time = now - timedelta(days=config["forecast_days"])
+
+        fits: Dict[int, LinearFit] = defaultdict(LinearFit)
+        values: Dict[int, List[float]] = defaultdict(list)
+        latest: Dict[int, Dict] = {}
+        samples = (
+            ClusterCapacityStat.objects.filter(
+                bk_biz_id=bk_biz_id,
+                cluster_type__in=cluster_types,
+                granularity=CapacityGranularity.DAY,
+                sample_time__gte=start_time,
+            )
+            .order_by("sample_time")
+            .values("cluster_id", "immute_domain", "cluster_type", "sample_time", "used", "total")
+        )
+        for sample in samples:
+            cluster_id = sample["cluster_id"]
+            days = (sample["sample_time"] - start_time).total_seconds() / SECONDS_PER_DAY
+            fits[cluster_id].add(days, sample["used"])
+            values[cluster_id].append(sample["used"])
+            latest[cluster_id] = sample
+
+        results: Dict[int, Dict] = {}
+        for cluster_id, sample in latest.items():
+            if len(values[cluster_id]) < config["min_samples"]:
+                continue
+            if method == "holt":
+                fitted = holt_fit(values[cluster_id], config["holt_alpha"], config["holt_beta"])
+            else:
+                fitted = fits[cluster_id].fit()
+            if not fitted:
+                continue
+
+            used, growth_per_day = fitted
+            results[cluster_id] = {
+                "cluster_id": cluster_id,
+                "immute_domain": sample["immute_domain"],
+                "cluster_type": sample["cluster_type"],
+                "used": sample["used"],
+                "total": sample["total"],
+                "in_use": round(sample["used"] * 100.0 / sample["total"], 2) if sample["total"] else 0,
+                "growth_per_day": round(growth_per_day, 2),
+                "days_to_full": cls.days_to_full(used, sample["total"], growth_per_day),
+            }
+        return results
+
+    @classmethod
+    def list_exhausting_clusters(
+        cls,
+        bk_biz_id: int,
+        cluster_types: List[str],
+        max_days: float = None,
+        limit: int = None,
+        method: str = None,
+        now: datetime = None,
+    ) -> List[Dict]:
+        """
+        即将用满的集群，按剩余可用天数升序排列
+        @param bk_biz_id: 业务ID
+        @param cluster_types: 集群类型列表
+        @param max_days: 只返回剩余天数不超过该值的集群
+        @param limit: 返回的集群数量
+        @param method: 预测方法
+        @param now: 当前时间
+        """
+        forecasts = [
+            forecast
+            for forecast in cls.forecast(bk_biz_id, cluster_types, method, now).values()
+            if forecast["days_to_full"] is not None and (max_days is None or forecast["days_to_full"] <= max_days)
+        ]
+        forecasts.sort(key=lambda x: (x["days_to_full"], -x["in_use"]))
+        return forecasts[:limit] if limit else forecasts
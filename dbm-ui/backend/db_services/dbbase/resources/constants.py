@@ -19,3 +19,17 @@ class ResourceNodeType(str, StructuredEnum):
     BIZ = EnumField("biz", _("业务"))
     CLUSTER = EnumField("cluster", _("集群"))
     MODULE = EnumField("module", _("模块"))
+
+
+class ResourceExportType(str, StructuredEnum):
+    CLUSTER = EnumField("cluster", _("集群"))
+    INSTANCE = EnumField("instance", _("实例"))
+
+
+class ResourceExportFormat(str, StructuredEnum):
+    XLSX = EnumField("xlsx", _("xlsx"))
+    CSV = EnumField("csv", _("csv"))
+
+
+# 后台导出文件在制品库中的保存路径
+EXPORT_FILE_PATH = "resource/export/{bk_biz_id}"
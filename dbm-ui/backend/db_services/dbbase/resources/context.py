@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from typing import Any, Dict, List
+
+from django.utils.functional import cached_property
+
+from backend.db_meta.models import AppCache, Cluster, ClusterEntry, DBModule
+from backend.db_services.ipchooser.query.resource import ResourceQueryHelper
+from backend.ticket.models import ClusterOperateRecord
+
+
+class ResourceListContext:
+    """
+    资源列表查询的请求级上下文
+    列表序列化需要的跨对象信息(集群容量、云区域、业务、DB模块、访问入口、操作记录)只在第一次访问时批量获取一次，
+    集群、实例、机器列表共用这一份上下文，避免在逐个对象序列化时重复查询
+    """
+
+    def __init__(self, bk_biz_id: int, cluster_types: List[str], cluster_ids: List[int] = None):
+        self.bk_biz_id = bk_biz_id
+        self.cluster_types = cluster_types
+        self.cluster_ids = cluster_ids or []
+
+    @cached_property
+    def cluster_stats_map(self) -> Dict[str, Dict[str, int]]:
+        """集群容量信息，key 是集群域名"""
+        return Cluster.get_cluster_stats(self.bk_biz_id, self.cluster_types)
+
+    @cached_property
+    def cloud_info(self) -> Dict[str, Any]:
+        """云区域信息，key 是字符串类型的 bk_cloud_id"""
+        return ResourceQueryHelper.search_cc_cloud(get_cache=True)
+
+    @cached_property
+    def biz_info(self) -> AppCache:
+        return AppCache.objects.get(bk_biz_id=self.bk_biz_id)
+
+    @cached_property
+    def db_module_names_map(self) -> Dict[int, str]:
+        return {
+            module.db_module_id: module.db_module_name
+            for module in DBModule.objects.filter(bk_biz_id=self.bk_biz_id, cluster_type__in=self.cluster_types)
+        }
+
+    @cached_property
+    def cluster_entry_map(self) -> Dict[int, Dict[str, str]]:
+        return ClusterEntry.get_cluster_entry_map(self.cluster_ids)
+
+    @cached_property
+    def cluster_operate_records_map(self) -> Dict[int, List]:
+        return ClusterOperateRecord.get_cluster_records_map(self.cluster_ids)
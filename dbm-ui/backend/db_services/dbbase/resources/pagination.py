@@ -8,22 +8,35 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+from collections import OrderedDict
 from typing import Callable, Dict
 
+from django.utils.translation import ugettext as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
 from backend.bk_web.pagination import AuditedLimitOffsetPagination
 
 from .query import ResourceList
+from .query_base import ResourceCursor
 
 
 class ResourceLimitOffsetPagination(AuditedLimitOffsetPagination):
     """专为 ResourceViewSet 定制的 LimitOffsetPagination, 用于处理 ResourceList 类型数据的分页问题"""
 
     no_limit_query_param = "no_limit"
+    # 游标分页：/list/?cursor= 开启，第一页传空值，之后传上一页返回的 next_cursor
+    cursor_query_param = "cursor"
     limit = 10
     offset = 0
     count = 0
+    cursor_mode = False
+    next_cursor = None
 
     def paginate_list(self, request, bk_biz_id: int, query_method: Callable, query_params: Dict):
+        if self.cursor_query_param in request.query_params:
+            return self.paginate_list_by_cursor(request, bk_biz_id, query_method, query_params)
+
         limit_query_param = request.query_params.get(self.limit_query_param)
         # 支持返回全部数据：/list/?limit=-1
         if str(limit_query_param) == "-1":
@@ -54,3 +67,39 @@ class ResourceLimitOffsetPagination(AuditedLimitOffsetPagination):
             return []
 
         return data_list.data
+
+    def paginate_list_by_cursor(self, request, bk_biz_id: int, query_method: Callable, query_params: Dict):
+        """游标分页，每页的查询代价与翻页深度无关，不支持 limit=-1"""
+        try:
+            cursor = ResourceCursor.from_string(request.query_params[self.cursor_query_param])
+        except ValueError:
+            raise ValidationError(_("无效的分页游标"))
+
+        self.request = request
+        self.cursor_mode = True
+        self.limit = self.get_limit(request)
+        self.offset = 0
+
+        data_list: ResourceList = query_method(
+            bk_biz_id,
+            query_params={**query_params, self.cursor_query_param: cursor},
+            limit=self.limit,
+            offset=self.offset,
+        )
+        self.count = data_list.count
+        self.next_cursor = data_list.next_cursor
+        return data_list.data
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("next_cursor", self.next_cursor),
+                    ("results", data),
+                ]
+            )
+        )
@@ -9,7 +9,7 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 import abc
-from typing import Any, Callable, Dict, List, Tuple, Union
+from typing import Any, Callable, Dict, Generator, Iterator, List, Tuple, Union
 
 import attr
 from django.db.models import F, Prefetch, Q, QuerySet
@@ -19,25 +19,36 @@ from django.utils.translation import ugettext_lazy as _
 from backend.constants import IP_PORT_DIVIDER
 from backend.db_meta.enums import ClusterEntryType, ClusterType, InstanceRole
 from backend.db_meta.enums.comm import SystemTagEnum
-from backend.db_meta.models import AppCache, Cluster, ClusterEntry, DBModule, Machine, ProxyInstance, StorageInstance
+from backend.db_meta.models import AppCache, Cluster, ClusterEntry, Machine, ProxyInstance, StorageInstance
 from backend.db_services.dbbase.instances.handlers import InstanceHandler
+from backend.db_services.dbbase.resources.constants import ResourceExportType
+from backend.db_services.dbbase.resources.context import ResourceListContext
 from backend.db_services.dbbase.resources.query_base import (
+    ResourceCursor,
     build_q_for_domain_by_cluster,
     build_q_for_domain_by_instance,
     build_q_for_instance_filter,
+    get_cached_count,
+    iter_queryset_chunks,
 )
 from backend.db_services.ipchooser.handlers.host_handler import HostHandler
 from backend.db_services.ipchooser.query.resource import ResourceQueryHelper
 from backend.flow.utils.dns_manage import DnsManage
+from backend.ticket.constants import InstanceType
 from backend.ticket.models import ClusterOperateRecord
 from backend.utils.excel import ExcelHandler
 from backend.utils.time import datetime2str
 
+# 导出时每批次查询的数量
+EXPORT_CHUNK_SIZE = 500
+
 
 @attr.s
 class ResourceList:
     count = attr.ib(validator=attr.validators.instance_of(int))
     data = attr.ib(validator=attr.validators.instance_of(list))
+    # 游标分页模式下的下一页游标，为None表示没有下一页
+    next_cursor = attr.ib(default=None)
 
 
 class CommonQueryResourceMixin(abc.ABC):
@@ -67,18 +78,8 @@ class CommonQueryResourceMixin(abc.ABC):
         return entry_details
 
     @staticmethod
-    def common_query_cluster(bk_biz_id: int, cluster_types: list, cluster_ids: list) -> Tuple[List[Dict], List[Dict]]:
-        """集群的通用属性查询"""
-        # 获取所有符合条件的集群对象
-        clusters = Cluster.objects.prefetch_related(
-            "storageinstance_set", "proxyinstance_set", "storageinstance_set__machine", "proxyinstance_set__machine"
-        ).filter(bk_biz_id=bk_biz_id, cluster_type__in=cluster_types)
-        if cluster_ids:
-            clusters = clusters.filter(id__in=cluster_ids)
-
-        cluster_entry_map = ClusterEntry.get_cluster_entry_map(cluster_ids=list(clusters.values_list("id", flat=True)))
-
-        # 初始化用于存储Excel数据的字典列表
+    def _get_cluster_headers(cluster_queryset: QuerySet) -> List[Dict]:
+        """集群导出的表头，实例角色列只保留集群中实际存在的角色"""
         headers = [
             {"id": "cluster_id", "name": _("集群 ID")},
             {"id": "cluster_name", "name": _("集群名称")},
@@ -90,7 +91,24 @@ class CommonQueryResourceMixin(abc.ABC):
             {"id": "region", "name": _("地域")},
             {"id": "disaster_tolerance_level", "name": _("容灾级别")},
         ]
-        role_header_ids = set()
+        # 流式导出需要在写入数据前确定表头，因此通过聚合查询获取存在的角色，而不是遍历全部实例
+        role_header_ids = set(
+            StorageInstance.objects.filter(cluster__in=cluster_queryset)
+            .values_list("instance_role", flat=True)
+            .distinct()
+        )
+        if ProxyInstance.objects.filter(cluster__in=cluster_queryset).exists():
+            role_header_ids.add(InstanceType.PROXY.value)
+
+        for ins_role in InstanceRole.get_values():
+            if ins_role in role_header_ids:
+                headers.append({"id": ins_role, "name": InstanceRole.get_choice_label(ins_role)})
+
+        return headers
+
+    @staticmethod
+    def iter_query_cluster(cluster_queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Dict]:
+        """按批次迭代集群的通用属性，每批次只预取当前批次集群的实例和访问入口"""
 
         def fill_instances_to_cluster_info(
             _cluster_info: Dict, instances: List[Union[StorageInstance, ProxyInstance]]
@@ -103,52 +121,51 @@ class CommonQueryResourceMixin(abc.ABC):
                 role = ins.instance_role
 
                 # 如果该角色已经存在于集群信息字典中，则添加新的IP和端口；否则，更新字典的值
-                if role in cluster_info:
-                    cluster_info[role] += f"\n{ins.machine.ip}#{ins.port}"
+                if role in _cluster_info:
+                    _cluster_info[role] += f"\n{ins.machine.ip}#{ins.port}"
                 else:
-                    role_header_ids.add(role)
-                    cluster_info[role] = f"{ins.machine.ip}#{ins.port}"
-
-        # 遍历所有的集群对象
-        data_list = []
-        for cluster in clusters:
-            # 创建一个空字典来保存当前集群的信息
-            cluster_info = {
-                "cluster_id": cluster.id,
-                "cluster_name": cluster.name,
-                "cluster_alias": cluster.alias,
-                "cluster_type": cluster.cluster_type,
-                "master_domain": cluster.immute_domain,
-                "slave_domain": cluster_entry_map[cluster.id].get("slave_domain", ""),
-                "major_version": cluster.major_version,
-                "region": cluster.region,
-                "disaster_tolerance_level": cluster.get_disaster_tolerance_level_display(),
-            }
-            fill_instances_to_cluster_info(cluster_info, cluster.proxyinstance_set.all())
-            fill_instances_to_cluster_info(cluster_info, cluster.storageinstance_set.all())
-
-            # 将当前集群的信息追加到data_list列表中
-            data_list.append(cluster_info)
+                    _cluster_info[role] = f"{ins.machine.ip}#{ins.port}"
 
-        for ins_role in InstanceRole.get_values():
-            if ins_role in role_header_ids:
-                headers.append({"id": ins_role, "name": InstanceRole.get_choice_label(ins_role)})
+        cluster_queryset = cluster_queryset.prefetch_related(
+            "storageinstance_set", "proxyinstance_set", "storageinstance_set__machine", "proxyinstance_set__machine"
+        )
+        for clusters in iter_queryset_chunks(cluster_queryset, chunk_size):
+            cluster_entry_map = ClusterEntry.get_cluster_entry_map(cluster_ids=[cluster.id for cluster in clusters])
+            for cluster in clusters:
+                # 创建一个空字典来保存当前集群的信息
+                cluster_info = {
+                    "cluster_id": cluster.id,
+                    "cluster_name": cluster.name,
+                    "cluster_alias": cluster.alias,
+                    "cluster_type": cluster.cluster_type,
+                    "master_domain": cluster.immute_domain,
+                    "slave_domain": cluster_entry_map[cluster.id].get("slave_domain", ""),
+                    "major_version": cluster.major_version,
+                    "region": cluster.region,
+                    "disaster_tolerance_level": cluster.get_disaster_tolerance_level_display(),
+                }
+                fill_instances_to_cluster_info(cluster_info, cluster.proxyinstance_set.all())
+                fill_instances_to_cluster_info(cluster_info, cluster.storageinstance_set.all())
+                yield cluster_info
+
+    @staticmethod
+    def _get_export_cluster_queryset(bk_biz_id: int, cluster_types: list, cluster_ids: list) -> QuerySet:
+        clusters = Cluster.objects.filter(bk_biz_id=bk_biz_id, cluster_type__in=cluster_types)
+        if cluster_ids:
+            clusters = clusters.filter(id__in=cluster_ids)
+        return clusters
 
-        return headers, data_list
+    @classmethod
+    def common_query_cluster(
+        cls, bk_biz_id: int, cluster_types: list, cluster_ids: list
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """集群的通用属性查询"""
+        clusters = cls._get_export_cluster_queryset(bk_biz_id, cluster_types, cluster_ids)
+        return cls._get_cluster_headers(clusters), list(cls.iter_query_cluster(clusters))
 
     @staticmethod
-    def common_query_instance(bk_biz_id: int, cluster_types: list, bk_host_ids: list) -> Tuple[List[Dict], List[Dict]]:
-        """实例通用属性查询"""
-        query_condition = Q(bk_biz_id=bk_biz_id, cluster_type__in=cluster_types)
-        if bk_host_ids:
-            query_condition = query_condition & Q(machine__bk_host_id__in=bk_host_ids)
-        storages = StorageInstance.objects.prefetch_related("machine", "machine__bk_city", "cluster").filter(
-            query_condition
-        )
-        proxies = ProxyInstance.objects.prefetch_related("machine", "machine__bk_city", "cluster").filter(
-            query_condition
-        )
-        headers = [
+    def _get_instance_headers() -> List[Dict]:
+        return [
             {"id": "bk_host_id", "name": _("主机 ID")},
             {"id": "bk_cloud_id", "name": _("云区域 ID")},
             {"id": "ip", "name": _("IP")},
@@ -163,13 +180,26 @@ class CommonQueryResourceMixin(abc.ABC):
             {"id": "master_domain", "name": _("主域名")},
             {"id": "major_version", "name": _("主版本")},
         ]
-        # 插入数据
-        data_list = []
-        for instances in [storages, proxies]:
-            for ins in instances:
-                for cluster in ins.cluster.all():
-                    data_list.append(
-                        {
+
+    @staticmethod
+    def iter_query_instance(
+        bk_biz_id: int, cluster_types: list, bk_host_ids: list, chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> Iterator[Dict]:
+        """按批次迭代实例的通用属性"""
+        query_condition = Q(bk_biz_id=bk_biz_id, cluster_type__in=cluster_types)
+        if bk_host_ids:
+            query_condition = query_condition & Q(machine__bk_host_id__in=bk_host_ids)
+        storages = StorageInstance.objects.prefetch_related("machine", "machine__bk_city", "cluster").filter(
+            query_condition
+        )
+        proxies = ProxyInstance.objects.prefetch_related("machine", "machine__bk_city", "cluster").filter(
+            query_condition
+        )
+        for instance_queryset in [storages, proxies]:
+            for instances in iter_queryset_chunks(instance_queryset, chunk_size):
+                for ins in instances:
+                    for cluster in ins.cluster.all():
+                        yield {
                             "bk_host_id": ins.machine.bk_host_id,
                             "bk_cloud_id": ins.machine.bk_cloud_id,
                             "ip": ins.machine.ip,
@@ -184,31 +214,45 @@ class CommonQueryResourceMixin(abc.ABC):
                             "master_domain": cluster.immute_domain,
                             "major_version": cluster.major_version,
                         }
-                    )
-
-        return headers, data_list
 
     @classmethod
-    def export_cluster(cls, bk_biz_id: int, cluster_ids: list) -> HttpResponse:
-        """集群通用属性导出"""
-        headers, data_list = cls.common_query_cluster(bk_biz_id, cls.cluster_types, cluster_ids)
+    def common_query_instance(
+        cls, bk_biz_id: int, cluster_types: list, bk_host_ids: list
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """实例通用属性查询"""
+        return cls._get_instance_headers(), list(cls.iter_query_instance(bk_biz_id, cluster_types, bk_host_ids))
 
-        biz_abbr = AppCache.get_app_attr(bk_biz_id)
+    @classmethod
+    def get_export_file_name(cls, bk_biz_id: int, export_type: str) -> str:
         db_type = ClusterType.cluster_type_to_db_type(cls.cluster_types[0])
-        wb = ExcelHandler.serialize(data_list, headers=headers, match_header=True)
+        if export_type == ResourceExportType.CLUSTER:
+            return f"{AppCache.get_app_attr(bk_biz_id)}({bk_biz_id}){db_type}_cluster.xlsx"
+        return f"{AppCache.get_biz_name(bk_biz_id)}({bk_biz_id}){db_type}_instances.xlsx"
 
-        return ExcelHandler.response(wb, f"{biz_abbr}({bk_biz_id}){db_type}_cluster.xlsx")
+    @classmethod
+    def get_export_cluster_rows(cls, bk_biz_id: int, cluster_ids: list) -> Tuple[List[Dict], Iterator[Dict]]:
+        """获取集群导出的表头和数据迭代器"""
+        clusters = cls._get_export_cluster_queryset(bk_biz_id, cls.cluster_types, cluster_ids)
+        return cls._get_cluster_headers(clusters), cls.iter_query_cluster(clusters)
 
     @classmethod
-    def export_instance(cls, bk_biz_id: int, bk_host_ids: list) -> HttpResponse:
-        """实例通用属性导出"""
-        headers, data_list = cls.common_query_instance(bk_biz_id, cls.cluster_types, bk_host_ids)
+    def get_export_instance_rows(cls, bk_biz_id: int, bk_host_ids: list) -> Tuple[List[Dict], Iterator[Dict]]:
+        """获取实例导出的表头和数据迭代器"""
+        return cls._get_instance_headers(), cls.iter_query_instance(bk_biz_id, cls.cluster_types, bk_host_ids)
 
-        biz_name = AppCache.get_biz_name(bk_biz_id)
-        db_type = ClusterType.cluster_type_to_db_type(cls.cluster_types[0])
-        wb = ExcelHandler.serialize(data_list, headers=headers, match_header=True)
+    @classmethod
+    def export_cluster(cls, bk_biz_id: int, cluster_ids: list, file_format: str = "xlsx") -> HttpResponse:
+        """集群通用属性导出，数据按批次查询并流式写入"""
+        headers, rows = cls.get_export_cluster_rows(bk_biz_id, cluster_ids)
+        file_name = cls.get_export_file_name(bk_biz_id, ResourceExportType.CLUSTER)
+        return ExcelHandler.stream_response(rows, headers, file_name, file_format)
 
-        return ExcelHandler.response(wb, f"{biz_name}({bk_biz_id}){db_type}_instances.xlsx")
+    @classmethod
+    def export_instance(cls, bk_biz_id: int, bk_host_ids: list, file_format: str = "xlsx") -> HttpResponse:
+        """实例通用属性导出，数据按批次查询并流式写入"""
+        headers, rows = cls.get_export_instance_rows(bk_biz_id, bk_host_ids)
+        file_name = cls.get_export_file_name(bk_biz_id, ResourceExportType.INSTANCE)
+        return ExcelHandler.stream_response(rows, headers, file_name, file_format)
 
     @classmethod
     def get_temporary_cluster_info(cls, cluster, ticket_type):
@@ -333,6 +377,25 @@ class BaseListRetrieveResource(CommonQueryResourceMixin):
     def get_fields(cls) -> List[Dict[str, str]]:
         return cls.fields
 
+    @classmethod
+    def iter_resources(
+        cls, query_method: Callable, bk_biz_id: int, query_params: Dict, page_size: int = 500
+    ) -> Generator[Dict, None, None]:
+        """
+        按游标逐页遍历全部资源，每页的查询代价恒定，用于全量导出等场景
+        @param query_method: 列表查询方法，如 list_clusters/list_instances/list_machines
+        @param bk_biz_id: 业务ID
+        @param query_params: 查询条件
+        @param page_size: 每页数量
+        """
+        cursor = ResourceCursor()
+        while True:
+            resource_list = query_method(bk_biz_id, {**query_params, "cursor": cursor}, limit=page_size, offset=0)
+            yield from resource_list.data
+            if not resource_list.next_cursor:
+                return
+            cursor = ResourceCursor.from_string(resource_list.next_cursor)
+
 
 class ListRetrieveResource(BaseListRetrieveResource):
     """集群基础视图接口的封装类实现，组件的相关视图接口一般继承此类实现"""
@@ -437,7 +500,13 @@ class ListRetrieveResource(BaseListRetrieveResource):
             cluster_queryset = cluster_queryset.order_by(query_params.get("ordering"))
 
         cluster_infos = cls._filter_cluster_hook(
-            bk_biz_id, cluster_queryset, proxy_queryset, storage_queryset, limit, offset
+            bk_biz_id,
+            cluster_queryset,
+            proxy_queryset,
+            storage_queryset,
+            limit,
+            offset,
+            cursor=query_params.get("cursor"),
         )
         return cluster_infos
 
@@ -460,58 +529,63 @@ class ListRetrieveResource(BaseListRetrieveResource):
         @param storage_queryset: 过滤的storage查询集
         @param limit: 分页限制
         @param offset: 分页起始
+        @param cursor: (kwargs)游标分页的游标，不为空时忽略offset，按照 (create_at, id) 顺序取下一页
         """
-
-        count = cluster_queryset.count()
-        limit = count if limit == -1 else limit
+        cursor: ResourceCursor = kwargs.pop("cursor", None)
+        if cursor is not None:
+            count = get_cached_count(cluster_queryset)
+            cluster_queryset = cluster_queryset.filter(cursor.build_q()).order_by(*cursor.ordering())
+            offset = 0
+        else:
+            count = cluster_queryset.count()
+            limit = count if limit == -1 else limit
         if count == 0:
             return ResourceList(count=0, data=[])
 
         # 预取proxy_queryset，storage_queryset，clusterentry_set,加块查询效率
-        cluster_queryset = cluster_queryset[offset : limit + offset].prefetch_related(
-            Prefetch("proxyinstance_set", queryset=proxy_queryset.select_related("machine"), to_attr="proxies"),
-            Prefetch("storageinstance_set", queryset=storage_queryset.select_related("machine"), to_attr="storages"),
-            Prefetch("clusterentry_set", to_attr="entries"),
-            "tag_set",
+        cluster_list = list(
+            cluster_queryset[offset : limit + offset].prefetch_related(
+                Prefetch("proxyinstance_set", queryset=proxy_queryset.select_related("machine"), to_attr="proxies"),
+                Prefetch(
+                    "storageinstance_set", queryset=storage_queryset.select_related("machine"), to_attr="storages"
+                ),
+                Prefetch("clusterentry_set", to_attr="entries"),
+                "tag_set",
+            )
         )
-        cluster_ids = list(cluster_queryset.values_list("id", flat=True))
 
-        # 获取集群与访问入口的映射
-        cluster_entry_map = ClusterEntry.get_cluster_entry_map(cluster_ids)
-
-        # 获取DB模块的映射信息
-        db_module_names_map = {
-            module.db_module_id: module.db_module_name
-            for module in DBModule.objects.filter(bk_biz_id=bk_biz_id, cluster_type__in=cls.cluster_types)
-        }
-
-        # 获取集群操作记录的映射关系
-        cluster_operate_records_map = ClusterOperateRecord.get_cluster_records_map(cluster_ids)
-
-        # 获取云区域信息和业务信息
-        cloud_info = ResourceQueryHelper.search_cc_cloud(get_cache=True)
-        biz_info = AppCache.objects.get(bk_biz_id=bk_biz_id)
+        # 集群列表的公共信息(访问入口、DB模块、操作记录、云区域、业务、集群容量)统一批量获取一次
+        context = ResourceListContext(bk_biz_id, cls.cluster_types, [cluster.id for cluster in cluster_list])
 
         # 将集群的查询结果序列化为集群字典信息
         clusters: List[Dict[str, Any]] = []
-        for cluster in cluster_queryset:
+        for cluster in cluster_list:
             cluster_info = cls._to_cluster_representation(
                 cluster=cluster,
                 cluster_entry=[
                     {"cluster_entry_type": entry.cluster_entry_type, "entry": entry.entry, "role": entry.role}
                     for entry in cluster.entries
                 ],
-                db_module_names_map=db_module_names_map,
-                cluster_entry_map=cluster_entry_map,
-                cluster_operate_records_map=cluster_operate_records_map,
-                cloud_info=cloud_info,
-                biz_info=biz_info,
-                cluster_stats_map=Cluster.get_cluster_stats(bk_biz_id, cls.cluster_types),
+                db_module_names_map=context.db_module_names_map,
+                cluster_entry_map=context.cluster_entry_map,
+                cluster_operate_records_map=context.cluster_operate_records_map,
+                cloud_info=context.cloud_info,
+                biz_info=context.biz_info,
+                cluster_stats_map=context.cluster_stats_map,
                 **kwargs,
             )
             clusters.append(cluster_info)
 
-        return ResourceList(count=count, data=clusters)
+        next_cursor = cls._build_next_cursor(cursor, cluster_list, limit, lambda c: (c.create_at, c.id))
+        return ResourceList(count=count, data=clusters, next_cursor=next_cursor)
+
+    @staticmethod
+    def _build_next_cursor(cursor: ResourceCursor, resources: List, limit: int, key: Callable) -> Union[str, None]:
+        """根据当前页的最后一条记录生成下一页的游标，不足一页说明已经没有下一页"""
+        if cursor is None or not resources or len(resources) < limit:
+            return None
+        create_at, pk = key(resources[-1])
+        return ResourceCursor(create_at=create_at, pk=pk).to_string()
 
     @classmethod
     def _to_cluster_representation(
@@ -606,9 +680,17 @@ class ListRetrieveResource(BaseListRetrieveResource):
             if query_params.get(param):
                 query_filters &= filter_params_map[param]
 
-        instance_queryset = cls._filter_instance_qs(query_filters, query_params)
-        count = instance_queryset.count()
-        limit = count if limit == -1 else limit
+        cursor: ResourceCursor = query_params.get("cursor")
+        if cursor is not None:
+            # 游标模式：总数取缓存，游标条件下推到storage和proxy的查询集中，再按 (create_at, id) 排序取一页
+            count = get_cached_count(cls._filter_instance_qs(query_filters, query_params))
+            instance_queryset = cls._filter_instance_qs(query_filters & cursor.build_q(), query_params)
+            instance_queryset = list(instance_queryset.order_by(*cursor.ordering())[:limit])
+            offset = 0
+        else:
+            instance_queryset = cls._filter_instance_qs(query_filters, query_params)
+            count = instance_queryset.count()
+            limit = count if limit == -1 else limit
 
         if count == 0:
             return ResourceList(count=0, data=[])
@@ -617,23 +699,21 @@ class ListRetrieveResource(BaseListRetrieveResource):
         paginated_instances = cls._filter_instance_hook(
             bk_biz_id, query_params, instance_queryset[offset : offset + limit], **kwargs
         )
-        return ResourceList(count=count, data=paginated_instances)
+        next_cursor = cls._build_next_cursor(
+            cursor, instance_queryset, limit, lambda inst: (inst["create_at"], inst["id"])
+        )
+        return ResourceList(count=count, data=paginated_instances, next_cursor=next_cursor)
 
     @classmethod
     def _filter_instance_hook(cls, bk_biz_id, query_params, instances, **kwargs):
         cluster_ids = [instance["cluster__id"] for instance in instances]
-        # 查询访问入口
-        cluster_entry_map = ClusterEntry.get_cluster_entry_map(cluster_ids)
-        # 查询云区域信息
-        cloud = ResourceQueryHelper.search_cc_cloud(get_cache=True)
-        # 获取DB模块的映射信息
-        db_module_names_map = {
-            module.db_module_id: module.db_module_name
-            for module in DBModule.objects.filter(bk_biz_id=bk_biz_id, cluster_type__in=cls.cluster_types)
-        }
+        # 访问入口、云区域、DB模块等公共信息统一批量获取一次
+        context = ResourceListContext(bk_biz_id, cls.cluster_types, cluster_ids)
         # 将实例的查询结果序列化为实例字典信息
         instance_infos = [
-            cls._to_instance_representation(inst, cluster_entry_map, db_module_names_map, cloud_info=cloud, **kwargs)
+            cls._to_instance_representation(
+                inst, context.cluster_entry_map, context.db_module_names_map, cloud_info=context.cloud_info, **kwargs
+            )
             for inst in instances
         ]
         # 特例：如果有extra参数，则补充额外实例信息
@@ -796,7 +876,9 @@ class ListRetrieveResource(BaseListRetrieveResource):
                 query_filters &= filter_params_map[param]
 
         machine_queryset = Machine.objects.filter(query_filters).distinct()
-        machine_infos = cls._filter_machine_hook(bk_biz_id, machine_queryset, limit, offset, **kwargs)
+        machine_infos = cls._filter_machine_hook(
+            bk_biz_id, machine_queryset, limit, offset, cursor=query_params.get("cursor"), **kwargs
+        )
         return machine_infos
 
     @classmethod
@@ -814,28 +896,44 @@ class ListRetrieveResource(BaseListRetrieveResource):
         @param machine_queryset: 过滤机器查询集
         @param limit: 分页限制
         @param offset: 分页起始
+        @param cursor: (kwargs)游标分页的游标，不为空时忽略offset，按照 (create_at, bk_host_id) 顺序取下一页
         """
-
-        count = machine_queryset.count()
-        limit = count if limit == -1 else limit
+        cursor: ResourceCursor = kwargs.pop("cursor", None)
+        if cursor is not None:
+            count = get_cached_count(machine_queryset)
+            machine_queryset = machine_queryset.filter(cursor.build_q("bk_host_id")).order_by(
+                *cursor.ordering("bk_host_id")
+            )
+            offset = 0
+        else:
+            count = machine_queryset.count()
+            limit = count if limit == -1 else limit
+            machine_queryset = machine_queryset.order_by("-create_at")
         if count == 0:
             return ResourceList(count=0, data=[])
 
         # 预取proxy_queryset，storage_queryset，加块查询效率
-        machine_queryset = machine_queryset.order_by("-create_at")[offset : limit + offset].prefetch_related(
+        machine_queryset = machine_queryset[offset : limit + offset].prefetch_related(
             "storageinstance_set__cluster", "proxyinstance_set__cluster"
         )
 
+        machine_list = list(machine_queryset)
+
         # 预取host的cc信息
-        bk_host_ids = list(machine_queryset.values_list("bk_host_id", flat=True))
+        bk_host_ids = [machine.bk_host_id for machine in machine_list]
         host_id_info_map = {host["host_id"]: host for host in HostHandler.check([], [], [], bk_host_ids)}
 
+        # 云区域等公共信息统一获取一次
+        context = ResourceListContext(bk_biz_id, cls.cluster_types)
+        kwargs.setdefault("cloud_info", context.cloud_info)
+
         # 将集群的查询结果序列化为集群字典信息
         machine_infos: List[Dict[str, Any]] = []
-        for machine in machine_queryset:
+        for machine in machine_list:
             machine_infos.append(cls._to_machine_representation(machine, host_id_info_map, **kwargs))
 
-        return ResourceList(count=count, data=machine_infos)
+        next_cursor = cls._build_next_cursor(cursor, machine_list, limit, lambda m: (m.create_at, m.bk_host_id))
+        return ResourceList(count=count, data=machine_infos, next_cursor=next_cursor)
 
     @classmethod
     def _to_machine_representation(
@@ -849,7 +947,7 @@ class ListRetrieveResource(BaseListRetrieveResource):
         @param machine: model Machine 对象, 增加了 storages 和 proxies 属性
         @param host_id_info_map: key 是 bk_host_id, value 是 机器在cc的信息
         """
-        cloud_info = ResourceQueryHelper.search_cc_cloud(get_cache=True)
+        cloud_info = kwargs.get("cloud_info") or ResourceQueryHelper.search_cc_cloud(get_cache=True)
         bk_cloud_name = cloud_info.get(str(machine.bk_cloud_id), {}).get("bk_cloud_name", "")
         machine_info = {
             "bk_host_id": machine.bk_host_id,
@@ -1,7 +1,21 @@
-from django.db.models import Q
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Iterator, List, Optional
+
+import attr
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Q, QuerySet
 
 from backend.constants import IP_PORT_DIVIDER
 from backend.db_meta.enums import ClusterEntryType
+from backend.utils.md5 import count_md5
+
+# 游标分页下列表总数的缓存时间，总数只用于展示，允许短时间内的不精确
+RESOURCE_COUNT_CACHE_TIME = 60
+RESOURCE_COUNT_CACHE_KEY = "resource_list_count"
 
 
 def build_q_for_domain_by_cluster(domains, role=None):
@@ -51,3 +65,68 @@ def build_q_for_instance_filter(params_data: dict) -> Q:
 
     # 合并两种过滤条件
     return q_ip | q_ip_port
+
+
+@attr.s
+class ResourceCursor:
+    """
+    资源列表的游标(keyset)分页，按照 (create_at, pk) 升序稳定排序，create_at 为空表示第一页
+    """
+
+    create_at: Optional[datetime] = attr.ib(default=None)
+    pk: Any = attr.ib(default=None)
+
+    @classmethod
+    def from_string(cls, cursor: str) -> "ResourceCursor":
+        if not cursor:
+            return cls()
+        try:
+            create_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return cls(create_at=datetime.fromisoformat(create_at), pk=pk)
+        except (ValueError, TypeError, binascii.Error):
+            raise ValueError(f"invalid cursor: {cursor}")
+
+    def to_string(self) -> str:
+        raw = json.dumps([self.create_at.isoformat(), self.pk])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def build_q(self, pk_field: str = "id") -> Q:
+        if self.create_at is None:
+            return Q()
+        return Q(create_at__gt=self.create_at) | Q(create_at=self.create_at, **{f"{pk_field}__gt": self.pk})
+
+    @staticmethod
+    def ordering(pk_field: str = "id"):
+        return "create_at", pk_field
+
+
+def get_cached_count(queryset: QuerySet) -> int:
+    """获取查询集的总数，以SQL语句为key缓存，避免游标翻页时每一页都执行count"""
+    try:
+        cache_key = f"{RESOURCE_COUNT_CACHE_KEY}_{count_md5(str(queryset.query))}"
+    except EmptyResultSet:
+        return 0
+
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, RESOURCE_COUNT_CACHE_TIME)
+    return count
+
+
+def iter_queryset_chunks(queryset: QuerySet, chunk_size: int) -> Iterator[List]:
+    """
+    按主键顺序分批迭代查询集，每批次是一次独立的查询(会执行queryset上的prefetch_related)，
+    避免一次性加载全部对象，也避免深分页offset带来的开销
+    """
+    last_pk = None
+    queryset = queryset.order_by("pk")
+    while True:
+        chunk_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(chunk_queryset[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_pk = chunk[-1].pk
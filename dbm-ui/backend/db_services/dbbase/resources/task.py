@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+import os
+import tempfile
+
+from celery import shared_task
+from django.core.files import File
+
+from backend.core.storages.storage import get_storage
+from backend.db_services.dbbase.resources.constants import EXPORT_FILE_PATH, ResourceExportType
+from backend.db_services.dbbase.resources.register import cluster_type__resource_class
+from backend.utils.excel import STREAM_SPOOL_MAX_SIZE, ExcelHandler
+
+logger = logging.getLogger("celery")
+
+
+def get_export_file_path(bk_biz_id: int, uid: str, file_name: str) -> str:
+    return os.path.join(EXPORT_FILE_PATH.format(bk_biz_id=bk_biz_id), uid, file_name)
+
+
+@shared_task
+def export_resource_to_storage(
+    bk_biz_id: int, cluster_type: str, export_type: str, ids: list, file_path: str, file_format: str = "xlsx"
+) -> str:
+    """
+    后台导出集群/实例数据，并将文件保存到制品库
+    @param bk_biz_id: 业务ID
+    @param cluster_type: 集群类型，用于获取对应的resource类
+    @param export_type: 导出类型，参考 ResourceExportType
+    @param ids: 集群ID列表或者主机ID列表，为空表示导出全部
+    @param file_path: 文件保存路径
+    @param file_format: 文件格式，xlsx 或者 csv
+    """
+    resource_class = cluster_type__resource_class[cluster_type]
+    if export_type == ResourceExportType.CLUSTER:
+        headers, rows = resource_class.get_export_cluster_rows(bk_biz_id, ids)
+    else:
+        headers, rows = resource_class.get_export_instance_rows(bk_biz_id, ids)
+
+    with tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_MAX_SIZE) as file:
+        if file_format == "csv":
+            ExcelHandler.write_csv(file, rows, headers)
+        else:
+            ExcelHandler.write_xlsx(file, rows, headers)
+        file.seek(0)
+        file_path = get_storage(file_overwrite=True).save(file_path, File(file, name=os.path.basename(file_path)))
+
+    logger.info(f"export {export_type} of biz[{bk_biz_id}]({cluster_type}) to {file_path}")
+    return file_path
@@ -8,6 +8,7 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import uuid
 
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -18,8 +19,10 @@ from backend.iam_app.handlers.drf_perm.cluster import ClusterDetailPermission
 from backend.iam_app.handlers.permission import Permission
 
 from . import serializers
+from .constants import ResourceExportFormat, ResourceExportType
 from .pagination import ResourceLimitOffsetPagination
 from .query import ListRetrieveResource
+from .task import export_resource_to_storage, get_export_file_path
 
 
 class ResourceViewSet(SystemViewSet):
@@ -120,17 +123,34 @@ class ResourceViewSet(SystemViewSet):
         """获取拓扑图"""
         return Response(self.query_class.get_topo_graph(bk_biz_id, cluster_id))
 
+    def _async_export(self, bk_biz_id: int, export_type: str, ids: list, file_format: str):
+        """后台导出，文件保存到制品库后可通过返回的 file_path 下载"""
+        file_name = self.query_class.get_export_file_name(bk_biz_id, export_type)
+        if file_format == ResourceExportFormat.CSV:
+            file_name = f"{file_name.rsplit('.', 1)[0]}.csv"
+        file_path = get_export_file_path(bk_biz_id, uuid.uuid1().hex, file_name)
+        result = export_resource_to_storage.delay(
+            bk_biz_id, self.query_class.cluster_types[0], export_type, ids, file_path, file_format
+        )
+        return Response({"task_id": result.id, "file_path": file_path})
+
     @action(methods=["POST", "GET"], detail=False, url_path="export_cluster")
     def export_cluster(self, request, bk_biz_id: int):
-        """导出集群数据为 excel 文件"""
+        """导出集群数据为 excel 文件，支持 csv 格式和后台导出"""
         cluster_ids = request.data.get("cluster_ids")
-        return self.query_class.export_cluster(bk_biz_id, cluster_ids)
+        file_format = request.data.get("file_format", ResourceExportFormat.XLSX)
+        if request.data.get("async_export"):
+            return self._async_export(bk_biz_id, ResourceExportType.CLUSTER, cluster_ids, file_format)
+        return self.query_class.export_cluster(bk_biz_id, cluster_ids, file_format)
 
     @action(methods=["POST", "GET"], detail=False, url_path="export_instance")
     def export_instance(self, request, bk_biz_id: int):
-        """导出实例数据为 excel 文件"""
+        """导出实例数据为 excel 文件，支持 csv 格式和后台导出"""
         bk_host_ids = request.data.get("bk_host_ids")
-        return self.query_class.export_instance(bk_biz_id, bk_host_ids)
+        file_format = request.data.get("file_format", ResourceExportFormat.XLSX)
+        if request.data.get("async_export"):
+            return self._async_export(bk_biz_id, ResourceExportType.INSTANCE, bk_host_ids, file_format)
+        return self.query_class.export_instance(bk_biz_id, bk_host_ids, file_format)
 
     def _paginate_resource_list(self, request, bk_biz_id: int):
         return self.paginator.paginate_resource_list(request, bk_biz_id, self)
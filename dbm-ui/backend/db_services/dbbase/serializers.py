@@ -16,6 +16,7 @@ from rest_framework import serializers
 from backend.components import CCApi
 from backend.db_dirty.models import DirtyMachine
 from backend.db_meta.enums import ClusterPhase, ClusterType
+from backend.db_meta.models import Cluster
 from backend.db_services.dbbase.constants import ResourceType
 from backend.db_services.ipchooser.query.resource import ResourceQueryHelper
 from backend.db_services.redis.resources.redis_cluster.query import RedisListRetrieveResource
@@ -179,3 +180,40 @@ class WebConsoleSerializer(serializers.Serializer):
 class WebConsoleResponseSerializer(serializers.Serializer):
     class Meta:
         swagger_schema_fields = {"example": [{"title1": "xxx", "title2": "xxx"}]}
+
+
+class QueryCapacityForecastSerializer(serializers.Serializer):
+    bk_biz_id = serializers.IntegerField(help_text=_("业务ID"))
+    cluster_types = serializers.CharField(help_text=_("集群类型(逗号分隔)，不传则查询业务下所有集群"), required=False)
+    method = serializers.ChoiceField(
+        help_text=_("预测方法"), choices=(("linear", _("线性拟合")), ("holt", _("双指数平滑"))), required=False
+    )
+    max_days = serializers.FloatField(help_text=_("只返回剩余可用天数不超过该值的集群"), required=False)
+    limit = serializers.IntegerField(help_text=_("返回的集群数量"), default=20)
+
+    def validate(self, attrs):
+        if attrs.get("cluster_types"):
+            attrs["cluster_types"] = attrs["cluster_types"].split(",")
+        else:
+            attrs["cluster_types"] = list(
+                Cluster.objects.filter(bk_biz_id=attrs["bk_biz_id"]).values_list("cluster_type", flat=True).distinct()
+            )
+        return attrs
+
+
+class QueryCapacityForecastResponseSerializer(serializers.Serializer):
+    class Meta:
+        swagger_schema_fields = {
+            "example": [
+                {
+                    "cluster_id": 1,
+                    "immute_domain": "tendbha.db",
+                    "cluster_type": "tendbha",
+                    "used": 858993459200,
+                    "total": 1073741824000,
+                    "in_use": 80.0,
+                    "growth_per_day": 10737418240.0,
+                    "days_to_full": 20.0,
+                }
+            ]
+        }
@@ -23,6 +23,7 @@ from backend.bk_web.swagger import ResponseSwaggerAutoSchema, common_swagger_aut
 from backend.configuration.constants import DBType
 from backend.db_meta.enums import ClusterType
 from backend.db_meta.models import Cluster, DBModule, ProxyInstance, StorageInstance
+from backend.db_services.dbbase.cluster.capacity import ClusterCapacityForecaster
 from backend.db_services.dbbase.cluster.handlers import ClusterServiceHandler
 from backend.db_services.dbbase.cluster.serializers import CheckClusterDbsResponseSerializer, CheckClusterDbsSerializer
 from backend.db_services.dbbase.instances.handlers import InstanceHandler
@@ -39,6 +40,8 @@ from backend.db_services.dbbase.serializers import (
     QueryAllTypeClusterSerializer,
     QueryBizClusterAttrsResponseSerializer,
     QueryBizClusterAttrsSerializer,
+    QueryCapacityForecastResponseSerializer,
+    QueryCapacityForecastSerializer,
     ResourceAdministrationSerializer,
     WebConsoleResponseSerializer,
     WebConsoleSerializer,
@@ -230,6 +233,25 @@ class DBBaseViewSet(viewsets.SystemViewSet):
 
         return Response(cluster_attrs)
 
+    @common_swagger_auto_schema(
+        operation_summary=_("查询即将用满的集群"),
+        auto_schema=ResponseSwaggerAutoSchema,
+        query_serializer=QueryCapacityForecastSerializer(),
+        responses={status.HTTP_200_OK: QueryCapacityForecastResponseSerializer()},
+        tags=[SWAGGER_TAG],
+    )
+    @action(methods=["GET"], detail=False, serializer_class=QueryCapacityForecastSerializer)
+    def query_capacity_forecast(self, request, *args, **kwargs):
+        data = self.params_validate(self.get_serializer_class())
+        clusters = ClusterCapacityForecaster.list_exhausting_clusters(
+            bk_biz_id=data["bk_biz_id"],
+            cluster_types=data["cluster_types"],
+            max_days=data.get("max_days"),
+            limit=data["limit"],
+            method=data.get("method"),
+        )
+        return Response(clusters)
+
     @common_swagger_auto_schema(
         operation_summary=_("查询资源池,污点主机管理表头筛选数据"),
         auto_schema=ResponseSwaggerAutoSchema,
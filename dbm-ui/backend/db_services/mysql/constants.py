@@ -30,3 +30,10 @@ QUERY_SCHEMA_TABLES_SQL = (
 QUERY_TABLES_FROM_DB_SQL = (
     "select table_schema as table_schema, table_name as table_name from information_schema.tables where {db_sts}"
 )
+
+# 根据库表查询字段的sql语句
+QUERY_TABLE_COLUMNS_SQL = (
+    "select table_schema as table_schema, table_name as table_name, column_name as column_name, "
+    "column_type as column_type, column_key as column_key from information_schema.columns "
+    "where table_schema='{db}' and table_name in {table_list} order by table_name, ordinal_position"
+)
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional
+
+from dateutil.parser import parse as time_parse
+from django.core.cache import cache
+from django.utils import timezone as django_timezone
+from redis.exceptions import LockError
+
+from backend.components.bklog.handler import BKLogHandler
+from backend.db_services.mysql.fixpoint_rollback.constants import BACKUP_LOG_RANGE_DAYS
+from backend.db_services.mysql.fixpoint_rollback.models import MySQLBackupCatalog, MySQLBinlogCatalog
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("root")
+
+DEFAULT_BACKUP_CATALOG_CONFIG = {
+    # 是否开启备份目录，关闭后回档查询直接走日志平台
+    "enabled": True,
+    # 首次导入时回溯的天数
+    "backfill_days": BACKUP_LOG_RANGE_DAYS,
+    # 备份目录的保留天数
+    "retention_days": BACKUP_LOG_RANGE_DAYS * 2,
+    # 每次导入与上次导入的重叠时间(分钟)，兼容日志平台的上报延迟
+    "overlap_minutes": 30,
+    # 批量写入的批次大小
+    "batch_size": 1000,
+    # 每个导入窗口的时长(小时)，每个窗口导入完成后推进已导入范围
+    "window_hours": 6,
+    # 导入锁的超时时间(秒)，每个窗口导入完成后续期
+    "lock_timeout": 30 * 60,
+}
+
+# 备份目录已导入的日志上报时间范围
+BACKUP_CATALOG_COVERAGE_KEY = "mysql_backup_catalog:coverage"
+# 导入锁，首次回溯导入可能超过周期任务的间隔，避免多个导入任务重复拉取相同的窗口
+BACKUP_CATALOG_LOCK_KEY = "mysql_backup_catalog:lock"
+
+
+def parse_log_time(value) -> Optional[datetime]:
+    """解析日志中的时间字段，不带时区的按当前时区处理，无法解析返回 None"""
+    if not value:
+        return None
+    try:
+        parsed = time_parse(str(value))
+    except (ValueError, OverflowError):
+        return None
+    if django_timezone.is_naive(parsed):
+        parsed = django_timezone.make_aware(parsed)
+    return parsed
+
+
+class BackupCatalogHandler(object):
+    """
+    MySQL 备份目录
+    - 周期任务按时间窗口增量拉取 mysql_dbbackup_result/mysql_binlog_result 日志写入目录表
+    - 定点回档、重建从库查询备份时，已导入的部分直接按索引查询目录表，
+      只有最近一段还未导入的日志才查询日志平台
+    """
+
+    @classmethod
+    def config(cls) -> Dict:
+        return get_feature_config("MYSQL_BACKUP_CATALOG", DEFAULT_BACKUP_CATALOG_CONFIG)
+
+    @classmethod
+    def get_coverage(cls) -> Optional[Dict[str, datetime]]:
+        coverage = cache.get(BACKUP_CATALOG_COVERAGE_KEY)
+        if not coverage:
+            return None
+        return {
+            "start": datetime.fromtimestamp(coverage["start"], timezone.utc),
+            "end": datetime.fromtimestamp(coverage["end"], timezone.utc),
+        }
+
+    @classmethod
+    def _set_coverage(cls, start: datetime, end: datetime):
+        cache.set(BACKUP_CATALOG_COVERAGE_KEY, {"start": start.timestamp(), "end": end.timestamp()}, timeout=None)
+
+    @staticmethod
+    def _build_backup(log: Dict) -> Optional[MySQLBackupCatalog]:
+        consistent_time = parse_log_time(log.get("consistent_backup_time") or log.get("backup_consistent_time"))
+        try:
+            cluster_id, backup_port = int(log["cluster_id"]), int(log["backup_port"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not consistent_time or not log.get("backup_id"):
+            return None
+
+        return MySQLBackupCatalog(
+            cluster_id=cluster_id,
+            bk_biz_id=log.get("bk_biz_id") or 0,
+            backup_id=log["backup_id"],
+            shard_value=log.get("shard_value", -1),
+            mysql_role=log.get("mysql_role", ""),
+            backup_host=log.get("backup_host", ""),
+            backup_port=backup_port,
+            is_full_backup=bool(log.get("is_full_backup")),
+            consistent_time=consistent_time,
+            backup_log=log,
+        )
+
+    @staticmethod
+    def _build_binlog(log: Dict) -> Optional[MySQLBinlogCatalog]:
+        start_time, stop_time = parse_log_time(log.get("start_time")), parse_log_time(log.get("stop_time"))
+        try:
+            cluster_id, port = int(log["cluster_id"]), int(log["port"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not start_time or not stop_time or not log.get("task_id"):
+            return None
+
+        return MySQLBinlogCatalog(
+            cluster_id=cluster_id,
+            host=log.get("host", ""),
+            port=port,
+            task_id=str(log["task_id"]),
+            file_name=log.get("filename", ""),
+            start_time=start_time,
+            stop_time=stop_time,
+            binlog_log=log,
+        )
+
+    @classmethod
+    def _ingest_collector(
+        cls, collector: str, builder: Callable, model, start_time: datetime, end_time: datetime
+    ) -> int:
+        count, batch_size = 0, cls.config()["batch_size"]
+        records = filter(None, (builder(log) for log in BKLogHandler.scan_logs(collector, start_time, end_time)))
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return count
+            # 重叠窗口内重复导入的日志通过唯一索引忽略
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            count += len(batch)
+
+    @classmethod
+    def ingest(cls, now: datetime = None) -> Optional[Dict[str, int]]:
+        """
+        增量导入备份日志，返回各采集项导入的记录数，已有导入任务在运行时跳过并返回 None
+        @param now: 导入的截止时间，默认为当前时间
+        """
+        lock = cache.lock(BACKUP_CATALOG_LOCK_KEY, timeout=cls.config()["lock_timeout"])
+        if not lock.acquire(blocking=False):
+            logger.info("mysql backup catalog is ingesting by another task, skip")
+            return None
+
+        try:
+            return cls._ingest(now or datetime.now(timezone.utc), lock)
+        finally:
+            try:
+                lock.release()
+            except LockError:
+                logger.warning("mysql backup catalog lock expired before release")
+
+    @classmethod
+    def _ingest(cls, now: datetime, lock) -> Dict[str, int]:
+        config = cls.config()
+        coverage = cls.get_coverage()
+        overlap = timedelta(minutes=config["overlap_minutes"])
+        retention_start = now - timedelta(days=config["retention_days"])
+
+        if coverage:
+            coverage_start, scan_start = coverage["start"], coverage["end"]
+        else:
+            coverage_start = scan_start = now - timedelta(days=config["backfill_days"])
+        coverage_start = max(coverage_start, retention_start)
+        # 最近一段时间的日志可能还没有上报，不计入已导入范围，下次导入时重新拉取
+        coverage_end = max(now - overlap, scan_start)
+
+        counts = {"mysql_dbbackup_result": 0, "mysql_binlog_result": 0}
+        window = timedelta(hours=config["window_hours"])
+        window_start = scan_start
+        while window_start < now:
+            window_end = min(window_start + window, now)
+            counts["mysql_dbbackup_result"] += cls._ingest_collector(
+                "mysql_dbbackup_result", cls._build_backup, MySQLBackupCatalog, window_start, window_end
+            )
+            counts["mysql_binlog_result"] += cls._ingest_collector(
+                "mysql_binlog_result", cls._build_binlog, MySQLBinlogCatalog, window_start, window_end
+            )
+            # 每个窗口导入后立即推进已导入范围，任务中断后下次从该窗口之后继续
+            cls._set_coverage(coverage_start, min(window_end, coverage_end))
+            lock.reacquire()
+            window_start = window_end
+
+        # 清理过期的目录
+        MySQLBackupCatalog.objects.filter(consistent_time__lt=retention_start).delete()
+        MySQLBinlogCatalog.objects.filter(stop_time__lt=retention_start).delete()
+
+        cls._set_coverage(coverage_start, coverage_end)
+        return counts
+
+    @classmethod
+    def _get_tail_range(cls, start_time: datetime, end_time: datetime) -> Optional[Dict[str, datetime]]:
+        """
+        获取需要查询日志平台的时间范围，目录没有覆盖查询起点时返回 None
+        """
+        if not cls.config()["enabled"]:
+            return None
+        coverage = cls.get_coverage()
+        if not coverage or coverage["start"] > start_time:
+            return None
+        return {"start": max(start_time, coverage["end"]), "end": end_time}
+
+    @staticmethod
+    def _merge_tail(logs: List[Dict], tail_logs: Iterable[Dict], get_key: Callable) -> List[Dict]:
+        keys = {get_key(log) for log in logs}
+        return logs + [log for log in tail_logs if get_key(log) not in keys]
+
+    @classmethod
+    def query_backup_logs(
+        cls, cluster_id: int, start_time: datetime, end_time: datetime, tail_loader: Callable
+    ) -> Optional[List[Dict]]:
+        """
+        查询集群在时间范围内的备份日志，返回结构同日志平台的 mysql_dbbackup_result 日志
+        目录没有覆盖查询范围时返回 None，由调用方直接查询日志平台
+        @param cluster_id: 集群ID
+        @param start_time: 开始时间
+        @param end_time: 结束时间
+        @param tail_loader: 查询日志平台的函数，参数为(start_time, end_time)，用于补齐尚未导入的部分
+        """
+        tail_range = cls._get_tail_range(start_time, end_time)
+        if tail_range is None:
+            return None
+
+        logs = list(
+            MySQLBackupCatalog.objects.filter(
+                cluster_id=cluster_id, consistent_time__gte=start_time, consistent_time__lte=end_time
+            )
+            .order_by("consistent_time", "id")
+            .values_list("backup_log", flat=True)
+        )
+        if tail_range["start"] < tail_range["end"]:
+            logs = cls._merge_tail(
+                logs,
+                tail_loader(tail_range["start"], tail_range["end"]),
+                get_key=lambda log: (log.get("backup_id"), log.get("backup_host"), str(log.get("backup_port"))),
+            )
+        return logs
+
+    @classmethod
+    def query_binlogs(
+        cls, host: str, port: int, start_time: datetime, end_time: datetime, tail_loader: Callable
+    ) -> Optional[List[Dict]]:
+        """
+        查询实例与时间范围有交集的binlog备份日志，返回结构同日志平台的 mysql_binlog_result 日志
+        目录没有覆盖查询范围时返回 None，由调用方直接查询日志平台
+        @param host: 实例IP
+        @param port: 实例端口
+        @param start_time: 开始时间
+        @param end_time: 结束时间
+        @param tail_loader: 查询日志平台的函数，参数为(start_time, end_time)，用于补齐尚未导入的部分
+        """
+        tail_range = cls._get_tail_range(start_time, end_time)
+        if tail_range is None:
+            return None
+
+        logs = list(
+            MySQLBinlogCatalog.objects.filter(
+                host=host, port=port, stop_time__gte=start_time, start_time__lte=end_time
+            )
+            .order_by("stop_time", "id")
+            .values_list("binlog_log", flat=True)
+        )
+        if tail_range["start"] < tail_range["end"]:
+            logs = cls._merge_tail(
+                logs, tail_loader(tail_range["start"], tail_range["end"]), get_key=lambda log: str(log.get("task_id"))
+            )
+        return logs
@@ -27,6 +27,7 @@ from backend.components.bklog.handler import BKLogHandler
 from backend.db_meta.enums import ClusterType, InstanceInnerRole
 from backend.db_meta.models import StorageInstance
 from backend.db_meta.models.cluster import Cluster
+from backend.db_services.mysql.fixpoint_rollback.catalog import BackupCatalogHandler
 from backend.db_services.mysql.fixpoint_rollback.constants import BACKUP_LOG_ROLLBACK_TIME_RANGE_DAYS
 from backend.exceptions import AppBaseException
 from backend.flow.consts import SUCCESS_LIST, DBActuatorActionEnum, DBActuatorTypeEnum, InstanceStatus, JobStatusEnum
@@ -330,12 +331,20 @@ class FixPointRollbackHandler:
         :param end_time: 结束时间
         """
 
-        backup_logs = self._get_log_from_bklog(
-            collector="mysql_dbbackup_result",
-            start_time=start_time,
-            end_time=end_time,
-            query_string=f'log: "cluster_id: \\"{self.cluster.id}\\""',
+        def _query_from_bklog(_start_time: datetime, _end_time: datetime) -> List[Dict]:
+            return self._get_log_from_bklog(
+                collector="mysql_dbbackup_result",
+                start_time=_start_time,
+                end_time=_end_time,
+                query_string=f'log: "cluster_id: \\"{self.cluster.id}\\""',
+            )
+
+        # 优先从备份目录查询，目录未覆盖时间范围时再查询日志平台
+        backup_logs = BackupCatalogHandler.query_backup_logs(
+            self.cluster.id, start_time, end_time, tail_loader=_query_from_bklog
         )
+        if backup_logs is None:
+            backup_logs = _query_from_bklog(start_time, end_time)
 
         if self.cluster.cluster_type == ClusterType.TenDBCluster:
             return self.aggregate_tendbcluster_dbbackup_logs(backup_logs)
@@ -362,13 +371,23 @@ class FixPointRollbackHandler:
             master = self.cluster.storageinstance_set.get(instance_inner_role=InstanceInnerRole.MASTER)
             host_ip, port = master.machine.ip, master.port
 
-        binlogs = self._get_log_from_bklog(
-            collector="mysql_binlog_result",
-            # 时间范围前后放大避免日志平台上传延迟
-            start_time=start_time - timedelta(minutes=minute_range),
-            end_time=end_time + timedelta(minutes=minute_range),
-            query_string=f"host: {host_ip} AND port: {port}",
+        def _query_from_bklog(_start_time: datetime, _end_time: datetime) -> List[Dict]:
+            return self._get_log_from_bklog(
+                collector="mysql_binlog_result",
+                start_time=_start_time,
+                end_time=_end_time,
+                query_string=f"host: {host_ip} AND port: {port}",
+            )
+
+        # 时间范围前后放大避免日志平台上传延迟
+        query_start_time = start_time - timedelta(minutes=minute_range)
+        query_end_time = end_time + timedelta(minutes=minute_range)
+        # 优先从备份目录查询，目录未覆盖时间范围时再查询日志平台
+        binlogs = BackupCatalogHandler.query_binlogs(
+            host_ip, port, query_start_time, query_end_time, tail_loader=_query_from_bklog
         )
+        if binlogs is None:
+            binlogs = _query_from_bklog(query_start_time, query_end_time)
 
         if not binlogs:
             raise AppBaseException(_("无法查找在时间范围内{}-{}，主机{}的binlog日志").format(start_time, end_time, host_ip))
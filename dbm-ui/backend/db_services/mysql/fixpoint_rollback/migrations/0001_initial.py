@@ -0,0 +1,59 @@
+# Generated by Django 3.2.19 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="MySQLBackupCatalog",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("cluster_id", models.BigIntegerField(help_text="集群ID")),
+                ("bk_biz_id", models.BigIntegerField(default=0, help_text="业务ID")),
+                ("backup_id", models.CharField(help_text="备份ID", max_length=64)),
+                ("shard_value", models.IntegerField(default=-1, help_text="分片值，非tendbcluster为-1")),
+                ("mysql_role", models.CharField(default="", help_text="备份实例角色", max_length=32)),
+                ("backup_host", models.CharField(help_text="备份实例IP", max_length=64)),
+                ("backup_port", models.IntegerField(help_text="备份实例端口")),
+                ("is_full_backup", models.BooleanField(default=False, help_text="是否为全备")),
+                ("consistent_time", models.DateTimeField(help_text="备份一致性时间")),
+                ("backup_log", models.JSONField(default=dict, help_text="备份日志原文(字段已转为下划线风格)")),
+                ("create_at", models.DateTimeField(auto_now_add=True, help_text="导入时间")),
+            ],
+            options={
+                "verbose_name": "MySQL备份目录",
+                "verbose_name_plural": "MySQL备份目录",
+                "db_table": "tb_mysql_backup_catalog",
+                "unique_together": {("cluster_id", "backup_id", "backup_host", "backup_port")},
+                "index_together": {("cluster_id", "consistent_time")},
+            },
+        ),
+        migrations.CreateModel(
+            name="MySQLBinlogCatalog",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("cluster_id", models.BigIntegerField(help_text="集群ID")),
+                ("host", models.CharField(help_text="实例IP", max_length=64)),
+                ("port", models.IntegerField(help_text="实例端口")),
+                ("task_id", models.CharField(help_text="备份系统任务ID", max_length=64)),
+                ("file_name", models.CharField(help_text="binlog文件名", max_length=128)),
+                ("start_time", models.DateTimeField(help_text="binlog开始时间")),
+                ("stop_time", models.DateTimeField(help_text="binlog结束时间")),
+                ("binlog_log", models.JSONField(default=dict, help_text="binlog备份日志原文(字段已转为下划线风格)")),
+                ("create_at", models.DateTimeField(auto_now_add=True, help_text="导入时间")),
+            ],
+            options={
+                "verbose_name": "MySQL binlog目录",
+                "verbose_name_plural": "MySQL binlog目录",
+                "db_table": "tb_mysql_binlog_catalog",
+                "unique_together": {("cluster_id", "host", "port", "task_id")},
+                "index_together": {("host", "port", "stop_time")},
+            },
+        ),
+    ]
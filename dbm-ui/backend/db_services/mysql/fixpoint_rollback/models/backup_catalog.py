@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+class MySQLBackupCatalog(models.Model):
+    """
+    MySQL 备份目录：由 mysql_dbbackup_result 日志增量导入，每条记录对应一个实例的一次备份
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    cluster_id = models.BigIntegerField(help_text=_("集群ID"))
+    bk_biz_id = models.BigIntegerField(default=0, help_text=_("业务ID"))
+    backup_id = models.CharField(max_length=64, help_text=_("备份ID"))
+    shard_value = models.IntegerField(default=-1, help_text=_("分片值，非tendbcluster为-1"))
+    mysql_role = models.CharField(max_length=32, default="", help_text=_("备份实例角色"))
+    backup_host = models.CharField(max_length=64, help_text=_("备份实例IP"))
+    backup_port = models.IntegerField(help_text=_("备份实例端口"))
+    is_full_backup = models.BooleanField(default=False, help_text=_("是否为全备"))
+    consistent_time = models.DateTimeField(help_text=_("备份一致性时间"))
+    backup_log = models.JSONField(default=dict, help_text=_("备份日志原文(字段已转为下划线风格)"))
+    create_at = models.DateTimeField(auto_now_add=True, help_text=_("导入时间"))
+
+    class Meta:
+        db_table = "tb_mysql_backup_catalog"
+        verbose_name = verbose_name_plural = _("MySQL备份目录")
+        unique_together = ("cluster_id", "backup_id", "backup_host", "backup_port")
+        index_together = [("cluster_id", "consistent_time")]
+
+
+class MySQLBinlogCatalog(models.Model):
+    """
+    MySQL binlog 目录：由 mysql_binlog_result 日志增量导入，每条记录对应一个binlog文件
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    cluster_id = models.BigIntegerField(help_text=_("集群ID"))
+    host = models.CharField(max_length=64, help_text=_("实例IP"))
+    port = models.IntegerField(help_text=_("实例端口"))
+    task_id = models.CharField(max_length=64, help_text=_("备份系统任务ID"))
+    file_name = models.CharField(max_length=128, help_text=_("binlog文件名"))
+    start_time = models.DateTimeField(help_text=_("binlog开始时间"))
+    stop_time = models.DateTimeField(help_text=_("binlog结束时间"))
+    binlog_log = models.JSONField(default=dict, help_text=_("binlog备份日志原文(字段已转为下划线风格)"))
+    create_at = models.DateTimeField(auto_now_add=True, help_text=_("导入时间"))
+
+    class Meta:
+        db_table = "tb_mysql_binlog_catalog"
+        verbose_name = verbose_name_plural = _("MySQL binlog目录")
+        unique_together = ("cluster_id", "host", "port", "task_id")
+        index_together = [("host", "port", "stop_time")]
@@ -9,15 +9,25 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 from collections import defaultdict
-from typing import Any, Dict, List, Union
+from typing import Any, Callable, Dict, List, Union
 
 from django.utils.translation import ugettext as _
 
 from backend.components import DRSApi
 from backend.db_meta.api.cluster.base.handler import ClusterHandler
 from backend.db_meta.models import Cluster
-from backend.db_services.mysql.constants import QUERY_SCHEMA_DBS_SQL, QUERY_SCHEMA_TABLES_SQL, QUERY_TABLES_FROM_DB_SQL
+from backend.db_services.mysql.constants import (
+    QUERY_SCHEMA_DBS_SQL,
+    QUERY_SCHEMA_TABLES_SQL,
+    QUERY_TABLE_COLUMNS_SQL,
+    QUERY_TABLES_FROM_DB_SQL,
+)
 from backend.db_services.mysql.remote_service.exceptions import RemoteServiceBaseException
+from backend.db_services.mysql.remote_service.metadata import (
+    RemoteSchemaKind,
+    SchemaCacheItem,
+    remote_metadata_service,
+)
 from backend.db_services.mysql.sqlparse.exceptions import SQLParseBaseException
 from backend.db_services.mysql.sqlparse.handlers import SQLParseHandler
 from backend.flow.consts import SYSTEM_DBS
@@ -63,88 +73,219 @@ class RemoteServiceHandler:
         return cluster_handler, cluster_handler.get_remote_address()
 
     def show_databases(
-        self, cluster_ids: List[int], cluster_id__role_map: Dict[int, str] = None
+        self, cluster_ids: List[int], cluster_id__role_map: Dict[int, str] = None, use_cache: bool = False
     ) -> List[Dict[str, Union[int, List[str]]]]:
         """
         批量查询集群的数据库列表
         @param cluster_ids: 集群ID列表
         @param cluster_id__role_map: (可选)集群ID和对应查询库表角色的映射表
+        @param use_cache: 是否使用库表缓存，页面浏览场景开启，单据校验场景实时查询
         """
 
         # 如果集群列表为空，则提前返回
         if not cluster_ids:
             return []
 
-        cluster_id__role_map = cluster_id__role_map or {}
-        cloud_addresses = defaultdict(list)
-        cluster_databases = []
-        address_cluster_id_map = defaultdict(dict)
-        cluster_ids = list(set(cluster_ids))
+        cluster_ids = list(dict.fromkeys(cluster_ids))
+        cluster_addresses = remote_metadata_service.get_cluster_addresses(
+            self.bk_biz_id, cluster_ids, cluster_id__role_map
+        )
+        cache_items = {cluster_id: (cluster_id, cluster_addresses[cluster_id][1], "") for cluster_id in cluster_ids}
+        cached_databases = (
+            remote_metadata_service.get_cache(RemoteSchemaKind.DATABASES, cache_items.values()) if use_cache else {}
+        )
 
-        # 查询各个集群可执行的实例地址
+        # 未命中缓存的集群按云区域合并查询
+        cloud_addresses = defaultdict(list)
+        address_cluster_ids = defaultdict(list)
         for cluster_id in cluster_ids:
-            cluster_handler, address = self._get_cluster_address(cluster_id__role_map, cluster_id)
-            bk_cloud_id = cluster_handler.cluster.bk_cloud_id
+            if cache_items[cluster_id] in cached_databases:
+                continue
+            bk_cloud_id, address = cluster_addresses[cluster_id]
             cloud_addresses[bk_cloud_id].append(address)
-            address_cluster_id_map[bk_cloud_id][address] = cluster_id
-
-        # 批量查询实例地址对应的数据库列表
-        for bk_cloud_id in cloud_addresses.keys():
-            rpc_results = DRSApi.rpc(
-                {"bk_cloud_id": bk_cloud_id, "addresses": cloud_addresses[bk_cloud_id], "cmds": ["show databases"]}
-            )
+            address_cluster_ids[(bk_cloud_id, address)].append(cluster_id)
 
+        tasks = [
+            {"bk_cloud_id": bk_cloud_id, "addresses": addresses, "cmds": ["show databases"]}
+            for bk_cloud_id, addresses in cloud_addresses.items()
+        ]
+        databases_map, new_cache = {}, {}
+        for task, rpc_results in zip(tasks, remote_metadata_service.batch_rpc(DRSApi.rpc, tasks)):
             if rpc_results[0]["error_msg"]:
                 raise RemoteServiceBaseException(_("DRS调用失败，错误信息: {}").format(rpc_results[0]["error_msg"]))
 
             for rpc_result in rpc_results:
                 cmd_results = rpc_result["cmd_results"] or [{}]
-                cluster_databases.append(
-                    {
-                        "cluster_id": address_cluster_id_map[bk_cloud_id][rpc_result["address"]],
-                        "databases": [
-                            data["Database"]
-                            for data in cmd_results[0].get("table_data", [])
-                            if data["Database"] not in SYSTEM_DBS
-                        ],
-                        "system_databases": SYSTEM_DBS,
-                    }
-                )
+                databases = [
+                    data["Database"]
+                    for data in cmd_results[0].get("table_data", [])
+                    if data["Database"] not in SYSTEM_DBS
+                ]
+                for cluster_id in address_cluster_ids[(task["bk_cloud_id"], rpc_result["address"])]:
+                    databases_map[cluster_id] = databases
+                    # 查询失败的实例不缓存
+                    if not rpc_result["error_msg"]:
+                        new_cache[cache_items[cluster_id]] = databases
+
+        if use_cache:
+            remote_metadata_service.set_cache(RemoteSchemaKind.DATABASES, new_cache)
+
+        cluster_databases = []
+        for cluster_id in cluster_ids:
+            if cache_items[cluster_id] in cached_databases:
+                databases = cached_databases[cache_items[cluster_id]]
+            elif cluster_id in databases_map:
+                databases = databases_map[cluster_id]
+            else:
+                continue
+            cluster_databases.append(
+                {"cluster_id": cluster_id, "databases": databases, "system_databases": SYSTEM_DBS}
+            )
         return cluster_databases
 
+    def _batch_query_schema(
+        self, kind: str, query_infos: List[Dict], use_cache: bool, parse_result: Callable[[Dict, List[Dict]], Dict]
+    ) -> Dict[SchemaCacheItem, Any]:
+        """
+        批量查询库表元数据，返回 缓存条目 -> 元数据
+        未命中缓存的条目按 (云区域, 查询语句) 合并到同一个 DRS 请求中并发执行
+        @param kind: 缓存类型，参考 RemoteSchemaKind
+        @param query_infos: [{"bk_cloud_id": 0, "cluster_id": 1, "address": "", "names": [], "sql": lambda names: ""}]
+        @param use_cache: 是否使用库表缓存
+        @param parse_result: 将单个实例的查询结果解析为 名称 -> 元数据
+        """
+        items = [(info["cluster_id"], info["address"], name) for info in query_infos for name in info["names"]]
+        schema_map = remote_metadata_service.get_cache(kind, items) if use_cache else {}
+
+        query_groups = defaultdict(list)
+        query_group_infos = defaultdict(list)
+        for info in query_infos:
+            names = [name for name in info["names"] if (info["cluster_id"], info["address"], name) not in schema_map]
+            if not names:
+                continue
+            query_sql = info["sql"](names)
+            query_groups[(info["bk_cloud_id"], query_sql)].append(info["address"])
+            query_group_infos[(info["bk_cloud_id"], query_sql, info["address"])].append({**info, "names": names})
+
+        tasks = [
+            {"bk_cloud_id": bk_cloud_id, "addresses": addresses, "cmds": [query_sql]}
+            for (bk_cloud_id, query_sql), addresses in query_groups.items()
+        ]
+        new_cache = {}
+        for task, rpc_results in zip(tasks, remote_metadata_service.batch_rpc(DRSApi.rpc, tasks)):
+            for rpc_result in rpc_results:
+                if rpc_result["error_msg"]:
+                    raise RemoteServiceBaseException(_("DRS调用失败，错误信息: {}").format(rpc_result["error_msg"]))
+
+                table_data = rpc_result["cmd_results"][0]["table_data"]
+                group_key = (task["bk_cloud_id"], task["cmds"][0], rpc_result["address"])
+                for info in query_group_infos[group_key]:
+                    parsed_data = parse_result(info, table_data)
+                    for name in info["names"]:
+                        new_cache[(info["cluster_id"], info["address"], name)] = parsed_data[name]
+
+        if use_cache:
+            remote_metadata_service.set_cache(kind, new_cache)
+        return {**schema_map, **new_cache}
+
     def show_tables(
-        self, cluster_db_infos: List[Dict], cluster_id__role_map: Dict[int, str] = None
+        self, cluster_db_infos: List[Dict], cluster_id__role_map: Dict[int, str] = None, use_cache: bool = False
     ) -> List[Dict[str, Union[str, List]]]:
         """
         批量查询集群的数据库列表
         @param cluster_db_infos: 集群DB信息
         @param cluster_id__role_map: (可选)集群ID和对应查询库表角色的映射表
+        @param use_cache: 是否使用库表缓存，页面浏览场景开启，单据校验场景实时查询
         """
-        cluster_id__role_map = cluster_id__role_map or {}
-
-        cluster_table_infos: List[Dict[str, Union[str, List]]] = []
-        for info in cluster_db_infos:
-            cluster_handler, address = self._get_cluster_address(cluster_id__role_map, info["cluster_id"])
+        cluster_addresses = remote_metadata_service.get_cluster_addresses(
+            self.bk_biz_id, list({info["cluster_id"] for info in cluster_db_infos}), cluster_id__role_map
+        )
 
+        def _query_table_sql(dbs):
             # 构造数据表查询语句
-            db_sts = " or ".join([f"table_schema='{db}'" for db in info["dbs"]])
-            query_table_sql = QUERY_TABLES_FROM_DB_SQL.format(db_sts=db_sts)
+            db_sts = " or ".join([f"table_schema='{db}'" for db in dbs])
+            return QUERY_TABLES_FROM_DB_SQL.format(db_sts=db_sts)
 
-            # 执行DRS，并聚合库所包含的表数据
-            bk_cloud_id = cluster_handler.cluster.bk_cloud_id
-            rpc_results = DRSApi.rpc({"bk_cloud_id": bk_cloud_id, "addresses": [address], "cmds": [query_table_sql]})
+        def _parse_tables(info, table_data):
+            # 聚合库所包含的表数据
+            aggregate_table_data: Dict[str, List[str]] = {db: [] for db in info["names"]}
+            for data in table_data:
+                aggregate_table_data[data["table_schema"]].append(data["table_name"])
+            return aggregate_table_data
 
-            if rpc_results[0]["error_msg"]:
-                raise RemoteServiceBaseException(_("DRS调用失败，错误信息: {}").format(rpc_results[0]["error_msg"]))
+        query_infos = [
+            {
+                "bk_cloud_id": cluster_addresses[info["cluster_id"]][0],
+                "cluster_id": info["cluster_id"],
+                "address": cluster_addresses[info["cluster_id"]][1],
+                "names": info["dbs"],
+                "sql": _query_table_sql,
+            }
+            for info in cluster_db_infos
+        ]
+        tables_map = self._batch_query_schema(RemoteSchemaKind.TABLES, query_infos, use_cache, _parse_tables)
+
+        return [
+            {
+                "cluster_id": info["cluster_id"],
+                "table_data": {db: tables_map[(info["cluster_id"], info["address"], db)] for db in info["names"]},
+            }
+            for info in query_infos
+        ]
+
+    def show_columns(
+        self, cluster_table_infos: List[Dict], cluster_id__role_map: Dict[int, str] = None, use_cache: bool = False
+    ) -> List[Dict[str, Union[int, str, Dict]]]:
+        """
+        批量查询集群数据表的字段
+        @param cluster_table_infos: 集群表信息，格式：{"cluster_id": 1, "db": "db1", "tables": ["tb1"]}
+        @param cluster_id__role_map: (可选)集群ID和对应查询库表角色的映射表
+        @param use_cache: 是否使用库表缓存
+        """
+        cluster_addresses = remote_metadata_service.get_cluster_addresses(
+            self.bk_biz_id, list({info["cluster_id"] for info in cluster_table_infos}), cluster_id__role_map
+        )
 
-            table_data = rpc_results[0]["cmd_results"][0]["table_data"]
-            aggregate_table_data: Dict[str, List[str]] = {db: [] for db in info["dbs"]}
+        def _query_column_sql(db_tables):
+            db = db_tables[0].split(".", 1)[0]
+            table_list = "(" + ",".join([f"'{db_table.split('.', 1)[1]}'" for db_table in db_tables]) + ")"
+            return QUERY_TABLE_COLUMNS_SQL.format(db=db, table_list=table_list)
+
+        def _parse_columns(info, table_data):
+            aggregate_column_data: Dict[str, List[Dict]] = {db_table: [] for db_table in info["names"]}
             for data in table_data:
-                aggregate_table_data[data["table_schema"]].append(data["table_name"])
+                db_table = f"{data['table_schema']}.{data['table_name']}"
+                if db_table not in aggregate_column_data:
+                    continue
+                aggregate_column_data[db_table].append(
+                    {key: data[key] for key in ["column_name", "column_type", "column_key"]}
+                )
+            return aggregate_column_data
 
-            cluster_table_infos.append({"cluster_id": cluster_handler.cluster_id, "table_data": aggregate_table_data})
+        query_infos = [
+            {
+                "bk_cloud_id": cluster_addresses[info["cluster_id"]][0],
+                "cluster_id": info["cluster_id"],
+                "address": cluster_addresses[info["cluster_id"]][1],
+                "names": [f"{info['db']}.{table}" for table in info["tables"]],
+                "sql": _query_column_sql,
+                "db": info["db"],
+            }
+            for info in cluster_table_infos
+        ]
+        columns_map = self._batch_query_schema(RemoteSchemaKind.COLUMNS, query_infos, use_cache, _parse_columns)
 
-        return cluster_table_infos
+        return [
+            {
+                "cluster_id": info["cluster_id"],
+                "db": info["db"],
+                "column_data": {
+                    db_table.split(".", 1)[1]: columns_map[(info["cluster_id"], info["address"], db_table)]
+                    for db_table in info["names"]
+                },
+            }
+            for info in query_infos
+        ]
 
     def check_cluster_database(self, check_infos: List[Dict[str, Any]]) -> List[Dict[str, Dict]]:
         """
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+
+from backend.constants import IP_PORT_DIVIDER
+from backend.db_meta.api.cluster.base.handler import ClusterHandler
+from backend.db_meta.enums import ClusterType, InstanceInnerRole, TenDBClusterSpiderRole
+from backend.db_meta.exceptions import ClusterNotExistException
+from backend.db_meta.models import Cluster, ProxyInstance, StorageInstance
+from backend.flow.consts import TenDBBackUpLocation
+from backend.ticket.constants import TicketObjectType, TicketType
+from backend.utils.batch_request import async_request_runner
+from backend.utils.settings import get_feature_config
+
+DEFAULT_REMOTE_METADATA_CONFIG = {
+    # 是否开启库表元数据缓存
+    "cache_enabled": True,
+    # 库表元数据的缓存时间(秒)
+    "cache_ttl": 60,
+    # 每个云区域同时进行的 DRS 请求数
+    "cloud_concurrency": 5,
+    # 单次 DRS 请求的实例数量
+    "batch_size": 20,
+}
+
+REMOTE_SCHEMA_VERSION_KEY = "remote_schema:version:{cluster_id}"
+REMOTE_SCHEMA_CACHE_KEY = "remote_schema:{cluster_id}:{version}:{address}:{kind}:{name}"
+
+# 执行后库表结构可能发生变化的单据，单据结束后清理关联集群的库表缓存
+SCHEMA_CHANGE_TICKET_TYPES = [
+    TicketType.MYSQL_IMPORT_SQLFILE,
+    TicketType.MYSQL_FORCE_IMPORT_SQLFILE,
+    TicketType.MYSQL_HA_RENAME_DATABASE,
+    TicketType.MYSQL_SINGLE_RENAME_DATABASE,
+    TicketType.MYSQL_HA_TRUNCATE_DATA,
+    TicketType.MYSQL_SINGLE_TRUNCATE_DATA,
+    TicketType.MYSQL_OPEN_AREA,
+    TicketType.MYSQL_DATA_MIGRATE,
+    TicketType.TENDBCLUSTER_IMPORT_SQLFILE,
+    TicketType.TENDBCLUSTER_FORCE_IMPORT_SQLFILE,
+    TicketType.TENDBCLUSTER_RENAME_DATABASE,
+    TicketType.TENDBCLUSTER_TRUNCATE_DATABASE,
+    TicketType.TENDBCLUSTER_OPEN_AREA,
+    TicketType.TENDBCLUSTER_DATA_MIGRATE,
+]
+
+# 缓存条目：(集群ID, 实例地址, 名称)，名称按类型分别是空串/库名/库名.表名
+SchemaCacheItem = Tuple[int, str, str]
+
+
+class RemoteSchemaKind(object):
+    DATABASES = "databases"
+    TABLES = "tables"
+    COLUMNS = "columns"
+
+
+class RemoteMetadataService(object):
+    """
+    远程库表元数据查询
+    - 批量解析集群的 DRS 访问地址，不再逐个集群构造 ClusterHandler
+    - DRS 请求按云区域分组、按实例分批后并发执行，每个云区域的并发数单独限制
+    - 库、表、字段按实例缓存，缓存键带集群的元数据版本号，变更库表的单据结束后递增版本号使缓存失效
+    """
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("REMOTE_METADATA", DEFAULT_REMOTE_METADATA_CONFIG)
+
+    @staticmethod
+    def get_cluster_addresses(
+        bk_biz_id: int, cluster_ids: List[int], cluster_id__role_map: Dict[int, str] = None
+    ) -> Dict[int, Tuple[int, str]]:
+        """
+        批量查询集群的 DRS 访问地址，返回 集群ID -> (云区域ID, 实例地址)
+        地址的选取规则与各集群 handler 的 get_remote_address 一致，批量查询不到的集群回退到 handler 查询
+        @param bk_biz_id: 业务ID
+        @param cluster_ids: 集群ID列表
+        @param cluster_id__role_map: (可选)集群ID和对应查询库表角色的映射表
+        """
+        cluster_id__role_map = cluster_id__role_map or {}
+        clusters = {cluster.id: cluster for cluster in Cluster.objects.filter(bk_biz_id=bk_biz_id, id__in=cluster_ids)}
+        for cluster_id in cluster_ids:
+            if cluster_id not in clusters:
+                raise ClusterNotExistException(cluster_type="", cluster_id=cluster_id)
+
+        # 主从集群访问 master，单节点集群访问 orphan 实例
+        storage_cluster_ids = [
+            cluster.id
+            for cluster in clusters.values()
+            if cluster.cluster_type in [ClusterType.TenDBHA, ClusterType.TenDBSingle]
+        ]
+        storages = [
+            (cluster_id, ip, port)
+            for cluster_id, cluster_type, inner_role, ip, port in StorageInstance.objects.filter(
+                cluster__id__in=storage_cluster_ids
+            ).values_list("cluster__id", "cluster__cluster_type", "instance_inner_role", "machine__ip", "port")
+            if cluster_type == ClusterType.TenDBSingle or inner_role == InstanceInnerRole.MASTER
+        ]
+
+        # TenDBCluster 默认访问 spider master，指定了非 remote 角色时访问运维节点
+        spider_role_cluster_ids: Dict[str, List[int]] = defaultdict(list)
+        for cluster in clusters.values():
+            if cluster.cluster_type != ClusterType.TenDBCluster:
+                continue
+            role = cluster_id__role_map.get(cluster.id) or TenDBBackUpLocation.REMOTE
+            spider_role = (
+                TenDBClusterSpiderRole.SPIDER_MASTER
+                if role == TenDBBackUpLocation.REMOTE
+                else TenDBClusterSpiderRole.SPIDER_MNT
+            )
+            spider_role_cluster_ids[spider_role].append(cluster.id)
+        spiders = []
+        for spider_role, role_cluster_ids in spider_role_cluster_ids.items():
+            spiders.extend(
+                ProxyInstance.objects.filter(
+                    cluster__id__in=role_cluster_ids, tendbclusterspiderext__spider_role=spider_role
+                )
+                .order_by("id")
+                .values_list("cluster__id", "machine__ip", "port")
+            )
+
+        addresses: Dict[int, Tuple[int, str]] = {}
+        for cluster_id, ip, port in [*storages, *spiders]:
+            addresses.setdefault(cluster_id, (clusters[cluster_id].bk_cloud_id, f"{ip}{IP_PORT_DIVIDER}{port}"))
+
+        for cluster_id in cluster_ids:
+            if cluster_id in addresses:
+                continue
+            cluster_handler = ClusterHandler.get_exact_handler(bk_biz_id=bk_biz_id, cluster_id=cluster_id)
+            role = cluster_id__role_map.get(cluster_id)
+            address = cluster_handler.get_remote_address(role) if role else cluster_handler.get_remote_address()
+            addresses[cluster_id] = (clusters[cluster_id].bk_cloud_id, address)
+
+        return addresses
+
+    def batch_rpc(self, rpc: Callable, tasks: List[Dict[str, Any]]) -> List[List[Dict]]:
+        """
+        并发执行 DRS 请求，返回与 tasks 一一对应的执行结果
+        每个 task 的实例按 batch_size 拆成多个请求，同一云区域同时进行的请求数不超过 cloud_concurrency
+        @param rpc: DRS 请求方法，如 DRSApi.rpc
+        @param tasks: [{"bk_cloud_id": 0, "addresses": ["127.0.0.1:3306"], "cmds": ["show databases"]}]
+        """
+        batch_size = self.config["batch_size"]
+        requests: List[Tuple[int, Dict]] = []
+        for index, task in enumerate(tasks):
+            addresses = list(dict.fromkeys(task["addresses"]))
+            for start in range(0, len(addresses), batch_size):
+                params = {**task, "addresses": addresses[start : start + batch_size]}
+                requests.append((index, params))
+
+        if len(requests) <= 1 or async_request_runner.in_worker():
+            responses = [rpc(params) for __, params in requests]
+        else:
+            responses = async_request_runner.run(self._gather_rpc(rpc, [params for __, params in requests]))
+
+        results: List[List[Dict]] = [[] for __ in tasks]
+        for (index, __), response in zip(requests, responses):
+            results[index].extend(response)
+        return results
+
+    async def _gather_rpc(self, rpc: Callable, params_list: List[Dict]) -> List:
+        semaphores: Dict[int, asyncio.Semaphore] = {}
+        for params in params_list:
+            semaphores.setdefault(params["bk_cloud_id"], asyncio.Semaphore(self.config["cloud_concurrency"]))
+
+        async def _call(params):
+            async with semaphores[params["bk_cloud_id"]]:
+                return await async_request_runner.call(rpc, params)
+
+        return await asyncio.gather(*[_call(params) for params in params_list])
+
+    @property
+    def cache_enabled(self) -> bool:
+        return self.config["cache_enabled"]
+
+    @staticmethod
+    def _get_versions(cluster_ids: Iterable[int]) -> Dict[int, int]:
+        keys = {cluster_id: REMOTE_SCHEMA_VERSION_KEY.format(cluster_id=cluster_id) for cluster_id in cluster_ids}
+        versions = cache.get_many(list(keys.values()))
+        return {cluster_id: int(versions.get(key) or 0) for cluster_id, key in keys.items()}
+
+    def _get_cache_keys(self, kind: str, items: Iterable[SchemaCacheItem]) -> Dict[SchemaCacheItem, str]:
+        items = list(items)
+        versions = self._get_versions({cluster_id for cluster_id, __, __ in items})
+        return {
+            (cluster_id, address, name): REMOTE_SCHEMA_CACHE_KEY.format(
+                cluster_id=cluster_id, version=versions[cluster_id], address=address, kind=kind, name=name
+            )
+            for cluster_id, address, name in items
+        }
+
+    def get_cache(self, kind: str, items: Iterable[SchemaCacheItem]) -> Dict[SchemaCacheItem, Any]:
+        """
+        批量读取库表缓存，只返回命中的条目
+        @param kind: 缓存类型，参考 RemoteSchemaKind
+        @param items: 缓存条目列表
+        """
+        if not self.cache_enabled:
+            return {}
+        keys = self._get_cache_keys(kind, items)
+        values = cache.get_many(list(keys.values()))
+        return {item: values[key] for item, key in keys.items() if key in values}
+
+    def set_cache(self, kind: str, values: Dict[SchemaCacheItem, Any]):
+        """
+        批量写入库表缓存
+        @param kind: 缓存类型，参考 RemoteSchemaKind
+        @param values: 缓存条目 -> 缓存内容
+        """
+        if not self.cache_enabled or not values:
+            return
+        keys = self._get_cache_keys(kind, values.keys())
+        cache.set_many({keys[item]: value for item, value in values.items()}, timeout=self.config["cache_ttl"])
+
+    @staticmethod
+    def invalidate(cluster_ids: Iterable[int]):
+        """递增集群的元数据版本号，集群下所有实例的库表缓存失效"""
+        for cluster_id in set(cluster_ids):
+            key = REMOTE_SCHEMA_VERSION_KEY.format(cluster_id=cluster_id)
+            cache.add(key, 0, timeout=None)
+            cache.incr(key)
+
+    def invalidate_by_ticket(self, ticket) -> Optional[List[int]]:
+        """变更库表的单据结束后，清理单据关联集群的库表缓存"""
+        if ticket.ticket_type not in SCHEMA_CHANGE_TICKET_TYPES:
+            return None
+        cluster_ids = list(
+            ticket.related_objects.filter(object_type=TicketObjectType.CLUSTER).values_list("object_id", flat=True)
+        )
+        self.invalidate(cluster_ids)
+        return cluster_ids
+
+
+remote_metadata_service = RemoteMetadataService()
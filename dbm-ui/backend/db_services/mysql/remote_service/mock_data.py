@@ -18,6 +18,14 @@ SHOW_DATABASES_RESPONSE_DATA = [
 
 SHOW_TABLES_RESPONSE_DATA = [{"cluster_id": 1, "table_data": {"db1": [], "db2": [], "db3": ["test1"]}}]
 
+SHOW_COLUMNS_RESPONSE_DATA = [
+    {
+        "cluster_id": 1,
+        "db": "db1",
+        "column_data": {"tb1": [{"column_name": "id", "column_type": "int(11)", "column_key": "PRI"}]},
+    }
+]
+
 CHECK_CLUSTER_DATABASE_REQUEST_DATA = {"infos": [{"cluster_id": 1, "db_names": ["test1", "test2"]}]}
 
 CHECK_CLUSTER_DATABASE_RESPONSE_DATA = [
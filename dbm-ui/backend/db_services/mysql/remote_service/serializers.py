@@ -16,6 +16,7 @@ from backend.db_services.mysql.remote_service.mock_data import (
     CHECK_CLUSTER_DATABASE_REQUEST_DATA,
     CHECK_CLUSTER_DATABASE_RESPONSE_DATA,
     FLASHBACK_CHECK_DATA,
+    SHOW_COLUMNS_RESPONSE_DATA,
     SHOW_DATABASES_REQUEST_DATA,
     SHOW_DATABASES_RESPONSE_DATA,
     SHOW_TABLES_RESPONSE_DATA,
@@ -51,6 +52,20 @@ class ShowTablesResponseSerializer(serializers.Serializer):
         swagger_schema_fields = {"example": SHOW_TABLES_RESPONSE_DATA}
 
 
+class ShowColumnsRequestSerializer(serializers.Serializer):
+    class TableInfoSerializer(serializers.Serializer):
+        cluster_id = serializers.IntegerField(help_text=_("集群ID"))
+        db = DBTableField(help_text=_("查询的DB"), db_field=True)
+        tables = serializers.ListField(help_text=_("查询的表列表"), child=DBTableField())
+
+    cluster_table_infos = serializers.ListSerializer(help_text=_("集群数据表信息"), child=TableInfoSerializer())
+
+
+class ShowColumnsResponseSerializer(serializers.Serializer):
+    class Meta:
+        swagger_schema_fields = {"example": SHOW_COLUMNS_RESPONSE_DATA}
+
+
 class ShowDatabasesResponseSerializer(serializers.Serializer):
     class Meta:
         swagger_schema_fields = {"example": SHOW_DATABASES_RESPONSE_DATA}
@@ -21,6 +21,8 @@ from backend.db_services.mysql.remote_service.serializers import (
     CheckClusterDatabaseSerializer,
     CheckFlashbackInfoResponseSerializer,
     CheckFlashbackInfoSerializer,
+    ShowColumnsRequestSerializer,
+    ShowColumnsResponseSerializer,
     ShowDatabasesRequestSerializer,
     ShowDatabasesResponseSerializer,
     ShowDBWithPatternsResponseSerializer,
@@ -59,7 +61,7 @@ class RemoteServiceViewSet(viewsets.SystemViewSet):
         cluster_ids, cluster_id__role_map = self._get_cluster_id_and_role(validated_data)
         return Response(
             RemoteServiceHandler(bk_biz_id=bk_biz_id).show_databases(
-                cluster_ids=cluster_ids, cluster_id__role_map=cluster_id__role_map
+                cluster_ids=cluster_ids, cluster_id__role_map=cluster_id__role_map, use_cache=True
             ),
         )
 
@@ -73,7 +75,24 @@ class RemoteServiceViewSet(viewsets.SystemViewSet):
     def show_cluster_tables(self, request, bk_biz_id):
         validated_data = self.params_validate(self.get_serializer_class())
         return Response(
-            RemoteServiceHandler(bk_biz_id=bk_biz_id).show_tables(cluster_db_infos=validated_data["cluster_db_infos"])
+            RemoteServiceHandler(bk_biz_id=bk_biz_id).show_tables(
+                cluster_db_infos=validated_data["cluster_db_infos"], use_cache=True
+            )
+        )
+
+    @common_swagger_auto_schema(
+        operation_summary=_("查询集群数据表字段列表"),
+        request_body=ShowColumnsRequestSerializer(),
+        tags=[SWAGGER_TAG],
+        responses={status.HTTP_200_OK: ShowColumnsResponseSerializer()},
+    )
+    @action(methods=["POST"], detail=False, serializer_class=ShowColumnsRequestSerializer)
+    def show_cluster_columns(self, request, bk_biz_id):
+        validated_data = self.params_validate(self.get_serializer_class())
+        return Response(
+            RemoteServiceHandler(bk_biz_id=bk_biz_id).show_columns(
+                cluster_table_infos=validated_data["cluster_table_infos"], use_cache=True
+            )
         )
 
     @common_swagger_auto_schema(
@@ -19,8 +19,6 @@ CACHE_SEMANTIC_TASK_FIELD = "{user}_{cluster_type}_semantic_check_task"
 CACHE_SEMANTIC_DATA_FIELD = "{root_id}_semantic_data"
 SQL_SEMANTIC_CHECK_DATA_EXPIRE_TIME = 7 * 24 * 60 * 60
 
-# 最大预览SQL文件大小200MB
-MAX_PREVIEW_SQL_FILE_SIZE = 200 * 1024 * 1024
 # 最大上传SQL文件大小1G
 MAX_UPLOAD_SQL_FILE_SIZE = 1024 * 1024 * 1024
 
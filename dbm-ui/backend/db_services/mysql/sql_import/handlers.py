@@ -15,7 +15,6 @@ import tempfile
 import time
 from typing import Any, Dict, List, Optional, Union
 
-import chardet
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.utils.translation import ugettext as _
 
@@ -27,10 +26,10 @@ from backend.db_services.mysql.sql_import.constants import (
     BKREPO_SQLFILE_PATH,
     CACHE_SEMANTIC_DATA_FIELD,
     CACHE_SEMANTIC_TASK_FIELD,
-    MAX_PREVIEW_SQL_FILE_SIZE,
     SQL_SEMANTIC_CHECK_DATA_EXPIRE_TIME,
 )
 from backend.db_services.mysql.sql_import.exceptions import SQLImportBaseException
+from backend.db_services.mysql.sql_import.ingest import sql_file_ingestor
 from backend.db_services.taskflow.handlers import TaskFlowHandler
 from backend.flow.consts import StateType
 from backend.flow.engine.bamboo.engine import BambooEngine
@@ -65,7 +64,7 @@ class SQLHandler(object):
         bkrepo_path, sql_content: str = None, sql_file_list: List[InMemoryUploadedFile] = None
     ) -> List[Dict[str, Any]]:
         """
-        - 将sql文本或者sql文件上传到制品库
+        - 将sql文本或者sql文件上传到制品库，返回文件路径、预览内容及文件摘要
         @param bkrepo_path: sql 路径
         @param sql_content: sql 语句内容
         @param sql_file_list: sql 语句文件
@@ -83,23 +82,13 @@ class SQLHandler(object):
 
         sql_file_info_list: List[Dict[str, Any]] = []
         for sql_file in sql_file_list:
-            sql_file_info: Dict[str, Any] = {}
             with sql_file as file:
                 # TODO: 是否需要考虑windows机器的路径分隔
-                sql_path = storage.save(name=os.path.join(bkrepo_path, file.name.split("/")[-1]), content=file)
-
-                # 恢复文件指针为文件头，否则会无法读取内容 TODO：如果sql内容过大需要进行内容读取吗？
-                file.seek(0)
-                # 超过最大预览限制，则不支持预览
-                if file.size > MAX_PREVIEW_SQL_FILE_SIZE:
-                    sql_content = _("当前SQL文件过大，暂不提供内容预览...")
-                else:
-                    content_bytes = file.read()
-                    # chardet.detect预测性非100%，这里非强制UnicodeDecodeError，选择replace模式忽略
-                    encoding = chardet.detect(content_bytes[:100])["encoding"]
-                    sql_content = content_bytes.decode(encoding=encoding, errors="replace")
-
-                sql_file_info.update(sql_path=sql_path, sql_content=sql_content, raw_file_name=file.name)
+                # 流式上传，同时计算md5、探测编码并生成前N条语句的预览，不会把整个文件读入内存
+                sql_file_info = sql_file_ingestor.ingest(
+                    storage, name=os.path.join(bkrepo_path, file.name.split("/")[-1]), file=file
+                )
+                sql_file_info.update(raw_file_name=file.name)
 
             sql_file_info_list.append(sql_file_info)
 
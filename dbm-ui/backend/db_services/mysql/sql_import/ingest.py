@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import codecs
+import hashlib
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from chardet.universaldetector import UniversalDetector
+from django.core.files import File
+
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("root")
+
+DEFAULT_SQL_INGEST_CONFIG = {
+    # 存储后端每次读取的分块大小
+    "chunk_size": 1024 * 1024,
+    # 编码探测最多使用的样本大小
+    "sample_size": 64 * 1024,
+    # 预览的语句数量
+    "preview_statements": 1000,
+    # 预览内容的最大长度(字符)
+    "preview_max_length": 5 * 1024 * 1024,
+    # 上传失败的重试次数，重试时从文件头重新上传，已经统计过的内容不会重复计算
+    "upload_retries": 2,
+}
+
+DEFAULT_SQL_DELIMITER = ";"
+SQL_DELIMITER_PREFIX = re.compile(r"delimiter[ \t]", re.I)
+SQL_DELIMITER_PATTERN = re.compile(r"delimiter[ \t]+(\S+)", re.I)
+# 完整的字符串字面量，字面量在当前文本块中没有结束时退化为逐段查找
+SQL_QUOTED_PATTERNS = {
+    "'": re.compile(r"'[^'\\]*(?:\\.[^'\\]*)*'", re.S),
+    '"': re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.S),
+    "`": re.compile(r"`[^`]*`"),
+}
+SQL_QUOTE_END_PATTERNS = {
+    "'": re.compile(r"\\.|'", re.S),
+    '"': re.compile(r'\\.|"', re.S),
+    "`": re.compile(r"`"),
+}
+SQL_WHITESPACE_PATTERN = re.compile(r"\s*")
+
+
+class SQLStatementScanner(object):
+    """
+    流式的SQL语句切分
+    - 按块输入解码后的文本，识别字符串、注释和 DELIMITER 命令，只在真正的语句结束符处切分
+    - 只保留当前语句的统计状态和前 N 条语句的预览内容，不保留整个文件
+    """
+
+    NORMAL = "normal"
+    QUOTE = "quote"
+    LINE_COMMENT = "line_comment"
+    BLOCK_COMMENT = "block_comment"
+
+    def __init__(self, preview_statements: int, preview_max_length: int):
+        self.preview_statements = preview_statements
+        self.preview_max_length = preview_max_length
+
+        self.statement_count = 0
+        self.max_statement_length = 0
+        self.delimiter = DEFAULT_SQL_DELIMITER
+
+        self._state = self.NORMAL
+        self._quote = None
+        self._pending = ""
+        self._normal_pattern = None
+        self._normal_run_pattern = None
+        self._statement_length = 0
+        self._has_content = False
+
+        self._preview_parts: List[str] = []
+        self._preview_length = 0
+        # 最后一个语句边界在预览内容中的位置
+        self._preview_boundary = 0
+        self._preview_closed = False
+        self._preview_truncated = False
+
+        self._compile_normal_pattern()
+
+    def _compile_normal_pattern(self):
+        self._normal_pattern = re.compile(r"['\"`#]|--(?=\s)|/\*|" + re.escape(self.delimiter))
+        # 不含任何标记的普通文本及完整的字符串字面量，一次匹配跳过，避免逐个字面量进入循环
+        self._normal_run_pattern = re.compile(
+            r"(?:[^'\"`#/\-{}]+|{})*".format(
+                re.escape(self.delimiter[0]), "|".join(pattern.pattern for pattern in SQL_QUOTED_PATTERNS.values())
+            ),
+            re.S,
+        )
+
+    def _append_preview(self, text: str):
+        if self._preview_closed:
+            if not self._preview_truncated and text.strip():
+                self._preview_truncated = True
+            return
+
+        remain = self.preview_max_length - self._preview_length
+        if len(text) > remain:
+            # 超出预览长度，预览截止到上一个语句边界，一条语句都不完整时按长度截断
+            self._preview_parts.append(text[:remain])
+            self._preview_length += remain
+            self._preview_closed = self._preview_truncated = True
+            return
+
+        self._preview_parts.append(text)
+        self._preview_length += len(text)
+
+    def _consume(self, text: str, is_content: bool = False):
+        if not text:
+            return
+        # 语句开头的空白和注释不计入语句长度
+        if is_content and not self._has_content:
+            self._has_content = bool(text.strip())
+        if self._has_content:
+            self._statement_length += len(text)
+        self._append_preview(text)
+
+    def _end_statement(self):
+        if self._has_content:
+            self.statement_count += 1
+            self.max_statement_length = max(self.max_statement_length, self._statement_length)
+            if not self._preview_closed:
+                self._preview_boundary = self._preview_length
+                self._preview_closed = self.statement_count >= self.preview_statements
+        self._statement_length = 0
+        self._has_content = False
+
+    def _scan_delimiter_command(self, buf: str, pos: int, final: bool) -> Optional[int]:
+        """
+        识别语句开头的 DELIMITER 命令，返回命令结束的位置
+        返回 -1 表示命令可能还没有读完整，需要等待下一块文本
+        """
+        if len(buf) - pos < len("delimiter "):
+            return None if final or not "delimiter ".startswith(buf[pos:].lower()) else -1
+        if not SQL_DELIMITER_PREFIX.match(buf, pos):
+            return None
+
+        line_end = buf.find("\n", pos)
+        if line_end == -1:
+            if not final:
+                return -1
+            line_end = len(buf)
+        match = SQL_DELIMITER_PATTERN.match(buf, pos, line_end)
+        if not match:
+            return None
+        self.delimiter = match.group(1)
+        self._compile_normal_pattern()
+        return line_end
+
+    def feed(self, text: str, final: bool = False):
+        """
+        输入一块文本
+        @param text: 解码后的文本
+        @param final: 是否是最后一块，非最后一块时末尾可能被截断的标记会留到下一块处理
+        """
+        buf = self._pending + text
+        self._pending = ""
+        # 末尾保留的字符足以判断跨块的注释符、转义符和多字符的分隔符
+        limit = len(buf) if final else len(buf) - max(len(self.delimiter), 3)
+        pos = 0
+        while pos < limit:
+            if self._state == self.NORMAL:
+                if not self._has_content:
+                    # 语句开头，跳过空白后识别 DELIMITER 命令
+                    ws_end = SQL_WHITESPACE_PATTERN.match(buf, pos).end()
+                    self._consume(buf[pos:ws_end])
+                    pos = ws_end
+                    if pos >= limit:
+                        break
+                    if buf[pos] in "dD":
+                        command_end = self._scan_delimiter_command(buf, pos, final)
+                        if command_end == -1:
+                            break
+                        if command_end is not None:
+                            self._consume(buf[pos:command_end])
+                            pos = command_end
+                            limit = len(buf) if final else len(buf) - max(len(self.delimiter), 3)
+                            continue
+
+                run_end = self._normal_run_pattern.match(buf, pos).end()
+                if run_end > pos:
+                    self._consume(buf[pos:run_end], is_content=True)
+                    pos = run_end
+                    if pos >= limit:
+                        break
+
+                match = self._normal_pattern.search(buf, pos)
+                if not match or match.start() >= limit:
+                    self._consume(buf[pos:limit], is_content=True)
+                    pos = limit
+                    break
+
+                token = match.group()
+                self._consume(buf[pos : match.start()], is_content=True)
+                pos = match.end()
+                if token in SQL_QUOTED_PATTERNS:
+                    literal = SQL_QUOTED_PATTERNS[token].match(buf, match.start())
+                    if literal:
+                        pos = literal.end()
+                    else:
+                        self._state, self._quote = self.QUOTE, token
+                    self._consume(buf[match.start() : pos], is_content=True)
+                elif token == self.delimiter:
+                    self._consume(token)
+                    self._end_statement()
+                else:
+                    self._state = self.BLOCK_COMMENT if token == "/*" else self.LINE_COMMENT
+                    self._consume(token)
+
+            elif self._state == self.QUOTE:
+                # 跳过转义字符，转义字符可能跨过 limit，消费时不能把它截断
+                end, pattern = pos, SQL_QUOTE_END_PATTERNS[self._quote]
+                match = pattern.search(buf, pos)
+                while match and match.start() < limit and match.group() != self._quote:
+                    end = match.end()
+                    match = pattern.search(buf, end)
+                if not match or match.start() >= limit:
+                    end = max(end, limit)
+                    self._consume(buf[pos:end], is_content=True)
+                    pos = end
+                    break
+                self._consume(buf[pos : match.end()], is_content=True)
+                pos = match.end()
+                self._state, self._quote = self.NORMAL, None
+
+            else:
+                end_token = "\n" if self._state == self.LINE_COMMENT else "*/"
+                end = buf.find(end_token, pos)
+                if end == -1 or end >= limit:
+                    self._consume(buf[pos:limit])
+                    pos = limit
+                    break
+                self._consume(buf[pos : end + len(end_token)])
+                pos = end + len(end_token)
+                self._state = self.NORMAL
+
+        self._pending = buf[pos:]
+
+    def finish(self):
+        self.feed("", final=True)
+        self._end_statement()
+
+    @property
+    def preview(self) -> str:
+        content = "".join(self._preview_parts)
+        if self._preview_truncated and self._preview_boundary:
+            return content[: self._preview_boundary]
+        return content
+
+    @property
+    def preview_truncated(self) -> bool:
+        return self._preview_truncated
+
+
+class SQLFileDigest(object):
+    """
+    单次遍历计算SQL文件的摘要：md5、大小、编码、语句统计以及前 N 条语句的预览
+    编码只根据文件头的样本探测，探测完成前样本暂存在内存中，探测后按增量解码交给语句切分
+    """
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self.md5 = hashlib.md5()
+        self.size = 0
+        self.encoding = None
+
+        self.scanner = SQLStatementScanner(config["preview_statements"], config["preview_max_length"])
+        self._detector = UniversalDetector()
+        self._samples: List[bytes] = []
+        self._sample_size = 0
+        self._decoder = None
+
+    def _detect_encoding(self):
+        # chardet.detect预测性非100%，这里非强制UnicodeDecodeError，选择replace模式忽略
+        self._detector.close()
+        encoding = self._detector.result.get("encoding") or "utf-8"
+        # ascii 样本无法区分后续内容的编码，按兼容 ascii 的 utf-8 解码
+        if encoding.lower() == "ascii":
+            encoding = "utf-8"
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            encoding = "utf-8"
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.encoding = encoding
+
+        samples, self._samples = b"".join(self._samples), []
+        self.scanner.feed(self._decoder.decode(samples))
+
+    def update(self, data: bytes):
+        if not data:
+            return
+        self.md5.update(data)
+        self.size += len(data)
+
+        if self._decoder is not None:
+            self.scanner.feed(self._decoder.decode(data))
+            return
+
+        self._samples.append(data)
+        self._sample_size += len(data)
+        self._detector.feed(data[: max(self.config["sample_size"] - self._sample_size + len(data), 0)])
+        if self._detector.done or self._sample_size >= self.config["sample_size"]:
+            self._detect_encoding()
+
+    def finish(self) -> Dict[str, Any]:
+        if self._decoder is None:
+            self._detect_encoding()
+        self.scanner.feed(self._decoder.decode(b"", final=True))
+        self.scanner.finish()
+        return {
+            "md5": self.md5.hexdigest(),
+            "size": self.size,
+            "encoding": self.encoding,
+            "sql_content": self.scanner.preview,
+            "preview_truncated": self.scanner.preview_truncated,
+            "statement_count": self.scanner.statement_count,
+            "max_statement_length": self.scanner.max_statement_length,
+        }
+
+
+class SQLFileIngestReader(object):
+    """
+    上传时的只读文件包装，存储后端按块读取文件时顺便计算摘要
+    存储后端回退重读(如重试、计算长度)时，已经计算过的部分不会重复计入摘要
+    """
+
+    def __init__(self, file, digest: SQLFileDigest):
+        self.file = file
+        self.digest = digest
+        self.name = getattr(file, "name", None)
+        self._size = getattr(file, "size", None)
+        self._position = 0
+        self._consumed = 0
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._size = self.file.seek(0, os.SEEK_END)
+            self.file.seek(self._position)
+        return self._size
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.file.read(size)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        end = self._position + len(data)
+        if end > self._consumed:
+            self.digest.update(data[self._consumed - self._position :])
+            self._consumed = end
+        self._position = end
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self._position = self.file.seek(offset, whence)
+        if self._position is None:
+            self._position = self.file.tell()
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self, chunk_size: int):
+        """读完存储后端没有读取的剩余内容，保证摘要覆盖整个文件"""
+        self.seek(self._consumed)
+        while self.read(chunk_size):
+            pass
+
+
+class SQLFileIngestor(object):
+    """
+    SQL文件的流式上传
+    - 存储后端按块读取文件上传，同一次遍历中计算 md5/大小、探测编码、切分语句并生成预览
+    - 上传失败时从文件头重试，摘要沿用已经计算的部分
+    - 整个过程只在内存中保留编码样本、当前文本块和预览内容，不会读取整个文件
+    """
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("SQL_INGEST", DEFAULT_SQL_INGEST_CONFIG)
+
+    def ingest(self, storage, name: str, file) -> Dict[str, Any]:
+        """
+        上传SQL文件并返回文件摘要
+        @param storage: 存储后端
+        @param name: 存储路径
+        @param file: 文件对象
+        """
+        chunk_size = self.config["chunk_size"]
+        reader = SQLFileIngestReader(file, SQLFileDigest(self.config))
+        content = File(reader, name=name)
+        content.DEFAULT_CHUNK_SIZE = chunk_size
+
+        retries = self.config["upload_retries"]
+        for attempt in range(retries + 1):
+            try:
+                reader.seek(0)
+                sql_path = storage.save(name=name, content=content)
+                break
+            except Exception as err:  # pylint: disable=broad-except
+                if attempt >= retries:
+                    raise
+                logger.warning(f"upload sql file {name} failed, retry {attempt + 1}/{retries}: {err}")
+
+        reader.drain(chunk_size)
+        return {"sql_path": sql_path, **reader.digest.finish()}
+
+
+sql_file_ingestor = SQLFileIngestor()
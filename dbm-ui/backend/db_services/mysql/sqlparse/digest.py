@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from backend.db_services.mysql.sqlparse.handlers import WHITESPACE_PATTERN, SQLParseHandler
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("root")
+
+DEFAULT_SQL_DIGEST_CONFIG = {
+    # 指纹缓存的最大条数，按最近使用淘汰
+    "cache_size": 10000,
+    # 单次批量解析的最大语句数
+    "batch_max_size": 1000,
+    # 进程池大小，0 表示不使用进程池
+    "max_workers": 0,
+    # 未命中缓存的语句超过该数量时才提交到进程池，语句少时进程间传输的开销大于收益
+    "pool_threshold": 500,
+    # 提交到进程池时每个任务包含的语句数
+    "pool_chunk_size": 250,
+}
+
+
+def normalize_whitespace(sql: str) -> str:
+    """连续空白归一化为一个空格，包含换行时归一化为一个换行，换行会结束单行注释(-- 和 #)，不能与空格混为一谈"""
+    return WHITESPACE_PATTERN.sub(lambda match: "\n" if "\n" in match.group() or "\r" in match.group() else " ", sql)
+
+
+def digest_sqls(sqls: List[str]) -> List[Dict]:
+    """解析一批 SQL，进程池的任务入口，需要定义在模块顶层以便序列化"""
+    return [SQLParseHandler().parse_sql(sql) for sql in sqls]
+
+
+class SQLDigestEngine(object):
+    """
+    SQL 指纹计算
+    - 空白字符归一化(保留换行)后计算哈希作为缓存 key，相同 key 的语句解析结果完全一致，命中时不再 parse
+    - 缓存为有界 LRU，按最近使用淘汰
+    - 批量解析时先按 key 去重，未命中的语句数量较多时分片提交到进程池并行解析
+    """
+
+    def __init__(self):
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.hits = self.misses = 0
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("SQL_DIGEST", DEFAULT_SQL_DIGEST_CONFIG)
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.config["max_workers"])
+        return self._executor
+
+    @staticmethod
+    def get_key(sql: str) -> str:
+        """解析结果只与空白归一化后的 SQL 有关(query_length 包含首尾空白，所以这里不去除首尾)"""
+        return hashlib.md5(normalize_whitespace(sql).encode()).hexdigest()
+
+    def _get_cache(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            result = self._cache.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return result
+
+    def _set_cache(self, key: str, result: Dict):
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.config["cache_size"]:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+    def get_stats(self) -> Dict:
+        return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    def digest(self, sql: str) -> Dict:
+        """解析单条 SQL，返回结构同 SQLParseHandler.parse_sql"""
+        key = self.get_key(sql)
+        result = self._get_cache(key)
+        if result is None:
+            result = SQLParseHandler().parse_sql(sql)
+            self._set_cache(key, result)
+        # 返回副本，避免调用方修改缓存
+        return copy.copy(result)
+
+    def _parse_misses(self, sqls: List[str]) -> List[Dict]:
+        max_workers, chunk_size = self.config["max_workers"], self.config["pool_chunk_size"]
+        if not max_workers or len(sqls) < self.config["pool_threshold"]:
+            return digest_sqls(sqls)
+
+        chunks = [sqls[index : index + chunk_size] for index in range(0, len(sqls), chunk_size)]
+        try:
+            return [result for results in self.executor.map(digest_sqls, chunks) for result in results]
+        except Exception as err:  # pylint: disable=broad-except
+            # 进程池异常(如子进程被杀)时重建进程池，本次退化为串行解析
+            logger.warning(f"[sql digest] process pool failed, fallback to serial: {err}")
+            self._executor = None
+            return digest_sqls(sqls)
+
+    def digest_many(self, sqls: List[str]) -> List[Dict]:
+        """
+        批量解析 SQL，按输入顺序返回
+        @param sqls: SQL 列表
+        """
+        keys = [self.get_key(sql) for sql in sqls]
+        results: Dict[str, Dict] = {}
+        miss_sqls: Dict[str, str] = {}
+        for key, sql in zip(keys, sqls):
+            if key in results or key in miss_sqls:
+                continue
+            result = self._get_cache(key)
+            if result is None:
+                miss_sqls[key] = sql
+            else:
+                results[key] = result
+
+        for key, result in zip(miss_sqls.keys(), self._parse_misses(list(miss_sqls.values()))):
+            self._set_cache(key, result)
+            results[key] = result
+        return [copy.copy(results[key]) for key in keys]
+
+
+sql_digest_engine = SQLDigestEngine()
@@ -22,6 +22,10 @@ from backend.utils.md5 import count_md5
 logger = logging.getLogger("root")
 
 LIMIT = 1000
+DDL_DML_TTYPES = (sqlparse.tokens.DDL, sqlparse.tokens.DML)
+TABLE_KEYWORDS = {"FROM", "UPDATE", "INTO", "TABLE", "JOIN"}
+TABLE_NAME_PATTERN = re.compile(r"(?:\w+\.\w+|\w+)\s+\w+|(?:\w+\.\w+|\w+)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
 
 
 class SQLParseHandler:
@@ -37,12 +41,12 @@ class SQLParseHandler:
         """
         self.table_token = False
         for token in tokens:
-            if token.ttype in [sqlparse.tokens.DDL, sqlparse.tokens.DML]:
+            if token.ttype in DDL_DML_TTYPES:
                 self.commands.add(token.value.upper())
 
             # 提取表名
             if token.is_keyword:
-                if token.value.upper() in ["FROM", "UPDATE", "INTO", "TABLE", "JOIN"]:
+                if token.value.upper() in TABLE_KEYWORDS:
                     self.table_token = True
             elif self.table_token:
                 sub_tokens = getattr(token, "tokens", [])
@@ -51,7 +55,7 @@ class SQLParseHandler:
                         isinstance(x, sqlparse.sql.Parenthesis) or "SELECT" in x.value.upper() for x in sub_tokens
                     ):
                         fr = "".join(str(j) for j in token if j.value not in {"as", "\n"})
-                        for t in re.findall(r"(?:\w+\.\w+|\w+)\s+\w+|(?:\w+\.\w+|\w+)", fr):
+                        for t in TABLE_NAME_PATTERN.findall(fr):
                             self.tables.add(t.split()[0])
                             self.table_token = False
                 elif isinstance(token, sqlparse.sql.Function):
@@ -66,9 +70,10 @@ class SQLParseHandler:
             if token.is_group:
                 self.parse_tokens(token.tokens)
             else:
-                if token.ttype.parent == sqlparse.tokens.Token.Literal.String:
+                ttype_parent = token.ttype.parent
+                if ttype_parent == sqlparse.tokens.Token.Literal.String:
                     self.sql_items.append("'?'")
-                elif token.ttype.parent == sqlparse.tokens.Token.Literal.Number:
+                elif ttype_parent == sqlparse.tokens.Token.Literal.Number:
                     self.sql_items.append("?")
                 else:
                     self.sql_items.append(token.value)
@@ -80,14 +85,17 @@ class SQLParseHandler:
         parsed_sqls = sqlparse.parse(sql)
         if len(parsed_sqls) == 0:
             return {}
-        tokens = sqlparse.parse(sql)[0].tokens
-        self.parse_tokens(tokens=tokens)
-        digest_sql = " ".join(self.sql_items)
-        for char in ["\r", "\n", "\t"]:
-            digest_sql.replace(char, " ")
-            sql.replace(char, " ")
-        digest_sql = re.sub(r"\s+", " ", digest_sql)
-        sql = re.sub(r"\s+", " ", sql)
+        return self.parse_statement(parsed_sqls[0], sql)
+
+    def parse_statement(self, statement: sqlparse.sql.Statement, sql: str) -> dict:
+        """
+        解析已经 parse 过的语句，避免同一条 SQL 重复 parse
+        @param statement: sqlparse 解析出的第一条语句
+        @param sql: 原始 SQL
+        """
+        self.parse_tokens(tokens=statement.tokens)
+        digest_sql = WHITESPACE_PATTERN.sub(" ", " ".join(self.sql_items))
+        sql = WHITESPACE_PATTERN.sub(" ", sql)
         query_digest_md5 = count_md5(digest_sql)
         return {
             "command": ",".join(sorted(self.commands)),
@@ -147,7 +155,7 @@ class SQLParseHandler:
             return
 
         # 判断解析表结构，不允许查询系统表
-        dbs = [table.split(".")[0] for table in self.parse_sql(sql)["table_name"].split(",")]
+        dbs = [table.split(".")[0] for table in self.parse_statement(parsed_sqls[0], sql)["table_name"].split(",")]
         if dbs and set(dbs).intersection(set(SYSTEM_DBS)):
             raise SQLParseBaseException(_("不允许查询以下系统库表:{}").format(SYSTEM_DBS))
 
@@ -3,13 +3,25 @@ import json
 
 from blueapps.account.decorators import login_exempt
 from django.http import JsonResponse
+from django.utils.translation import gettext as _
 from django.views.decorators.csrf import csrf_exempt
 
-from backend.db_services.mysql.sqlparse.handlers import SQLParseHandler
+from backend.db_services.mysql.sqlparse.digest import sql_digest_engine
 
 
 @login_exempt
 @csrf_exempt
 def parse_sql(request):
     sql = json.loads(request.body.decode()).get("content", "")
-    return JsonResponse(SQLParseHandler().parse_sql(sql=sql))
+    return JsonResponse(sql_digest_engine.digest(sql=sql))
+
+
+@csrf_exempt
+def batch_parse_sql(request):
+    sqls = json.loads(request.body.decode()).get("contents") or []
+    batch_max_size = sql_digest_engine.config["batch_max_size"]
+    if not isinstance(sqls, list) or not all(isinstance(sql, str) for sql in sqls):
+        return JsonResponse({"message": _("contents 必须为字符串列表")}, status=400)
+    if len(sqls) > batch_max_size:
+        return JsonResponse({"message": _("单次最多解析{}条语句").format(batch_max_size)}, status=400)
+    return JsonResponse({"results": sql_digest_engine.digest_many(sqls)})
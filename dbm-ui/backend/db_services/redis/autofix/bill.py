@@ -28,7 +28,7 @@ from backend.db_services.redis.util import is_support_redis_auotfix
 from backend.ticket.builders import BuilderFactory
 from backend.ticket.constants import TicketStatus, TicketType
 from backend.ticket.flow_manager.manager import TicketFlowManager
-from backend.ticket.models import Ticket
+from backend.ticket.models import Ticket, TicketObjectRelation
 from backend.utils.time import datetime2str
 
 from .enums import AutofixStatus
@@ -116,6 +116,7 @@ def create_ticket(cluster: RedisAutofixCore, cluster_ids: list, redis_proxies: l
     try:
         builder = BuilderFactory.create_builder(ticket)
         builder.patch_ticket_detail()
+        TicketObjectRelation.sync_ticket_objects([ticket])
         builder.init_ticket_flows()
         TicketFlowManager(ticket=ticket).run_next_flow()
     except Exception as e:
@@ -211,4 +211,4 @@ class RedisListRetrieveResource(query.ListRetrieveResource):
             for item in machines:
                 item.update(master_slave_map.get(item["ip"], {}))
 
-        return ResourceList(count=count, data=machines)
+        return ResourceList(count=count, data=machines, next_cursor=data.next_cursor)
@@ -38,6 +38,6 @@ class SqlserverListRetrieveResource(query.ListRetrieveResource):
             for mode in SqlserverClusterSyncMode.objects.filter(cluster_id__in=cluster_queryset)
         }
         cluster_infos = super()._filter_cluster_hook(
-            bk_biz_id, cluster_queryset, proxy_queryset, storage_queryset, limit, offset
+            bk_biz_id, cluster_queryset, proxy_queryset, storage_queryset, limit, offset, **kwargs
         )
         return cluster_infos
@@ -25,7 +25,6 @@ from django.utils.translation import gettext as _
 
 from backend import env
 from backend.bk_web.constants import LogLevelName
-from backend.components import BKLogApi
 from backend.db_services.taskflow import task
 from backend.db_services.taskflow.constants import LOG_START_STRIP_PATTERN
 from backend.db_services.taskflow.exceptions import (
@@ -34,11 +33,13 @@ from backend.db_services.taskflow.exceptions import (
     RevokePipelineException,
     SkipNodeException,
 )
+from backend.db_services.taskflow.node_log import NodeLogStream
 from backend.flow.consts import StateType
 from backend.flow.engine.bamboo.engine import BambooEngine
 from backend.flow.models import FlowNode, FlowTree
+from backend.flow.utils.state_journal import flow_state_journal
 from backend.utils.string import format_json_string
-from backend.utils.time import calculate_cost_time, datetime2str
+from backend.utils.time import calculate_cost_time
 
 logger = logging.getLogger("root")
 
@@ -183,21 +184,6 @@ class TaskFlowHandler:
         component_search(tree)
         return node_ids
 
-    @staticmethod
-    def bklog_esquery_search(indices, query_string, start_time, end_time):
-        """esquery搜索"""
-        resp = BKLogApi.esquery_search(
-            {
-                "indices": indices,
-                "start_time": start_time,
-                "end_time": end_time,
-                "query_string": query_string,
-                "start": 0,
-                "size": 10000,
-            }
-        )
-        return resp["hits"]["hits"]
-
     def get_version_logs(self, node_id: str, version_id: str) -> List[Dict[str, Dict[str, str]]]:
         """获取节点的日志信息"""
         try:
@@ -207,39 +193,67 @@ class TaskFlowHandler:
         if flow_node.updated_at < timezone.now() - timedelta(days=7):
             return [self.generate_log_record(message=_("节点日志仅保留7天"))]
 
-        start_time = datetime2str(flow_node.started_at)
-        end_time = datetime2str(flow_node.updated_at + timedelta(days=7))
-        dbm_logs = self.bklog_esquery_search(
-            indices=f"{env.DBA_APP_BK_BIZ_ID}_bklog.dbm_log",
-            query_string=f"({self.root_id} AND {node_id} AND {version_id})"
-            f" AND (__ext.io_kubernetes_pod:*worker* OR __ext.io_kubernetes_pod:*dbsimulation*)",
-            start_time=start_time,
-            end_time=end_time,
-        )
-        dbm_dbactuator_logs = self.bklog_esquery_search(
-            indices=f"{env.DBA_APP_BK_BIZ_ID}_bklog.dbm_dbactuator,{env.DBA_APP_BK_BIZ_ID}_bklog.dbm_win_dbactuator,",
-            query_string=f"{self.root_id} AND {node_id} AND {version_id}",
-            start_time=start_time,
-            end_time=end_time,
-        )
-        logs = []
-        sorted_hits = sorted(
-            dbm_logs + dbm_dbactuator_logs,
-            key=lambda x: (x["_source"]["dtEventTimeStamp"], x["_source"]["gseIndex"], x["_source"]["iterationIndex"]),
-        )
+        log_stream = NodeLogStream(flow_node, version_id, formatter=self.format_log_hit)
+        if log_stream.is_finished:
+            entries = log_stream.get_finished_entries()
+        else:
+            entries = log_stream.fetch_all()
 
-        for hit in sorted_hits:
-            log = self._format_log(hit["_source"]["log"], hit["_source"]["serverIp"], hit["_index"])
-            if log:
-                logs.append(
-                    self.generate_log_record(
-                        timestamp=hit["_source"].get("time"), levelname=log["levelname"], message=log["log"]
-                    )
-                )
+        logs = [log for __, __, log in entries]
         if not logs:
             return [self.generate_log_record(message=_("日志上报中，请稍后查看"))]
         return logs
 
+    def tail_version_logs(
+        self, node_id: str, version_id: str, cursor: Dict[str, List], size: Optional[int] = None
+    ) -> Dict:
+        """
+        增量获取节点的日志，只返回游标之后的日志
+        @param node_id: 节点ID
+        @param version_id: 节点版本
+        @param cursor: 上一次返回的游标，为空表示从头开始
+        @param size: 返回的最大日志条数
+        """
+        try:
+            flow_node = FlowNode.objects.get(root_id=self.root_id, node_id=node_id)
+        except FlowNode.DoesNotExist:
+            logs = [self.generate_log_record(message=_("节点尚未运行，请稍后查看"))]
+            return {"logs": logs, "cursor": "", "has_more": False, "finished": False}
+        if flow_node.updated_at < timezone.now() - timedelta(days=7):
+            logs = [self.generate_log_record(message=_("节点日志仅保留7天"))]
+            return {"logs": logs, "cursor": "", "has_more": False, "finished": True}
+
+        return NodeLogStream(flow_node, version_id, formatter=self.format_log_hit).read(cursor, size)
+
+    def stream_state_changes(self, since: str):
+        """
+        以 SSE 格式持续推送流程的状态变更，需要全量刷新或连接到期时结束，客户端携带 Last-Event-ID 重连
+        @param since: 起始版本号
+        """
+        config = flow_state_journal.config
+        deadline = time.time() + config["sse_max_duration"]
+        while time.time() < deadline:
+            result = flow_state_journal.get_changes(self.root_id, since, wait=config["max_wait"])
+            if result["full"]:
+                yield f"event: full\ndata: {json.dumps(result)}\n\n"
+                return
+            if result["changes"]:
+                since = result["version"]
+                yield f"id: {since}\nevent: changes\ndata: {json.dumps(result)}\n\n"
+            else:
+                # 心跳，避免空闲连接被代理断开
+                yield ": keepalive\n\n"
+
+    @classmethod
+    def format_log_hit(cls, hit: Dict) -> Optional[Dict]:
+        """格式化日志平台查询结果中的一条日志"""
+        log = cls._format_log(hit["_source"]["log"], hit["_source"]["serverIp"], hit["_index"])
+        if not log:
+            return None
+        return cls.generate_log_record(
+            timestamp=hit["_source"].get("time"), levelname=log["levelname"], message=log["log"]
+        )
+
     @staticmethod
     def generate_log_record(
         message: str, levelname: str = LogLevelName.INFO.value, timestamp: Optional[float] = None
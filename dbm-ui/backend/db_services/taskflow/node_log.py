@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import base64
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.utils import timezone
+
+from backend import env
+from backend.components import BKLogApi
+from backend.flow.consts import StateType
+from backend.flow.models import FlowNode
+from backend.utils.redis import RedisConn
+from backend.utils.settings import get_feature_config
+from backend.utils.time import datetime2str
+
+logger = logging.getLogger("root")
+
+DEFAULT_NODE_LOG_CONFIG = {
+    # 增量拉取时每次返回的默认日志条数
+    "page_size": 500,
+    # 节点结束多久(秒)之后认为日志已经上报完整，可以缓存
+    "finished_delay": 60,
+    # 已结束节点版本的日志缓存时间(秒)
+    "cache_ttl": 24 * 60 * 60,
+    # 压缩后超过该大小(字节)的日志不缓存
+    "cache_max_bytes": 16 * 1024 * 1024,
+    # 拉取全部日志时的最大翻页次数
+    "max_pages": 1000,
+}
+
+# ES 单次查询 start+size 的上限(max_result_window)
+NODE_LOG_MAX_RESULT_WINDOW = 10000
+# 单次查询的最大条数，同一秒内的日志可以翻两页
+NODE_LOG_MAX_PAGE_SIZE = 5000
+NODE_LOG_SORT_LIST = [["dtEventTimeStamp", "asc"], ["gseIndex", "asc"], ["iterationIndex", "asc"]]
+NODE_LOG_CACHE_KEY = "node_log:{root_id}:{node_id}:{version_id}"
+NODE_LOG_FINISHED_STATES = [StateType.FINISHED, StateType.FAILED, StateType.REVOKED]
+
+
+class NodeLogStream(object):
+    """
+    节点版本日志的增量读取
+    - 节点日志来自 flow 和 dbactuator 两类采集项，esquery_search 只支持 start/size 分页，
+      所以每个数据源从游标所在的秒开始查询，再跳过已经读过的日志，不受 ES 分页上限的限制
+    - 两个数据源的结果合并后只返回到满页数据源中最小的排序值为止，保证多次读取拼接起来整体有序
+    - 游标记录每个数据源最后一条日志的排序值，轮询时只返回游标之后的新日志
+    - 已结束的节点版本日志不会再变化，格式化后压缩缓存，重复查看时直接从缓存分页
+    """
+
+    def __init__(self, flow_node: FlowNode, version_id: str, formatter: Callable[[Dict], Optional[Dict]]):
+        """
+        @param flow_node: 流程节点
+        @param version_id: 节点版本
+        @param formatter: 日志格式化函数，入参为 ES 的 hit，返回 None 表示该日志不展示
+        """
+        self.flow_node = flow_node
+        self.root_id = flow_node.root_id
+        self.node_id = flow_node.node_id
+        self.version_id = version_id
+        self.formatter = formatter
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("NODE_LOG", DEFAULT_NODE_LOG_CONFIG)
+
+    @property
+    def sources(self) -> Dict[str, Dict[str, str]]:
+        """日志数据源：数据源名称 -> 查询的索引和过滤条件"""
+        query_string = f"{self.root_id} AND {self.node_id} AND {self.version_id}"
+        return {
+            "flow": {
+                "indices": f"{env.DBA_APP_BK_BIZ_ID}_bklog.dbm_log",
+                "query_string": f"({query_string})"
+                f" AND (__ext.io_kubernetes_pod:*worker* OR __ext.io_kubernetes_pod:*dbsimulation*)",
+            },
+            "dbactuator": {
+                "indices": f"{env.DBA_APP_BK_BIZ_ID}_bklog.dbm_dbactuator,"
+                f"{env.DBA_APP_BK_BIZ_ID}_bklog.dbm_win_dbactuator,",
+                "query_string": query_string,
+            },
+        }
+
+    @staticmethod
+    def encode_cursor(cursor: Dict[str, List]) -> str:
+        if not cursor:
+            return ""
+        return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Dict[str, List]:
+        """解析游标，非法的游标抛出 ValueError"""
+        if not cursor:
+            return {}
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError) as err:
+            raise ValueError(f"invalid cursor: {err}")
+        if not isinstance(cursor, dict) or not all(isinstance(sort, list) for sort in cursor.values()):
+            raise ValueError("invalid cursor")
+        return cursor
+
+    @staticmethod
+    def get_sort(hit: Dict) -> Tuple:
+        """日志的排序值，优先使用 ES 返回的 sort"""
+        if hit.get("sort"):
+            return tuple(hit["sort"])
+        source = hit["_source"]
+        return source["dtEventTimeStamp"], source["gseIndex"], source["iterationIndex"]
+
+    @property
+    def is_finished(self) -> bool:
+        """节点版本已经结束，且日志已经上报完整"""
+        is_current_version = self.version_id == self.flow_node.version_id
+        if is_current_version and self.flow_node.status not in NODE_LOG_FINISHED_STATES:
+            return False
+        # 历史版本的结束时间一定早于当前节点的更新时间
+        return self.flow_node.updated_at < timezone.now() - timedelta(seconds=self.config["finished_delay"])
+
+    def search(self, source: str, search_after: Optional[List], size: int) -> Tuple[List[Dict], bool]:
+        """
+        查询数据源在游标之后的一页日志，返回日志列表以及是否还有更多日志
+        @param source: 数据源名称
+        @param search_after: 数据源的游标，即上一次读到的最后一条日志的排序值
+        @param size: 每页条数
+        """
+        start_time = self.flow_node.started_at
+        if search_after:
+            # 查询时间只精确到秒，游标所在秒内已经读过的日志需要跳过
+            start_time = max(start_time, datetime.fromtimestamp(int(search_after[0]) // 1000, tz=timezone.utc))
+        params = {
+            **self.sources[source],
+            "end_time": datetime2str(self.flow_node.updated_at + timedelta(days=7)),
+            "size": size,
+            "sort_list": NODE_LOG_SORT_LIST,
+        }
+
+        start, skipped = 0, False
+        while True:
+            params.update(start_time=datetime2str(start_time), start=start)
+            hits = BKLogApi.esquery_search(params)["hits"]["hits"]
+            new_hits = [hit for hit in hits if not search_after or self.get_sort(hit) > tuple(search_after)]
+            if new_hits or len(hits) < size:
+                return new_hits, len(hits) >= size
+
+            # 整页都是已经读过的日志，继续往后翻页
+            start += size
+            if start + size <= NODE_LOG_MAX_RESULT_WINDOW:
+                continue
+            if skipped:
+                logger.warning(f"[node log] {source} logs of {self.cache_key} make no progress, stop searching")
+                return [], False
+            # 同一秒内的日志超过 ES 分页上限时，跳过该秒剩余的日志
+            logger.warning(
+                f"[node log] {source} logs of {self.cache_key} at {datetime2str(start_time)} "
+                f"exceed {NODE_LOG_MAX_RESULT_WINDOW}, some logs are ignored"
+            )
+            start_time, start, skipped = start_time.replace(microsecond=0) + timedelta(seconds=1), 0, True
+
+    def fetch(self, cursor: Dict[str, List], size: int) -> Tuple[List[Tuple], Dict[str, List], bool]:
+        """
+        从日志平台拉取游标之后的一页日志
+        返回 [(数据源, 排序值, 格式化后的日志)]，新的游标，以及是否还有更多日志
+        """
+        results = {source: self.search(source, cursor.get(source), size) for source in self.sources}
+        # 还有更多日志的数据源，只能返回到其中最小的排序值为止，剩余的日志下次再返回
+        merged = sorted(
+            [(self.get_sort(hit), source, hit) for source, (hits, __) in results.items() for hit in hits],
+            key=itemgetter(0),
+        )
+        boundaries = [self.get_sort(hits[-1]) for hits, has_more in results.values() if has_more]
+        # 合并后超过 size 的部分同样留到下次返回
+        if len(merged) > size:
+            boundaries.append(merged[size - 1][0])
+        boundary = min(boundaries) if boundaries else None
+
+        entries, cursor = [], dict(cursor)
+        for sort, source, hit in merged:
+            if boundary is not None and sort > boundary:
+                break
+            # 不展示的日志同样需要推进游标
+            cursor[source] = list(sort)
+            log = self.formatter(hit)
+            if log:
+                entries.append((source, sort, log))
+        return entries, cursor, boundary is not None
+
+    def fetch_all(self) -> List[Tuple]:
+        """拉取节点版本的全部日志"""
+        entries, cursor = [], {}
+        for __ in range(self.config["max_pages"]):
+            page_entries, next_cursor, has_more = self.fetch(cursor, NODE_LOG_MAX_PAGE_SIZE)
+            entries.extend(page_entries)
+            if not has_more:
+                break
+            # 游标没有推进说明接口没有按游标返回新的日志，继续翻页只会重复拉取
+            if next_cursor == cursor:
+                logger.warning(f"[node log] cursor of {self.cache_key} make no progress, stop fetching")
+                break
+            cursor = next_cursor
+        else:
+            logger.warning(
+                f"[node log] logs of {self.cache_key} exceed {self.config['max_pages']} pages, stop fetching"
+            )
+        return entries
+
+    @property
+    def cache_key(self) -> str:
+        return NODE_LOG_CACHE_KEY.format(root_id=self.root_id, node_id=self.node_id, version_id=self.version_id)
+
+    def get_finished_entries(self) -> List[Tuple]:
+        """获取已结束节点版本的全部日志，优先读取缓存"""
+        cached = RedisConn.get(self.cache_key)
+        if cached:
+            entries = json.loads(zlib.decompress(base64.b64decode(cached)))
+            return [(source, tuple(sort), log) for source, sort, log in entries]
+
+        entries = self.fetch_all()
+        compressed = base64.b64encode(zlib.compress(json.dumps(entries).encode())).decode()
+        if len(compressed) <= self.config["cache_max_bytes"]:
+            RedisConn.set(self.cache_key, compressed, ex=self.config["cache_ttl"])
+        else:
+            logger.warning(f"[node log] logs of {self.cache_key} exceed cache max size, skip caching")
+        return entries
+
+    def read(self, cursor: Dict[str, List], size: Optional[int] = None) -> Dict:
+        """
+        读取游标之后的日志
+        @param cursor: 上一次读取返回的游标，为空表示从头开始读取
+        @param size: 返回的最大日志条数，为空时使用默认配置
+        """
+        size = min(size or self.config["page_size"], NODE_LOG_MAX_PAGE_SIZE)
+        finished = self.is_finished
+        if finished:
+            # 已结束的版本从缓存的全量日志中分页，游标的含义与实时拉取一致
+            unread = [
+                (source, sort, log)
+                for source, sort, log in self.get_finished_entries()
+                if source not in cursor or sort > tuple(cursor[source])
+            ]
+            entries, has_more, cursor = unread[:size], len(unread) > size, dict(cursor)
+            for source, sort, __ in entries:
+                cursor[source] = list(sort)
+        else:
+            entries, cursor, has_more = self.fetch(cursor, size)
+
+        return {
+            "logs": [log for __, __, log in entries],
+            "cursor": self.encode_cursor(cursor),
+            "has_more": has_more,
+            "finished": finished,
+        }
@@ -12,8 +12,10 @@ from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 
+from backend.db_services.taskflow.node_log import NODE_LOG_MAX_PAGE_SIZE, NodeLogStream
 from backend.flow.consts import PipelineStatus
 from backend.flow.models import FlowTree
+from backend.flow.utils.state_journal import FlowStateJournal
 from backend.utils.time import calculate_cost_time
 
 
@@ -67,6 +69,33 @@ class VersionSerializer(NodeSerializer):
     download = serializers.BooleanField(help_text=_("是否下载日志"), default=False)
 
 
+class TailVersionLogSerializer(NodeSerializer):
+    version_id = serializers.CharField(help_text=_("版本ID"))
+    cursor = serializers.CharField(help_text=_("上一次返回的游标，为空则从头开始"), required=False, default="", allow_blank=True)
+    size = serializers.IntegerField(
+        help_text=_("返回的最大日志条数"), required=False, min_value=1, max_value=NODE_LOG_MAX_PAGE_SIZE
+    )
+
+    def validate_cursor(self, value):
+        try:
+            return NodeLogStream.decode_cursor(value)
+        except ValueError:
+            raise serializers.ValidationError(_("游标不合法"))
+
+
+class FlowStateChangesSerializer(serializers.Serializer):
+    since = serializers.CharField(
+        help_text=_("上一次返回的版本号，为空时使用请求头 Last-Event-ID"), required=False, default="", allow_blank=True
+    )
+    wait = serializers.IntegerField(help_text=_("没有变更时长轮询等待的秒数"), required=False, default=0, min_value=0)
+    stream = serializers.BooleanField(help_text=_("是否通过 SSE 持续推送变更"), required=False, default=False)
+
+    def validate_since(self, value):
+        if value and not FlowStateJournal.is_valid_version(value):
+            raise serializers.ValidationError(_("版本号不合法"))
+        return value
+
+
 class BatchDownloadSerializer(serializers.Serializer):
     full_paths = serializers.ListField(
         help_text=_("文件路径列表"), child=serializers.CharField(help_text="full_path"), min_length=1
@@ -10,8 +10,9 @@ specific language governing permissions and limitations under the License.
 """
 import logging
 
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.translation import ugettext as _
+from rest_framework import serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
@@ -24,14 +25,17 @@ from backend.db_services.taskflow.serializers import (
     BatchRetryNodesSerializer,
     CallbackNodeSerializer,
     DownloadExcelSerializer,
+    FlowStateChangesSerializer,
     FlowTaskSerializer,
     NodeSerializer,
+    TailVersionLogSerializer,
     VersionSerializer,
 )
 from backend.flow.consts import StateType
 from backend.flow.engine.bamboo.engine import BambooEngine
 from backend.flow.models import FlowTree
 from backend.flow.plugins.components.collections.common.base_service import BaseService
+from backend.flow.utils.state_journal import EMPTY_VERSION, FlowStateJournal, flow_state_journal
 from backend.iam_app.dataclass.actions import ActionEnum
 from backend.iam_app.dataclass.resources import ResourceEnum
 from backend.iam_app.handlers.drf_perm.base import DBManagePermission
@@ -98,6 +102,8 @@ class TaskFlowViewSet(viewsets.AuditedModelViewSet):
     )
     def retrieve(self, requests, *args, **kwargs):
         root_id = kwargs["root_id"]
+        # 先获取状态版本号再获取流程树，期间发生的变更会在下一次增量查询中重复返回，不会遗漏
+        state_version = flow_state_journal.get_version(root_id)
         tree_states = BambooEngine(root_id=root_id).get_pipeline_tree_states()
         flow_info = super().retrieve(requests, *args, **kwargs).data
 
@@ -120,7 +126,30 @@ class TaskFlowViewSet(viewsets.AuditedModelViewSet):
         )
         todos = TodoSerializer(todo_qs, many=True).data
 
-        return Response({"flow_info": flow_info, "todos": todos, **tree_states})
+        return Response({"flow_info": flow_info, "todos": todos, "state_version": state_version, **tree_states})
+
+    @common_swagger_auto_schema(
+        operation_summary=_("增量获取流程状态变更"),
+        query_serializer=FlowStateChangesSerializer(),
+        tags=[SWAGGER_TAG],
+    )
+    @action(methods=["GET"], detail=True, serializer_class=FlowStateChangesSerializer)
+    def state_changes(self, requests, *args, **kwargs):
+        root_id = kwargs["root_id"]
+        validated_data = self.params_validate(self.get_serializer_class())
+        since = validated_data["since"] or requests.headers.get("Last-Event-ID") or EMPTY_VERSION
+        if not FlowStateJournal.is_valid_version(since):
+            raise serializers.ValidationError(_("版本号不合法"))
+
+        if validated_data["stream"]:
+            response = StreamingHttpResponse(
+                TaskFlowHandler(root_id=root_id).stream_state_changes(since), content_type="text/event-stream"
+            )
+            response["Cache-Control"] = "no-cache"
+            response["X-Accel-Buffering"] = "no"
+            return response
+
+        return Response(flow_state_journal.get_changes(root_id, since, wait=validated_data["wait"]))
 
     @common_swagger_auto_schema(
         operation_summary=_("撤销流程"),
@@ -208,6 +237,25 @@ class TaskFlowViewSet(viewsets.AuditedModelViewSet):
         else:
             return Response(logs)
 
+    @common_swagger_auto_schema(
+        operation_summary=_("增量获取节点日志"),
+        query_serializer=TailVersionLogSerializer(),
+        tags=[SWAGGER_TAG],
+    )
+    @action(methods=["GET"], detail=True, serializer_class=TailVersionLogSerializer)
+    def tail_node_log(self, requests, *args, **kwargs):
+        root_id = kwargs["root_id"]
+        validated_data = self.params_validate(self.get_serializer_class())
+        handler = TaskFlowHandler(root_id=root_id)
+        return Response(
+            handler.tail_version_logs(
+                node_id=validated_data["node_id"],
+                version_id=validated_data["version_id"],
+                cursor=validated_data["cursor"],
+                size=validated_data.get("size"),
+            )
+        )
+
     @common_swagger_auto_schema(
         operation_summary=_("回调节点"),
         query_serializer=CallbackNodeSerializer(),
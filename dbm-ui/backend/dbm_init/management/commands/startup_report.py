@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import subprocess
+import sys
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.utils.import_time import parse_import_time, summarize_import_time
+
+STARTUP_CODE = "import django; django.setup()"
+
+
+class Command(BaseCommand):
+    help = "在子进程中冷启动 django，按 app 统计导入耗时，用于跟踪启动耗时的变化"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20, help="输出耗时最多的前 N 个 app")
+        parser.add_argument("--json", action="store_true", help="以 json 格式输出，便于持续记录")
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_CODE], capture_output=True, universal_newlines=True
+        )
+        total = time.time() - start_time
+        if proc.returncode:
+            raise CommandError(f"django startup failed: {proc.stderr[-2000:]}")
+
+        app_names = [app_config.name for app_config in apps.get_app_configs()]
+        app_names.append(settings.SETTINGS_MODULE.split(".")[0])
+        totals = summarize_import_time(parse_import_time(proc.stderr), app_names)
+        app_costs = sorted(
+            ((app, round(cost / 1000, 1)) for app, cost in totals.items()), key=lambda item: item[1], reverse=True
+        )[: options["top"]]
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"total_ms": round(total * 1000, 1), "apps": dict(app_costs)}))
+            return
+
+        self.stdout.write(f"django startup cost {total * 1000:.1f}ms (import time by app, ms):")
+        for app, cost in app_costs:
+            self.stdout.write(f"{cost:>10.1f}  {app}")
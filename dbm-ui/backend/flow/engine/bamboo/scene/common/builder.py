@@ -32,6 +32,7 @@ from pipeline.eri.runtime import BambooDjangoRuntime
 from backend.flow.models import FlowNode, FlowTree, StateType
 from backend.flow.plugins.components.collections.common.create_random_job_user import AddTempUserForClusterComponent
 from backend.flow.plugins.components.collections.common.drop_random_job_user import DropTempUserForClusterComponent
+from backend.flow.utils.base.payload_cache import flow_payload_cache
 from backend.ticket.constants import TicketType
 
 logger = logging.getLogger("json")
@@ -234,6 +235,9 @@ class Builder(object):
             db_type=TicketType.get_db_type_by_ticket(self.data["ticket_type"]),
         )
 
+        # 批量预取流程内各个节点生成payload需要的内置账号
+        flow_payload_cache.prefetch(self.root_id, self.data)
+
         if not api.run_pipeline(runtime=BambooDjangoRuntime(), pipeline=pipeline).result:
             logger.error(_("部署bamboo流程任务创建失败，任务结束"))
             return False
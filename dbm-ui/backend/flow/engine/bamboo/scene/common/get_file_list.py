@@ -11,6 +11,7 @@ specific language governing permissions and limitations under the License.
 from backend import env
 from backend.components.constants import SSLEnum
 from backend.configuration.constants import DBType
+from backend.db_package.catalog import package_catalog
 from backend.db_package.models import Package
 from backend.db_services.redis.util import is_predixy_proxy_type
 from backend.db_services.version.constants import PredixyVersion, TwemproxyVersion
@@ -28,7 +29,7 @@ class GetFileList(object):
         """
         @param db_type: db类型，默认是MySQL，如果是Redis这actuator包不一样
         """
-        self.actuator_pkg = Package.get_latest_package(
+        self.actuator_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.DBActuator, db_type=db_type
         )
 
@@ -42,7 +43,7 @@ class GetFileList(object):
         """
         最新的dba_toolkit包
         """
-        dba_toolkit = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLToolKit)
+        dba_toolkit = package_catalog.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLToolKit)
         return [f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{dba_toolkit.path}"]
 
     @staticmethod
@@ -55,10 +56,14 @@ class GetFileList(object):
         @param is_install_monitor 是否要下发监控程序的介质包
         @param db_backup_pkg_type 下发备份程序的介质包类型
         """
-        checksum_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLChecksum)
-        rotate_binlog = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLRotateBinlog)
-        mysql_crond_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLCrond)
-        dba_toolkit_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLToolKit)
+        checksum_pkg, rotate_binlog, mysql_crond_pkg, dba_toolkit_pkg = package_catalog.get_latest_packages(
+            [
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLChecksum},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLRotateBinlog},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLCrond},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLToolKit},
+            ]
+        )
         pkg_list = [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{checksum_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{rotate_binlog.path}",
@@ -67,20 +72,24 @@ class GetFileList(object):
         ]
         if is_install_monitor:
             # 下发监控程序的介质包
-            mysql_monitor_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLMonitor)
+            mysql_monitor_pkg = package_catalog.get_latest_package(
+                version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLMonitor
+            )
             pkg_list.append(f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{mysql_monitor_pkg.path}")
 
         if is_install_backup:
             # 下发备份程序的介质包
             if db_backup_pkg_type:
                 # 如果直接传db_backup_pkg_type，则以它为准
-                db_backup_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=db_backup_pkg_type)
+                db_backup_pkg = package_catalog.get_latest_package(
+                    version=MediumEnum.Latest, pkg_type=db_backup_pkg_type
+                )
                 pkg_list.append(f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{db_backup_pkg.path}")
                 return pkg_list
 
             elif env.MYSQL_BACKUP_PKG_MAP_ENABLE:
                 # 内部环境，追加内部版本介质包
-                txsql_db_backup_pkg = Package.get_latest_package(
+                txsql_db_backup_pkg = package_catalog.get_latest_package(
                     version=MediumEnum.Latest, pkg_type=MediumEnum.DbBackupTXSQL
                 )
                 pkg_list.append(f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{txsql_db_backup_pkg.path}")
@@ -88,7 +97,7 @@ class GetFileList(object):
                 pass
 
             # 默认情况下
-            db_backup_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.DbBackup)
+            db_backup_pkg = package_catalog.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.DbBackup)
             pkg_list.append(f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{db_backup_pkg.path}")
 
         return pkg_list
@@ -102,13 +111,25 @@ class GetFileList(object):
         else:
             db_backup_pkg_type = MediumEnum.DbBackup
 
-        mysql_pkg = Package.get_latest_package(version=db_version, pkg_type=MediumEnum.MySQL)
-        db_backup_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=db_backup_pkg_type)
-        checksum_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLChecksum)
-        dba_toolkit = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLToolKit)
-        rotate_binlog = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLRotateBinlog)
-        mysql_crond_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLCrond)
-        mysql_monitor_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLMonitor)
+        (
+            mysql_pkg,
+            db_backup_pkg,
+            checksum_pkg,
+            dba_toolkit,
+            rotate_binlog,
+            mysql_crond_pkg,
+            mysql_monitor_pkg,
+        ) = package_catalog.get_latest_packages(
+            [
+                {"version": db_version, "pkg_type": MediumEnum.MySQL},
+                {"version": MediumEnum.Latest, "pkg_type": db_backup_pkg_type},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLChecksum},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLToolKit},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLRotateBinlog},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLCrond},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLMonitor},
+            ]
+        )
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{mysql_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{db_backup_pkg.path}",
@@ -130,9 +151,13 @@ class GetFileList(object):
         else:
             db_backup_pkg_type = MediumEnum.DbBackup
 
-        mysql_pkg = Package.get_latest_package(version=db_version, pkg_type=MediumEnum.MySQL)
-        db_backup_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=db_backup_pkg_type)
-        mysql_crond_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLCrond)
+        mysql_pkg, db_backup_pkg, mysql_crond_pkg = package_catalog.get_latest_packages(
+            [
+                {"version": db_version, "pkg_type": MediumEnum.MySQL},
+                {"version": MediumEnum.Latest, "pkg_type": db_backup_pkg_type},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLCrond},
+            ]
+        )
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{mysql_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{db_backup_pkg.path}",
@@ -144,9 +169,13 @@ class GetFileList(object):
         """
         mysql_proxy安装需要的安装包列表
         """
-        proxy_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLProxy)
-        mysql_crond_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLCrond)
-        mysql_monitor_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLMonitor)
+        proxy_pkg, mysql_crond_pkg, mysql_monitor_pkg = package_catalog.get_latest_packages(
+            [
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLProxy},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLCrond},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLMonitor},
+            ]
+        )
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{self.actuator_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{proxy_pkg.path}",
@@ -173,12 +202,23 @@ class GetFileList(object):
         else:
             db_backup_pkg_type = MediumEnum.DbBackup
         mysql_pkg = Package.objects.get(id=pkg_id, pkg_type=MediumEnum.MySQL)
-        db_backup_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=db_backup_pkg_type)
-        checksum_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLChecksum)
-        dba_toolkit = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLToolKit)
-        rotate_binlog = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLRotateBinlog)
-        mysql_crond_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLCrond)
-        mysql_monitor_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLMonitor)
+        (
+            db_backup_pkg,
+            checksum_pkg,
+            dba_toolkit,
+            rotate_binlog,
+            mysql_crond_pkg,
+            mysql_monitor_pkg,
+        ) = package_catalog.get_latest_packages(
+            [
+                {"version": MediumEnum.Latest, "pkg_type": db_backup_pkg_type},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLChecksum},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLToolKit},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLRotateBinlog},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLCrond},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLMonitor},
+            ]
+        )
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{self.actuator_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{mysql_pkg.path}",
@@ -194,9 +234,11 @@ class GetFileList(object):
         """
         riak安装需要的安装包列表
         """
-        riak_pkg = Package.get_latest_package(version=db_version, pkg_type=MediumEnum.Riak, db_type=DBType.Riak)
-        mysql_crond_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLCrond)
-        riak_monitor_pkg = Package.get_latest_package(
+        riak_pkg = package_catalog.get_latest_package(
+            version=db_version, pkg_type=MediumEnum.Riak, db_type=DBType.Riak
+        )
+        mysql_crond_pkg = package_catalog.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLCrond)
+        riak_monitor_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.RiakMonitor, db_type=DBType.Riak.value
         )
         return [
@@ -216,11 +258,11 @@ class GetFileList(object):
             version = PredixyVersion.PredixyLatest
             pkg_type = MediumEnum.Predixy
 
-        proxy_pkg = Package.get_latest_package(version=version, pkg_type=pkg_type, db_type=DBType.Redis)
-        bkdbmon_pkg = Package.get_latest_package(
+        proxy_pkg = package_catalog.get_latest_package(version=version, pkg_type=pkg_type, db_type=DBType.Redis)
+        bkdbmon_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.DbMon, db_type=DBType.Redis
         )
-        redis_tool_pkg = Package.get_latest_package(
+        redis_tool_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.RedisTools, db_type=DBType.Redis
         )
         return [
@@ -235,10 +277,10 @@ class GetFileList(object):
         部署redis,所有节点需要的redis pkg包
         """
         redis_pkg = get_latest_redis_package_by_version(db_version)
-        redis_tool_pkg = Package.get_latest_package(
+        redis_tool_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.RedisTools, db_type=DBType.Redis
         )
-        bkdbmon_pkg = Package.get_latest_package(
+        bkdbmon_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.DbMon, db_type=DBType.Redis
         )
         ret = [
@@ -249,7 +291,7 @@ class GetFileList(object):
         ]
         if db_version.startswith("Redis-"):
             # 如果是 cache Redis,则下发 redis modules 介质
-            redismodules_pkg = Package.get_latest_package(
+            redismodules_pkg = package_catalog.get_latest_package(
                 version=MediumEnum.Latest, pkg_type=MediumEnum.RedisModules, db_type=DBType.Redis
             )
             ret.append(f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{redismodules_pkg.path}")
@@ -260,7 +302,7 @@ class GetFileList(object):
         redis集群版本升级
         """
         redis_pkg = get_latest_redis_package_by_version(db_version)
-        bkdbmon_pkg = Package.get_latest_package(
+        bkdbmon_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.DbMon, db_type=DBType.Redis
         )
         return [
@@ -279,10 +321,10 @@ class GetFileList(object):
         """
         安装 或者重装 dbmon
         """
-        bkdbmon_pkg = Package.get_latest_package(
+        bkdbmon_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.DbMon, db_type=DBType.Redis
         )
-        redis_tool_pkg = Package.get_latest_package(
+        redis_tool_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.RedisTools, db_type=DBType.Redis
         )
         return [
@@ -297,7 +339,7 @@ class GetFileList(object):
         """
         Redis actuator 包
         """
-        redis_tool_pkg = Package.get_latest_package(
+        redis_tool_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.RedisTools, db_type=DBType.Redis
         )
         return [
@@ -306,13 +348,13 @@ class GetFileList(object):
         ]
 
     def tendisplus_apply_proxy(self) -> list:
-        proxy_pkg = Package.get_latest_package(
+        proxy_pkg = package_catalog.get_latest_package(
             version=PredixyVersion.PredixyLatest, pkg_type=MediumEnum.Predixy, db_type=DBType.Redis
         )
-        bkdbmon_pkg = Package.get_latest_package(
+        bkdbmon_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.DbMon, db_type=DBType.Redis
         )
-        redis_tool_pkg = Package.get_latest_package(
+        redis_tool_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.RedisTools, db_type=DBType.Redis
         )
         return [
@@ -323,13 +365,13 @@ class GetFileList(object):
         ]
 
     def tendisplus_apply_backend(self, db_version: str) -> list:
-        redis_pkg = Package.get_latest_package(
+        redis_pkg = package_catalog.get_latest_package(
             version=db_version, pkg_type=MediumEnum.TendisPlus, db_type=DBType.Redis
         )
-        redis_tool_pkg = Package.get_latest_package(
+        redis_tool_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.RedisTools, db_type=DBType.Redis
         )
-        bkdbmon_pkg = Package.get_latest_package(
+        bkdbmon_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.DbMon, db_type=DBType.Redis
         )
         return [
@@ -351,7 +393,7 @@ class GetFileList(object):
 
     def es_apply(self, db_version: str) -> list:
         # 部署es所有节点需要的pkg列表
-        es_pkg = Package.get_latest_package(version=db_version, pkg_type=MediumEnum.Es, db_type=DBType.Es)
+        es_pkg = package_catalog.get_latest_package(version=db_version, pkg_type=MediumEnum.Es, db_type=DBType.Es)
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{es_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{self.actuator_pkg.path}",
@@ -359,7 +401,7 @@ class GetFileList(object):
 
     def es_scale_up(self, db_version: str) -> list:
         # 扩容es所有节点需要的pkg列表
-        es_pkg = Package.get_latest_package(version=db_version, pkg_type=MediumEnum.Es, db_type=DBType.Es)
+        es_pkg = package_catalog.get_latest_package(version=db_version, pkg_type=MediumEnum.Es, db_type=DBType.Es)
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{es_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{self.actuator_pkg.path}",
@@ -387,7 +429,9 @@ class GetFileList(object):
 
     def kafka_apply(self, db_version: str) -> list:
         # 部署kafka集群，所有节点需要的pkg列表
-        kafka_pkg = Package.get_latest_package(version=db_version, pkg_type=MediumEnum.Kafka, db_type=DBType.Kafka)
+        kafka_pkg = package_catalog.get_latest_package(
+            version=db_version, pkg_type=MediumEnum.Kafka, db_type=DBType.Kafka
+        )
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{self.actuator_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{kafka_pkg.path}",
@@ -399,7 +443,7 @@ class GetFileList(object):
 
     def influxdb_apply(self, db_version: str) -> list:
         # 部署kafka集群，所有节点需要的pkg列表
-        influxdb_pkg = Package.get_latest_package(
+        influxdb_pkg = package_catalog.get_latest_package(
             version=db_version, pkg_type=MediumEnum.Influxdb, db_type=DBType.InfluxDB
         )
         return [
@@ -417,10 +461,10 @@ class GetFileList(object):
         """
         redis单据基础包：act + tool工具包 + dbmon
         """
-        redis_tool_pkg = Package.get_latest_package(
+        redis_tool_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.RedisTools, db_type=DBType.Redis
         )
-        bkdbmon_pkg = Package.get_latest_package(
+        bkdbmon_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.DbMon, db_type=DBType.Redis
         )
         return [
@@ -434,10 +478,10 @@ class GetFileList(object):
         """
         redis load module, actuator + redis_modules
         """
-        redis_actuator_pkg = Package.get_latest_package(
+        redis_actuator_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.DBActuator, db_type=DBType.Redis
         )
-        redis_modules_pkg = Package.get_latest_package(
+        redis_modules_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.RedisModules, db_type=DBType.Redis
         )
         return [
@@ -450,10 +494,10 @@ class GetFileList(object):
         """
         redis add dts_server
         """
-        redis_actuator_pkg = Package.get_latest_package(
+        redis_actuator_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.DBActuator, db_type=DBType.Redis
         )
-        redis_dts_pkg = Package.get_latest_package(
+        redis_dts_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.RedisDts, db_type=DBType.Redis
         )
         return [
@@ -471,7 +515,9 @@ class GetFileList(object):
 
     def hdfs_apply(self, db_version: str) -> list:
         # 部署hdfs集群需要的pkg列表
-        hdfs_pkg = Package.get_latest_package(version=db_version, pkg_type=MediumEnum.Hdfs, db_type=DBType.Hdfs)
+        hdfs_pkg = package_catalog.get_latest_package(
+            version=db_version, pkg_type=MediumEnum.Hdfs, db_type=DBType.Hdfs
+        )
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{hdfs_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{self.actuator_pkg.path}",
@@ -486,7 +532,7 @@ class GetFileList(object):
     @classmethod
     def nginx_apply(cls) -> list:
         # 部署云区域nginx服务的文件列表
-        nginx_pkg = Package.get_latest_package(
+        nginx_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.CloudNginx, db_type=DBType.Cloud
         )
         return [
@@ -500,10 +546,10 @@ class GetFileList(object):
     @classmethod
     def dns_apply(cls) -> list:
         # 部署云区域nginx服务的文件列表
-        dns_bind_pkg = Package.get_latest_package(
+        dns_bind_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.CloudDNSBind, db_type=DBType.Cloud
         )
-        dns_pull_crond_pkg = Package.get_latest_package(
+        dns_pull_crond_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.CloudDNSPullCrond, db_type=DBType.Cloud
         )
         return [
@@ -514,7 +560,7 @@ class GetFileList(object):
     @classmethod
     def dbha_apply(cls) -> list:
         # 部署云区域dbha服务的文件列表
-        dbha_pkg = Package.get_latest_package(
+        dbha_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.CloudDBHA, db_type=DBType.Cloud
         )
         return [
@@ -524,10 +570,10 @@ class GetFileList(object):
     @classmethod
     def drs_apply(cls) -> list:
         # 部署云区域drs服务的文件列表
-        drs_pkg = Package.get_latest_package(
+        drs_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.CloudDRS, db_type=DBType.Cloud
         )
-        tmysqlparse_pkg = Package.get_latest_package(
+        tmysqlparse_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.CloudDRSTymsqlParse, db_type=DBType.Cloud
         )
         return [
@@ -539,7 +585,9 @@ class GetFileList(object):
 
     def pulsar_apply(self, db_version: str) -> list:
         # 部署es所有节点需要的pkg列表
-        pulsar_pkg = Package.get_latest_package(version=db_version, pkg_type=MediumEnum.Pulsar, db_type=DBType.Pulsar)
+        pulsar_pkg = package_catalog.get_latest_package(
+            version=db_version, pkg_type=MediumEnum.Pulsar, db_type=DBType.Pulsar
+        )
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{pulsar_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{self.actuator_pkg.path}",
@@ -556,13 +604,13 @@ class GetFileList(object):
         部署spider master节点时需要的介质包
         spider master 和 spider ctl 混合部署一起，所以下发两个介质包
         """
-        spider_master_pkg = Package.get_latest_package(
+        spider_master_pkg = package_catalog.get_latest_package(
             version=spider_version, pkg_type=MediumEnum.Spider, db_type=DBType.MySQL
         )
-        tdbctl_pkg = Package.get_latest_package(
+        tdbctl_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.tdbCtl, db_type=DBType.MySQL
         )
-        mysql_crond_pkg = Package.get_latest_package(
+        mysql_crond_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLCrond, db_type=DBType.MySQL
         )
         return [
@@ -576,10 +624,10 @@ class GetFileList(object):
         """
         部署spider slave节点需要的介质包
         """
-        spider_slave_pkg = Package.get_latest_package(
+        spider_slave_pkg = package_catalog.get_latest_package(
             version=spider_version, pkg_type=MediumEnum.Spider, db_type=DBType.MySQL
         )
-        mysql_crond_pkg = Package.get_latest_package(
+        mysql_crond_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLCrond, db_type=DBType.MySQL
         )
         return [
@@ -589,10 +637,10 @@ class GetFileList(object):
         ]
 
     def tdbctl_install_package(self) -> list:
-        tdbctl_pkg = Package.get_latest_package(
+        tdbctl_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.tdbCtl, db_type=DBType.MySQL
         )
-        db_backup_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.DbBackup)
+        db_backup_pkg = package_catalog.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.DbBackup)
 
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{self.actuator_pkg.path}",
@@ -605,9 +653,13 @@ class GetFileList(object):
         """
         spider 安装周边程序所需要下载介质包列表
         """
-        db_backup_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.DbBackup)
-        mysql_monitor_pkg = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLMonitor)
-        dba_toolkit = Package.get_latest_package(version=MediumEnum.Latest, pkg_type=MediumEnum.MySQLToolKit)
+        db_backup_pkg, mysql_monitor_pkg, dba_toolkit = package_catalog.get_latest_packages(
+            [
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.DbBackup},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLMonitor},
+                {"version": MediumEnum.Latest, "pkg_type": MediumEnum.MySQLToolKit},
+            ]
+        )
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{dba_toolkit.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{db_backup_pkg.path}",
@@ -618,7 +670,7 @@ class GetFileList(object):
         """
         获取tbinlogdumper安装的
         """
-        tbinlogdumper_pkg = Package.get_latest_package(
+        tbinlogdumper_pkg = package_catalog.get_latest_package(
             version=MediumEnum.Latest, pkg_type=MediumEnum.TBinlogDumper, db_type=DBType.MySQL
         )
         return [
@@ -628,7 +680,9 @@ class GetFileList(object):
 
     def doris_apply(self, db_version: str) -> list:
         # 部署doris所有节点需要的pkg列表
-        doris_pkg = Package.get_latest_package(version=db_version, pkg_type=MediumEnum.Doris, db_type=DBType.Doris)
+        doris_pkg = package_catalog.get_latest_package(
+            version=db_version, pkg_type=MediumEnum.Doris, db_type=DBType.Doris
+        )
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{doris_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{self.actuator_pkg.path}",
@@ -644,7 +698,7 @@ class GetFileList(object):
         """
         获取Sqlserver的安装包
         """
-        sqlserver_pkg = Package.get_latest_package(
+        sqlserver_pkg = package_catalog.get_latest_package(
             version=db_version, pkg_type=MediumEnum.Sqlserver, db_type=DBType.Sqlserver
         )
         return [
@@ -657,10 +711,10 @@ class GetFileList(object):
         部署mongodb,需要的pkg包
         """
 
-        mongodb_pkg = Package.get_latest_package(
+        mongodb_pkg = package_catalog.get_latest_package(
             version=db_version, pkg_type=MediumEnum.MongoDB, db_type=DBType.MongoDB
         )
-        # bkdbmon_pkg = Package.get_latest_package(
+        # bkdbmon_pkg = package_catalog.get_latest_package(
         #     version=MediumEnum.Latest, pkg_type=MediumEnum.DbMon, db_type=DBType.MongoDB
         # )
         return [
@@ -682,7 +736,7 @@ class GetFileList(object):
         """
         vm的介质包跟dbactuator
         """
-        vm_pkg = Package.get_latest_package(version=db_version, pkg_type=MediumEnum.Vm, db_type=DBType.Vm)
+        vm_pkg = package_catalog.get_latest_package(version=db_version, pkg_type=MediumEnum.Vm, db_type=DBType.Vm)
         return [
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{vm_pkg.path}",
             f"{env.BKREPO_PROJECT}/{env.BKREPO_BUCKET}/{self.actuator_pkg.path}",
@@ -28,6 +28,7 @@ from backend.core.encrypt.constants import AsymmetricCipherConfigType
 from backend.core.encrypt.handlers import AsymmetricHandler
 from backend.core.translation.constants import Language
 from backend.flow.consts import DEFAULT_FLOW_CACHE_EXPIRE_TIME, SUCCESS_LIST, WriteContextOpType
+from backend.flow.utils.job_poller import get_ip_log_key, job_status_poller
 from backend.ticket.models import Flow
 from backend.utils.excel import ExcelHandler
 from backend.utils.redis import RedisConn
@@ -248,15 +249,9 @@ class BkJobService(BaseService, metaclass=ABCMeta):
     @staticmethod
     def __status__(instance_id: str) -> Optional[Dict]:
         """
-        获取任务状态
+        获取任务状态，由 job_status_poller 集中轮询，轮询结果未就绪时返回None
         """
-        payload = {
-            "bk_biz_id": env.JOB_BLUEKING_BIZ_ID,
-            "job_instance_id": instance_id,
-            "return_ip_result": True,
-        }
-        resp = JobApi.get_job_instance_status(payload, raw=True)
-        return resp
+        return job_status_poller.get_status(instance_id)
 
     def __log__(
         self,
@@ -274,10 +269,26 @@ class BkJobService(BaseService, metaclass=ABCMeta):
         }
         return JobApi.get_job_instance_ip_log({**payload, **ip_dict}, raw=True)
 
+    def __batch_log__(self, job_instance_id: int, step_instance_id: int, ip_dicts: List[Dict]) -> Dict[str, str]:
+        """
+        批量获取多个IP的任务日志，返回 bk_cloud_id:ip -> log_content。批量接口失败时回退为逐个IP获取
+        """
+        if not ip_dicts:
+            return {}
+        ip_logs = job_status_poller.batch_get_ip_logs(job_instance_id, step_instance_id, ip_dicts)
+        if ip_logs is not None:
+            return ip_logs
+
+        ip_logs = {}
+        for ip_dict in ip_dicts:
+            resp = self.__log__(job_instance_id, step_instance_id, ip_dict)
+            if resp.get("result"):
+                ip_logs[get_ip_log_key(ip_dict["bk_cloud_id"], ip_dict["ip"])] = resp["data"]["log_content"]
+        return ip_logs
+
     def __get_target_ip_context(
         self,
-        job_instance_id: int,
-        step_instance_id: int,
+        log_content: Optional[str],
         ip_dict: dict,
         data,
         trans_data,
@@ -285,16 +296,15 @@ class BkJobService(BaseService, metaclass=ABCMeta):
         write_op: str,
     ):
         """
-        对单个节点获取执行后log，并赋值给定义好流程上下文的trans_data
+        对单个节点的执行后log，赋值给定义好流程上下文的trans_data
         write_op 控制写入变量的方式，rewrite是默认值，代表覆盖写入；append代表以{"ip":xxx} 形式追加里面变量里面
         """
-        resp = self.__log__(job_instance_id, step_instance_id, ip_dict)
-        if not resp["result"]:
-            # 结果返回异常，则异常退出
+        if log_content is None:
+            # 未获取到日志，则异常退出
             return False
         try:
             # 以dict形式追加写入
-            result = json.loads(re.search(cpl, resp["data"]["log_content"]).group("context"))
+            result = json.loads(re.search(cpl, log_content).group("context"))
             if write_op == WriteContextOpType.APPEND.value:
                 context = copy.deepcopy(getattr(trans_data, write_payload_var))
                 ip = ip_dict["ip"]
@@ -348,7 +358,7 @@ class BkJobService(BaseService, metaclass=ABCMeta):
         # 1.未执行; 2.正在执行; 3.执行成功; 4.执行失败; 5.跳过; 6.忽略错误;
         # 7.等待用户; 8.手动结束; 9.状态异常; 10.步骤强制终止中; 11.步骤强制终止成功; 12.步骤强制终止失败
         # """
-        if not (resp["result"] and resp["data"]["finished"]):
+        if not (resp and resp["result"] and resp["data"]["finished"]):
             self.log_info(_("[{}] 任务正在执行🤔").format(node_name))
             return True
 
@@ -376,11 +386,11 @@ class BkJobService(BaseService, metaclass=ABCMeta):
             self.log_info(_("[{}]  任务调度失败😱").format(node_name))
 
             # 转载job脚本节点报错日志，兼容多IP执行场景的日志输出
-            if ip_dicts:
-                for ip_dict in ip_dicts:
-                    resp = self.__log__(job_instance_id, step_instance_id, ip_dict)
-                    if resp.get("result"):
-                        self.log_error(f"{ip_dict}:{resp['data']['log_content']}")
+            ip_logs = self.__batch_log__(job_instance_id, step_instance_id, ip_dicts)
+            for ip_dict in ip_dicts:
+                ip_log_key = get_ip_log_key(ip_dict["bk_cloud_id"], ip_dict["ip"])
+                if ip_log_key in ip_logs:
+                    self.log_error(f"{ip_dict}:{ip_logs[ip_log_key]}")
 
             self.finish_schedule()
             return False
@@ -397,10 +407,10 @@ class BkJobService(BaseService, metaclass=ABCMeta):
         self.log_info(_("[{}]该节点需要获取执行后日志，赋值到流程上下文").format(node_name))
 
         is_false = False
+        ip_logs = self.__batch_log__(job_instance_id, step_instance_id, ip_dicts)
         for ip_dict in ip_dicts:
             if not self.__get_target_ip_context(
-                job_instance_id=job_instance_id,
-                step_instance_id=step_instance_id,
+                log_content=ip_logs.get(get_ip_log_key(ip_dict["bk_cloud_id"], ip_dict["ip"])),
                 ip_dict=ip_dict,
                 data=data,
                 trans_data=trans_data,
@@ -16,6 +16,7 @@ from pipeline.component_framework.component import Component
 from backend.components import DBPrivManagerApi
 from backend.exceptions import ApiResultError
 from backend.flow.plugins.components.collections.common.base_service import BaseService
+from backend.flow.utils.base.payload_cache import PayloadCacheKind, flow_payload_cache
 
 logger = logging.getLogger("flow")
 
@@ -51,6 +52,8 @@ class RandomizeAdminPasswordService(BaseService):
             logger.error(_("「接口modify_mysql_admin_password返回结果异常」{}").format(e.message))
             return False
 
+        # 密码服务的密码版本号已递增，这里顺带清理本流程已失效的账号缓存
+        flow_payload_cache.invalidate(self.runtime_attrs.get("root_pipeline_id"), PayloadCacheKind.ACCOUNT)
         return True
 
 
@@ -20,7 +20,7 @@ from backend.flow.plugins.components.collections.common.base_service import Base
 from backend.ticket.builders import BuilderFactory
 from backend.ticket.constants import TicketStatus
 from backend.ticket.flow_manager.manager import TicketFlowManager
-from backend.ticket.models import Ticket
+from backend.ticket.models import Ticket, TicketObjectRelation
 
 
 class RedisTicketService(BaseService):
@@ -48,6 +48,7 @@ class RedisTicketService(BaseService):
         # 初始化builder类
         builder = BuilderFactory.create_builder(ticket)
         builder.patch_ticket_detail()
+        TicketObjectRelation.sync_ticket_objects([ticket])
         builder.init_ticket_flows()
         TicketFlowManager(ticket=ticket).run_next_flow()
 
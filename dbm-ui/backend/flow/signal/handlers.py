@@ -17,11 +17,14 @@ from backend.db_dirty.handlers import DBDirtyMachineHandler
 from backend.flow.consts import StateType
 from backend.flow.engine.bamboo.engine import BambooEngine
 from backend.flow.models import FlowNode, FlowTree
+from backend.flow.utils.base.payload_cache import flow_payload_cache
+from backend.flow.utils.state_journal import flow_state_journal
 from backend.ticket.constants import FlowCallbackType, FlowMsgType, FlowType, TicketFlowStatus
 from backend.ticket.flow_manager.inner import InnerFlow
 from backend.ticket.flow_manager.manager import TicketFlowManager
 from backend.ticket.models import Ticket
 from backend.ticket.tasks.ticket_tasks import send_msg_for_flow
+from backend.utils.time import datetime2timestamp
 
 logger = logging.getLogger("flow")
 
@@ -45,6 +48,12 @@ def post_set_state_signal_handler(sender, node_id, to_state, version, root_id, *
         logger.debug(_("【状态信号捕获】未查找到FlowTree root_id={}").format(root_id))
         return
 
+    # 记录节点状态变更，供前端增量刷新流程树
+    change = {"node_id": node_id, "status": to_state, "updated_at": int(datetime2timestamp(now))}
+    if to_state == StateType.RUNNING:
+        change["started_at"] = change["updated_at"]
+    flow_state_journal.record_node_state(root_id, tree.tree, change)
+
     # 流转当前的flow状态
     origin_tree_status = tree.status
     # 如果当前节点或者流程已失败，则状态为失败
@@ -62,6 +71,10 @@ def post_set_state_signal_handler(sender, node_id, to_state, version, root_id, *
     else:
         target_tree_status = to_state
 
+    # 流程结束或撤销后不会再生成payload，提前清理流程缓存的账号和配置
+    if origin_tree_status != target_tree_status and target_tree_status in [StateType.FINISHED, StateType.REVOKED]:
+        flow_payload_cache.invalidate(root_id)
+
     # 如果状态发生改变，则触发单据回调和污点池转移
     if origin_tree_status != target_tree_status:
         try:
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.components import DBPrivManagerApi
+from backend.configuration.constants import DBType
+from backend.core.encrypt.handlers import SymmetricHandler
+from backend.flow.consts import DEFAULT_INSTANCE, MySQLPrivComponent, UserName
+from backend.ticket.constants import TicketType
+from backend.utils.redis import RedisConn
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("flow")
+
+DEFAULT_FLOW_PAYLOAD_CACHE_CONFIG = {
+    # 是否开启流程级别的payload缓存，关闭后每次生成payload都实时请求密码服务和配置服务
+    "enabled": True,
+    # 缓存的最长保留时间(秒)，流程结束或撤销时会提前清理
+    "ttl": 3 * 24 * 60 * 60,
+    # 内置账号密码的有效时间(秒)，兜底密码服务之外的密码变更，超过后重新请求密码服务
+    "account_ttl": 60 * 60,
+    # 构建流程时预取内置账号的组件类型
+    "prefetch_db_types": [DBType.MySQL.value, DBType.TenDBCluster.value],
+}
+
+FLOW_PAYLOAD_CACHE_KEY = "flow_payload_cache:{root_id}"
+
+# mysql 实例内置账号
+MYSQL_ACCOUNT_USERS = [
+    {"username": UserName.BACKUP.value, "component": MySQLPrivComponent.MYSQL.value},
+    {"username": UserName.MONITOR.value, "component": MySQLPrivComponent.MYSQL.value},
+    {"username": UserName.MONITOR_ACCESS_ALL.value, "component": MySQLPrivComponent.MYSQL.value},
+    {"username": UserName.OS_MYSQL.value, "component": MySQLPrivComponent.MYSQL.value},
+    {"username": UserName.REPL.value, "component": MySQLPrivComponent.MYSQL.value},
+    {"username": UserName.YW.value, "component": MySQLPrivComponent.MYSQL.value},
+    {"username": UserName.PARTITION_YW.value, "component": MySQLPrivComponent.MYSQL.value},
+]
+# proxy 实例内置账号
+PROXY_ACCOUNT_USERS = [{"username": UserName.PROXY.value, "component": MySQLPrivComponent.PROXY.value}]
+# tbinlogdumper 实例内置账号
+TBINLOGDUMPER_ACCOUNT_USERS = [{"username": UserName.ADMIN.value, "component": MySQLPrivComponent.TBINLOGDUMPER.value}]
+# mysql 分区运维账号
+PARTITION_YW_ACCOUNT_USERS = [{"username": UserName.PARTITION_YW.value, "component": MySQLPrivComponent.MYSQL.value}]
+
+
+class PayloadCacheKind:
+    ACCOUNT = "account"
+    CONFIG = "config"
+
+
+def get_account_params(users: List[Dict]) -> Dict:
+    """内置账号的查询参数，内置账号统一登记在默认实例(云区域0)下"""
+    return {"instances": [DEFAULT_INSTANCE], "users": users}
+
+
+class FlowPayloadCache(object):
+    """
+    流程级别的 payload 缓存
+    - 同一个流程的各个节点生成 payload 时，内置账号密码、DB配置只请求一次密码服务和配置服务
+    - 以 root_id 为 redis hash，field 为 类型+请求参数摘要(包含云区域、模块、版本等)，值使用对称加密后存储
+    - 构建流程时批量预取内置账号，配置在第一次使用时写入缓存
+    - 账号的 field 额外带上密码版本号和时间窗口，通过密码服务修改任意密码或超过 account_ttl 后，所有流程的账号缓存失效
+    - 流程结束/撤销时显式清理，其余情况依赖过期时间兜底
+    """
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("FLOW_PAYLOAD_CACHE", DEFAULT_FLOW_PAYLOAD_CACHE_CONFIG)
+
+    def get_version(self, kind: str) -> Optional[str]:
+        """缓存版本，只有账号区分版本: 密码版本号 + 时间窗口"""
+        if kind != PayloadCacheKind.ACCOUNT:
+            return None
+        return f"{DBPrivManagerApi.get_password_version()}.{int(time.time() // self.config['account_ttl'])}"
+
+    @staticmethod
+    def get_field(kind: str, params: Dict, version: Optional[str] = None) -> str:
+        digest = hashlib.md5(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        if version is None:
+            return f"{kind}:{digest}"
+        return f"{kind}:{version}:{digest}"
+
+    @staticmethod
+    def encrypt(value: Any) -> str:
+        return SymmetricHandler.encrypt(json.dumps(value))
+
+    @staticmethod
+    def decrypt(content: str) -> Any:
+        return json.loads(SymmetricHandler.decrypt(content))
+
+    def get(self, root_id: str, kind: str, params: Dict, version: Optional[str] = None) -> Optional[Any]:
+        content = RedisConn.hget(FLOW_PAYLOAD_CACHE_KEY.format(root_id=root_id), self.get_field(kind, params, version))
+        if content is None:
+            return None
+        try:
+            return self.decrypt(content)
+        except Exception as err:  # pylint: disable=broad-except
+            # 密钥轮换等原因导致无法解密时当作未命中
+            logger.warning(f"decrypt flow payload cache failed, root_id: {root_id}, kind: {kind}, err: {err}")
+            return None
+
+    def set_many(self, root_id: str, kind: str, items: List[tuple], version: Optional[str] = None):
+        """
+        批量写入缓存
+        @param root_id: 流程id
+        @param kind: 缓存类型
+        @param items: [(请求参数, 结果)]
+        @param version: 缓存版本，需要在请求之前获取，避免请求期间发生的密码变更被新版本号掩盖
+        """
+        if not items:
+            return
+        key = FLOW_PAYLOAD_CACHE_KEY.format(root_id=root_id)
+        pipeline = RedisConn.pipeline()
+        pipeline.hset(
+            key, mapping={self.get_field(kind, params, version): self.encrypt(value) for params, value in items}
+        )
+        pipeline.expire(key, self.config["ttl"])
+        pipeline.execute()
+
+    def get_or_fetch(self, root_id: Optional[str], kind: str, params: Dict, fetch: Callable[[Dict], Any]) -> Any:
+        """
+        优先从流程缓存中获取，未命中时调用 fetch(params) 并写入缓存
+        @param root_id: 流程id，为空时不使用缓存
+        @param kind: 缓存类型
+        @param params: 请求参数
+        @param fetch: 实际的请求函数
+        """
+        if not self.config["enabled"] or not root_id:
+            return fetch(params)
+
+        version = self.get_version(kind)
+        value = self.get(root_id, kind, params, version)
+        if value is not None:
+            return value
+
+        value = fetch(params)
+        self.set_many(root_id, kind, [(params, value)], version)
+        return value
+
+    def prefetch_accounts(self, root_id: str):
+        """一次请求密码服务获取流程可能用到的全部内置账号，按 payload 的查询维度拆分后写入缓存"""
+        groups = [MYSQL_ACCOUNT_USERS, PROXY_ACCOUNT_USERS, TBINLOGDUMPER_ACCOUNT_USERS, PARTITION_YW_ACCOUNT_USERS]
+        users = []
+        for user in [user for group in groups for user in group]:
+            if user not in users:
+                users.append(user)
+
+        version = self.get_version(PayloadCacheKind.ACCOUNT)
+        data = DBPrivManagerApi.get_password(get_account_params(users))
+        items = []
+        for group in groups:
+            group_items = [
+                item
+                for item in data["items"]
+                if {"username": item["username"], "component": item["component"]} in group
+            ]
+            # 账号缺失时不写入，交给 payload 生成时实时请求并按原有逻辑报错
+            if len(group_items) == len(group):
+                items.append((get_account_params(group), {**data, "items": group_items}))
+        self.set_many(root_id, PayloadCacheKind.ACCOUNT, items, version)
+
+    def prefetch(self, root_id: str, data: Dict):
+        """
+        构建流程时预取，预取失败不影响流程创建，payload 生成时会回退到实时请求
+        @param root_id: 流程id
+        @param data: 流程全局参数
+        """
+        if not self.config["enabled"]:
+            return
+        db_type = TicketType.get_db_type_by_ticket(data.get("ticket_type", ""))
+        if db_type not in self.config["prefetch_db_types"]:
+            return
+        try:
+            self.prefetch_accounts(root_id)
+        except Exception as err:  # pylint: disable=broad-except
+            logger.warning(f"prefetch flow payload cache failed, root_id: {root_id}, err: {err}")
+
+    def invalidate(self, root_id: str, kind: str = None):
+        """
+        清理流程缓存
+        @param root_id: 流程id
+        @param kind: 缓存类型，为空时清理整个流程的缓存
+        """
+        key = FLOW_PAYLOAD_CACHE_KEY.format(root_id=root_id)
+        if not kind:
+            RedisConn.delete(key)
+            return
+        fields = list(RedisConn.hscan_iter(key, match=f"{kind}:*"))
+        if fields:
+            RedisConn.hdel(key, *[field for field, __ in fields])
+
+
+flow_payload_cache = FlowPayloadCache()
@@ -23,6 +23,15 @@ from backend.db_meta.models import Cluster
 from backend.db_proxy.constants import ExtensionType
 from backend.db_proxy.models import DBExtension
 from backend.flow.consts import DEFAULT_INSTANCE, ConfigTypeEnum, LevelInfoEnum, MySQLPrivComponent, UserName
+from backend.flow.utils.base.payload_cache import (
+    MYSQL_ACCOUNT_USERS,
+    PARTITION_YW_ACCOUNT_USERS,
+    PROXY_ACCOUNT_USERS,
+    TBINLOGDUMPER_ACCOUNT_USERS,
+    PayloadCacheKind,
+    flow_payload_cache,
+    get_account_params,
+)
 from backend.flow.utils.mysql.get_mysql_sys_user import generate_mysql_tmp_user
 from backend.ticket.constants import TicketType
 from backend.utils.string import base64_encode
@@ -49,8 +58,10 @@ class PayloadHandler(object):
         self.ticket_data = ticket_data
         self.cluster = cluster
         self.cluster_type = cluster_type
+        # 流程id，同一个流程内的内置账号和配置从流程缓存中获取
+        self.root_id = self.ticket_data.get("job_root_id")
         self.account = self.get_mysql_account()
-        self.proxy_account = self.get_proxy_account()
+        self.proxy_account = self.get_proxy_account(self.root_id)
 
         # todo 后面可能优化这个问题
         if self.ticket_data.get("module"):
@@ -61,32 +72,44 @@ class PayloadHandler(object):
             self.db_module_id = 0
 
     @staticmethod
-    def get_proxy_account():
+    def get_builtin_accounts(root_id: str, users: list) -> list:
         """
-        获取proxy实例内置帐户密码
+        获取内置帐户密码，同一个流程内优先从流程缓存中获取
+        @param root_id: 流程id，为空时实时请求密码服务
+        @param users: 需要查询的帐户列表
         """
-        data = DBPrivManagerApi.get_password(
-            {
-                "instances": [DEFAULT_INSTANCE],
-                "users": [{"username": UserName.PROXY.value, "component": MySQLPrivComponent.PROXY.value}],
-            }
+        return flow_payload_cache.get_or_fetch(
+            root_id, PayloadCacheKind.ACCOUNT, get_account_params(users), DBPrivManagerApi.get_password
         )["items"]
+
+    def get_flow_config(self, params: dict, fetch=None) -> dict:
+        """
+        获取配置服务的配置，同一个流程内相同的查询只请求一次
+        @param params: 配置查询参数
+        @param fetch: 配置查询接口，默认为 DBConfigApi.query_conf_item
+        """
+        fetch = fetch or DBConfigApi.query_conf_item
+        return flow_payload_cache.get_or_fetch(self.root_id, PayloadCacheKind.CONFIG, params, fetch)
+
+    @staticmethod
+    def get_proxy_account(root_id: str = None):
+        """
+        获取proxy实例内置帐户密码
+        @param root_id: 流程id
+        """
+        data = PayloadHandler.get_builtin_accounts(root_id, PROXY_ACCOUNT_USERS)
         return {
             "proxy_admin_pwd": base64.b64decode(data[0]["password"]).decode("utf-8"),
             "proxy_admin_user": data[0]["username"],
         }
 
     @staticmethod
-    def get_tbinlogdumper_account():
+    def get_tbinlogdumper_account(root_id: str = None):
         """
         获取tbinlogdumper实例内置帐户密码
+        @param root_id: 流程id
         """
-        data = DBPrivManagerApi.get_password(
-            {
-                "instances": [DEFAULT_INSTANCE],
-                "users": [{"username": UserName.ADMIN.value, "component": MySQLPrivComponent.TBINLOGDUMPER.value}],
-            }
-        )["items"]
+        data = PayloadHandler.get_builtin_accounts(root_id, TBINLOGDUMPER_ACCOUNT_USERS)
         return {
             "tbinlogdumper_admin_pwd": base64.b64decode(data[0]["password"]).decode("utf-8"),
             "tbinlogdumper_admin_user": data[0]["username"],
@@ -98,21 +121,7 @@ class PayloadHandler(object):
         """
         user_map = {}
         value_to_name = {member.value: member.name.lower() for member in UserName}
-        data = DBPrivManagerApi.get_password(
-            {
-                "instances": [DEFAULT_INSTANCE],
-                "users": [
-                    {"username": UserName.BACKUP.value, "component": MySQLPrivComponent.MYSQL.value},
-                    {"username": UserName.MONITOR.value, "component": MySQLPrivComponent.MYSQL.value},
-                    {"username": UserName.MONITOR_ACCESS_ALL.value, "component": MySQLPrivComponent.MYSQL.value},
-                    {"username": UserName.OS_MYSQL.value, "component": MySQLPrivComponent.MYSQL.value},
-                    {"username": UserName.REPL.value, "component": MySQLPrivComponent.MYSQL.value},
-                    {"username": UserName.YW.value, "component": MySQLPrivComponent.MYSQL.value},
-                    {"username": UserName.PARTITION_YW.value, "component": MySQLPrivComponent.MYSQL.value},
-                ],
-            }
-        )
-        for user in data["items"]:
+        for user in self.get_builtin_accounts(self.root_id, MYSQL_ACCOUNT_USERS):
             user_map[value_to_name[user["username"]] + "_user"] = (
                 "MONITOR" if user["username"] == UserName.MONITOR_ACCESS_ALL.value else user["username"]
             )
@@ -217,13 +226,7 @@ class PayloadHandler(object):
         """
         获得mysql分区运维account
         """
-        partition_yw = DBPrivManagerApi.get_password(
-            params={
-                "instances": [DEFAULT_INSTANCE],
-                "users": [{"username": UserName.PARTITION_YW.value, "component": MySQLPrivComponent.MYSQL.value}],
-            }
-        )
-        partition_yw = partition_yw["items"][0]
+        partition_yw = self.get_builtin_accounts(self.root_id, PARTITION_YW_ACCOUNT_USERS)[0]
         return {
             "access_hosts": [],
             "user": partition_yw["username"],
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from backend import env
+from backend.components import JobApi
+from backend.utils.batch_request import request_multi_thread
+from backend.utils.redis import RedisConn
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("flow")
+
+DEFAULT_JOB_POLLER_CONFIG = {
+    # 是否开启集中轮询，关闭后各个节点自行查询作业状态
+    "enabled": True,
+    # 每批次查询的作业数量
+    "batch_size": 200,
+    # 单次轮询任务的最长执行时间(秒)，应小于周期任务的间隔
+    "max_run_time": 2,
+    # 自适应退避：作业已运行时间(秒) 小于阈值时使用对应的轮询间隔，最后一档阈值为None表示不限
+    "backoff": [[60, 2], [600, 5], [None, 15]],
+    # 作业状态在redis中的保留时间
+    "status_ttl": 600,
+    # 轮询进程的心跳时间，心跳过期说明轮询任务未在运行，各节点回退到自行查询
+    "heartbeat_ttl": 30,
+    # 作业的最长轮询时间(秒)，超过后移出轮询队列(如持续查询失败的作业)，节点仍在等待时会重新登记
+    "max_pending_time": 24 * 60 * 60,
+}
+
+JOB_POLLER_PENDING_KEY = "job_poller:pending"
+JOB_POLLER_REGISTER_KEY = "job_poller:register"
+JOB_POLLER_STATUS_KEY = "job_poller:status:{job_instance_id}"
+JOB_POLLER_HEARTBEAT_KEY = "job_poller:heartbeat"
+JOB_POLLER_LOCK_KEY = "job_poller:lock"
+# 只释放自己持有的锁，避免锁过期后误删其他进程的锁
+JOB_POLLER_UNLOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def get_ip_log_key(bk_cloud_id: int, ip: str) -> str:
+    """IP日志的key，不同云区域可能存在相同的IP"""
+    return f"{bk_cloud_id}:{ip}"
+
+
+class JobStatusPoller(object):
+    """
+    JOB 作业状态的集中轮询
+    - 各个 BkJobService 节点在 schedule 时只登记 job_instance_id 并从redis读取状态，不再各自请求 JOB
+    - 周期任务取出到期的作业，分批并发查询状态后写入redis
+    - 作业运行越久轮询间隔越长，结束的作业移出轮询队列
+    """
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("JOB_STATUS_POLLER", DEFAULT_JOB_POLLER_CONFIG)
+
+    @staticmethod
+    def query_status(job_instance_id: int) -> Dict:
+        """直接查询作业状态"""
+        payload = {
+            "bk_biz_id": env.JOB_BLUEKING_BIZ_ID,
+            "job_instance_id": job_instance_id,
+            "return_ip_result": True,
+        }
+        return JobApi.get_job_instance_status(payload, raw=True)
+
+    @classmethod
+    def _safe_query_status(cls, job_instance_id: int) -> Dict:
+        try:
+            return cls.query_status(job_instance_id)
+        except Exception as err:  # pylint: disable=broad-except
+            return {"result": False, "message": str(err)}
+
+    def is_running(self) -> bool:
+        return self.config["enabled"] and bool(RedisConn.exists(JOB_POLLER_HEARTBEAT_KEY))
+
+    def register(self, job_instance_id: int):
+        """登记作业，登记后由轮询任务负责查询状态"""
+        now = time.time()
+        pipeline = RedisConn.pipeline()
+        pipeline.zadd(JOB_POLLER_PENDING_KEY, {job_instance_id: now}, nx=True)
+        pipeline.hsetnx(JOB_POLLER_REGISTER_KEY, job_instance_id, now)
+        pipeline.execute()
+
+    def get_status(self, job_instance_id: int) -> Optional[Dict]:
+        """
+        获取作业状态，返回结构同 JobApi.get_job_instance_status(raw=True)
+        轮询任务还未查询到结果时返回 None，调用方按作业执行中处理
+        """
+        if not self.is_running():
+            return self.query_status(job_instance_id)
+
+        status = RedisConn.get(JOB_POLLER_STATUS_KEY.format(job_instance_id=job_instance_id))
+        if status is None:
+            self.register(job_instance_id)
+            return None
+        return json.loads(status)
+
+    def get_interval(self, elapsed: float) -> float:
+        for max_elapsed, interval in self.config["backoff"]:
+            if max_elapsed is None or elapsed < max_elapsed:
+                return interval
+        return self.config["backoff"][-1][1]
+
+    def poll_once(self) -> int:
+        """查询一批到期的作业，返回本批次查询的数量"""
+        now = time.time()
+        job_instance_ids = [
+            int(job_instance_id)
+            for job_instance_id in RedisConn.zrangebyscore(
+                JOB_POLLER_PENDING_KEY, 0, now, start=0, num=self.config["batch_size"]
+            )
+        ]
+        if not job_instance_ids:
+            return 0
+
+        register_times = RedisConn.hmget(JOB_POLLER_REGISTER_KEY, job_instance_ids)
+        params_list = [{"job_instance_id": job_instance_id} for job_instance_id in job_instance_ids]
+        results = request_multi_thread(
+            self._safe_query_status, params_list, get_data=lambda x: x, in_order=True, use_async=True
+        )
+
+        pipeline = RedisConn.pipeline()
+        for job_instance_id, register_time, (__, resp) in zip(job_instance_ids, register_times, results):
+            # 查询失败的结果不写入，节点会继续按执行中处理，等待下一次轮询
+            if resp.get("result"):
+                pipeline.set(
+                    JOB_POLLER_STATUS_KEY.format(job_instance_id=job_instance_id),
+                    json.dumps(resp),
+                    ex=self.config["status_ttl"],
+                )
+
+            elapsed = now - float(register_time or now)
+            finished = resp.get("result") and resp["data"].get("finished")
+            if finished or elapsed > self.config["max_pending_time"]:
+                # 结束或超过最长轮询时间的作业移出轮询队列，避免队列无限增长
+                pipeline.zrem(JOB_POLLER_PENDING_KEY, job_instance_id)
+                pipeline.hdel(JOB_POLLER_REGISTER_KEY, job_instance_id)
+            else:
+                pipeline.zadd(JOB_POLLER_PENDING_KEY, {job_instance_id: now + self.get_interval(elapsed)})
+        pipeline.execute()
+
+        return len(job_instance_ids)
+
+    def run(self):
+        """周期任务入口，同一时刻只有一个轮询任务在运行"""
+        if not self.config["enabled"]:
+            return
+
+        max_run_time = self.config["max_run_time"]
+        token = uuid.uuid4().hex
+        if not RedisConn.set(JOB_POLLER_LOCK_KEY, token, nx=True, ex=max_run_time * 5):
+            return
+
+        try:
+            RedisConn.set(JOB_POLLER_HEARTBEAT_KEY, time.time(), ex=self.config["heartbeat_ttl"])
+            start_time = time.time()
+            # 一批查询满了说明还有到期的作业，在时间允许的范围内继续查询
+            while time.time() - start_time < max_run_time:
+                if self.poll_once() < self.config["batch_size"]:
+                    break
+        except Exception as err:  # pylint: disable=broad-except
+            logger.exception(f"poll job instance status failed: {err}")
+        finally:
+            RedisConn.eval(JOB_POLLER_UNLOCK_SCRIPT, 1, JOB_POLLER_LOCK_KEY, token)
+
+    @staticmethod
+    def batch_get_ip_logs(job_instance_id: int, step_instance_id: int, ip_dicts: List[Dict]) -> Optional[Dict]:
+        """
+        批量获取多个IP的执行日志，返回 bk_cloud_id:ip -> log_content 的映射，查询失败返回 None
+        @param job_instance_id: 作业实例ID
+        @param step_instance_id: 步骤实例ID
+        @param ip_dicts: [{"bk_cloud_id": 0, "ip": "127.0.0.1"}]
+        """
+        payload = {
+            "bk_biz_id": env.JOB_BLUEKING_BIZ_ID,
+            "job_instance_id": job_instance_id,
+            "step_instance_id": step_instance_id,
+            "ip_list": [{"bk_cloud_id": ip_dict["bk_cloud_id"], "ip": ip_dict["ip"]} for ip_dict in ip_dicts],
+        }
+        resp = JobApi.batch_get_job_instance_ip_log(payload, raw=True)
+        if not resp["result"]:
+            return None
+        return {
+            get_ip_log_key(log["bk_cloud_id"], log["ip"]): log["log_content"]
+            for log in resp["data"].get("script_task_logs") or []
+        }
+
+
+job_status_poller = JobStatusPoller()
@@ -68,7 +68,7 @@ class MysqlActPayload(PayloadHandler, ProxyActPayload, TBinlogDumperActPayload):
         生成并获取mysql实例配置,集群级别配置
         spider/spider-ctl/spider-mysql实例统一用这里拿去配置
         """
-        data = DBConfigApi.get_or_generate_instance_config(
+        data = self.get_flow_config(
             {
                 "bk_biz_id": str(self.ticket_data["bk_biz_id"]),
                 "level_name": LevelName.CLUSTER,
@@ -79,13 +79,14 @@ class MysqlActPayload(PayloadHandler, ProxyActPayload, TBinlogDumperActPayload):
                 "namespace": self.cluster_type,
                 "format": FormatType.MAP_LEVEL,
                 "method": ReqType.GENERATE_AND_PUBLISH,
-            }
+            },
+            fetch=DBConfigApi.get_or_generate_instance_config,
         )
         return data["content"]
 
     def __get_version_and_charset(self, db_module_id) -> Any:
         """获取版本号和字符集信息"""
-        data = DBConfigApi.query_conf_item(
+        data = self.get_flow_config(
             {
                 "bk_biz_id": str(self.ticket_data["bk_biz_id"]),
                 "level_name": LevelName.MODULE,
@@ -102,7 +103,7 @@ class MysqlActPayload(PayloadHandler, ProxyActPayload, TBinlogDumperActPayload):
         """
         远程获取rotate_binlog配置
         """
-        data = DBConfigApi.query_conf_item(
+        data = self.get_flow_config(
             {
                 "bk_biz_id": str(self.ticket_data["bk_biz_id"]),
                 "level_name": LevelName.MODULE,
@@ -1443,7 +1444,7 @@ class MysqlActPayload(PayloadHandler, ProxyActPayload, TBinlogDumperActPayload):
         else:
             pass  # ToDo
 
-        config_items = DBConfigApi.query_conf_item(
+        config_items = self.get_flow_config(
             {
                 "bk_biz_id": "{}".format(machine.bk_biz_id),
                 "level_name": "cluster",
@@ -42,7 +42,7 @@ class ProxyActPayload(object):
 
     def __get_proxy_config(self):
         """获取proxy安装配置, 平台层级的配置，没有业务区分"""
-        data = DBConfigApi.query_conf_item(
+        data = self.get_flow_config(
             {
                 "bk_biz_id": "0",
                 "level_name": LevelName.PLAT,
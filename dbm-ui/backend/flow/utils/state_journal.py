@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import logging
+from typing import Dict, List, Optional
+
+from backend.flow.consts import FAILED_STATES
+from backend.utils.redis import RedisConn
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("flow")
+
+DEFAULT_FLOW_STATE_JOURNAL_CONFIG = {
+    # 是否记录状态变更，关闭后前端只能全量查询流程树
+    "enabled": True,
+    # 每个流程保留的最大变更条数，超过后最早的变更被淘汰，落后太多的客户端需要全量刷新
+    "max_len": 10000,
+    # 变更日志的保留时间(秒)，以最后一次变更开始计算
+    "ttl": 7 * 24 * 60 * 60,
+    # 长轮询的最大等待时间(秒)
+    "max_wait": 30,
+    # SSE 连接的最长持续时间(秒)，到期后由客户端携带 Last-Event-ID 重连
+    "sse_max_duration": 300,
+}
+
+FLOW_STATE_JOURNAL_KEY = "flow_state_journal:{root_id}"
+# 空日志的版本号，流程还没有任何状态变更
+EMPTY_VERSION = "0-0"
+
+
+def get_subprocess_ancestors(tree: Dict, node_id: str) -> List[str]:
+    """获取节点所在的子流程节点，由外到内排列，节点不在子流程内时返回空列表"""
+
+    def search(activities: Dict, path: List[str]) -> Optional[List[str]]:
+        for act_id, activity in activities.items():
+            if act_id == node_id:
+                return path
+            if activity.get("pipeline"):
+                found = search(activity["pipeline"].get("activities", {}), path + [act_id])
+                if found is not None:
+                    return found
+        return None
+
+    return search((tree or {}).get("activities", {}), []) or []
+
+
+class FlowStateJournal(object):
+    """
+    流程状态变更日志
+    - 节点状态变化时追加到该流程的 redis stream，stream ID 即为单调递增的版本号
+    - 前端全量获取流程树时带上当时的版本号，之后只查询该版本之后的变更，轮询开销只与变更数量有关
+    - 支持长轮询(XREAD BLOCK)，版本已被淘汰或过期时返回 full，前端重新全量获取
+    """
+
+    @property
+    def config(self) -> Dict:
+        return get_feature_config("FLOW_STATE_JOURNAL", DEFAULT_FLOW_STATE_JOURNAL_CONFIG)
+
+    @property
+    def enabled(self) -> bool:
+        return self.config["enabled"]
+
+    @staticmethod
+    def get_key(root_id: str) -> str:
+        return FLOW_STATE_JOURNAL_KEY.format(root_id=root_id)
+
+    @staticmethod
+    def next_version(version: str) -> str:
+        """紧跟在 version 之后的最小版本号，用于 XRANGE 的开区间查询"""
+        timestamp, seq = version.split("-")
+        return f"{timestamp}-{int(seq) + 1}"
+
+    @staticmethod
+    def is_valid_version(version: str) -> bool:
+        timestamp, __, seq = version.partition("-")
+        return timestamp.isdigit() and seq.isdigit()
+
+    def record(self, root_id: str, changes: List[Dict]):
+        """
+        记录节点状态变更
+        @param root_id: 流程ID
+        @param changes: 节点状态变更列表，每项至少包含 node_id 和 status
+        """
+        if not self.enabled or not changes:
+            return
+
+        key = self.get_key(root_id)
+        pipeline = RedisConn.pipeline()
+        for change in changes:
+            pipeline.xadd(key, {"data": json.dumps(change)}, maxlen=self.config["max_len"], approximate=True)
+        pipeline.expire(key, self.config["ttl"])
+        pipeline.execute()
+
+    def record_node_state(self, root_id: str, tree: Optional[Dict], change: Dict):
+        """
+        记录节点状态变更，节点失败/撤销时所在的子流程在流程树中同样展示为失败/撤销，需要一并记录
+        @param root_id: 流程ID
+        @param tree: 流程树，用于查找节点所在的子流程
+        @param change: 节点状态变更
+        """
+        changes = [change]
+        if change["status"] in FAILED_STATES:
+            changes.extend(
+                {"node_id": subprocess_id, "status": change["status"]}
+                for subprocess_id in get_subprocess_ancestors(tree, change["node_id"])
+            )
+        try:
+            self.record(root_id, changes)
+        except Exception as err:  # pylint: disable=broad-except
+            # 变更日志只用于前端增量刷新，记录失败不能影响流程状态流转
+            logger.exception(f"record flow state journal failed, root_id: {root_id}, err: {err}")
+
+    def get_version(self, root_id: str) -> str:
+        """当前最新的版本号"""
+        if not self.enabled:
+            return EMPTY_VERSION
+        entries = RedisConn.xrevrange(self.get_key(root_id), count=1)
+        return entries[0][0] if entries else EMPTY_VERSION
+
+    def _is_expired(self, key: str, since: str) -> bool:
+        """since 之后的变更是否已经被淘汰"""
+        if since == EMPTY_VERSION:
+            # 全量获取时还没有变更，只有日志被裁剪过才可能丢失
+            return RedisConn.xlen(key) >= self.config["max_len"]
+        # 客户端的版本号一定来自某条变更，该变更还在说明之后的变更都在
+        return not RedisConn.xrange(key, min=since, max=since, count=1)
+
+    def get_changes(self, root_id: str, since: str, wait: int = 0) -> Dict:
+        """
+        获取 since 之后的节点状态变更，同一个节点只返回最新的状态
+        @param root_id: 流程ID
+        @param since: 上一次返回的版本号
+        @param wait: 没有变更时最多等待的秒数，0 表示立即返回
+        """
+        if not self.enabled:
+            return {"version": since, "full": True, "changes": []}
+
+        key = self.get_key(root_id)
+        if self._is_expired(key, since):
+            return {"version": self.get_version(root_id), "full": True, "changes": []}
+
+        entries = RedisConn.xrange(key, min=self.next_version(since), max="+")
+        if not entries and wait:
+            timeout = min(wait, self.config["max_wait"]) * 1000
+            entries = (RedisConn.xread({key: since}, block=timeout) or [[key, []]])[0][1]
+
+        changes: Dict[str, Dict] = {}
+        for __, fields in entries:
+            change = json.loads(fields["data"])
+            # 合并同一节点的多次变更，先删除再插入，按节点最后一次变更的顺序返回
+            changes[change["node_id"]] = {**changes.pop(change["node_id"], {}), **change}
+        version = entries[-1][0] if entries else since
+        return {"version": version, "full": False, "changes": list(changes.values())}
+
+
+flow_state_journal = FlowStateJournal()
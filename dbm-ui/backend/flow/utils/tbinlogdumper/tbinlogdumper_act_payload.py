@@ -67,7 +67,7 @@ class TBinlogDumperActPayload(object):
 
         # 这里做了调整，传入payload需要的admin密码是tbinlogdumper的admin 密码
         account = copy.deepcopy(self.account)
-        dumper_account = PayloadHandler.get_tbinlogdumper_account()
+        dumper_account = PayloadHandler.get_tbinlogdumper_account(self.root_id)
         account["admin_user"] = dumper_account["tbinlogdumper_admin_user"]
         account["admin_pwd"] = dumper_account["tbinlogdumper_admin_pwd"]
 
@@ -141,7 +141,7 @@ class TBinlogDumperActPayload(object):
         """
         # 这里做了调整，传入payload需要的admin密码是tbinlogdumper的admin 密码
         account = copy.deepcopy(self.account)
-        dumper_account = PayloadHandler.get_tbinlogdumper_account()
+        dumper_account = PayloadHandler.get_tbinlogdumper_account(self.root_id)
         account["admin_user"] = dumper_account["tbinlogdumper_admin_user"]
         account["admin_pwd"] = dumper_account["tbinlogdumper_admin_pwd"]
         return {
@@ -162,7 +162,7 @@ class TBinlogDumperActPayload(object):
         TBinlogDumper建立数据同步
         """
         account = copy.deepcopy(self.account)
-        dumper_account = PayloadHandler.get_tbinlogdumper_account()
+        dumper_account = PayloadHandler.get_tbinlogdumper_account(self.root_id)
         account["admin_user"] = dumper_account["tbinlogdumper_admin_user"]
         account["admin_pwd"] = dumper_account["tbinlogdumper_admin_pwd"]
         return {
@@ -189,7 +189,9 @@ class TBinlogDumperActPayload(object):
             "db_type": DBActuatorTypeEnum.TBinlogDumper.value,
             "action": DBActuatorActionEnum.MySQLBackupDemand.value,
             "payload": {
-                "general": {"runtime_account": {**self.account, **PayloadHandler.get_tbinlogdumper_account()}},
+                "general": {
+                    "runtime_account": {**self.account, **PayloadHandler.get_tbinlogdumper_account(self.root_id)}
+                },
                 "extend": {
                     "host": kwargs["ip"],
                     "port": self.ticket_data["port"],
@@ -216,7 +218,9 @@ class TBinlogDumperActPayload(object):
             "db_type": DBActuatorTypeEnum.MySQL.value,
             "action": DBActuatorActionEnum.RestoreSlave.value,
             "payload": {
-                "general": {"runtime_account": {**self.account, **PayloadHandler.get_tbinlogdumper_account()}},
+                "general": {
+                    "runtime_account": {**self.account, **PayloadHandler.get_tbinlogdumper_account(self.root_id)}
+                },
                 "extend": {
                     "work_dir": kwargs["trans_data"]["backup_info"]["backup_dir"],
                     "backup_dir": kwargs["trans_data"]["backup_info"]["backup_dir"],
@@ -249,7 +253,9 @@ class TBinlogDumperActPayload(object):
             "db_type": DBActuatorTypeEnum.TBinlogDumper.value,
             "action": DBActuatorActionEnum.DumpSchema.value,
             "payload": {
-                "general": {"runtime_account": {**self.account, **PayloadHandler.get_tbinlogdumper_account()}},
+                "general": {
+                    "runtime_account": {**self.account, **PayloadHandler.get_tbinlogdumper_account(self.root_id)}
+                },
                 "extend": {
                     "host": kwargs["ip"],
                     "port": master.port,
@@ -265,7 +271,7 @@ class TBinlogDumperActPayload(object):
         """
         # 这里做了调整，传入payload需要的admin密码是tbinlogdumper的admin 密码
         account = copy.deepcopy(self.account)
-        dumper_account = PayloadHandler.get_tbinlogdumper_account()
+        dumper_account = PayloadHandler.get_tbinlogdumper_account(self.root_id)
         account["admin_user"] = dumper_account["tbinlogdumper_admin_user"]
         account["admin_pwd"] = dumper_account["tbinlogdumper_admin_pwd"]
         return {
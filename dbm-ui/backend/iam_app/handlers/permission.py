@@ -36,6 +36,7 @@ from backend.env import BK_IAM_SYSTEM_ID
 from backend.iam_app.dataclass.actions import ActionEnum, ActionMeta, _all_actions
 from backend.iam_app.dataclass.resources import ResourceEnum, ResourceMeta, _all_resources
 from backend.iam_app.exceptions import ActionNotExistError, GetSystemInfoError, PermissionDeniedError
+from backend.iam_app.handlers.policy_cache import IAMPolicyCache
 from backend.utils.local import local
 
 logger = logging.getLogger("root")
@@ -259,18 +260,13 @@ class Permission(object):
                 permission_list[key] = {action.id: True for action in actions}
             return permission_list
 
-        multi_request = self.make_multi_request(actions)
         batch_permission = {}
         try:
-            # TODO: 暂时屏蔽跨资源类型鉴权，SDK问题待排查
-            if len(resources_list[0]) == 1 and self.check_resource_is_local(resources_list[0]):
-                batch_permission = self._iam.batch_resource_multi_actions_allowed(multi_request, resources_list)
-            # 如果资源不属于本系统，则只能单次调用allowed
+            # 单资源鉴权使用策略缓存在本地计算，只有策略依赖资源属性的动作才请求权限中心
+            if self.is_policy_cache_enabled() and all(len(resources) == 1 for resources in resources_list):
+                batch_permission = self._batch_is_allowed_with_policy_cache(actions, resources_list)
             else:
-                batch_permission = {}
-                for index, resources in enumerate(resources_list):
-                    key = index if len(resources) > 1 else resources[0].id
-                    batch_permission[key] = self.multi_actions_is_allowed(actions, resources)
+                batch_permission = self._remote_batch_is_allowed(actions, resources_list)
         except Exception as e:  # pylint: disable=broad-except
             logger.exception(f"IAM AuthAPIError: {e}")
             for index in range(len(resources_list)):
@@ -288,6 +284,49 @@ class Permission(object):
 
         return batch_permission
 
+    @staticmethod
+    def is_policy_cache_enabled() -> bool:
+        return IAMPolicyCache.enabled() and not env.BK_IAM_SKIP
+
+    def _query_policies_by_actions(self, actions: List[ActionMeta]) -> List[Dict]:
+        """查询用户在各个动作上的策略，不传资源，由调用方在本地计算"""
+        return self._iam._do_policy_query_by_actions(self.make_multi_request(actions), with_resources=False)
+
+    def _remote_batch_is_allowed(
+        self, actions: List[Union[ActionMeta, str]], resources_list: List[List[Resource]]
+    ) -> Dict[str, Dict[str, bool]]:
+        """请求权限中心对一批动作的一批资源进行鉴权"""
+        # TODO: 暂时屏蔽跨资源类型鉴权，SDK问题待排查
+        if len(resources_list[0]) == 1 and self.check_resource_is_local(resources_list[0]):
+            return self._iam.batch_resource_multi_actions_allowed(self.make_multi_request(actions), resources_list)
+
+        # 如果资源不属于本系统，则只能单次调用allowed
+        batch_permission = {}
+        for index, resources in enumerate(resources_list):
+            key = index if len(resources) > 1 else resources[0].id
+            batch_permission[key] = self.multi_actions_is_allowed(actions, resources)
+        return batch_permission
+
+    def _batch_is_allowed_with_policy_cache(
+        self, actions: List[Union[ActionMeta, str]], resources_list: List[List[Resource]]
+    ) -> Dict[str, Dict[str, bool]]:
+        """基于缓存的策略对一批动作的一批单资源进行鉴权"""
+        actions = [ActionEnum.get_action_by_id(action) for action in actions]
+        policies = IAMPolicyCache.get_policies(self.username, actions, self._query_policies_by_actions)
+        batch_permission = IAMPolicyCache.eval_policies(self._iam, policies, resources_list)
+
+        # 策略依赖本地资源没有的属性，回退到权限中心鉴权
+        evaluated_action_ids = set(batch_permission[resources_list[0][0].id].keys())
+        remote_actions = [action for action in actions if action.id not in evaluated_action_ids]
+        if remote_actions:
+            for resource_id, permission in self._remote_batch_is_allowed(remote_actions, resources_list).items():
+                batch_permission.setdefault(resource_id, {}).update(permission)
+
+        IAMPolicyCache.incr_stats(
+            local=len(evaluated_action_ids) * len(resources_list), remote=len(remote_actions) * len(resources_list)
+        )
+        return batch_permission
+
     def policy_query(self, action: Union[ActionMeta, str], obj_list: List[Union[int, str]]) -> List:
         """
         批量判断业务资源关联动作是否有权限
@@ -301,8 +340,13 @@ class Permission(object):
 
         # 获得策略数据
         try:
-            request = self.make_request(action=action)
-            policies = self._iam._do_policy_query(request)
+            if self.is_policy_cache_enabled():
+                action = ActionEnum.get_action_by_id(action)
+                action_policies = IAMPolicyCache.get_policies(self.username, [action], self._query_policies_by_actions)
+                policies = action_policies[action.id]
+            else:
+                request = self.make_request(action=action)
+                policies = self._iam._do_policy_query(request)
         except AuthAPIError as e:
             logger.exception(f"IAM AuthAPIError: {e}")
             return []
@@ -444,6 +488,8 @@ class Permission(object):
         grant_result = None
         try:
             grant_result = grant_func(application, self.bk_token, self.username)
+            # 授权后创建者的策略发生变化，使策略缓存失效
+            IAMPolicyCache.invalidate(application["creator"])
             logger.info(f"[grant_creator_action] Success! resource: {resource.to_dict()}, result: {grant_result}")
         except Exception as e:
             logger.exception(f"[grant_creator_action] Failed! resource: {resource.to_dict()}, result: {e}")
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+from typing import Callable, Dict, List, Optional, Set
+
+from django.core.cache import cache
+from iam import ObjectSet, Resource, make_expression
+
+from backend.iam_app.dataclass.actions import ActionMeta
+from backend.utils.redis import RedisConn
+from backend.utils.settings import get_feature_config
+
+logger = logging.getLogger("root")
+
+DEFAULT_IAM_POLICY_CACHE_CONFIG = {
+    # 是否开启策略缓存，关闭后每次鉴权都请求权限中心
+    "enabled": True,
+    # 策略的缓存时间(秒)，授权后会主动失效
+    "ttl": 60,
+}
+
+IAM_POLICY_KEY = "iam_policy:{username}:{version}:{action_id}"
+IAM_POLICY_VERSION_KEY = "iam_policy:version:{username}"
+IAM_POLICY_STATS_KEY = "iam_policy:stats"
+
+
+def get_condition_fields(condition: Dict) -> Set[str]:
+    """获取策略表达式中引用的全部字段，格式为 {resource_type}.{attribute}"""
+    if condition["op"] in ["AND", "OR"]:
+        return set().union(*[get_condition_fields(sub_condition) for sub_condition in condition["content"]])
+    return {condition["field"]}
+
+
+class IAMPolicyCache(object):
+    """
+    按用户和动作缓存权限中心的策略
+    - 批量鉴权时只查询一次缺失动作的策略，缓存后在本地对整页资源计算表达式
+    - 策略依赖了本地资源没有的属性(如创建者等属性授权)时，只对这些动作回退到权限中心鉴权
+    - 用户被授权后递增版本号，使该用户的策略缓存立即失效
+    """
+
+    @classmethod
+    def config(cls) -> Dict:
+        return get_feature_config("IAM_POLICY_CACHE", DEFAULT_IAM_POLICY_CACHE_CONFIG)
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls.config()["enabled"]
+
+    @staticmethod
+    def get_version(username: str) -> int:
+        return cache.get(IAM_POLICY_VERSION_KEY.format(username=username)) or 0
+
+    @staticmethod
+    def invalidate(username: str):
+        """使用户的策略缓存失效"""
+        version_key = IAM_POLICY_VERSION_KEY.format(username=username)
+        cache.add(version_key, 0, timeout=None)
+        cache.incr(version_key)
+
+    @staticmethod
+    def incr_stats(**counts):
+        counts = {name: count for name, count in counts.items() if count}
+        if not counts:
+            return
+        try:
+            pipeline = RedisConn.pipeline()
+            for name, count in counts.items():
+                pipeline.hincrby(IAM_POLICY_STATS_KEY, name, count)
+            pipeline.execute()
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning(f"incr iam policy cache stats failed: {e}")
+
+    @staticmethod
+    def get_stats() -> Dict[str, float]:
+        """
+        策略缓存的统计
+        hit/miss: 策略缓存的命中/未命中次数，local/remote: 本地计算/回退到权限中心鉴权的动作资源数
+        """
+        stats = {name: 0 for name in ["hit", "miss", "local", "remote"]}
+        stats.update({name: int(count) for name, count in RedisConn.hgetall(IAM_POLICY_STATS_KEY).items()})
+        lookups = stats["hit"] + stats["miss"]
+        stats["hit_rate"] = round(stats["hit"] / lookups, 4) if lookups else 0
+        return stats
+
+    @classmethod
+    def get_policies(
+        cls, username: str, actions: List[ActionMeta], query_policies: Callable[[List[ActionMeta]], List[Dict]]
+    ) -> Dict[str, Optional[Dict]]:
+        """
+        获取用户在各个动作上的策略表达式，没有策略的动作为 None
+        @param username: 用户名
+        @param actions: 动作列表
+        @param query_policies: 查询权限中心策略的函数，参数为缺失策略的动作列表，返回结构同 policy_query_by_actions
+        """
+        version = cls.get_version(username)
+        action_keys = {
+            action.id: IAM_POLICY_KEY.format(username=username, version=version, action_id=action.id)
+            for action in actions
+        }
+        cached = cache.get_many(list(action_keys.values()))
+        policies = {action_id: cached[key]["condition"] for action_id, key in action_keys.items() if key in cached}
+
+        missing_actions = [action for action in actions if action.id not in policies]
+        cls.incr_stats(hit=len(policies), miss=len(missing_actions))
+        if not missing_actions:
+            return policies
+
+        action_policies = {
+            action_policy["action"]["id"]: action_policy["condition"]
+            for action_policy in query_policies(missing_actions) or []
+        }
+        missing_policies = {action.id: action_policies.get(action.id) or None for action in missing_actions}
+        cache.set_many(
+            {action_keys[action_id]: {"condition": policy} for action_id, policy in missing_policies.items()},
+            timeout=cls.config()["ttl"],
+        )
+        policies.update(missing_policies)
+        return policies
+
+    @staticmethod
+    def is_local_evaluable(condition: Dict, resources_list: List[List[Resource]]) -> bool:
+        """策略引用的资源属性在每个本地资源上都存在时，才能在本地计算"""
+        for field in get_condition_fields(condition):
+            resource_type, __, attribute = field.partition(".")
+            for resources in resources_list:
+                resource = next((r for r in resources if r.type == resource_type), None)
+                if resource is None or (attribute != "id" and attribute not in (resource.attribute or {})):
+                    return False
+        return True
+
+    @staticmethod
+    def make_object_set(resources: List[Resource]) -> ObjectSet:
+        obj_set = ObjectSet()
+        for resource in resources:
+            obj_set.add_object(resource.type, {**(resource.attribute or {}), "id": resource.id})
+        return obj_set
+
+    @classmethod
+    def eval_policies(
+        cls, iam, policies: Dict[str, Optional[Dict]], resources_list: List[List[Resource]]
+    ) -> Dict[str, Dict[str, bool]]:
+        """
+        在本地计算每个资源在各个动作上的权限，返回 资源ID -> {动作ID: 是否有权限}
+        无法在本地计算的动作不会出现在结果中
+        """
+        permissions: Dict[str, Dict[str, bool]] = {resources[0].id: {} for resources in resources_list}
+        for action_id, condition in policies.items():
+            if not condition:
+                for resource_id in permissions:
+                    permissions[resource_id][action_id] = False
+                continue
+            if not cls.is_local_evaluable(condition, resources_list):
+                continue
+
+            expression = make_expression(condition)
+            for resources in resources_list:
+                permissions[resources[0].id][action_id] = iam._eval_expr(expression, cls.make_object_set(resources))
+        return permissions
@@ -16,6 +16,7 @@ from rest_framework.response import Response
 from backend.bk_web import viewsets
 from backend.bk_web.swagger import common_swagger_auto_schema
 from backend.iam_app.handlers.permission import Permission
+from backend.iam_app.handlers.policy_cache import IAMPolicyCache
 from backend.iam_app.serializers import (
     CheckAllowedResSerializer,
     GetApplyDataResSerializer,
@@ -38,6 +39,11 @@ class IAMViewSet(viewsets.SystemViewSet):
         result = Permission(username=request.user.username).get_system_info()
         return Response(result)
 
+    @common_swagger_auto_schema(operation_summary=_("获取权限策略缓存的命中统计"), tags=[SWAGGER_TAG])
+    @action(methods=["GET"], detail=False)
+    def get_policy_cache_stats(self, request, *args, **kwargs):
+        return Response(IAMPolicyCache.get_stats())
+
     @common_swagger_auto_schema(
         operation_summary=_("检查当前用户对该动作是否有权限"),
         request_body=IamActionResourceRequestSerializer(),
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import threading
+from unittest.mock import patch
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+
+from backend.components.cache import APIResponseCache
+from backend.exceptions import ApiRequestError
+
+
+@pytest.fixture
+def api_cache():
+    with patch("backend.components.cache.cache", LocMemCache("test_api_cache", {})):
+        yield APIResponseCache()
+
+
+class TestAPIResponseCache:
+    def test_cached_value_is_not_shared(self, api_cache):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return {"result": True, "data": [{"bk_cloud_id": 0, "bk_cloud_name": "default area"}]}
+
+        first = api_cache.get_or_load("cc", "search_cloud_area", loader, cache_time=60)
+        # 调用方修改返回结果(如翻译云区域名称)，不能影响缓存
+        first["data"][0]["bk_cloud_name"] = "直连区域"
+        second = api_cache.get_or_load("cc", "search_cloud_area", loader, cache_time=60)
+
+        assert len(calls) == 1
+        assert second["data"][0]["bk_cloud_name"] == "default area"
+        assert second is not first
+
+    def test_negative_cache_raises_new_error(self, api_cache):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            raise ApiRequestError("upstream failed")
+
+        errors = []
+        for __ in range(3):
+            with pytest.raises(ApiRequestError) as exc_info:
+                api_cache.get_or_load("cc", "search_business", loader, cache_time=60)
+            errors.append(exc_info.value)
+
+        assert len(calls) == 1
+        assert len({id(err) for err in errors}) == 3
+        assert all(err.message == errors[0].message for err in errors)
+        assert api_cache.get_stats()["cc"]["negative_hits"] == 2
+
+    def test_skip_errors_not_cached(self, api_cache):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            raise TimeoutError
+
+        for __ in range(2):
+            with pytest.raises(TimeoutError):
+                api_cache.get_or_load("cc", "list_hosts", loader, cache_time=60, skip_errors=(TimeoutError,))
+        assert len(calls) == 2
+
+    def test_single_flight(self, api_cache):
+        calls, started, release = [], threading.Event(), threading.Event()
+
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"result": True, "data": []}
+
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(api_cache.get_or_load("cc", "list_biz", loader, cache_time=60))
+        )
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(
+                target=lambda: results.append(api_cache.get_or_load("cc", "list_biz", loader, cache_time=60))
+            )
+            for __ in range(4)
+        ]
+        for follower in followers:
+            follower.start()
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        assert len(calls) == 1
+        assert len(results) == 5
+        assert len({id(result) for result in results}) == 5
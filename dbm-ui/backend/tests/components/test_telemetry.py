@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import io
+import json
+import logging
+import time
+from unittest.mock import patch
+
+import pytest
+
+from backend.components.telemetry import APIRecord, APITelemetry, truncated_json_dumps
+from backend.tests.conftest import mark_benchmark
+
+MOCK_RESPONSE_DATA = {
+    "count": 10000,
+    "info": [
+        {"bk_host_id": index, "bk_host_innerip": f"127.0.{index // 256}.{index % 256}"} for index in range(10000)
+    ],
+}
+MAX_RESPONSE_RECORD = 5000
+
+
+@pytest.fixture
+def target():
+    """测试专用的 logger，用例结束后还原日志级别和 handler"""
+    target = logging.getLogger("test_api_telemetry")
+    level, handlers = target.level, list(target.handlers)
+    try:
+        yield target
+    finally:
+        target.setLevel(level)
+        target.handlers = handlers
+
+
+def record_before(data):
+    """改造前的流水记录方式：完整序列化后截断，并立即拼接日志字符串"""
+    info = {"response_data": json.dumps(data)[:MAX_RESPONSE_RECORD]}
+    return "[BKAPI] {info}".format(info=" && ".join([" {}=>{} ".format(_k, _v) for _k, _v in list(info.items())]))
+
+
+def record_after(telemetry, data):
+    """改造后的流水记录方式：先判断是否记录，再增量序列化，日志字符串延迟到输出时拼接"""
+    if not telemetry.should_record(is_success=True):
+        return None
+    return APIRecord({"response_data": telemetry.dumps_data(data, MAX_RESPONSE_RECORD)})
+
+
+class TestAPITelemetry:
+    def test_truncated_json_dumps(self):
+        full = json.dumps(MOCK_RESPONSE_DATA)
+        assert truncated_json_dumps(MOCK_RESPONSE_DATA, MAX_RESPONSE_RECORD) == full[:MAX_RESPONSE_RECORD]
+        assert truncated_json_dumps(MOCK_RESPONSE_DATA) == full
+        assert truncated_json_dumps({"a": 1}, 100) == '{"a": 1}'
+
+    def test_skip_disabled_level(self, target):
+        target.setLevel(logging.INFO)
+        telemetry = APITelemetry(target=target)
+        assert telemetry.should_record(is_success=True) is False
+        assert telemetry.should_record(is_success=False) is True
+
+    def test_lazy_rendering(self, target):
+        stream = io.StringIO()
+        target.addHandler(logging.StreamHandler(stream))
+        telemetry = APITelemetry(target=target)
+        with patch.object(APIRecord, "__str__", return_value="[BKAPI]") as render:
+            # 成功流水在 INFO 级别下不输出，不拼接日志字符串
+            target.setLevel(logging.INFO)
+            telemetry.record({"response_data": "{}"}, is_success=True)
+            render.assert_not_called()
+
+            target.setLevel(logging.DEBUG)
+            telemetry.record({"response_data": "{}"}, is_success=True)
+            assert render.called
+        assert stream.getvalue() == "[BKAPI]\n"
+
+    def test_dumps_data_truncated(self):
+        data = APITelemetry.dumps_data(MOCK_RESPONSE_DATA, MAX_RESPONSE_RECORD)
+        assert len(data) == MAX_RESPONSE_RECORD
+        assert data == json.dumps(MOCK_RESPONSE_DATA)[:MAX_RESPONSE_RECORD]
+        # 无法序列化的对象退化为字符串截断
+        assert APITelemetry.dumps_data({1, 2, 3}, 3) == "{1,"
+
+    @mark_benchmark
+    def test_record_overhead(self, target):
+        """流水开启(DEBUG)与关闭(INFO)时，改造前后单次记录的耗时"""
+        times = 50
+        for level in [logging.DEBUG, logging.INFO]:
+            target.setLevel(level)
+            telemetry = APITelemetry(target=target)
+
+            start = time.perf_counter()
+            for __ in range(times):
+                record_before(MOCK_RESPONSE_DATA)
+            before_cost = (time.perf_counter() - start) / times
+
+            start = time.perf_counter()
+            for __ in range(times):
+                record_after(telemetry, MOCK_RESPONSE_DATA)
+            after_cost = (time.perf_counter() - start) / times
+
+            print(
+                f"level -> {logging.getLevelName(level)}, "
+                f"before -> {before_cost * 1000:.3f}ms/call, after -> {after_cost * 1000:.3f}ms/call"
+            )
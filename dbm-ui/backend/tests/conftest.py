@@ -215,3 +215,7 @@ def init_ticket():
 
 
 mark_global_skip = pytest.mark.skipif(os.environ.get("GLOBAL_SKIP") == "true", reason="disable in landun WIP")
+# 性能基准测试默认不执行，需要时通过 RUN_BENCHMARK=true pytest -s <测试文件> 执行并查看耗时输出
+mark_benchmark = pytest.mark.skipif(
+    os.environ.get("RUN_BENCHMARK") != "true", reason="benchmark, set RUN_BENCHMARK=true"
+)
@@ -9,12 +9,16 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 import ipaddress
+import time
 
 import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from rest_framework.exceptions import ValidationError
 
 from backend.constants import IP_PORT_DIVIDER
 from backend.db_meta import api, models
+from backend.db_meta.api.dbha.snapshot import PendingMetaChange, dbha_instance_snapshot, notify_meta_changed
 from backend.db_meta.enums import (
     AccessLayer,
     ClusterPhase,
@@ -25,6 +29,7 @@ from backend.db_meta.enums import (
     InstanceStatus,
     MachineType,
 )
+from backend.tests.conftest import mark_benchmark
 from backend.tests.mock_data import constant
 from backend.tests.mock_data.components import cc
 
@@ -164,6 +169,49 @@ class TestDBHA:
     def test_instance_filter2(self, dbha_fixture):
         assert len(api.dbha.instances(statuses=[InstanceStatus.UNAVAILABLE.value])) == 4
 
+    def test_instance_snapshot(self, dbha_fixture):
+        snapshot = api.dbha.instances_snapshot()
+        assert snapshot["full"] and len(snapshot["instances"]) == 9
+        # 元数据没有变化时版本和 ETag 不变，增量为空
+        unchanged = api.dbha.instances_snapshot(since_version=snapshot["version"])
+        assert unchanged["etag"] == snapshot["etag"]
+        assert not unchanged["full"] and unchanged["instances"] == [] and unchanged["removed"] == []
+
+        row = snapshot["instances"][0]
+        target_status = (
+            InstanceStatus.UNAVAILABLE.value
+            if row["status"] == InstanceStatus.RUNNING.value
+            else InstanceStatus.RUNNING.value
+        )
+        api.dbha.update_status([{"ip": row["ip"], "port": row["port"], "status": target_status}], bk_cloud_id=0)
+
+        delta = api.dbha.instances_snapshot(since_version=snapshot["version"])
+        assert delta["version"] > snapshot["version"] and delta["etag"] != snapshot["etag"]
+        assert not delta["full"] and delta["removed"] == []
+        assert (row["ip"], row["port"], target_status) in {
+            (ele["ip"], ele["port"], ele["status"]) for ele in delta["instances"]
+        }
+        assert len(delta["instances"]) < len(snapshot["instances"])
+
+    def test_instance_snapshot_version_per_cloud(self, dbha_fixture):
+        snapshot = api.dbha.instances_snapshot()
+        version = dbha_instance_snapshot.get_meta_version(0)
+
+        # 其他云区域的元数据变更不影响当前云区域的快照
+        notify_meta_changed([1])
+        assert dbha_instance_snapshot.get_meta_version(0) == version
+        assert api.dbha.instances_snapshot(since_version=snapshot["version"])["instances"] == []
+
+        # 同一事务中的多次变更只注册一个提交回调，并且只立即递增一次
+        hooks = len(connection.run_on_commit)
+        with transaction.atomic():
+            for inst in models.StorageInstance.objects.select_related("machine"):
+                inst.save(update_fields=["status"])
+        assert dbha_instance_snapshot.get_meta_version(0) == version + 1
+        pending = [func for __, func in connection.run_on_commit[hooks:]]
+        assert len(pending) == 1 and isinstance(pending[0], PendingMetaChange)
+        assert pending[0].bk_cloud_ids == {0}
+
     def test_update_success(self, dbha_fixture):
         api.dbha.update_status(
             [
@@ -192,6 +240,160 @@ class TestDBHA:
         )
         assert p.cluster.first().status == ClusterStatus.ABNORMAL.value
 
+    def test_update_duplicate_reports(self, dbha_fixture):
+        results = api.dbha.update_status(
+            [
+                {"ip": cc.NORMAL_IP2, "port": TEST_STORAGE_PORT1, "status": InstanceStatus.UNAVAILABLE.value},
+                {"ip": cc.NORMAL_IP2, "port": TEST_STORAGE_PORT2, "status": InstanceStatus.RUNNING.value},
+                # 重复上报以最后一条为准
+                {"ip": cc.NORMAL_IP2, "port": TEST_STORAGE_PORT1, "status": InstanceStatus.RUNNING.value},
+            ],
+            bk_cloud_id=0,
+        )
+        assert [result["result"] for result in results] == ["duplicate", "unchanged", "unchanged"]
+        assert (
+            models.StorageInstance.objects.get(machine__ip=cc.NORMAL_IP2, port=TEST_STORAGE_PORT1).status
+            == InstanceStatus.RUNNING.value
+        )
+        assert models.Cluster.objects.get(name=constant.CLUSTER_NAME).status == ClusterStatus.NORMAL.value
+
+    def test_update_status_bulk(self, dbha_fixture):
+        """批量上报的查询次数与实例数量无关"""
+        cluster = models.Cluster.objects.get(name=constant.CLUSTER_NAME)
+        machines = [
+            models.Machine.objects.create(
+                ip=f"10.0.{index}.1",
+                bk_biz_id=constant.BK_BIZ_ID,
+                machine_type=MachineType.BACKEND,
+                access_layer=AccessLayer.STORAGE,
+                bk_host_id=int(ipaddress.IPv4Address(f"10.0.{index}.1")),
+            )
+            for index in range(10)
+        ]
+        models.StorageInstance.objects.bulk_create(
+            [
+                models.StorageInstance(
+                    port=30000 + port_index,
+                    machine=machine,
+                    status=InstanceStatus.RUNNING,
+                    instance_role=InstanceRole.BACKEND_SLAVE,
+                    instance_inner_role=InstanceInnerRole.SLAVE,
+                )
+                for machine in machines
+                for port_index in range(10)
+            ]
+        )
+        storages = list(models.StorageInstance.objects.filter(machine__in=machines))
+        cluster.storageinstance_set.add(*storages)
+
+        payloads = [
+            {"ip": machine.ip, "port": 30000 + port_index, "status": InstanceStatus.UNAVAILABLE.value}
+            for machine in machines
+            for port_index in range(10)
+        ]
+        query_counts = []
+        for batch in [payloads[:5], payloads[5:]]:
+            models.Cluster.objects.filter(id=cluster.id).update(status=ClusterStatus.NORMAL.value)
+            with CaptureQueriesContext(connection) as ctx:
+                results = api.dbha.update_status(batch, bk_cloud_id=0)
+            query_counts.append(len(ctx.captured_queries))
+            assert all(result["result"] == "updated" for result in results)
+            assert models.Cluster.objects.get(id=cluster.id).status == ClusterStatus.ABNORMAL.value
+
+        assert query_counts[0] == query_counts[1]
+        assert not models.StorageInstance.objects.filter(
+            machine__in=machines, status=InstanceStatus.RUNNING.value
+        ).exists()
+
+    def test_update_recover_cluster_status(self, dbha_fixture):
+        """实例恢复后集群恢复正常，实例关联的全部集群都重新计算状态，临时集群不处理"""
+        cluster = models.Cluster.objects.get(name=constant.CLUSTER_NAME)
+        other_cluster, temporary_cluster = [
+            models.Cluster.objects.create(
+                bk_biz_id=constant.BK_BIZ_ID,
+                name=name,
+                db_module_id=constant.DB_MODULE_ID,
+                immute_domain=f"{name}.{constant.CLUSTER_IMMUTE_DOMAIN}",
+                cluster_type=ClusterType.TenDBHA.value,
+                phase=ClusterPhase.ONLINE.value,
+                status=status,
+            )
+            for name, status in [("other", ClusterStatus.ABNORMAL.value), ("temporary", ClusterStatus.TEMPORARY.value)]
+        ]
+        storage = models.StorageInstance.objects.get(machine__ip=cc.NORMAL_IP2, port=TEST_STORAGE_PORT1)
+        storage.cluster.add(other_cluster, temporary_cluster)
+        models.StorageInstance.objects.update(status=InstanceStatus.RUNNING.value)
+        models.ProxyInstance.objects.update(status=InstanceStatus.RUNNING.value)
+
+        payload = {"ip": cc.NORMAL_IP2, "port": TEST_STORAGE_PORT1}
+        api.dbha.update_status([{**payload, "status": InstanceStatus.UNAVAILABLE.value}], bk_cloud_id=0)
+        assert models.Cluster.objects.get(id=cluster.id).status == ClusterStatus.ABNORMAL.value
+
+        api.dbha.update_status([{**payload, "status": InstanceStatus.RUNNING.value}], bk_cloud_id=0)
+        assert dict(
+            models.Cluster.objects.filter(id__in=[cluster.id, other_cluster.id, temporary_cluster.id]).values_list(
+                "id", "status"
+            )
+        ) == {
+            cluster.id: ClusterStatus.NORMAL.value,
+            other_cluster.id: ClusterStatus.NORMAL.value,
+            temporary_cluster.id: ClusterStatus.TEMPORARY.value,
+        }
+
+    @mark_benchmark
+    def test_update_status_benchmark(self, dbha_fixture):
+        """5000 个实例分布在 50 个集群中，整体上报不可用再恢复"""
+        machine_count, port_count = 50, 100
+        machines = [
+            models.Machine.objects.create(
+                ip=f"10.1.{index}.1",
+                bk_biz_id=constant.BK_BIZ_ID,
+                machine_type=MachineType.BACKEND,
+                access_layer=AccessLayer.STORAGE,
+                bk_host_id=int(ipaddress.IPv4Address(f"10.1.{index}.1")),
+            )
+            for index in range(machine_count)
+        ]
+        models.StorageInstance.objects.bulk_create(
+            [
+                models.StorageInstance(
+                    port=30000 + port_index,
+                    machine=machine,
+                    status=InstanceStatus.RUNNING,
+                    instance_role=InstanceRole.BACKEND_SLAVE,
+                    instance_inner_role=InstanceInnerRole.SLAVE,
+                )
+                for machine in machines
+                for port_index in range(port_count)
+            ]
+        )
+        for machine in machines:
+            cluster = models.Cluster.objects.create(
+                bk_biz_id=constant.BK_BIZ_ID,
+                name=f"cluster-{machine.ip}",
+                db_module_id=constant.DB_MODULE_ID,
+                immute_domain=f"{machine.ip}.{constant.CLUSTER_IMMUTE_DOMAIN}",
+                cluster_type=ClusterType.TenDBHA.value,
+                phase=ClusterPhase.ONLINE.value,
+                status=ClusterStatus.NORMAL.value,
+            )
+            cluster.storageinstance_set.add(*models.StorageInstance.objects.filter(machine=machine))
+
+        for status in [InstanceStatus.UNAVAILABLE.value, InstanceStatus.RUNNING.value]:
+            payloads = [
+                {"ip": machine.ip, "port": 30000 + port_index, "status": status}
+                for machine in machines
+                for port_index in range(port_count)
+            ]
+            begin = time.time()
+            with CaptureQueriesContext(connection) as ctx:
+                results = api.dbha.update_status(payloads, bk_cloud_id=0)
+            print(
+                f"update {len(payloads)} instances to {status}: "
+                f"{len(ctx.captured_queries)} queries, cost {time.time() - begin:.3f}s"
+            )
+            assert all(result["result"] == "updated" for result in results)
+
     def test_update_invalid_status(self):
         with pytest.raises(Exception):
             api.dbha.update_status(
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.db_meta.enums import CapacityGranularity, ClusterPhase, ClusterStatus, ClusterType
+from backend.db_meta.models import Cluster, ClusterCapacityStat
+from backend.db_services.dbbase.cluster.capacity import ClusterCapacityForecaster
+from backend.tests.mock_data import constant
+
+pytestmark = pytest.mark.django_db
+
+GB = 1024 * 1024 * 1024
+
+
+class TestClusterCapacityStat:
+    def test_record_and_forecast(self):
+        cluster_type = ClusterType.TenDBHA.value
+        for index in range(2):
+            Cluster.objects.create(
+                bk_biz_id=constant.BK_BIZ_ID,
+                name=f"capacity{index}",
+                db_module_id=constant.DB_MODULE_ID,
+                immute_domain=f"capacity{index}.db",
+                cluster_type=cluster_type,
+                phase=ClusterPhase.ONLINE.value,
+                status=ClusterStatus.NORMAL.value,
+            )
+
+        # 集群0每天增长10G，集群1容量不变
+        start_time = datetime(2024, 5, 20, tzinfo=timezone.utc)
+        for day in range(5):
+            for hour in (1, 13):
+                ClusterCapacityStat.record(
+                    constant.BK_BIZ_ID,
+                    cluster_type,
+                    {
+                        "capacity0.db": {"used": (100 + day * 10) * GB, "total": 1000 * GB},
+                        "capacity1.db": {"used": 100 * GB, "total": 1000 * GB},
+                    },
+                    start_time + timedelta(days=day, hours=hour),
+                )
+
+        assert ClusterCapacityStat.objects.filter(granularity=CapacityGranularity.RAW).count() == 20
+        assert ClusterCapacityStat.objects.filter(granularity=CapacityGranularity.DAY).count() == 10
+        assert ClusterCapacityStat.objects.filter(granularity=CapacityGranularity.WEEK).count() == 2
+
+        now = start_time + timedelta(days=5)
+        forecasts = {
+            forecast["immute_domain"]: forecast
+            for forecast in ClusterCapacityForecaster.forecast(constant.BK_BIZ_ID, [cluster_type], now=now).values()
+        }
+        assert forecasts["capacity0.db"]["days_to_full"] == 86.0
+        assert forecasts["capacity1.db"]["days_to_full"] is None
+
+        clusters = ClusterCapacityForecaster.list_exhausting_clusters(constant.BK_BIZ_ID, [cluster_type], now=now)
+        assert [cluster["immute_domain"] for cluster in clusters] == ["capacity0.db"]
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+from backend.db_monitor.models import MonitorPolicy
+from backend.db_monitor.policy_sync import MONITOR_POLICY_FINGERPRINT_KEY, MonitorPolicySyncer
+
+pytestmark = pytest.mark.django_db
+
+
+def _template(name, version=1, deleted=False):
+    return {
+        "bk_biz_id": 0,
+        "name": name,
+        "db_type": "mysql",
+        "version": version,
+        "deleted": deleted,
+        "export_at": "2024-05-20T16:02:33+08:00",
+        "details": {
+            "labels": ["/DBM/"],
+            "items": [
+                {
+                    "algorithms": [{"level": 1, "config": [], "type": "Threshold", "unit_prefix": ""}],
+                    "query_configs": [{"agg_condition": []}],
+                }
+            ],
+            "notice": {"signal": ["abnormal"], "user_groups": [], "options": {"assign_mode": ["only_notice"]}},
+        },
+    }
+
+
+def _write_template(tpl_dir, template):
+    path = os.path.join(tpl_dir, f"{template['name']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(template, f)
+    return path
+
+
+@pytest.fixture
+def syncer(tmp_path):
+    cache.delete(MONITOR_POLICY_FINGERPRINT_KEY)
+    for index in range(3):
+        _write_template(tmp_path, _template(f"policy{index}"))
+    (tmp_path / "v1").mkdir()
+    _write_template(tmp_path / "v1", _template("legacy"))
+    return MonitorPolicySyncer(tpl_dir=str(tmp_path))
+
+
+@pytest.fixture
+def bkm_calls():
+    calls = []
+
+    def _save(details):
+        calls.append(details["name"])
+        return {**details, "id": len(calls)}
+
+    with patch("backend.db_monitor.policy_sync.bkm_save_alarm_strategy", side_effect=_save), patch.object(
+        MonitorPolicy, "patch_target_and_metric_id", side_effect=lambda details, db_type: details
+    ):
+        yield calls
+
+
+class TestMonitorPolicySyncer:
+    def test_sync_plat_policies(self, syncer, bkm_calls, tmp_path):
+        counts = syncer.sync_plat_policies()
+        assert (counts["created"], counts["parsed"], counts["skipped"]) == (3, 3, 0)
+        assert sorted(bkm_calls) == ["policy0", "policy1", "policy2"]
+        assert not MonitorPolicy.objects.filter(name="legacy").exists()
+
+        # 模板没有变化时不再解析，也不再调用监控接口
+        with patch.object(syncer, "read_file") as read_file:
+            counts = syncer.sync_plat_policies()
+        read_file.assert_not_called()
+        assert (counts["parsed"], counts["skipped"], len(bkm_calls)) == (0, 3, 3)
+
+        # 只推送版本升级的策略，删除标记为删除的策略
+        _write_template(tmp_path, _template("policy0", version=2))
+        _write_template(tmp_path, _template("policy1", deleted=True))
+        with patch("backend.db_monitor.models.alarm.bkm_delete_alarm_strategy"):
+            counts = syncer.sync_plat_policies()
+        assert (counts["updated"], counts["deleted"], counts["skipped"]) == (1, 1, 1)
+        assert bkm_calls[3:] == ["policy0"]
+        assert MonitorPolicy.objects.get(name="policy0").version == 2
+        assert not MonitorPolicy.objects.filter(name="policy1").exists()
+
+    def test_resync_after_version_reset(self, syncer, bkm_calls):
+        syncer.sync_plat_policies()
+        # 指纹命中但策略版本被重置(update_alarm --force)，仍然需要重新推送
+        MonitorPolicy.objects.filter(name="policy2").update(version=0)
+        counts = syncer.sync_plat_policies()
+        assert (counts["updated"], counts["parsed"]) == (1, 0)
+        assert bkm_calls[3:] == ["policy2"]
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from backend.configuration.constants import DBType
+from backend.db_package.catalog import PackageCatalog
+from backend.db_package.exceptions import PackageNotExistException
+from backend.db_package.models import Package
+from backend.flow.consts import MediumEnum
+
+pytestmark = pytest.mark.django_db
+
+
+def _create_package(name, version, pkg_type=MediumEnum.MySQL, allow_biz_ids=None, enable=True, minutes=0):
+    package = Package.objects.create(
+        name=name,
+        version=version,
+        pkg_type=pkg_type,
+        db_type=DBType.MySQL,
+        path=f"mysql/{pkg_type}/{name}",
+        size=0,
+        md5="",
+        allow_biz_ids=allow_biz_ids,
+        enable=enable,
+    )
+    # update_at 为 auto_now，需要通过 update 指定包的新旧顺序
+    Package.objects.filter(id=package.id).update(update_at=timezone.now() + datetime.timedelta(minutes=minutes))
+    return package
+
+
+@pytest.fixture
+def catalog():
+    _create_package("mysql-5.7-old", "MySQL-5.7", minutes=0)
+    _create_package("mysql-5.7-gray", "MySQL-5.7", allow_biz_ids=[2], minutes=2)
+    _create_package("mysql-5.7-new", "MySQL-5.7", minutes=1)
+    _create_package("mysql-8.0-disable", "MySQL-8.0", enable=False, minutes=3)
+    _create_package("dbbackup", "latest", pkg_type=MediumEnum.DbBackup)
+    return PackageCatalog()
+
+
+class TestPackageCatalog:
+    def test_get_latest_package(self, catalog):
+        assert catalog.get_latest_package("MySQL-5.7", MediumEnum.MySQL).name == "mysql-5.7-gray"
+        assert catalog.get_latest_package("MySQL-5.7", MediumEnum.MySQL, bk_biz_id=1).name == "mysql-5.7-new"
+        assert catalog.get_latest_package("MySQL-5.7", MediumEnum.MySQL, bk_biz_id=2).name == "mysql-5.7-gray"
+        assert catalog.get_latest_package(MediumEnum.Latest, MediumEnum.MySQL, bk_biz_id=1).name == "mysql-5.7-new"
+        with pytest.raises(PackageNotExistException):
+            catalog.get_latest_package("MySQL-8.0", MediumEnum.MySQL)
+
+        # 与数据库查询的结果保持一致
+        for bk_biz_id in [None, 1, 2]:
+            assert (
+                catalog.get_latest_package("MySQL-5.7", MediumEnum.MySQL, bk_biz_id=bk_biz_id).id
+                == Package.get_latest_package("MySQL-5.7", MediumEnum.MySQL, bk_biz_id=bk_biz_id).id
+            )
+
+    def test_get_latest_packages(self, catalog):
+        catalog.get_index()
+        with CaptureQueriesContext(connection) as ctx:
+            packages = catalog.get_latest_packages(
+                [
+                    {"version": "MySQL-5.7", "pkg_type": MediumEnum.MySQL, "bk_biz_id": 1},
+                    {"version": MediumEnum.Latest, "pkg_type": MediumEnum.DbBackup},
+                ]
+            )
+        assert [package.name for package in packages] == ["mysql-5.7-new", "dbbackup"]
+        assert len(ctx.captured_queries) == 0
+
+        # 介质包变更后重新加载目录
+        _create_package("dbbackup-new", "latest", pkg_type=MediumEnum.DbBackup, minutes=5)
+        assert catalog.get_latest_package(MediumEnum.Latest, MediumEnum.DbBackup).name == "dbbackup-new"
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import timedelta
+from typing import Dict, List
+from unittest.mock import patch
+
+import pytest
+
+from backend.components.bklog.handler import BKLOG_MAX_RESULT_WINDOW, BKLogHandler
+from backend.db_meta.enums import ClusterPhase, ClusterStatus, ClusterType
+from backend.db_meta.models import Cluster
+from backend.db_periodic_task.local_tasks.mysql_backup.check_full_backup import check_full_backup, get_query_date_time
+from backend.db_report.models import MysqlBackupCheckReport
+from backend.tests.mock_data import constant
+from backend.tests.mock_data.components.bklog import FakeBKLogEndpoint
+
+pytestmark = pytest.mark.django_db
+
+CHECK_DATE = "2024-05-20"
+
+
+def _full_backup_log(domain: str, backup_id: str, file_types: List[str]) -> Dict:
+    return {
+        "bk_biz_id": constant.BK_BIZ_ID,
+        "backup_id": backup_id,
+        "cluster_address": domain,
+        "cluster_id": 0,
+        "backup_host": "127.0.0.1",
+        "backup_port": 20000,
+        "mysql_role": "slave",
+        "backup_type": "logical",
+        "file_list": [
+            {"file_name": f"{backup_id}.{file_type}", "file_size": 1, "file_type": file_type}
+            for file_type in file_types
+        ],
+        "data_schema_grant": "all",
+        "is_full_backup": 1,
+        "total_filesize": 1,
+        "encrypt_enable": False,
+        "mysql_version": "5.7.20",
+        "backup_begin_time": "",
+        "backup_end_time": "",
+        "backup_consistent_time": "",
+        "shard_value": 0,
+    }
+
+
+class TestBackupLogScan:
+    def test_scan_logs_split_window(self):
+        endpoint = FakeBKLogEndpoint()
+        start_time, end_time = get_query_date_time(CHECK_DATE)
+        # 前一个小时内的日志超过 ES 分页上限，需要拆分窗口
+        log_count = BKLOG_MAX_RESULT_WINDOW * 2 + 500
+        for index in range(log_count):
+            endpoint.add_log(start_time + timedelta(seconds=index % 3600), {"index": index})
+        endpoint.add_log(end_time, {"index": log_count})
+
+        with patch("backend.components.bklog.handler.BKLogApi", endpoint):
+            indexes = [log["index"] for log in BKLogHandler.scan_logs("test_collector", start_time, end_time)]
+
+        assert sorted(indexes) == list(range(log_count + 1))
+
+    def test_check_full_backup_in_one_scan(self):
+        endpoint = FakeBKLogEndpoint()
+        start_time, __ = get_query_date_time(CHECK_DATE)
+        cluster_count = 20
+        for index in range(cluster_count):
+            domain = f"tendbcluster{index}.db"
+            Cluster.objects.create(
+                bk_biz_id=constant.BK_BIZ_ID,
+                name=f"tendbcluster{index}",
+                db_module_id=constant.DB_MODULE_ID,
+                immute_domain=domain,
+                cluster_type=ClusterType.TenDBCluster.value,
+                phase=ClusterPhase.ONLINE.value,
+                status=ClusterStatus.NORMAL.value,
+            )
+            # 奇数集群的备份缺少 tar 文件
+            file_types = ["index", "tar"] if index % 2 == 0 else ["index"]
+            endpoint.add_log(
+                start_time + timedelta(minutes=index), _full_backup_log(domain, f"backup{index}", file_types)
+            )
+
+        with patch("backend.components.bklog.handler.BKLogApi", endpoint):
+            check_full_backup(CHECK_DATE)
+
+        # 每个时间窗口只查询一次，与集群数量无关
+        assert endpoint.calls == 24
+        failed_clusters = set(
+            MysqlBackupCheckReport.objects.filter(cluster_type=ClusterType.TenDBCluster).values_list(
+                "cluster", flat=True
+            )
+        )
+        assert failed_clusters == {f"tendbcluster{index}.db" for index in range(1, cluster_count, 2)}
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import patch
+
+from backend.db_periodic_task.local_tasks.dbmon_heartbeat.heartbeat_report import (
+    HEARTBEAT_QUERY_SERIES_LIMIT,
+    query_by_cluster_domains,
+    shard_cluster_domains,
+)
+
+
+class FakeMonitorEndpoint(object):
+    """按 promql 中的域名返回每个集群的心跳序列，序列数超过上限时截断"""
+
+    def __init__(self, domain__ips, missing_ips):
+        self.domain__ips = domain__ips
+        self.missing_ips = missing_ips
+        self.calls = 0
+
+    def unify_query(self, params, use_admin=False):
+        self.calls += 1
+        promql = params["query_configs"][0]["promql"]
+        domains = promql.split('cluster_domain=~"^(')[1].split(")$")[0].split("|")
+        series = [
+            {
+                "dimensions": {"cluster_domain": domain, "target": ip},
+                "datapoints": [[None, 1], [0 if ip in self.missing_ips else 1, 2]],
+            }
+            for domain in domains
+            for ip in self.domain__ips[domain]
+        ]
+        return {"series": series[:HEARTBEAT_QUERY_SERIES_LIMIT]}
+
+
+def _cluster_info(domain, ips):
+    return {
+        "immute_domain": domain,
+        "redis_master_ips_set": ips[:1],
+        "redis_slave_ips_set": ips[1:2],
+        "twemproxy_ips_set": ips[2:],
+    }
+
+
+class TestDbmonHeartbeat:
+    def test_shard_cluster_domains(self):
+        cluster_infos = [
+            _cluster_info(f"cache{index}.db", [f"127.0.{index}.{node}" for node in range(10)]) for index in range(120)
+        ]
+        shards = shard_cluster_domains(cluster_infos)
+        assert sum(len(shard) for shard in shards) == 120
+        assert all(len(shard) * 10 <= HEARTBEAT_QUERY_SERIES_LIMIT for shard in shards)
+
+    def test_query_by_cluster_domains(self):
+        domain__ips = {f"cache{index}.db": [f"127.0.{index}.{node}" for node in range(10)] for index in range(100)}
+        endpoint = FakeMonitorEndpoint(domain__ips, missing_ips={"127.0.1.1", "127.0.99.9"})
+        with patch("backend.db_periodic_task.local_tasks.dbmon_heartbeat.heartbeat_report.BKMonitorV3Api", endpoint):
+            heartbeat_ips = query_by_cluster_domains(list(domain__ips.keys()))
+
+        # 一次查询的序列数超过上限，拆分后查询
+        assert endpoint.calls > 1
+        assert heartbeat_ips["cache0.db"] == set(domain__ips["cache0.db"])
+        assert heartbeat_ips["cache1.db"] == set(domain__ips["cache1.db"]) - {"127.0.1.1"}
+        assert heartbeat_ips["cache99.db"] == set(domain__ips["cache99.db"]) - {"127.0.99.9"}
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import timedelta
+
+import pytest
+from celery.schedules import crontab
+from django_celery_beat.models import PeriodicTask
+
+from backend.db_periodic_task.constants import PeriodicTaskType
+from backend.db_periodic_task.local_tasks.register import register_periodic_task
+from backend.db_periodic_task.models import DBPeriodicTask
+
+pytestmark = pytest.mark.django_db
+
+
+def _task_specs(count):
+    return {
+        f"local_task_{index}": {
+            "task": f"local_task_{index}",
+            "run_every": crontab(minute=index % 3) if index % 2 else timedelta(minutes=5),
+            "args": None,
+            "kwargs": {"index": index},
+        }
+        for index in range(count)
+    }
+
+
+class TestPeriodicTaskRegister:
+    def test_register_without_db_write(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+
+            @register_periodic_task(run_every=timedelta(minutes=1))
+            def dummy_periodic_task():
+                pass
+
+    def test_sync_periodic_tasks(self):
+        DBPeriodicTask.create_or_update_periodic_task(
+            name="legacy_task", task="legacy_task", run_every=timedelta(minutes=1), task_type=PeriodicTaskType.LOCAL
+        )
+        task_specs = _task_specs(20)
+        result = DBPeriodicTask.sync_periodic_tasks(task_specs, PeriodicTaskType.LOCAL.value)
+        assert result == {"created": 20, "updated": 0, "deleted": 1}
+        assert set(DBPeriodicTask.objects.values_list("name", flat=True)) == set(task_specs.keys())
+
+        # 未变化的任务不会更新，冻结的任务不受影响
+        task_specs["local_task_0"]["run_every"] = crontab(minute=30)
+        task_specs["local_task_1"]["kwargs"] = {"index": 100}
+        DBPeriodicTask.objects.filter(name="local_task_2").update(is_frozen=True)
+        task_specs["local_task_2"]["args"] = [1]
+        result = DBPeriodicTask.sync_periodic_tasks(task_specs, PeriodicTaskType.LOCAL.value)
+        assert result == {"created": 0, "updated": 2, "deleted": 0}
+
+        task = PeriodicTask.objects.get(name="local_task_0")
+        assert task.crontab.minute == "30" and task.interval is None
+        assert PeriodicTask.objects.get(name="local_task_1").kwargs == '{"index": 100}'
+        assert PeriodicTask.objects.get(name="local_task_2").args == "[]"
+
+    def test_sync_close_intervals(self):
+        # 相近的执行周期 repr 相同，仍然需要对应不同的 schedule
+        task_specs = {
+            "daily_task": {"task": "daily_task", "run_every": timedelta(days=1)},
+            "daily_delay_task": {"task": "daily_delay_task", "run_every": timedelta(days=1, minutes=5)},
+        }
+        DBPeriodicTask.sync_periodic_tasks(task_specs, PeriodicTaskType.LOCAL.value)
+        assert PeriodicTask.objects.get(name="daily_task").interval.every == 24 * 60 * 60
+        assert PeriodicTask.objects.get(name="daily_delay_task").interval.every == 24 * 60 * 60 + 5 * 60
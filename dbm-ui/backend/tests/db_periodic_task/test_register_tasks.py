@@ -32,9 +32,12 @@ class TestRegisterRemoteTasks:
 
     def test_register_local_tasks(self):
         from backend.db_periodic_task.local_tasks import register_periodic_task
+        from backend.db_periodic_task.local_tasks.register import sync_local_periodic_tasks
 
         @register_periodic_task(run_every=1)
         def demo_task():
             return "hello, world!"
 
+        # 注册只写入内存，同步后才落库
+        sync_local_periodic_tasks()
         assert DBPeriodicTask.objects.filter(task_type=PeriodicTaskType.LOCAL, name__contains="demo_task").count()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+from backend.db_services.mysql.fixpoint_rollback.catalog import (
+    BACKUP_CATALOG_COVERAGE_KEY,
+    BACKUP_CATALOG_LOCK_KEY,
+    BackupCatalogHandler,
+)
+from backend.db_services.mysql.fixpoint_rollback.models import MySQLBackupCatalog, MySQLBinlogCatalog
+from backend.tests.mock_data.components.bklog import FakeBKLogEndpoint
+
+pytestmark = pytest.mark.django_db
+
+NOW = datetime(2024, 5, 20, 12, 0, 0, tzinfo=timezone.utc)
+CLUSTER_ID = 1
+
+
+def _backup_log(backup_id: str, consistent_time: datetime) -> dict:
+    return {
+        "cluster_id": str(CLUSTER_ID),
+        "bk_biz_id": 1,
+        "backup_id": backup_id,
+        "backup_host": "127.0.0.1",
+        "backup_port": "20000",
+        "mysql_role": "slave",
+        "shard_value": 0,
+        "is_full_backup": 1,
+        "consistent_backup_time": consistent_time.isoformat(),
+    }
+
+
+def _binlog(task_id: str, start_time: datetime, stop_time: datetime) -> dict:
+    return {
+        "cluster_id": str(CLUSTER_ID),
+        "host": "127.0.0.1",
+        "port": "20000",
+        "task_id": task_id,
+        "filename": f"binlog20000.{task_id}",
+        "start_time": start_time.isoformat(),
+        "stop_time": stop_time.isoformat(),
+    }
+
+
+@pytest.fixture
+def endpoint():
+    cache.delete(BACKUP_CATALOG_COVERAGE_KEY)
+    fake_endpoint = FakeBKLogEndpoint()
+    with patch("backend.components.bklog.handler.BKLogApi", fake_endpoint):
+        yield fake_endpoint
+    cache.delete(BACKUP_CATALOG_COVERAGE_KEY)
+
+
+class TestBackupCatalog:
+    def test_ingest_incrementally(self, endpoint):
+        for day in range(3):
+            report_time = NOW - timedelta(days=day, minutes=10)
+            endpoint.add_log(report_time, _backup_log(f"backup{day}", report_time - timedelta(minutes=10)))
+            endpoint.add_log(report_time, _binlog(f"task{day}", report_time - timedelta(hours=1), report_time))
+
+        BackupCatalogHandler.ingest(now=NOW)
+        assert MySQLBackupCatalog.objects.filter(cluster_id=CLUSTER_ID).count() == 3
+        assert MySQLBinlogCatalog.objects.filter(host="127.0.0.1", port=20000).count() == 3
+
+        # 重叠窗口内的日志重复导入时不产生重复记录
+        report_time = NOW + timedelta(minutes=5)
+        endpoint.add_log(report_time, _backup_log("backup_new", report_time))
+        endpoint.calls = 0
+        BackupCatalogHandler.ingest(now=NOW + timedelta(minutes=10))
+        assert MySQLBackupCatalog.objects.filter(cluster_id=CLUSTER_ID).count() == 4
+        assert MySQLBinlogCatalog.objects.filter(host="127.0.0.1", port=20000).count() == 3
+        # 增量导入只扫描上次覆盖范围之后的日志
+        assert endpoint.calls == 2
+
+    def test_query_with_tail(self, endpoint):
+        report_time = NOW - timedelta(days=1)
+        endpoint.add_log(report_time, _backup_log("backup_old", report_time))
+        BackupCatalogHandler.ingest(now=NOW)
+
+        tail_ranges = []
+        tail_log = _backup_log("backup_tail", NOW)
+
+        def tail_loader(start_time, end_time):
+            tail_ranges.append((start_time, end_time))
+            # 重叠范围内已导入的日志也会出现在日志平台的结果中
+            return [_backup_log("backup_old", report_time), tail_log]
+
+        logs = BackupCatalogHandler.query_backup_logs(
+            CLUSTER_ID, NOW - timedelta(days=2), NOW + timedelta(minutes=5), tail_loader=tail_loader
+        )
+        assert [log["backup_id"] for log in logs] == ["backup_old", "backup_tail"]
+        # 只有还没导入的部分查询日志平台
+        coverage = BackupCatalogHandler.get_coverage()
+        assert tail_ranges == [(coverage["end"], NOW + timedelta(minutes=5))]
+
+        # 目录没有覆盖的时间范围直接返回 None，由调用方查询日志平台
+        assert (
+            BackupCatalogHandler.query_binlogs(
+                "127.0.0.1", 20000, NOW - timedelta(days=365), NOW, tail_loader=tail_loader
+            )
+            is None
+        )
+
+    def test_ingest_skipped_when_locked(self, endpoint):
+        lock = cache.lock(BACKUP_CATALOG_LOCK_KEY, timeout=60)
+        assert lock.acquire(blocking=False)
+        try:
+            assert BackupCatalogHandler.ingest(now=NOW) is None
+            assert endpoint.calls == 0
+        finally:
+            lock.release()
+
+    def test_coverage_advances_per_window(self, endpoint):
+        config = BackupCatalogHandler.config()
+        window = timedelta(hours=config["window_hours"])
+        backfill_start = NOW - timedelta(days=config["backfill_days"])
+        ingest_collector = BackupCatalogHandler._ingest_collector.__func__
+        calls = []
+
+        def interrupted_ingest(cls, *args):
+            calls.append(args)
+            # 每个窗口导入两个采集项，第三个窗口导入时中断
+            if len(calls) == 5:
+                raise RuntimeError("interrupted")
+            return ingest_collector(cls, *args)
+
+        with patch.object(BackupCatalogHandler, "_ingest_collector", classmethod(interrupted_ingest)):
+            with pytest.raises(RuntimeError):
+                BackupCatalogHandler.ingest(now=NOW)
+
+        # 已完成的两个窗口计入已导入范围，锁已释放，下次导入从断点继续
+        assert BackupCatalogHandler.get_coverage() == {"start": backfill_start, "end": backfill_start + 2 * window}
+        assert BackupCatalogHandler.ingest(now=NOW) is not None
+        assert BackupCatalogHandler.get_coverage()["end"] == NOW - timedelta(minutes=config["overlap_minutes"])
+        assert calls[4][3] == backfill_start + 2 * window
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import pytest
+from mock.mock import patch
+
+from backend.db_services.mysql.remote_service.handlers import RemoteServiceHandler
+from backend.db_services.mysql.remote_service.metadata import remote_metadata_service
+from backend.tests.mock_data.components.db_remote_service import DRSApiSchemaMock
+
+pytestmark = pytest.mark.django_db
+
+
+class TestRemoteMetadataService:
+    def test_show_databases_with_cache(self, bk_biz_id, dbsingle_cluster, dbha_cluster):
+        cluster_ids = [dbsingle_cluster.id, dbha_cluster.id]
+        remote_metadata_service.invalidate(cluster_ids)
+        drs_mock = DRSApiSchemaMock()
+        handler = RemoteServiceHandler(bk_biz_id=bk_biz_id)
+
+        with patch("backend.db_services.mysql.remote_service.handlers.DRSApi", drs_mock):
+            results = handler.show_databases(cluster_ids=cluster_ids, use_cache=True)
+            # 同一云区域的实例合并为一次请求
+            assert len(drs_mock.calls) == 1
+            assert [result["databases"] for result in results] == [["db1", "db2"], ["db1", "db2"]]
+
+            assert handler.show_databases(cluster_ids=cluster_ids, use_cache=True) == results
+            assert len(drs_mock.calls) == 1
+
+            # 变更库表后缓存失效
+            remote_metadata_service.invalidate([dbha_cluster.id])
+            assert handler.show_databases(cluster_ids=cluster_ids, use_cache=True) == results
+            assert len(drs_mock.calls) == 2 and len(drs_mock.calls[-1]["addresses"]) == 1
+
+    def test_show_tables_concurrently(self, bk_biz_id, dbsingle_cluster, dbha_cluster):
+        cluster_ids = [dbsingle_cluster.id, dbha_cluster.id]
+        remote_metadata_service.invalidate(cluster_ids)
+        drs_mock = DRSApiSchemaMock(delay=0.1)
+        handler = RemoteServiceHandler(bk_biz_id=bk_biz_id)
+        cluster_db_infos = [
+            {"cluster_id": dbsingle_cluster.id, "dbs": ["db1", "db2"]},
+            {"cluster_id": dbha_cluster.id, "dbs": ["db1"]},
+        ]
+
+        config = {**remote_metadata_service.config, "batch_size": 1, "cloud_concurrency": 2}
+        with patch("backend.db_services.mysql.remote_service.handlers.DRSApi", drs_mock), patch.object(
+            remote_metadata_service, "_config", config
+        ):
+            results = handler.show_tables(cluster_db_infos, use_cache=True)
+            assert len(drs_mock.calls) == 2 and drs_mock.max_running == 2
+            assert results == [
+                {"cluster_id": dbsingle_cluster.id, "table_data": {"db1": ["db1_tb"], "db2": ["db2_tb"]}},
+                {"cluster_id": dbha_cluster.id, "table_data": {"db1": ["db1_tb"]}},
+            ]
+
+            # 已缓存的库不再查询，只查询新增的库
+            cluster_db_infos[1]["dbs"] = ["db1", "db3"]
+            results = handler.show_tables(cluster_db_infos, use_cache=True)
+            assert len(drs_mock.calls) == 3 and drs_mock.calls[-1]["cmds"][0].count("table_schema=") == 1
+            assert results[1]["table_data"] == {"db1": ["db1_tb"], "db3": ["db3_tb"]}
@@ -8,11 +8,24 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import time
 from unittest.mock import patch
 
 import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.crypto import get_random_string
 
+from backend.constants import CACHE_CLUSTER_STATS
+from backend.db_meta.enums import ClusterType
+from backend.db_meta.models import AppCache, Cluster, Machine, StorageInstance
+from backend.db_services.dbbase.resources.query import ResourceQueryHelper
+from backend.db_services.dbbase.resources.query_base import ResourceCursor
 from backend.db_services.mysql.resources import views
+from backend.db_services.mysql.resources.tendbsingle.query import ListRetrieveResource
+from backend.tests.conftest import mark_benchmark
+from backend.tests.db_services.mysql.conftest import get_random_ip
 from backend.utils.pytest import AuthorizedAPIRequestFactory
 
 pytestmark = pytest.mark.django_db
@@ -52,3 +65,97 @@ class TestResourceTree:
         response = view(request, bk_biz_id=bk_biz_id)
         data = response.data
         assert data[0]["children"][0]["extra"]["domain"] == dbsingle_cluster.immute_domain
+
+
+class TestListClusterContext:
+    @staticmethod
+    def _create_clusters(bk_biz_id, db_module_id, count):
+        for __ in range(count):
+            cluster_name = get_random_string(8)
+            cluster = Cluster.objects.create(
+                name=cluster_name,
+                cluster_type=ClusterType.TenDBSingle,
+                immute_domain=f"gamedb.{cluster_name}.blueking.db",
+                bk_biz_id=bk_biz_id,
+                db_module_id=db_module_id,
+            )
+            ip = get_random_ip()
+            machine = Machine.objects.create(
+                ip=ip, bk_biz_id=bk_biz_id, db_module_id=db_module_id, bk_host_id=abs(hash(ip)) % 10**9
+            )
+            inst = StorageInstance.objects.create(
+                machine=machine,
+                port=30000,
+                cluster_type=ClusterType.TenDBSingle,
+                bk_biz_id=bk_biz_id,
+                db_module_id=db_module_id,
+            )
+            inst.cluster.add(cluster)
+
+    @patch.object(ResourceQueryHelper, "search_cc_cloud", lambda *args, **kwargs: {})
+    def test_list_clusters_query_count(self, bk_biz_id, dbsingle_module):
+        """集群列表的查询次数和容量缓存读取次数不随集群数量增长"""
+        AppCache.objects.get_or_create(bk_biz_id=bk_biz_id, defaults={"bk_biz_name": "test"})
+
+        query_counts, stats_calls = [], []
+        for cluster_count in [3, 10]:
+            self._create_clusters(bk_biz_id, dbsingle_module.db_module_id, cluster_count)
+            with patch.object(Cluster, "get_cluster_stats", return_value={}) as get_cluster_stats:
+                with CaptureQueriesContext(connection) as ctx:
+                    ListRetrieveResource.list_clusters(bk_biz_id, {}, limit=-1, offset=0)
+            query_counts.append(len(ctx.captured_queries))
+            stats_calls.append(get_cluster_stats.call_count)
+
+        assert query_counts[0] == query_counts[1]
+        assert stats_calls == [1, 1]
+
+    @mark_benchmark
+    @patch.object(ResourceQueryHelper, "search_cc_cloud", lambda *args, **kwargs: {})
+    def test_list_clusters_benchmark(self, bk_biz_id, dbsingle_module):
+        """集群数量增长时的列表耗时，并与改造前每个集群读取一次容量缓存的耗时对比"""
+        AppCache.objects.get_or_create(bk_biz_id=bk_biz_id, defaults={"bk_biz_name": "test"})
+
+        created_count = 0
+        for cluster_count in [50, 500]:
+            self._create_clusters(bk_biz_id, dbsingle_module.db_module_id, cluster_count - created_count)
+            created_count = cluster_count
+            domains = Cluster.objects.filter(bk_biz_id=bk_biz_id).values_list("immute_domain", flat=True)
+            cache.set(
+                f"{CACHE_CLUSTER_STATS}_{bk_biz_id}_{ClusterType.TenDBSingle}",
+                {domain: {"used": 1, "total": 2, "in_use": 50.0} for domain in domains},
+            )
+
+            start = time.perf_counter()
+            resources = ListRetrieveResource.list_clusters(bk_biz_id, {}, limit=-1, offset=0)
+            cost = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for __ in resources.data:
+                Cluster.get_cluster_stats(bk_biz_id, [ClusterType.TenDBSingle])
+            per_cluster_stats_cost = time.perf_counter() - start
+            print(
+                f"clusters -> {resources.count}, list cost -> {cost:.3f}s, "
+                f"per-cluster stats lookups (before) -> {per_cluster_stats_cost:.3f}s"
+            )
+
+    @patch.object(ResourceQueryHelper, "search_cc_cloud", lambda *args, **kwargs: {})
+    @patch.object(Cluster, "get_cluster_stats", lambda *args, **kwargs: {})
+    def test_iter_clusters_by_cursor(self, bk_biz_id, dbsingle_module):
+        """游标分页按 (create_at, id) 遍历全部集群，不重复不遗漏"""
+        AppCache.objects.get_or_create(bk_biz_id=bk_biz_id, defaults={"bk_biz_name": "test"})
+        self._create_clusters(bk_biz_id, dbsingle_module.db_module_id, 12)
+
+        first_page = ListRetrieveResource.list_clusters(bk_biz_id, {"cursor": ResourceCursor()}, limit=5, offset=0)
+        assert first_page.count == 12
+        assert len(first_page.data) == 5
+        assert first_page.next_cursor
+
+        cluster_ids = [
+            cluster["id"]
+            for cluster in ListRetrieveResource.iter_resources(
+                ListRetrieveResource.list_clusters, bk_biz_id, {}, page_size=5
+            )
+        ]
+        assert cluster_ids == list(
+            Cluster.objects.filter(bk_biz_id=bk_biz_id).order_by("create_at", "id").values_list("id", flat=True)
+        )
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import time
+from unittest.mock import patch
+
+from backend.db_services.mysql.sqlparse.digest import SQLDigestEngine
+from backend.db_services.mysql.sqlparse.handlers import SQLParseHandler
+from backend.tests.conftest import mark_benchmark
+from backend.tests.mock_data.db_services.mysql.slow_log import SLOW_LOG_SQLS
+
+
+def _make_engine(settings, **config):
+    settings.SQL_DIGEST = config
+    return SQLDigestEngine()
+
+
+class TestSQLDigestEngine:
+    def test_digest_same_as_handler(self, settings):
+        engine = _make_engine(settings)
+        results = engine.digest_many(SLOW_LOG_SQLS)
+        assert results == [SQLParseHandler().parse_sql(sql) for sql in SLOW_LOG_SQLS]
+        # 空白不同的语句共用缓存
+        assert engine.digest(SLOW_LOG_SQLS[0].replace(" ", " \t ")) == results[0]
+        assert engine.get_stats()["hits"] == 1
+
+    def test_comment_line_break(self, settings):
+        engine = _make_engine(settings)
+        # 换行结束了单行注释，与空格分隔的语句解析结果不同，不能共用缓存
+        sql_with_line_break, sql_with_space = "select a -- x\n, b from t limit 1", "select a -- x , b from t limit 1"
+        assert engine.get_key(sql_with_line_break) != engine.get_key(sql_with_space)
+        assert engine.digest(sql_with_line_break) == SQLParseHandler().parse_sql(sql_with_line_break)
+        assert engine.digest(sql_with_space) == SQLParseHandler().parse_sql(sql_with_space)
+        # 连续的换行与单个换行等价
+        assert engine.get_key("select a -- x\r\n\n  , b from t limit 1") == engine.get_key(sql_with_line_break)
+
+    def test_lru_cache(self, settings):
+        engine = _make_engine(settings, cache_size=5)
+        engine.digest_many(SLOW_LOG_SQLS[:10])
+        assert engine.get_stats() == {"size": 5, "hits": 0, "misses": 10}
+        # 最早的语句已被淘汰，最近的语句命中缓存
+        engine.digest(SLOW_LOG_SQLS[9])
+        engine.digest(SLOW_LOG_SQLS[0])
+        assert engine.get_stats()["hits"] == 1
+
+    def test_process_pool(self, settings):
+        expected = _make_engine(settings).digest_many(SLOW_LOG_SQLS)
+        engine = _make_engine(settings, max_workers=2, pool_threshold=1, pool_chunk_size=7)
+        assert engine.digest_many(SLOW_LOG_SQLS) == expected
+
+    def test_parse_once_per_key(self, settings):
+        # 慢日志中同一指纹的语句只有字面值不同，这里把语料按字面值扩展
+        sqls = [sql.replace("1", str(index)) for index in range(5) for sql in SLOW_LOG_SQLS]
+        engine = _make_engine(settings, cache_size=len(sqls))
+
+        with patch.object(SQLParseHandler, "parse_sql", autospec=True, side_effect=SQLParseHandler.parse_sql) as parse:
+            cold_results = engine.digest_many(sqls)
+            warm_results = engine.digest_many(sqls)
+
+        # 第二次全部命中缓存，每个不同的语句只解析了一次
+        unique_count = len({engine.get_key(sql) for sql in sqls})
+        assert warm_results == cold_results
+        assert parse.call_count == unique_count
+        assert engine.get_stats() == {"size": unique_count, "hits": unique_count, "misses": unique_count}
+
+    @mark_benchmark
+    def test_benchmark(self, settings):
+        """慢日志语料下逐条解析、缓存未命中、缓存命中三种情况的吞吐"""
+        sqls = [sql.replace("1", str(index)) for index in range(50) for sql in SLOW_LOG_SQLS]
+        engine = _make_engine(settings, cache_size=len(sqls))
+
+        begin = time.perf_counter()
+        for sql in sqls:
+            SQLParseHandler().parse_sql(sql)
+        baseline_cost = time.perf_counter() - begin
+        begin = time.perf_counter()
+        engine.digest_many(sqls)
+        cold_cost = time.perf_counter() - begin
+        begin = time.perf_counter()
+        engine.digest_many(sqls)
+        warm_cost = time.perf_counter() - begin
+        print(
+            f"digest {len(sqls)} statements: parse one by one {len(sqls) / baseline_cost:.0f} stmt/s, "
+            f"cache cold {len(sqls) / cold_cost:.0f} stmt/s, cache warm {len(sqls) / max(warm_cost, 1e-6):.0f} stmt/s"
+        )
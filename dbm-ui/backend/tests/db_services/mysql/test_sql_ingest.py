@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import hashlib
+import io
+
+import pytest
+from django.core.files.storage import FileSystemStorage
+
+from backend.db_services.mysql.sql_import.ingest import SQLFileIngestor, SQLStatementScanner
+from backend.tests.mock_data.components.storage import StorageMock
+
+SQL_SCRIPT = """-- 初始化脚本; 注释中的分号不切分
+CREATE TABLE t1 (id int, name varchar(32) COMMENT 'a;b');
+INSERT INTO t1 VALUES (1, 'it''s;'), (2, "x\\";y"), (3, 'z\\\\');
+/* 块注释;
+   跨行 */
+SELECT `a;b` FROM t1 # 行尾注释;
+;
+;;
+DELIMITER $$
+CREATE PROCEDURE p1()
+BEGIN
+    SELECT 1;
+    SELECT 2;
+END $$
+DELIMITER ;
+UPDATE t1 SET name = '中文;' WHERE id = 1"""
+
+
+def scan(text: str, chunk_size: int, preview_statements: int = 100, preview_max_length: int = 1024 * 1024):
+    scanner = SQLStatementScanner(preview_statements, preview_max_length)
+    for index in range(0, len(text), chunk_size):
+        scanner.feed(text[index : index + chunk_size])
+    scanner.finish()
+    return scanner
+
+
+class TestSQLStatementScanner:
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1024])
+    def test_split_statements(self, chunk_size):
+        scanner = scan(SQL_SCRIPT, chunk_size)
+        # 引号、注释中的分号及空语句都不计数，存储过程按 DELIMITER 切分
+        assert scanner.statement_count == 5
+        assert scanner.delimiter == ";"
+        assert scanner.preview == SQL_SCRIPT
+        assert not scanner.preview_truncated
+        procedure = "CREATE PROCEDURE p1()\nBEGIN\n    SELECT 1;\n    SELECT 2;\nEND $$"
+        assert scanner.max_statement_length == len(procedure)
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 1024])
+    def test_preview_statements(self, chunk_size):
+        scanner = scan(SQL_SCRIPT, chunk_size, preview_statements=2)
+        assert scanner.statement_count == 5
+        assert scanner.preview_truncated
+        assert scanner.preview.endswith("(3, 'z\\\\');")
+
+        # 超过预览长度时截止到上一个完整语句
+        scanner = scan(SQL_SCRIPT, chunk_size, preview_max_length=SQL_SCRIPT.index("/*"))
+        assert scanner.preview_truncated
+        assert scanner.preview.endswith("(3, 'z\\\\');")
+
+
+class TestSQLFileIngestor:
+    def test_ingest_to_file_system(self, tmp_path, settings):
+        settings.SQL_INGEST = {"chunk_size": 16, "sample_size": 64}
+        content = SQL_SCRIPT.encode("gbk")
+        ingestor = SQLFileIngestor()
+
+        info = ingestor.ingest(FileSystemStorage(location=str(tmp_path)), "sqlfile/test.sql", io.BytesIO(content))
+
+        assert (tmp_path / info["sql_path"]).read_bytes() == content
+        assert info["md5"] == hashlib.md5(content).hexdigest()
+        assert info["size"] == len(content)
+        assert info["statement_count"] == 5
+        assert info["sql_content"] == content.decode(info["encoding"])
+
+    def test_ingest_large_file(self, settings):
+        settings.SQL_INGEST = {"preview_statements": 10}
+        statement = "INSERT INTO t1 VALUES (1, 'value;with;delimiter'), (2, 'another value');\n"
+        content = statement.encode() * 50000
+        ingestor = SQLFileIngestor()
+
+        # 存储后端没有读取文件时，也能补齐整个文件的摘要
+        info = ingestor.ingest(StorageMock(), "sqlfile/large.sql", io.BytesIO(content))
+
+        assert info["md5"] == hashlib.md5(content).hexdigest()
+        assert info["size"] == len(content)
+        assert info["statement_count"] == 50000
+        assert info["max_statement_length"] == len(statement) - 1
+        assert info["sql_content"] == statement * 9 + statement[:-1]
+        assert info["preview_truncated"]
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from backend import env
+from backend.db_services.taskflow.handlers import TaskFlowHandler
+from backend.db_services.taskflow.node_log import NodeLogStream
+from backend.flow.models import FlowNode, StateType
+from backend.tests.mock_data.db_services import taskflow
+from backend.utils.time import str2datetime
+
+pytestmark = pytest.mark.django_db
+
+FLOW_INDEX = f"{env.DBA_APP_BK_BIZ_ID}_bklog_dbm_log"
+
+
+class FakeNodeLogEndpoint(object):
+    """本地的节点日志查询接口，与 esquery_search 一致，按 sort_list 排序，只支持时间范围过滤和 start/size 分页"""
+
+    def __init__(self, started_at):
+        self.started_at = int(started_at.timestamp()) * 1000
+        self.logs = {"flow": [], "dbactuator": []}
+        self.calls = 0
+
+    def add_log(self, source: str, offset: int, msg: str, levelname: str = "INFO"):
+        """
+        @param offset: 日志时间相对节点开始时间的偏移(毫秒)
+        """
+        index = FLOW_INDEX if source == "flow" else "dbm_dbactuator"
+        timestamp = self.started_at + offset
+        log = json.dumps({"levelname": levelname, "msg": msg})
+        self.logs[source].append(
+            {
+                "_index": index,
+                "_source": {"log": log, "serverIp": "127.0.0.1", "time": timestamp},
+                "sort": [timestamp, len(self.logs[source]), 0],
+            }
+        )
+
+    def esquery_search(self, params, use_admin=False):
+        self.calls += 1
+        source = "flow" if params["indices"].endswith("dbm_log") else "dbactuator"
+        start_time = str2datetime(params["start_time"]).timestamp() * 1000
+        end_time = str2datetime(params["end_time"]).timestamp() * 1000 + 999
+        hits = sorted(
+            [hit for hit in self.logs[source] if start_time <= hit["sort"][0] <= end_time], key=lambda x: x["sort"]
+        )
+        return {"hits": {"hits": hits[params["start"] : params["start"] + params["size"]]}}
+
+
+class StaticNodeLogEndpoint(FakeNodeLogEndpoint):
+    """忽略时间范围和分页参数，每次都返回相同结果的查询接口"""
+
+    def esquery_search(self, params, use_admin=False):
+        self.calls += 1
+        source = "flow" if params["indices"].endswith("dbm_log") else "dbactuator"
+        return {"hits": {"hits": sorted(self.logs[source], key=lambda x: x["sort"])[: params["size"]]}}
+
+
+class FakeRedis(object):
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+@pytest.fixture
+def flow_node():
+    return FlowNode.objects.create(
+        uid=425,
+        root_id=taskflow.ROOT_ID,
+        node_id=taskflow.NODE_ID,
+        version_id=taskflow.VERSION_ID,
+        status=StateType.RUNNING.value,
+        started_at=timezone.now(),
+    )
+
+
+@pytest.fixture
+def endpoint(flow_node):
+    endpoint = FakeNodeLogEndpoint(flow_node.started_at)
+    with patch("backend.db_services.taskflow.node_log.BKLogApi", endpoint), patch(
+        "backend.db_services.taskflow.node_log.RedisConn", FakeRedis()
+    ):
+        yield endpoint
+
+
+class TestNodeLog:
+    def _tail(self, cursor, size=None):
+        handler = TaskFlowHandler(root_id=taskflow.ROOT_ID)
+        return handler.tail_version_logs(taskflow.NODE_ID, taskflow.VERSION_ID, cursor, size)
+
+    def test_tail_running_node(self, flow_node, endpoint):
+        for index in range(5):
+            endpoint.add_log("flow", index * 2, f"flow-{index}")
+            endpoint.add_log("dbactuator", index * 2 + 1, f"actuator-{index}")
+        endpoint.add_log("dbactuator", 100, "debug", levelname="DEBUG")
+
+        # 分页读取时多个数据源合并后整体有序
+        messages, cursor, has_more = [], {}, True
+        while has_more:
+            resp = self._tail(cursor, size=3)
+            messages.extend(log["message"] for log in resp["logs"])
+            cursor, has_more = NodeLogStream.decode_cursor(resp["cursor"]), resp["has_more"]
+        assert messages == [
+            message
+            for index in range(5)
+            for message in [f"[flow]: flow-{index}", f"[dbactuator-127.0.0.1]: actuator-{index}"]
+        ]
+
+        # 轮询时只返回新增的日志
+        assert self._tail(cursor)["logs"] == []
+        endpoint.add_log("flow", 200, "new")
+        logs = self._tail(cursor)["logs"]
+        assert [log["message"] for log in logs] == ["[flow]: new"]
+
+    def test_finished_node_log_cache(self, flow_node, endpoint):
+        for index in range(12000):
+            endpoint.add_log("dbactuator", index, f"actuator-{index}")
+        FlowNode.objects.filter(id=flow_node.id).update(
+            status=StateType.FINISHED.value, updated_at=timezone.now() - timedelta(minutes=5)
+        )
+
+        # 超过 ES 分页上限的日志也能完整返回
+        logs = TaskFlowHandler(root_id=taskflow.ROOT_ID).get_version_logs(taskflow.NODE_ID, taskflow.VERSION_ID)
+        assert len(logs) == 12000
+
+        # 已结束的版本从缓存分页，不再请求日志平台
+        calls = endpoint.calls
+        resp = self._tail({}, size=100)
+        assert resp["finished"] and resp["has_more"] and len(resp["logs"]) == 100
+        resp = self._tail(NodeLogStream.decode_cursor(resp["cursor"]), size=100)
+        assert resp["logs"][0]["message"].endswith("actuator-100")
+        assert endpoint.calls == calls
+
+    def test_endpoint_ignore_paging(self, flow_node):
+        endpoint = StaticNodeLogEndpoint(flow_node.started_at)
+        for index in range(12000):
+            endpoint.add_log("dbactuator", index, f"actuator-{index}")
+        FlowNode.objects.filter(id=flow_node.id).update(
+            status=StateType.FINISHED.value, updated_at=timezone.now() - timedelta(minutes=5)
+        )
+
+        # 接口不按条件翻页时，重复的日志被跳过，拉取能够结束
+        with patch("backend.db_services.taskflow.node_log.BKLogApi", endpoint), patch(
+            "backend.db_services.taskflow.node_log.RedisConn", FakeRedis()
+        ):
+            logs = TaskFlowHandler(root_id=taskflow.ROOT_ID).get_version_logs(taskflow.NODE_ID, taskflow.VERSION_ID)
+        assert len(logs) == 5000
+        assert endpoint.calls < 20
+
+    def test_fetch_all_without_progress(self, flow_node):
+        log_stream = NodeLogStream(flow_node, taskflow.VERSION_ID, formatter=lambda hit: hit)
+        page = ([("flow", (1, 0, 0), {})], {"flow": [1, 0, 0]}, True)
+
+        # 游标没有推进时停止翻页
+        with patch.object(NodeLogStream, "fetch", return_value=page) as fetch:
+            assert len(log_stream.fetch_all()) == 2
+        assert fetch.call_count == 2
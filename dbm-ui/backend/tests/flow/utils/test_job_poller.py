@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import time
+from unittest.mock import patch
+
+import pytest
+
+from backend.flow.utils.job_poller import (
+    JOB_POLLER_LOCK_KEY,
+    JOB_POLLER_PENDING_KEY,
+    JOB_POLLER_REGISTER_KEY,
+    JOB_POLLER_STATUS_KEY,
+    JobStatusPoller,
+    get_ip_log_key,
+)
+
+
+class FakeRedis(object):
+    """本地的 redis，只实现作业轮询用到的命令"""
+
+    def __init__(self):
+        self.values, self.hashes, self.zsets = {}, {}, {}
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return False
+        self.values[key] = str(value)
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def exists(self, key):
+        return int(key in self.values)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def eval(self, script, numkeys, key, token):
+        # 只支持 JOB_POLLER_UNLOCK_SCRIPT
+        if self.values.get(key) == token:
+            self.values.pop(key)
+            return 1
+        return 0
+
+    def zadd(self, key, mapping, nx=False):
+        zset = self.zsets.setdefault(key, {})
+        for member, score in mapping.items():
+            if not (nx and str(member) in zset):
+                zset[str(member)] = score
+
+    def zrangebyscore(self, key, min_score, max_score, start=0, num=None):
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])
+        members = [member for member, score in members if min_score <= score <= max_score]
+        return members[start : start + num] if num else members[start:]
+
+    def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(str(member), None)
+
+    def hsetnx(self, key, field, value):
+        self.hashes.setdefault(key, {}).setdefault(str(field), str(value))
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(str(field)) for field in fields]
+
+    def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(str(field), None)
+
+
+def _request_in_order(func, params_list, get_data, in_order=False, use_async=False):
+    return [get_data((params, func(**params))) for params in params_list]
+
+
+@pytest.fixture
+def redis():
+    redis = FakeRedis()
+    with patch("backend.flow.utils.job_poller.RedisConn", redis), patch(
+        "backend.flow.utils.job_poller.request_multi_thread", _request_in_order
+    ):
+        yield redis
+
+
+def _job_status(finished: bool):
+    return {"result": True, "data": {"finished": finished, "job_instance": {"status": 3 if finished else 2}}}
+
+
+class TestJobStatusPoller:
+    def test_poll_once(self, redis):
+        poller = JobStatusPoller()
+        for job_instance_id in [1, 2]:
+            poller.register(job_instance_id)
+
+        with patch.object(JobStatusPoller, "query_status", side_effect=lambda job_id: _job_status(job_id == 1)):
+            assert poller.poll_once() == 2
+
+        # 结束的作业移出轮询队列，未结束的作业按退避间隔重新排队
+        assert list(redis.zsets[JOB_POLLER_PENDING_KEY]) == ["2"]
+        assert list(redis.hashes[JOB_POLLER_REGISTER_KEY]) == ["2"]
+        assert redis.get(JOB_POLLER_STATUS_KEY.format(job_instance_id=1))
+        assert redis.zsets[JOB_POLLER_PENDING_KEY]["2"] > time.time()
+
+    def test_drop_expired_job(self, redis):
+        poller = JobStatusPoller()
+        poller.register(1)
+        redis.hashes[JOB_POLLER_REGISTER_KEY]["1"] = str(time.time() - poller.config["max_pending_time"] - 1)
+
+        with patch.object(JobStatusPoller, "query_status", return_value={"result": False, "message": "not found"}):
+            poller.poll_once()
+
+        assert redis.zsets[JOB_POLLER_PENDING_KEY] == {}
+        assert redis.get(JOB_POLLER_STATUS_KEY.format(job_instance_id=1)) is None
+
+    def test_run_only_releases_own_lock(self, redis):
+        poller = JobStatusPoller()
+
+        def lock_taken_over():
+            # 模拟锁过期后被其他进程获取
+            redis.values[JOB_POLLER_LOCK_KEY] = "other"
+            return 0
+
+        with patch.object(JobStatusPoller, "poll_once", side_effect=lock_taken_over):
+            poller.run()
+        assert redis.get(JOB_POLLER_LOCK_KEY) == "other"
+
+        redis.delete(JOB_POLLER_LOCK_KEY)
+        with patch.object(JobStatusPoller, "poll_once", return_value=0):
+            poller.run()
+        assert redis.get(JOB_POLLER_LOCK_KEY) is None
+
+    def test_batch_get_ip_logs(self):
+        resp = {
+            "result": True,
+            "data": {
+                "script_task_logs": [
+                    {"bk_cloud_id": 0, "ip": "127.0.0.1", "log_content": "cloud 0"},
+                    {"bk_cloud_id": 1, "ip": "127.0.0.1", "log_content": "cloud 1"},
+                ]
+            },
+        }
+        ip_dicts = [{"bk_cloud_id": 0, "ip": "127.0.0.1"}, {"bk_cloud_id": 1, "ip": "127.0.0.1"}]
+        with patch("backend.flow.utils.job_poller.JobApi.batch_get_job_instance_ip_log", return_value=resp):
+            ip_logs = JobStatusPoller.batch_get_ip_logs(1, 1, ip_dicts)
+
+        assert ip_logs == {get_ip_log_key(0, "127.0.0.1"): "cloud 0", get_ip_log_key(1, "127.0.0.1"): "cloud 1"}
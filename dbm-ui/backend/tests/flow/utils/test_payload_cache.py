@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import base64
+import fnmatch
+import time
+from unittest.mock import patch
+
+import pytest
+
+from backend.flow.utils.base.payload_cache import FLOW_PAYLOAD_CACHE_KEY, FlowPayloadCache, PayloadCacheKind
+from backend.flow.utils.base.payload_handler import PayloadHandler
+from backend.ticket.constants import TicketType
+
+ROOT_ID = "root"
+
+
+class FakeHashRedis(object):
+    """本地的 redis hash，只实现流程缓存用到的命令"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def expire(self, key, ttl):
+        pass
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hscan_iter(self, key, match):
+        return [(field, value) for field, value in self.hashes.get(key, {}).items() if fnmatch.fnmatch(field, match)]
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+class FakePrivManager(object):
+    def __init__(self):
+        self.calls = 0
+        self.password_version = 0
+
+    def get_password_version(self):
+        return self.password_version
+
+    def get_password(self, params):
+        self.calls += 1
+        password = base64.b64encode(b"password").decode()
+        return {"items": [{**user, "password": password} for user in params["users"]]}
+
+
+@pytest.fixture
+def priv_manager():
+    cache, priv_manager, redis = FlowPayloadCache(), FakePrivManager(), FakeHashRedis()
+    with patch("backend.flow.utils.base.payload_cache.RedisConn", redis), patch(
+        "backend.flow.utils.base.payload_cache.DBPrivManagerApi", priv_manager
+    ), patch("backend.flow.utils.base.payload_handler.DBPrivManagerApi", priv_manager), patch(
+        "backend.flow.utils.base.payload_handler.flow_payload_cache", cache
+    ):
+        priv_manager.redis, priv_manager.cache = redis, cache
+        yield priv_manager
+
+
+class TestFlowPayloadCache:
+    def test_prefetch_accounts(self, priv_manager):
+        priv_manager.cache.prefetch(ROOT_ID, {"ticket_type": TicketType.TENDBCLUSTER_APPLY})
+        assert priv_manager.calls == 1
+
+        ticket_data = {"ticket_type": TicketType.TENDBCLUSTER_APPLY, "job_root_id": ROOT_ID}
+        for __ in range(10):
+            handler = PayloadHandler(bk_cloud_id=0, ticket_data=ticket_data, cluster={})
+            PayloadHandler.get_tbinlogdumper_account(handler.root_id)
+            assert handler.account["repl_pwd"] == "password"
+            assert handler.proxy_account["proxy_admin_pwd"] == "password"
+            assert handler.get_partition_yw_account()["pwd"] == "password"
+        assert priv_manager.calls == 1
+
+        # 缓存中不保存明文密码
+        cached = priv_manager.redis.hashes[FLOW_PAYLOAD_CACHE_KEY.format(root_id=ROOT_ID)]
+        assert all(base64.b64encode(b"password").decode() not in value for value in cached.values())
+
+    def test_invalidate(self, priv_manager):
+        params = {"conf_file": "MySQL-5.7"}
+        priv_manager.cache.get_or_fetch(ROOT_ID, PayloadCacheKind.CONFIG, params, lambda x: {"content": {}})
+        PayloadHandler.get_proxy_account(ROOT_ID)
+        PayloadHandler.get_proxy_account(ROOT_ID)
+        assert priv_manager.calls == 1
+
+        # 密码轮换只清理账号，配置仍然有效
+        priv_manager.cache.invalidate(ROOT_ID, PayloadCacheKind.ACCOUNT)
+        PayloadHandler.get_proxy_account(ROOT_ID)
+        assert priv_manager.calls == 2
+        assert priv_manager.cache.get(ROOT_ID, PayloadCacheKind.CONFIG, params) == {"content": {}}
+
+        priv_manager.cache.invalidate(ROOT_ID)
+        assert priv_manager.cache.get(ROOT_ID, PayloadCacheKind.CONFIG, params) is None
+
+    def test_password_rotation(self, priv_manager):
+        other_root_id = "other"
+        for root_id in [ROOT_ID, other_root_id]:
+            PayloadHandler.get_proxy_account(root_id)
+            PayloadHandler.get_proxy_account(root_id)
+        assert priv_manager.calls == 2
+
+        # 通过密码服务修改任意密码后，所有流程的账号缓存失效
+        priv_manager.password_version += 1
+        for root_id in [ROOT_ID, other_root_id]:
+            PayloadHandler.get_proxy_account(root_id)
+            PayloadHandler.get_proxy_account(root_id)
+        assert priv_manager.calls == 4
+
+    def test_account_ttl(self, priv_manager):
+        params = {"conf_file": "MySQL-5.7"}
+        priv_manager.cache.get_or_fetch(ROOT_ID, PayloadCacheKind.CONFIG, params, lambda x: {"content": {}})
+        PayloadHandler.get_proxy_account(ROOT_ID)
+        assert priv_manager.calls == 1
+
+        # 超过账号有效时间后重新请求密码服务，配置不受影响
+        account_ttl = priv_manager.cache.config["account_ttl"]
+        with patch("backend.flow.utils.base.payload_cache.time.time", return_value=time.time() + account_ttl):
+            PayloadHandler.get_proxy_account(ROOT_ID)
+            assert priv_manager.calls == 2
+            assert priv_manager.cache.get(ROOT_ID, PayloadCacheKind.CONFIG, params) == {"content": {}}
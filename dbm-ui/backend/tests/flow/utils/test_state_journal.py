@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import patch
+
+import pytest
+
+from backend.flow.consts import StateType
+from backend.flow.utils.state_journal import EMPTY_VERSION, FlowStateJournal, get_subprocess_ancestors
+
+ROOT_ID = "root"
+
+
+class FakeStreamRedis(object):
+    """本地的 redis stream，只实现变更日志用到的命令"""
+
+    def __init__(self):
+        self.streams = {}
+        self.seq = 0
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def expire(self, key, ttl):
+        pass
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        self.seq += 1
+        stream = self.streams.setdefault(key, [])
+        stream.append((f"1000-{self.seq}", fields))
+        del stream[: max(len(stream) - maxlen, 0)]
+
+    @staticmethod
+    def _parse(version):
+        return tuple(int(part) for part in version.split("-"))
+
+    def xrange(self, key, min="-", max="+", count=None):
+        entries = [
+            entry
+            for entry in self.streams.get(key, [])
+            if (min == "-" or self._parse(entry[0]) >= self._parse(min))
+            and (max == "+" or self._parse(entry[0]) <= self._parse(max))
+        ]
+        return entries[:count] if count else entries
+
+    def xrevrange(self, key, count=None):
+        return list(reversed(self.streams.get(key, [])))[:count]
+
+    def xlen(self, key):
+        return len(self.streams.get(key, []))
+
+    def xread(self, streams, block=None):
+        key, since = list(streams.items())[0]
+        entries = self.xrange(key, min=FlowStateJournal.next_version(since))
+        return [[key, entries]] if entries else None
+
+
+@pytest.fixture
+def journal(settings):
+    settings.FLOW_STATE_JOURNAL = {"max_len": 5}
+    journal = FlowStateJournal()
+    with patch("backend.flow.utils.state_journal.RedisConn", FakeStreamRedis()):
+        yield journal
+
+
+class TestFlowStateJournal:
+    def test_get_changes(self, journal):
+        assert journal.get_changes(ROOT_ID, EMPTY_VERSION) == {"version": EMPTY_VERSION, "full": False, "changes": []}
+
+        journal.record(ROOT_ID, [{"node_id": "n1", "status": StateType.RUNNING, "started_at": 1}])
+        version = journal.get_version(ROOT_ID)
+        journal.record(ROOT_ID, [{"node_id": "n2", "status": StateType.RUNNING}])
+        journal.record(ROOT_ID, [{"node_id": "n1", "status": StateType.FINISHED}])
+
+        # 同一节点的多次变更合并为一条，按最后一次变更的顺序返回
+        result = journal.get_changes(ROOT_ID, EMPTY_VERSION, wait=1)
+        assert result["version"] == journal.get_version(ROOT_ID)
+        assert result["changes"] == [
+            {"node_id": "n2", "status": StateType.RUNNING},
+            {"node_id": "n1", "status": StateType.FINISHED, "started_at": 1},
+        ]
+        # 只返回版本之后的变更
+        assert [change["node_id"] for change in journal.get_changes(ROOT_ID, version)["changes"]] == ["n2", "n1"]
+        assert journal.get_changes(ROOT_ID, result["version"], wait=1)["changes"] == []
+
+    def test_expired_version(self, journal):
+        journal.record(ROOT_ID, [{"node_id": "n0", "status": StateType.RUNNING}])
+        version = journal.get_version(ROOT_ID)
+        journal.record(ROOT_ID, [{"node_id": f"n{index}", "status": StateType.RUNNING} for index in range(1, 6)])
+
+        # 版本对应的变更已被淘汰，需要全量刷新
+        assert journal.get_changes(ROOT_ID, version)["full"]
+        assert journal.get_changes(ROOT_ID, EMPTY_VERSION)["full"]
+
+    def test_record_subprocess_state(self, journal):
+        tree = {"activities": {"sub": {"pipeline": {"activities": {"act": {}}}}, "other": {}}}
+        assert get_subprocess_ancestors(tree, "act") == ["sub"]
+        assert get_subprocess_ancestors(tree, "other") == []
+
+        journal.record_node_state(ROOT_ID, tree, {"node_id": "act", "status": StateType.FAILED})
+        changes = journal.get_changes(ROOT_ID, EMPTY_VERSION)["changes"]
+        assert changes == [
+            {"node_id": "act", "status": StateType.FAILED},
+            {"node_id": "sub", "status": StateType.FAILED},
+        ]
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import MagicMock
+
+from iam import Resource
+
+from backend.env import BK_IAM_SYSTEM_ID
+from backend.iam_app.dataclass.actions import ActionEnum
+from backend.iam_app.handlers.policy_cache import IAMPolicyCache
+
+USERNAME = "policy_cache_tester"
+
+
+class LocalIAM(object):
+    @staticmethod
+    def _eval_expr(expr, obj_set):
+        return expr.eval(obj_set)
+
+
+def _cluster_resources(count):
+    return [
+        [Resource(BK_IAM_SYSTEM_ID, "mysql", str(index), {"_bk_iam_path_": f"/biz,{index % 2}/"})]
+        for index in range(count)
+    ]
+
+
+class TestIAMPolicyCache:
+    def test_get_policies_with_cache(self):
+        IAMPolicyCache.invalidate(USERNAME)
+        actions = [ActionEnum.MYSQL_VIEW, ActionEnum.MYSQL_ENABLE_DISABLE]
+        condition = {"op": "any", "field": "mysql.id", "value": []}
+        query_policies = MagicMock(return_value=[{"action": {"id": ActionEnum.MYSQL_VIEW.id}, "condition": condition}])
+
+        for __ in range(3):
+            policies = IAMPolicyCache.get_policies(USERNAME, actions, query_policies)
+        assert query_policies.call_count == 1
+        assert policies[ActionEnum.MYSQL_ENABLE_DISABLE.id] is None
+
+        # 授权后策略缓存失效
+        IAMPolicyCache.invalidate(USERNAME)
+        IAMPolicyCache.get_policies(USERNAME, actions, query_policies)
+        assert query_policies.call_count == 2
+
+    def test_eval_policies(self):
+        resources_list = _cluster_resources(500)
+        policies = {
+            # 拓扑授权，可以在本地计算
+            "mysql_view": {"op": "starts_with", "field": "mysql._bk_iam_path_", "value": "/biz,1/"},
+            # 依赖本地资源没有的属性，需要回退到权限中心
+            "mysql_destroy": {"op": "eq", "field": "mysql.creator", "value": USERNAME},
+            # 没有策略
+            "mysql_enable_disable": None,
+        }
+        permissions = IAMPolicyCache.eval_policies(LocalIAM(), policies, resources_list)
+
+        assert len(permissions) == 500
+        assert permissions["1"] == {"mysql_view": True, "mysql_enable_disable": False}
+        assert permissions["2"] == {"mysql_view": False, "mysql_enable_disable": False}
@@ -8,6 +8,11 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import json
+from typing import Dict, List
+
+from backend.components.bklog.handler import BKLOG_MAX_RESULT_WINDOW
+from backend.utils.time import str2datetime
 
 LOG_DATA = {
     "result": True,
@@ -116,3 +121,29 @@ class BKLogApiMock(object):
     def list_collectors(cls, *args, **kwargs):
         data = BK_LOG_LIST_COLLECTOR_DATA
         return data["data"]
+
+
+class FakeBKLogEndpoint(object):
+    """
+    本地的日志平台查询接口，按时间范围过滤并按 start/size 分页，模拟 ES 的 max_result_window 限制
+    """
+
+    def __init__(self):
+        self.logs: List[Dict] = []
+        self.calls = 0
+
+    def add_log(self, timestamp, log: Dict):
+        self.logs.append({"timestamp": timestamp, "log": log})
+
+    def esquery_search(self, params, use_admin=False):
+        self.calls += 1
+        assert params["start"] + params["size"] <= BKLOG_MAX_RESULT_WINDOW
+        start_time, end_time = str2datetime(params["start_time"]), str2datetime(params["end_time"])
+        hits = sorted(
+            [item for item in self.logs if start_time <= item["timestamp"] <= end_time], key=lambda x: x["timestamp"]
+        )
+        total = {"value": min(len(hits), BKLOG_MAX_RESULT_WINDOW), "relation": "eq"}
+        if len(hits) > BKLOG_MAX_RESULT_WINDOW:
+            total["relation"] = "gte"
+        page = hits[params["start"] : params["start"] + params["size"]]
+        return {"hits": {"total": total, "hits": [{"_source": {"log": json.dumps(item["log"])}} for item in page]}}
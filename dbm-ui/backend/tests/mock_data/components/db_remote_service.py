@@ -8,6 +8,9 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import re
+import threading
+import time
 
 
 class DbRemoteServiceApiMock(object):
@@ -43,3 +46,41 @@ class DbRemoteServiceApiMock(object):
                 }
             )
         return results
+
+
+class DRSApiSchemaMock(object):
+    """按实例返回库表信息的 DRS mock，记录每次请求的参数"""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_table_data(cmd: str):
+        if cmd == "show databases":
+            return [{"Database": "db1"}, {"Database": "db2"}, {"Database": "mysql"}]
+        return [{"table_schema": db, "table_name": f"{db}_tb"} for db in re.findall(r"table_schema='(\w+)'", cmd)]
+
+    def rpc(self, params):
+        with self._lock:
+            self.calls.append(params)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+
+        cmd = params["cmds"][0]
+        return [
+            {
+                "address": address,
+                "cmd_results": [
+                    {"cmd": cmd, "table_data": self._get_table_data(cmd), "rows_affected": 0, "error_msg": ""}
+                ],
+                "error_msg": "",
+            }
+            for address in params["addresses"]
+        ]
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+# 慢查询日志中常见的语句形态，用于 SQL 指纹计算的正确性校验和性能基准
+SLOW_LOG_SQLS = [
+    "SELECT * FROM t_order WHERE user_id = 10086 AND status = 'PAID' ORDER BY create_time DESC LIMIT 20;",
+    "select id, name, age from db_user.tb_user where id in (1, 2, 3, 4, 5);",
+    "SELECT COUNT(*) FROM tb_log WHERE create_time >= '2024-05-01 00:00:00' AND create_time < '2024-05-02 00:00:00';",
+    "UPDATE tb_account SET balance = balance - 100.50, update_time = NOW() WHERE account_id = 998877;",
+    "DELETE FROM tb_session WHERE expire_at < 1716192000;",
+    "INSERT INTO tb_event (event_id, event_type, payload) VALUES (123, 'login', '{\"ip\": \"127.0.0.1\"}');",
+    "INSERT INTO tb_stat (k, v) VALUES ('a', 1), ('b', 2), ('c', 3) ON DUPLICATE KEY UPDATE v = VALUES(v);",
+    "REPLACE INTO tb_cache (cache_key, cache_value) VALUES ('user:1', 'xxx');",
+    "select a.id, b.name from tb_a a join tb_b b on a.bid = b.id where a.type = 3 and b.deleted = 0;",
+    "SELECT o.id FROM db_shop.t_order o LEFT JOIN db_shop.t_item i ON o.id = i.order_id WHERE i.sku = 'SKU-1';",
+    "select * from tb_goods where name like '%phone%' and price between 1000 and 5000 limit 100;",
+    "SELECT user_id, SUM(amount) FROM tb_pay WHERE pay_date = '2024-05-20' GROUP BY user_id HAVING SUM(amount) > 10;",
+    "select * from (select id, max(score) s from tb_score group by id) t where t.s > 90;",
+    "SELECT id FROM tb_task WHERE status = 1 AND retry < 3 ORDER BY id LIMIT 500 FOR UPDATE;",
+    "update tb_task set status = 2, worker = 'host-01' where id = 778899 and status = 1;",
+    "SELECT * FROM tb_config WHERE `key` = 'switch.enable' LIMIT 1;",
+    "select count(distinct uid) from tb_visit where dt = 20240520 and channel = 'app';",
+    "ALTER TABLE tb_user ADD COLUMN nickname VARCHAR(64) NOT NULL DEFAULT '' AFTER name;",
+    "CREATE TABLE IF NOT EXISTS tb_tmp_20240520 (id INT PRIMARY KEY, v VARCHAR(32));",
+    "DROP TABLE IF EXISTS tb_tmp_20240519;",
+    "TRUNCATE TABLE tb_tmp_cache;",
+    "select * from tb_user where id = 1 union all select * from tb_user_his where id = 1;",
+    "SELECT id, name FROM tb_product WHERE category_id IN (SELECT id FROM tb_category WHERE parent_id = 12);",
+    "insert into tb_order_his select * from tb_order where create_time < '2024-01-01';",
+    "SELECT /* from app server */ id FROM tb_notice WHERE receiver = 'admin' AND is_read = 0;",
+    "select sleep(5);",
+    "SELECT * FROM tb_large WHERE c1 = 1.5e3 OR c2 = -42 OR c3 = 0x1F;",
+    "select id from tb_msg where conv_id = 'c_001' and seq > 1024 order by seq asc limit 50;",
+    "UPDATE tb_inventory i JOIN tb_order o ON i.sku = o.sku SET i.locked = i.locked + o.num WHERE o.id = 9;",
+    "DELETE t1 FROM tb_dup t1 JOIN tb_dup t2 ON t1.k = t2.k AND t1.id > t2.id;",
+]
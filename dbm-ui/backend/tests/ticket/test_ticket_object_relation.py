@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import importlib
+import os
+import time
+
+import pytest
+from django.apps import apps
+
+from backend.tests.conftest import mark_benchmark
+from backend.ticket.constants import TicketObjectType, TicketStatus, TicketType
+from backend.ticket.exceptions import TicketDuplicationException
+from backend.ticket.filters import TicketListFilter
+from backend.ticket.handler import TicketHandler
+from backend.ticket.models import Ticket, TicketObjectRelation
+from backend.ticket.views import TicketViewSet
+
+pytestmark = pytest.mark.django_db
+
+ACTIVE_TICKET_COUNT = 50
+BENCHMARK_TICKET_COUNT = int(os.environ.get("BENCHMARK_TICKET_COUNT", 1000000))
+BENCHMARK_BATCH_SIZE = 10000
+
+
+def _cluster_details(cluster_ids):
+    return {
+        "cluster_ids": cluster_ids,
+        "clusters": {str(cluster_id): {"immute_domain": f"db{cluster_id}.test.db"} for cluster_id in cluster_ids},
+    }
+
+
+def _create_tickets(count, ticket_type=TicketType.MYSQL_HA_FULL_BACKUP, status=TicketStatus.RUNNING):
+    tickets = Ticket.objects.bulk_create(
+        [
+            Ticket(
+                bk_biz_id=1,
+                creator="admin",
+                ticket_type=ticket_type,
+                status=status,
+                remark="",
+                details=_cluster_details([index, index + 1]),
+            )
+            for index in range(count)
+        ],
+        batch_size=2000,
+    )
+    TicketObjectRelation.sync_ticket_objects(Ticket.objects.all().only("id", "details"))
+    return tickets
+
+
+class TestTicketObjectRelation:
+    def test_parse_ticket_objects(self):
+        details = {
+            **_cluster_details([1, 2, 1]),
+            "infos": [{"instance_id": "3"}, {"instance_id": "invalid"}],
+            "instances": {"3": {"instance": "127.0.0.1:20000"}},
+        }
+        ticket = Ticket.objects.create(bk_biz_id=1, remark="", details=details)
+        TicketObjectRelation.sync_ticket_objects([ticket])
+
+        relations = TicketObjectRelation.objects.filter(ticket=ticket).order_by("id")
+        assert list(relations.values_list("object_type", "object_id", "object_name")) == [
+            (TicketObjectType.CLUSTER, 1, "db1.test.db"),
+            (TicketObjectType.CLUSTER, 2, "db2.test.db"),
+            (TicketObjectType.INSTANCE, 3, "127.0.0.1:20000"),
+        ]
+
+        # 存在实例时优先展示实例
+        ticket_data = TicketHandler.add_related_object([{"id": ticket.id}])
+        assert ticket_data[0]["related_object"]["objects"] == ["127.0.0.1:20000"]
+
+    def test_related_object_and_cluster_filter(self, django_assert_num_queries):
+        _create_tickets(100)
+        ticket_ids = list(Ticket.objects.values_list("id", flat=True)[:10])
+
+        with django_assert_num_queries(1):
+            ticket_data = TicketHandler.add_related_object([{"id": ticket_id} for ticket_id in ticket_ids])
+        for item in ticket_data:
+            assert len(item["related_object"]["objects"]) == 2
+
+        # 集群 10 同时被第 9、10 个单据操作
+        queryset = TicketListFilter(data={"cluster_id": 10}, queryset=Ticket.objects.all()).qs
+        assert sorted(ticket.details["cluster_ids"] for ticket in queryset) == [[9, 10], [10, 11]]
+
+    def test_verify_duplicate_ticket(self, django_assert_max_num_queries):
+        _create_tickets(ACTIVE_TICKET_COUNT)
+        Ticket.objects.create(
+            bk_biz_id=1,
+            creator="admin",
+            ticket_type=TicketType.MYSQL_HA_FULL_BACKUP,
+            status=TicketStatus.SUCCEEDED,
+            remark="",
+            details=_cluster_details([ACTIVE_TICKET_COUNT + 10]),
+        )
+        view = TicketViewSet()
+        view.action = "create"
+
+        # 查询次数与运行中的单据数量无关
+        with django_assert_max_num_queries(1):
+            view._verify_duplicate_ticket(
+                TicketType.MYSQL_HA_FULL_BACKUP, {"cluster_ids": [ACTIVE_TICKET_COUNT + 10]}, "admin"
+            )
+
+        # 集群 5 同时被第 5、6 个单据操作，提示最新的单据
+        with pytest.raises(TicketDuplicationException) as err:
+            view._verify_duplicate_ticket(TicketType.MYSQL_HA_FULL_BACKUP, {"cluster_ids": [5]}, "admin")
+        latest_ticket = Ticket.objects.filter(related_objects__object_id=5).first()
+        assert err.value.data == {"duplicate_cluster_ids": [5], "duplicate_ticket_id": latest_ticket.id}
+
+    def test_related_object_fallback(self, django_assert_num_queries):
+        # 已结束的历史单据没有关联对象时，从 details 中解析
+        ticket = Ticket.objects.create(
+            bk_biz_id=1, status=TicketStatus.SUCCEEDED, remark="", details=_cluster_details([1, 2])
+        )
+        TicketObjectRelation.objects.filter(ticket=ticket).delete()
+
+        with django_assert_num_queries(2):
+            ticket_data = TicketHandler.add_related_object([{"id": ticket.id}])
+        assert ticket_data[0]["related_object"]["objects"] == ["db1.test.db", "db2.test.db"]
+
+    def test_backfill_ticket_objects(self):
+        # 模拟升级前创建的单据，没有关联对象
+        running_ticket, pending_ticket, succeeded_ticket = [
+            Ticket.objects.create(bk_biz_id=1, status=status, remark="", details=_cluster_details([index]))
+            for index, status in enumerate([TicketStatus.RUNNING, TicketStatus.PENDING, TicketStatus.SUCCEEDED])
+        ]
+        TicketObjectRelation.objects.all().delete()
+        migration = importlib.import_module("backend.ticket.migrations.0012_backfill_ticketobjectrelation")
+        migration.BACKFILL_BATCH_SIZE = 2
+        migration.backfill_ticket_objects(apps, None)
+
+        relations = TicketObjectRelation.objects.order_by("ticket_id").values_list("ticket_id", "object_id")
+        assert list(relations) == [(running_ticket.id, 0), (pending_ticket.id, 1), (succeeded_ticket.id, 2)]
+
+        # 回填后，运行中的单据可以参与重复提交校验
+        view = TicketViewSet()
+        view.action = "create"
+        running_ticket.creator = "admin"
+        running_ticket.ticket_type = TicketType.MYSQL_HA_FULL_BACKUP
+        running_ticket.save(update_fields=["creator", "ticket_type"])
+        with pytest.raises(TicketDuplicationException):
+            view._verify_duplicate_ticket(TicketType.MYSQL_HA_FULL_BACKUP, {"cluster_ids": [0]}, "admin")
+
+    @mark_benchmark
+    def test_benchmark(self):
+        """
+        单据量级下的重复提交校验与列表关联对象耗时，单据数量通过 BENCHMARK_TICKET_COUNT 调整
+        """
+        begin, last_id = time.time(), 0
+        for offset in range(0, BENCHMARK_TICKET_COUNT, BENCHMARK_BATCH_SIZE):
+            Ticket.objects.bulk_create(
+                [
+                    Ticket(
+                        bk_biz_id=1,
+                        creator="admin",
+                        ticket_type=TicketType.MYSQL_HA_FULL_BACKUP,
+                        status=TicketStatus.RUNNING,
+                        remark="",
+                        details=_cluster_details([index, index + 1]),
+                    )
+                    for index in range(offset, min(offset + BENCHMARK_BATCH_SIZE, BENCHMARK_TICKET_COUNT))
+                ]
+            )
+            # bulk_create 在 MySQL 下不回填主键，按主键范围取回本批单据
+            tickets = list(Ticket.objects.filter(id__gt=last_id).order_by("id").only("id", "details"))
+            TicketObjectRelation.sync_ticket_objects(tickets)
+            last_id = tickets[-1].id
+        print(f"prepare {BENCHMARK_TICKET_COUNT} tickets cost {time.time() - begin:.3f}s")
+
+        view = TicketViewSet()
+        view.action = "create"
+        begin = time.time()
+        view._verify_duplicate_ticket(
+            TicketType.MYSQL_HA_FULL_BACKUP, {"cluster_ids": [BENCHMARK_TICKET_COUNT + 10]}, "admin"
+        )
+        print(f"verify duplicate ticket in {BENCHMARK_TICKET_COUNT} tickets cost {time.time() - begin:.3f}s")
+
+        ticket_ids = list(Ticket.objects.order_by("-id").values_list("id", flat=True)[:50])
+        begin = time.time()
+        TicketHandler.add_related_object([{"id": ticket_id} for ticket_id in ticket_ids])
+        print(f"add related object for {len(ticket_ids)} tickets cost {time.time() - begin:.3f}s")
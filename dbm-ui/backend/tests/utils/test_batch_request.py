@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from backend.utils.batch_request import batch_request, iter_batch_request, request_multi_thread
+
+MOCK_DATA = list(range(1234))
+
+
+def mock_search_func(params, **kwargs):
+    page = params["page"]
+    return {"count": len(MOCK_DATA), "info": MOCK_DATA[page["start"] : page["start"] + page["limit"]]}
+
+
+class TestAsyncBatchRequest:
+    def test_batch_request_use_async(self):
+        assert batch_request(mock_search_func, {}, limit=100, use_async=True) == MOCK_DATA
+
+    def test_batch_request_use_async_without_count(self):
+        assert batch_request(mock_search_func, {}, limit=100, get_count=None, use_async=True) == MOCK_DATA
+
+    def test_iter_batch_request(self):
+        pages = list(iter_batch_request(mock_search_func, {}, limit=500))
+        assert [len(page) for page in pages] == [500, 500, 234]
+
+        # 提前终止迭代不影响后续请求
+        pages = iter_batch_request(mock_search_func, {}, limit=10)
+        assert next(pages) == MOCK_DATA[:10]
+        pages.close()
+        assert batch_request(mock_search_func, {}, limit=10, use_async=True) == MOCK_DATA
+
+    def test_request_multi_thread_use_async(self):
+        params_list = [{"params": {"start": index}} for index in range(5)]
+        result = request_multi_thread(
+            lambda params: params["start"], params_list, get_data=lambda x: x[1], in_order=True, use_async=True
+        )
+        assert result == list(range(5))
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import codecs
+import csv
+from io import BytesIO, StringIO
+
+from backend.utils.excel import ExcelHandler
+
+HEADERS = [{"id": "ip", "name": "IP"}, {"id": "role", "name": "角色"}, {"id": "domain", "name": "域名"}]
+
+
+def iter_rows(count):
+    for index in range(count):
+        # 缺失的列填充为空
+        row = {"ip": f"127.0.0.{index % 255}", "role": "backend_master\nbackend_slave"}
+        if index % 2:
+            row["domain"] = f"gamedb.{index}.blueking.db"
+        yield row
+
+
+class TestStreamExport:
+    def test_iter_xlsx(self):
+        content = b"".join(ExcelHandler.iter_xlsx(iter_rows(1000), HEADERS))
+        data = ExcelHandler.paser(BytesIO(content))
+
+        assert len(data) == 1000
+        assert data[0] == {"IP": "127.0.0.0", "角色": "backend_master\nbackend_slave", "域名": "None"}
+        assert data[1]["域名"] == "gamedb.1.blueking.db"
+
+    def test_iter_csv(self):
+        content = b"".join(ExcelHandler.iter_csv(iter_rows(10), HEADERS))
+
+        assert content.startswith(codecs.BOM_UTF8)
+        rows = list(csv.reader(StringIO(content[len(codecs.BOM_UTF8) :].decode("utf-8"))))
+        assert rows[0] == ["IP", "角色", "域名"]
+        assert len(rows) == 11
+        assert rows[2] == ["127.0.0.1", "backend_master\nbackend_slave", "gamedb.1.blueking.db"]
+
+    def test_estimate_column_widths(self):
+        widths = ExcelHandler.estimate_column_widths(HEADERS, list(iter_rows(10)))
+        assert widths[1] == len("backend_master") * 1.3
+        assert widths[2] == len("gamedb.1.blueking.db") * 1.3
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from backend.utils.import_time import parse_import_time, summarize_import_time
+
+IMPORT_TIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     yaml.reader
+import time:        50 |        150 |   yaml
+import time:        30 |        180 | backend.db_meta.models
+import time:        20 |         20 |   backend.utils.time
+import time:        40 |         60 | backend.db_services
+import time:        10 |         10 | json
+"""
+
+
+def test_summarize_import_time():
+    roots = parse_import_time(IMPORT_TIME_OUTPUT)
+    assert [root["module"] for root in roots] == ["backend.db_meta.models", "backend.db_services", "json"]
+    assert roots[0]["children"][0]["children"][0]["module"] == "yaml.reader"
+
+    totals = summarize_import_time(roots, ["backend.db_meta", "backend.db_services", "backend.utils"])
+    # 第三方模块的耗时计入首次导入它的 app
+    assert totals == {"backend.db_meta": 180, "backend.db_services": 40, "backend.utils": 20, "other": 10}
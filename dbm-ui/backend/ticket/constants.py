@@ -24,6 +24,15 @@ class InstanceType(str, StructuredEnum):
     PROXY = EnumField("proxy", _("proxy"))
 
 
+class TicketObjectType(str, StructuredEnum):
+    """
+    单据关联对象类型
+    """
+
+    CLUSTER = EnumField("cluster", _("集群"))
+    INSTANCE = EnumField("instance", _("实例"))
+
+
 class TodoType(str, StructuredEnum):
     """
     待办类型
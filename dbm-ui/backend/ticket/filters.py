@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from django.utils.translation import ugettext_lazy as _
+from django_filters import rest_framework as filters
+
+from backend.ticket.constants import TicketObjectType
+from backend.ticket.models import Ticket, TicketObjectRelation
+
+
+class TicketListFilter(filters.FilterSet):
+    cluster_id = filters.NumberFilter(field_name="cluster_id", method="filter_cluster_id", label=_("关联集群ID"))
+
+    class Meta:
+        model = Ticket
+        fields = {
+            "id": ["exact", "in"],
+            "bk_biz_id": ["exact"],
+            "ticket_type": ["exact", "in"],
+            "status": ["exact", "in"],
+            "create_at": ["gte", "lte"],
+            "creator": ["exact"],
+        }
+
+    def filter_cluster_id(self, queryset, name, value):
+        # 通过单据关联对象索引查询操作过该集群的单据
+        ticket_ids = TicketObjectRelation.objects.filter(
+            object_type=TicketObjectType.CLUSTER, object_id=value
+        ).values_list("ticket_id", flat=True)
+        return queryset.filter(id__in=ticket_ids)
@@ -114,3 +114,20 @@ class TicketFlowManager(object):
         if self.ticket.status != target_status:
             self.ticket.status = target_status
             self.ticket.save(update_fields=["status", "update_at"])
+            self.invalidate_remote_schema_cache(target_status)
+
+    def invalidate_remote_schema_cache(self, target_status: str):
+        """变更库表的单据执行结束(包括部分执行后失败/终止)后，清理关联集群的库表缓存"""
+        if target_status not in [
+            constants.TicketStatus.SUCCEEDED,
+            constants.TicketStatus.FAILED,
+            constants.TicketStatus.TERMINATED,
+        ]:
+            return
+
+        from backend.db_services.mysql.remote_service.metadata import remote_metadata_service
+
+        try:
+            remote_metadata_service.invalidate_by_ticket(self.ticket)
+        except Exception as err:  # pylint: disable=broad-except
+            logger.warning(f"invalidate remote schema cache for ticket:{self.ticket.id} failed, {err}")
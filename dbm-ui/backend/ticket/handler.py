@@ -21,7 +21,6 @@ from backend.configuration.constants import PLAT_BIZ_ID, SystemSettingsEnum
 from backend.configuration.models import SystemSettings
 from backend.db_services.ipchooser.handlers.host_handler import HostHandler
 from backend.ticket.builders import BuilderFactory
-from backend.ticket.builders.common.base import fetch_cluster_ids, fetch_instance_ids
 from backend.ticket.constants import (
     FLOW_FINISHED_STATUS,
     ITSM_FIELD_NAME__ITSM_KEY,
@@ -29,10 +28,11 @@ from backend.ticket.constants import (
     FlowTypeConfig,
     OperateNodeActionType,
     TicketFlowStatus,
+    TicketObjectType,
     TicketType,
 )
 from backend.ticket.flow_manager.manager import TicketFlowManager
-from backend.ticket.models import Flow, Ticket, TicketFlowsConfig, Todo
+from backend.ticket.models import Flow, Ticket, TicketFlowsConfig, TicketObjectRelation, Todo
 from backend.ticket.todos import ActionType, TodoActorFactory
 
 logger = logging.getLogger("root")
@@ -47,47 +47,18 @@ class TicketHandler:
         - 针对实例操作，则补充集群 IP:PORT
         - ...
         """
-        ticket_ids = [ticket["id"] for ticket in ticket_data]
-        # 单据关联对象映射表
-        ticket_id_obj_ids_map: Dict[int, Dict[str, List[int]]] = {}
-
-        # 查询单据对应的集群列表、实例列表等
-        cluster_id_immute_domain_map, instance_id_ip_port_map = {}, {}
-        for ticket in Ticket.objects.filter(id__in=ticket_ids):
-            clusters = ticket.details.get("clusters", {})
-            cluster_id_immute_domain_map.update(
-                {int(cluster_id): info["immute_domain"] for cluster_id, info in clusters.items()}
-            )
-            instances = ticket.details.get("instances", {})
-            instance_id_ip_port_map.update({int(inst_id): info["instance"] for inst_id, info in instances.items()})
-            ticket_id_obj_ids_map[ticket.id] = {
-                "cluster_ids": fetch_cluster_ids(ticket.details),
-                "instance_ids": fetch_instance_ids(ticket.details),
-            }
-
-        # 补充关联对象信息
+        # 关联对象在单据创建时已写入索引表，通常只需要一次查询
+        related_objects_map = TicketObjectRelation.get_related_objects_map([ticket["id"] for ticket in ticket_data])
         for item in ticket_data:
-            ticket_cluster_ids = ticket_id_obj_ids_map[item["id"]]["cluster_ids"]
-            if ticket_cluster_ids:
-                item["related_object"] = {
-                    "title": _("集群"),
-                    "objects": [
-                        cluster_id_immute_domain_map.get(cluster_id)
-                        for cluster_id in ticket_cluster_ids
-                        if cluster_id_immute_domain_map.get(cluster_id)
-                    ],
-                }
-
-            ticket_instance_ids = ticket_id_obj_ids_map[item["id"]]["instance_ids"]
-            if ticket_instance_ids:
-                item["related_object"] = {
-                    "title": _("实例"),
-                    "objects": [
-                        instance_id_ip_port_map.get(instance_id)
-                        for instance_id in ticket_instance_ids
-                        if instance_id_ip_port_map.get(instance_id)
-                    ],
-                }
+            type_names_map = related_objects_map.get(item["id"])
+            if not type_names_map:
+                continue
+            # 同时关联了集群和实例时，优先展示实例
+            if TicketObjectType.INSTANCE in type_names_map:
+                title, names = _("实例"), type_names_map[TicketObjectType.INSTANCE]
+            else:
+                title, names = _("集群"), type_names_map[TicketObjectType.CLUSTER]
+            item["related_object"] = {"title": title, "objects": [name for name in names if name]}
         return ticket_data
 
     @classmethod
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from backend.ticket.models import Ticket, TicketObjectRelation
+
+logger = logging.getLogger("root")
+
+
+class Command(BaseCommand):
+    help = _("回填单据关联对象(集群/实例)索引")
+
+    def add_arguments(self, parser):
+        parser.add_argument("-s", "--start-id", type=int, default=0, help=_("从该单据ID之后开始回填"))
+        parser.add_argument("-b", "--batch-size", type=int, default=1000, help=_("每批处理的单据数量"))
+
+    def handle(self, *args, **options):
+        last_id, batch_size, total = options["start_id"], options["batch_size"], 0
+        # 按主键分批处理，每批只加载 id 和 details，可以中断后通过 --start-id 继续
+        while True:
+            tickets = list(Ticket.objects.filter(id__gt=last_id).order_by("id").only("id", "details")[:batch_size])
+            if not tickets:
+                break
+            TicketObjectRelation.sync_ticket_objects(tickets)
+            last_id, total = tickets[-1].id, total + len(tickets)
+            logger.info(f"sync ticket objects: {total} tickets done, last ticket id: {last_id}")
+
+        self.stdout.write(f"sync ticket objects finished, total {total} tickets")
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2024-08-20 10:30
+
+from django.db import migrations
+
+# 每批回填的单据数量
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_ticket_objects(apps, schema_editor):
+    """
+    为升级前已存在的单据回填关联对象，按主键分批处理，每批只加载 id 和 details
+    待执行/执行中的单据依赖关联对象做重复提交校验，已结束的单据依赖关联对象在列表中展示
+    """
+    from backend.ticket.models.ticket_object_relation import TicketObjectRelation as RelationParser
+
+    Ticket = apps.get_model("ticket", "Ticket")
+    TicketObjectRelation = apps.get_model("ticket", "TicketObjectRelation")
+
+    tickets = Ticket.objects.only("id", "details")
+    last_id = 0
+    while True:
+        batch = list(tickets.filter(id__gt=last_id).order_by("id")[:BACKFILL_BATCH_SIZE])
+        if not batch:
+            break
+        relations = [
+            relation
+            for ticket in batch
+            for relation in RelationParser.parse_ticket_objects(ticket, relation_model=TicketObjectRelation)
+        ]
+        TicketObjectRelation.objects.bulk_create(relations, ignore_conflicts=True)
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ticket", "0011_ticketobjectrelation"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_ticket_objects, migrations.RunPython.noop),
+    ]
@@ -30,6 +30,7 @@ from backend.ticket.constants import (
     TicketStatus,
     TicketType,
 )
+from backend.ticket.models.ticket_object_relation import TicketObjectRelation
 from backend.utils.excel import ExcelHandler
 from backend.utils.time import calculate_cost_time
 
@@ -195,6 +196,7 @@ class Ticket(AuditedModel):
             logger.info(_("正在自动创建单据，单据详情: {}").format(ticket.__dict__))
             builder = BuilderFactory.create_builder(ticket)
             builder.patch_ticket_detail()
+            TicketObjectRelation.sync_ticket_objects([ticket])
             builder.init_ticket_flows()
 
         if auto_execute:
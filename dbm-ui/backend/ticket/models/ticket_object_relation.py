@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from django.db import models, transaction
+from django.db.models import QuerySet
+from django.utils.translation import ugettext_lazy as _
+
+from backend.bk_web.constants import LEN_LONG, LEN_SHORT
+from backend.ticket.constants import TicketObjectType
+
+
+class TicketObjectRelation(models.Model):
+    """
+    单据与关联对象(集群/实例)的索引
+    在单据创建时从 details 中解析一次，重复提交校验、单据列表的关联对象展示、按集群查询单据都直接查这张表，
+    不再逐个单据反复解析 details
+    """
+
+    ticket = models.ForeignKey("Ticket", help_text=_("关联单据"), related_name="related_objects", on_delete=models.CASCADE)
+    object_type = models.CharField(_("对象类型"), max_length=LEN_SHORT, choices=TicketObjectType.get_choices())
+    object_id = models.BigIntegerField(_("对象ID"))
+    object_name = models.CharField(_("对象名称(集群域名/实例IP:PORT)"), max_length=LEN_LONG, default="")
+
+    class Meta:
+        verbose_name_plural = verbose_name = _("单据关联对象(TicketObjectRelation)")
+        unique_together = (("ticket", "object_type", "object_id"),)
+        indexes = [models.Index(fields=["object_type", "object_id"])]
+
+    @staticmethod
+    def _get_object_ids(object_ids: List) -> List[int]:
+        """过滤出合法的对象ID并去重，保持在 details 中出现的顺序"""
+        valid_ids = [int(obj_id) for obj_id in object_ids if isinstance(obj_id, int) or str(obj_id).isdigit()]
+        return list(dict.fromkeys(valid_ids))
+
+    @classmethod
+    def parse_ticket_objects(cls, ticket, relation_model=None) -> List["TicketObjectRelation"]:
+        """
+        解析单据 details 中的集群和实例
+        @param ticket: 单据，需要包含 details
+        @param relation_model: 关联对象的模型类，数据迁移中传入历史模型，默认为当前模型
+        """
+        from backend.ticket.builders.common.base import fetch_cluster_ids, fetch_instance_ids
+
+        details = ticket.details or {}
+        # 集群/实例的展示名称来自 patch_ticket_detail 补充的 clusters/instances 信息
+        clusters, instances = details.get("clusters") or {}, details.get("instances") or {}
+        clusters = clusters if isinstance(clusters, dict) else {}
+        instances = instances if isinstance(instances, dict) else {}
+
+        relation_model = relation_model or cls
+        relations = []
+        for cluster_id in cls._get_object_ids(fetch_cluster_ids(details)):
+            info = clusters.get(str(cluster_id)) or clusters.get(cluster_id) or {}
+            relations.append(
+                relation_model(
+                    ticket_id=ticket.id,
+                    object_type=TicketObjectType.CLUSTER,
+                    object_id=cluster_id,
+                    object_name=info.get("immute_domain", ""),
+                )
+            )
+        for instance_id in cls._get_object_ids(fetch_instance_ids(details)):
+            info = instances.get(str(instance_id)) or instances.get(instance_id) or {}
+            relations.append(
+                relation_model(
+                    ticket_id=ticket.id,
+                    object_type=TicketObjectType.INSTANCE,
+                    object_id=instance_id,
+                    object_name=info.get("instance", ""),
+                )
+            )
+        return relations
+
+    @classmethod
+    def sync_ticket_objects(cls, tickets: Iterable):
+        """
+        重建单据的关联对象
+        @param tickets: 单据列表，需要包含 details
+        """
+        tickets = list(tickets)
+        relations = [relation for ticket in tickets for relation in cls.parse_ticket_objects(ticket)]
+        with transaction.atomic():
+            cls.objects.filter(ticket_id__in=[ticket.id for ticket in tickets]).delete()
+            cls.objects.bulk_create(relations, ignore_conflicts=True)
+
+    @classmethod
+    def get_duplicate_objects(
+        cls, tickets: QuerySet, object_type: TicketObjectType, object_ids: List[int]
+    ) -> Dict[int, List[int]]:
+        """
+        查询与给定对象重叠的单据，返回 单据ID -> 重叠的对象ID列表，按单据ID倒序
+        @param tickets: 待比较的单据范围
+        @param object_type: 对象类型
+        @param object_ids: 对象ID列表
+        """
+        object_ids = cls._get_object_ids(object_ids)
+        if not object_ids:
+            return {}
+
+        relations = (
+            cls.objects.filter(object_type=object_type, object_id__in=object_ids, ticket__in=tickets)
+            .order_by("-ticket_id", "id")
+            .values_list("ticket_id", "object_id")
+        )
+        duplicate_objects: Dict[int, List[int]] = defaultdict(list)
+        for ticket_id, object_id in relations:
+            duplicate_objects[ticket_id].append(object_id)
+        return duplicate_objects
+
+    @classmethod
+    def get_related_objects_map(cls, ticket_ids: List[int]) -> Dict[int, Dict[str, List[str]]]:
+        """
+        获取单据的关联对象名称，返回 单据ID -> {对象类型: 对象名称列表}
+        @param ticket_ids: 单据ID列表
+        """
+        related_objects_map: Dict[int, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+        relations = cls.objects.filter(ticket_id__in=ticket_ids).order_by("id")
+        for ticket_id, object_type, object_name in relations.values_list("ticket_id", "object_type", "object_name"):
+            related_objects_map[ticket_id][object_type].append(object_name)
+
+        # 没有关联对象的单据(如尚未回填的历史单据)，退化为解析 details
+        missing_ticket_ids = [ticket_id for ticket_id in ticket_ids if ticket_id not in related_objects_map]
+        if not missing_ticket_ids:
+            return related_objects_map
+        ticket_model = cls.ticket.field.related_model
+        for ticket in ticket_model.objects.filter(id__in=missing_ticket_ids).only("id", "details"):
+            for relation in cls.parse_ticket_objects(ticket):
+                related_objects_map[ticket.id][relation.object_type].append(relation.object_name)
+        return related_objects_map
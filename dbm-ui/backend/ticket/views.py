@@ -40,15 +40,24 @@ from backend.ticket.constants import (
     TODO_DONE_STATUS,
     CountType,
     OperateNodeActionType,
+    TicketObjectType,
     TicketStatus,
     TicketType,
     TodoStatus,
 )
 from backend.ticket.contexts import TicketContext
 from backend.ticket.exceptions import TicketDuplicationException
+from backend.ticket.filters import TicketListFilter
 from backend.ticket.flow_manager.manager import TicketFlowManager
 from backend.ticket.handler import TicketHandler
-from backend.ticket.models import ClusterOperateRecord, InstanceOperateRecord, Ticket, TicketFlowsConfig, Todo
+from backend.ticket.models import (
+    ClusterOperateRecord,
+    InstanceOperateRecord,
+    Ticket,
+    TicketFlowsConfig,
+    TicketObjectRelation,
+    Todo,
+)
 from backend.ticket.serializers import (
     BatchApprovalSerializer,
     BatchTodoOperateSerializer,
@@ -85,14 +94,7 @@ class TicketViewSet(viewsets.AuditedModelViewSet):
 
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
-    filter_fields = {
-        "id": ["exact", "in"],
-        "bk_biz_id": ["exact"],
-        "ticket_type": ["exact", "in"],
-        "status": ["exact", "in"],
-        "create_at": ["gte", "lte"],
-        "creator": ["exact"],
-    }
+    filter_class = TicketListFilter
 
     def _get_custom_permissions(self):
         # 创建单据，关联单据类型的动作
@@ -197,15 +199,18 @@ class TicketViewSet(viewsets.AuditedModelViewSet):
                     )
             return
 
-        cluster_ids = fetch_cluster_ids(details=details)
-        for ticket in active_tickets:
-            active_cluster_ids = fetch_cluster_ids(details=ticket.details)
-            duplicate_ids = list(set(active_cluster_ids).intersection(cluster_ids))
-            if duplicate_ids:
-                raise TicketDuplicationException(
-                    context=_("集群{}已存在相同类型的单据[{}]正在运行，请确认是否重复提交").format(duplicate_ids, ticket.id),
-                    data={"duplicate_cluster_ids": duplicate_ids, "duplicate_ticket_id": ticket.id},
-                )
+        # 通过单据关联对象索引查询存在重叠集群的运行中单据，不再逐个解析单据的 details
+        duplicate_objects = TicketObjectRelation.get_duplicate_objects(
+            tickets=active_tickets,
+            object_type=TicketObjectType.CLUSTER,
+            object_ids=fetch_cluster_ids(details=details),
+        )
+        if duplicate_objects:
+            ticket_id, duplicate_ids = next(iter(duplicate_objects.items()))
+            raise TicketDuplicationException(
+                context=_("集群{}已存在相同类型的单据[{}]正在运行，请确认是否重复提交").format(duplicate_ids, ticket_id),
+                data={"duplicate_cluster_ids": duplicate_ids, "duplicate_ticket_id": ticket_id},
+            )
 
     def perform_create(self, serializer):
         ticket_type = self.request.data["ticket_type"]
@@ -221,6 +226,7 @@ class TicketViewSet(viewsets.AuditedModelViewSet):
             # 初始化builder类
             builder = BuilderFactory.create_builder(ticket)
             builder.patch_ticket_detail()
+            TicketObjectRelation.sync_ticket_objects([ticket])
             builder.init_ticket_flows()
 
         TicketFlowManager(ticket=ticket).run_next_flow()
@@ -269,7 +275,7 @@ class TicketViewSet(viewsets.AuditedModelViewSet):
         auto_schema=PaginatedResponseSwaggerAutoSchema,
         tags=[TICKET_TAG],
     )
-    @action(methods=["GET"], detail=False, serializer_class=ListTicketStatusSerializer, filter_fields=None)
+    @action(methods=["GET"], detail=False, serializer_class=ListTicketStatusSerializer, filter_class=None)
     def list_ticket_status(self, request, *args, **kwargs):
         ticket_ids = self.params_validate(self.get_serializer_class())["ticket_ids"].split(",")
         ticket_status_map = {ticket.id: ticket.status for ticket in Ticket.objects.filter(id__in=ticket_ids)}
@@ -346,7 +352,7 @@ class TicketViewSet(viewsets.AuditedModelViewSet):
         responses={status.HTTP_200_OK: TicketTypeResponseSLZ(many=True)},
         tags=[TICKET_TAG],
     )
-    @action(methods=["GET"], detail=False, filter_fields=None, pagination_class=None, serializer_class=TicketTypeSLZ)
+    @action(methods=["GET"], detail=False, filter_class=None, pagination_class=None, serializer_class=TicketTypeSLZ)
     def flow_types(self, request, *args, **kwargs):
         is_apply = self.params_validate(self.get_serializer_class())["is_apply"]
         ticket_type_list = []
@@ -550,7 +556,7 @@ class TicketViewSet(viewsets.AuditedModelViewSet):
         methods=["GET"],
         detail=False,
         serializer_class=QueryTicketFlowDescribeSerializer,
-        filter_fields=None,
+        filter_class=None,
         pagination_class=None,
     )
     @Permission.decorator_external_permission_field(
@@ -8,16 +8,20 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import asyncio
+import os
+import threading
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from copy import deepcopy
 from multiprocessing.pool import ThreadPool
-from typing import Callable
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, Iterator, List
 
 import wrapt
 from django.conf import settings
 from django.utils.translation import get_language
 
-from backend.core.translation.context import RespectsLanguage
+from backend.core.translation.context import RespectsLanguage, respect_language
 from backend.utils.local import local
 
 QUERY_CMDB_LIMIT = 500
@@ -71,7 +75,8 @@ def batch_request(
     limit=QUERY_CMDB_LIMIT,
     sort=None,
     split_params=False,
-    **kwargs
+    use_async=False,
+    **kwargs,
 ):
     """
     异步并发请求接口
@@ -84,8 +89,14 @@ def batch_request(
     :param limit: 一次请求数量
     :param sort: 排序
     :param split_params: 是否拆分参数
+    :param use_async: 是否使用异步模式(共享线程池+流水线分页)，参考 async_batch_request
     :return: 请求结果
     """
+    if use_async and not async_request_runner.in_worker():
+        pages = iter_batch_request(
+            func, params, start_key, limit_key, get_data, get_count, limit, sort, split_params, **kwargs
+        )
+        return [item for page in pages for item in page]
 
     # 如果该接口没有返回count参数，只能同步请求
     if not get_count:
@@ -154,13 +165,14 @@ def sync_batch_request(func, params, get_data=lambda x: x["info"], limit=500, st
     return data
 
 
-def request_multi_thread(func, params_list, get_data=lambda x: [], in_order=False):
+def request_multi_thread(func, params_list, get_data=lambda x: [], in_order=False, use_async=False):
     """
     并发请求接口，每次按不同参数请求最后叠加请求结果
     :param func: 请求方法
     :param params_list: 参数列表
     :param get_data: 获取数据函数，通常CMDB的批量接口应该设置为 get_data=lambda x: x["info"]，其它场景视情况而定
     :param in_order: 按顺序处理线程结果，默认和请求参数有关，因此get_data要同时处理请求参数和结果
+    :param use_async: 是否使用异步模式，请求在共享线程池中执行，不再每次创建线程池
     :return: 请求结果累计
     """
 
@@ -169,6 +181,16 @@ def request_multi_thread(func, params_list, get_data=lambda x: [], in_order=Fals
         if isinstance(params, dict) and "params" in params:
             params["params"]["_request"] = local.request
 
+    if use_async and not async_request_runner.in_worker():
+
+        async def _gather():
+            return await asyncio.gather(*[async_request_runner.call(func, **params) for params in params_list])
+
+        responses = async_request_runner.run(_gather())
+        if in_order:
+            return [get_data((params_list[index], resp)) for index, resp in enumerate(responses)]
+        return [get_data(resp) for resp in responses]
+
     result = []
     with ThreadPoolExecutor(max_workers=settings.CONCURRENT_NUMBER) as ex:
         tasks = [ex.submit(RespectsLanguage(language=get_language())(func), **params) for params in params_list]
@@ -225,3 +247,179 @@ def batch_decorator(
         return {"data": data, "total": len(data)}
 
     return wrapper
+
+
+class AsyncRequestRunner:
+    """
+    异步请求执行器
+    - 在后台线程中维护常驻的事件循环，同步代码可以通过 run/iterate 驱动协程
+    - 所有调用方共享同一个请求线程池，线程池大小即为全局并发预算，避免每次请求都创建和销毁线程
+    - 请求通过 DataAPI 发出，复用其连接池、鉴权和重试逻辑
+    """
+
+    WORKER_PREFIX = "async-request"
+
+    def __init__(self, max_workers: int = None):
+        self._max_workers = max_workers
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+        self._loop_thread = None
+        self._executor = None
+        self._worker_local = threading.local()
+
+    def _ensure_started(self):
+        # fork之后(如celery prefork)子进程中需要重新创建事件循环和线程池
+        if self._loop is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers or settings.ASYNC_CONCURRENT_NUMBER,
+                thread_name_prefix=self.WORKER_PREFIX,
+            )
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(
+                target=self._loop.run_forever, name=f"{self.WORKER_PREFIX}-loop", daemon=True
+            )
+            self._loop_thread.start()
+            self._pid = os.getpid()
+
+    def in_worker(self) -> bool:
+        """是否在共享线程池中执行，嵌套调用时应该走同步逻辑，避免占满线程池导致死锁"""
+        return getattr(self._worker_local, "active", False)
+
+    def _bind_context(self, func: Callable, *args, **kwargs) -> Callable:
+        """将调用方的 request 和语言带到线程池中，并在执行后还原，防止线程复用时串用身份"""
+        request = local.request
+        language = get_language()
+
+        def inner():
+            self._worker_local.active = True
+            try:
+                local.request = request
+                with respect_language(language):
+                    return func(*args, **kwargs)
+            finally:
+                local.request = None
+                self._worker_local.active = False
+
+        return inner
+
+    async def call(self, func: Callable, *args, **kwargs) -> Any:
+        """在共享线程池中执行一次同步请求"""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._bind_context(func, *args, **kwargs))
+
+    def run(self, coro: Coroutine) -> Any:
+        """在常驻事件循环中执行协程，并同步等待结果"""
+        self._ensure_started()
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError("AsyncRequestRunner.run can not be called inside its own event loop")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def iterate(self, async_iter: AsyncIterator) -> Iterator:
+        """将异步生成器转换为同步生成器"""
+
+        async def _next():
+            return await async_iter.__anext__()
+
+        try:
+            while True:
+                try:
+                    yield self.run(_next())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(async_iter.aclose())
+
+
+async_request_runner = AsyncRequestRunner()
+
+
+def _build_page_params(params: Dict, start: int, limit: int, start_key: str, limit_key: str, sort=None) -> Dict:
+    request_params = {"page": {limit_key: limit, start_key: start}}
+    if sort:
+        request_params["page"]["sort"] = sort
+    request_params.update(params)
+    return request_params
+
+
+def _split_module_params(params: Dict) -> List[Dict]:
+    # 拆分params适配bk_module_id大于500情况
+    bk_module_ids = params.get("bk_module_ids", [])
+    if not bk_module_ids:
+        return [params]
+
+    params_list = []
+    for s_index in range(0, len(bk_module_ids), QUERY_CMDB_MODULE_LIMIT):
+        single_params = deepcopy(params)
+        single_params.update({"bk_module_ids": bk_module_ids[s_index : s_index + QUERY_CMDB_MODULE_LIMIT]})
+        params_list.append(single_params)
+    return params_list
+
+
+async def async_batch_request(
+    func,
+    params,
+    start_key="start",
+    limit_key="limit",
+    get_data=lambda x: x["info"],
+    get_count=lambda x: x["count"],
+    limit=QUERY_CMDB_LIMIT,
+    sort=None,
+    split_params=False,
+    concurrency=None,
+    **kwargs,
+) -> AsyncIterator[List]:
+    """
+    异步分页请求接口，参数约定与 batch_request 一致，但以异步生成器的方式按页(按顺序)返回数据，不在内存中汇总全量结果
+    :param concurrency: 单次调用的最大在途页数，所有调用方的总并发受共享线程池大小限制
+    """
+    runner = async_request_runner
+    concurrency = concurrency or settings.CONCURRENT_NUMBER
+
+    # 如果该接口没有返回count参数，只能逐页请求
+    if not get_count:
+        start = 0
+        while True:
+            page_params = _build_page_params(params, start, limit, start_key, limit_key, sort)
+            result = get_data(await runner.call(func, page_params, **kwargs))
+            yield result
+            if len(result) < limit:
+                return
+            start += limit
+
+    params_list = _split_module_params(params) if split_params else [params]
+    counts = await asyncio.gather(
+        *[runner.call(func, dict(page={start_key: 0, limit_key: 1}, **p), **kwargs) for p in params_list]
+    )
+
+    def _iter_page_params():
+        for single_params, count_resp in zip(params_list, counts):
+            for start in range(0, get_count(count_resp), limit):
+                yield _build_page_params(single_params, start, limit, start_key, limit_key, sort)
+
+    # 流水线请求：保持 concurrency 个在途请求，按顺序产出页数据
+    pending = deque()
+    page_params_iter = _iter_page_params()
+    try:
+        for page_params in page_params_iter:
+            pending.append(asyncio.ensure_future(runner.call(func, page_params, **kwargs)))
+            if len(pending) >= concurrency:
+                yield get_data(await pending.popleft())
+        while pending:
+            yield get_data(await pending.popleft())
+    finally:
+        # 调用方提前终止迭代时，取消未完成的请求
+        for task in pending:
+            task.cancel()
+
+
+def iter_batch_request(*args, **kwargs) -> Iterator[List]:
+    """
+    同步代码中流式获取分页数据，参数同 async_batch_request
+    """
+    return async_request_runner.iterate(async_batch_request(*args, **kwargs))
@@ -8,18 +8,30 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-
+import codecs
+import csv
+import itertools
+import tempfile
 from collections import defaultdict
-from io import BytesIO
-from typing import Any, Dict, List, Union
+from io import BytesIO, StringIO
+from typing import IO, Any, Dict, Iterable, Iterator, List, Union
 
 import openpyxl
 from django.http.response import HttpResponse, StreamingHttpResponse
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, PatternFill
+from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.writer.excel import save_virtual_workbook
 
+# 流式导出时，用于估算列宽的采样行数
+STREAM_WIDTH_SAMPLE_SIZE = 200
+# 流式导出时，每次返回的字节块大小
+STREAM_CHUNK_SIZE = 64 * 1024
+# 流式导出时，临时文件在内存中的最大大小，超过后落盘
+STREAM_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
 
 class ExcelHandler:
     """
@@ -163,7 +175,138 @@ class ExcelHandler:
         response["Access-Control-Expose-Headers"] = "content-disposition"
         return response
 
+    @staticmethod
+    def _get_header_id_name(header: Union[str, Dict]):
+        return (header, header) if isinstance(header, str) else (header["id"], header["name"])
+
     @classmethod
-    def stream_response(cls, wb: Workbook, excel_name: str) -> StreamingHttpResponse:
-        # TODO 如果excel文件过大，需采用流式返回，待实现
-        raise NotImplementedError
+    def estimate_column_widths(cls, headers: List, sample_rows: List[Dict]) -> List[float]:
+        """
+        - 根据表头和采样数据估算列宽，计算规则同 _adapt_sheet_weight_height，但只扫描采样行
+        :param headers: excel数据头
+        :param sample_rows: 采样数据
+        """
+        widths: List[float] = []
+        for header in headers:
+            header_id, header_name = cls._get_header_id_name(header)
+            values = [str(header_name)] + [str(row.get(header_id, "")) for row in sample_rows]
+            max_len = max(len(line.encode("gbk", errors="replace")) for value in values for line in value.split("\n"))
+            widths.append(max_len * 1.3)
+        return widths
+
+    @classmethod
+    def _iter_row_values(cls, headers: List, rows: Iterable[Dict]) -> Iterator[List[str]]:
+        header_ids = [cls._get_header_id_name(header)[0] for header in headers]
+        for row in rows:
+            yield [str(row[header_id]) if header_id in row else "" for header_id in header_ids]
+
+    @staticmethod
+    def _iter_file_chunks(file: IO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        with file:
+            file.seek(0)
+            chunk = file.read(chunk_size)
+            while chunk:
+                yield chunk
+                chunk = file.read(chunk_size)
+
+    @classmethod
+    def write_xlsx(cls, file: IO, rows: Iterable[Dict], headers: List, header_style: Dict = None):
+        """
+        - 以 write-only 模式逐行写入excel，内存占用与数据量无关
+        :param file: 写入的文件对象
+        :param rows: 数据字典的迭代器
+        :param headers: excel数据头 [{"id": "header_id", "name": "header_name"}]
+        :param header_style: excel的头部样式(颜色)
+        """
+        rows = iter(rows)
+        # write-only 模式需要在写入数据前确定列宽，因此先取部分数据用于估算
+        sample_rows = list(itertools.islice(rows, STREAM_WIDTH_SAMPLE_SIZE))
+
+        wb = Workbook(write_only=True)
+        sheet = wb.create_sheet()
+        for col, width in enumerate(cls.estimate_column_widths(headers, sample_rows)):
+            sheet.column_dimensions[get_column_letter(col + 1)].width = width
+
+        header_cells = []
+        for header in headers:
+            header_name = cls._get_header_id_name(header)[1]
+            cell = WriteOnlyCell(sheet, value=str(header_name))
+            if header_style:
+                cell.fill = PatternFill("solid", fgColor=header_style[header_name])
+            header_cells.append(cell)
+        sheet.append(header_cells)
+
+        alignment = Alignment(wrapText=True)
+        for values in cls._iter_row_values(headers, itertools.chain(sample_rows, rows)):
+            cells = []
+            for value in values:
+                cell = WriteOnlyCell(sheet, value=value)
+                if "\n" in value:
+                    cell.alignment = alignment
+                cells.append(cell)
+            sheet.append(cells)
+
+        wb.save(file)
+
+    @classmethod
+    def write_csv(cls, file: IO, rows: Iterable[Dict], headers: List):
+        """
+        - 逐行写入csv，带BOM头以便excel正确识别utf-8编码
+        :param file: 写入的二进制文件对象
+        :param rows: 数据字典的迭代器
+        :param headers: excel数据头
+        """
+        for chunk in cls.iter_csv(rows, headers):
+            file.write(chunk)
+
+    @classmethod
+    def iter_csv(cls, rows: Iterable[Dict], headers: List) -> Iterator[bytes]:
+        """
+        - 逐行生成csv字节流
+        :param rows: 数据字典的迭代器
+        :param headers: excel数据头
+        """
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([cls._get_header_id_name(header)[1] for header in headers])
+        yield codecs.BOM_UTF8 + buffer.getvalue().encode("utf-8")
+
+        for values in cls._iter_row_values(headers, rows):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(values)
+            yield buffer.getvalue().encode("utf-8")
+
+    @classmethod
+    def iter_xlsx(cls, rows: Iterable[Dict], headers: List, header_style: Dict = None) -> Iterator[bytes]:
+        """
+        - 生成excel字节流。xlsx是zip格式，需要写完才能确定目录，因此先写入临时文件(超过阈值落盘)，再分块返回
+        :param rows: 数据字典的迭代器
+        :param headers: excel数据头
+        :param header_style: excel的头部样式(颜色)
+        """
+        file = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_MAX_SIZE)
+        cls.write_xlsx(file, rows, headers, header_style)
+        yield from cls._iter_file_chunks(file)
+
+    @classmethod
+    def stream_response(
+        cls, rows: Iterable[Dict], headers: List, excel_name: str, file_format: str = "xlsx"
+    ) -> StreamingHttpResponse:
+        """
+        - 流式返回导出文件，数据逐行消费，不在内存中构造完整的workbook
+        :param rows: 数据字典的迭代器
+        :param headers: excel数据头
+        :param excel_name: 文件名(后缀会根据file_format修正)
+        :param file_format: 文件格式，xlsx 或者 csv
+        """
+        if file_format == "csv":
+            streaming_content = cls.iter_csv(rows, headers)
+            excel_name = f"{excel_name.rsplit('.', 1)[0]}.csv"
+        else:
+            streaming_content = cls.iter_xlsx(rows, headers)
+
+        response = StreamingHttpResponse(streaming_content=streaming_content, content_type="application/octet-stream")
+        response["Content-Disposition"] = f"attachment;filename={excel_name}"
+        response["Access-Control-Expose-Headers"] = "content-disposition"
+        return response
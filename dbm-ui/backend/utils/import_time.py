@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import re
+from collections import defaultdict
+from typing import Dict, List
+
+IMPORT_TIME_PATTERN = re.compile(
+    r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \|(?P<indent> +)(?P<module>\S+)"
+)
+
+
+def parse_import_time(output: str) -> List[Dict]:
+    """
+    解析 python -X importtime 的输出，返回导入树的根节点列表
+    输出按后序排列(子模块先于父模块)，缩进越深层级越深
+    @param output: importtime 输出到 stderr 的内容
+    """
+    pending = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if not match:
+            continue
+        indent = len(match.group("indent"))
+        children = []
+        while pending and pending[-1][0] > indent:
+            children.insert(0, pending.pop()[1])
+        node = {
+            "module": match.group("module"),
+            "self": int(match.group("self")),
+            "cumulative": int(match.group("cumulative")),
+            "children": children,
+        }
+        pending.append((indent, node))
+    return [node for __, node in pending]
+
+
+def summarize_import_time(roots: List[Dict], apps: List[str], default: str = "other") -> Dict[str, int]:
+    """
+    按 app 汇总导入耗时(微秒)
+    app 自身模块的耗时，以及由它首次导入的第三方模块的耗时都计入该 app，其余计入 default
+    @param roots: parse_import_time 返回的导入树
+    @param apps: app 的模块前缀，如 backend.db_meta
+    @param default: 不属于任何 app 的耗时归属
+    """
+    apps = sorted(apps, key=len, reverse=True)
+
+    def get_owner(module: str, owner: str) -> str:
+        for app in apps:
+            if module == app or module.startswith(f"{app}."):
+                return app
+        return owner
+
+    totals = defaultdict(int)
+    stack = [(root, default) for root in roots]
+    while stack:
+        node, owner = stack.pop()
+        owner = get_owner(node["module"], owner)
+        totals[owner] += node["self"]
+        stack.extend((child, owner) for child in node["children"])
+    return dict(totals)
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from typing import Any, Dict
+
+from django.conf import settings
+
+
+def get_feature_config(name: str, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取功能模块的配置，默认值定义在模块内，settings 中同名的 dict 只需声明要覆盖的项
+    @param name: settings 中的配置名
+    @param defaults: 模块内的默认配置
+    """
+    return {**defaults, **getattr(settings, name, {})}
@@ -125,6 +125,7 @@ INSTALLED_APPS += (
     "backend.db_services.redis.slots_migrate",
     "backend.db_services.redis.redis_modules",
     "backend.db_services.mysql.dumper",
+    "backend.db_services.mysql.fixpoint_rollback",
     "backend.dbm_init",
 )
 
@@ -401,6 +402,8 @@ CELERYBEAT_SCHEDULER = "django_celery_beat.schedulers.DatabaseScheduler"
 # CELERY 配置，申明任务的文件路径，即包含有 @task 装饰器的函数文件
 CELERY_IMPORTS = (
     "backend.db_periodic_task.local_tasks",
+    # 集群/实例的后台导出任务
+    "backend.db_services.dbbase.resources.task",
     # TODO: 等celery service服务正式启动后，开启remote_tasks的注册
     # "backend.db_periodic_task.remote_tasks",
 )
@@ -544,6 +547,15 @@ DEFAULT_FILE_STORAGE = STORAGE_TYPE_IMPORT_PATH_MAP[STORAGE_TYPE]
 
 # 并发数
 CONCURRENT_NUMBER = 10
+# 异步批量请求共享线程池的大小，即所有调用方的全局并发预算
+ASYNC_CONCURRENT_NUMBER = CONCURRENT_NUMBER * 2
+
+# 功能模块的可调参数默认值定义在模块内，需要调整时在这里声明同名 dict，只填写要覆盖的项，
+# 如 SQL_DIGEST = {"max_workers": 4}，见 backend.utils.settings.get_feature_config
+# DataAPI 连接池大小与异步批量请求的并发保持一致
+DATA_API_TRANSPORT = {
+    "pool_maxsize": ASYNC_CONCURRENT_NUMBER,
+}
 
 # grafana代理配置
 BACKEND_DIR = os.path.join(BASE_DIR, "backend/bk_dataview")